@@ -0,0 +1,55 @@
+"""
+Benchmark :func:`pypeit.bitmask.BitMask.flagged` and
+:func:`pypeit.bitmask.BitMask.turn_on` against the previous
+implementations, which applied one bitwise operation per flag.
+
+The mask is a random image using the bits of
+:class:`pypeit.images.imagebitmask.ImageBitMask`, and the methods are
+called with an increasing number of flags.  Neither implementation is
+given an output array.
+"""
+import timeit
+import argparse
+
+import numpy as np
+
+from pypeit.images.imagebitmask import ImageBitMask
+from pypeit.tests.test_bitmask import _loop_flagged, _loop_turn_on
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n\n')[0],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--npix', type=int, default=2048, help='Size of the square mask image')
+    parser.add_argument('--nrep', type=int, default=10, help='Number of calls timed')
+    args = parser.parse_args()
+
+    bm = ImageBitMask()
+    rng = np.random.default_rng(99)
+    mask = rng.integers(0, high=bm.max_value+1, size=(args.npix,args.npix)
+                        ).astype(bm.minimum_dtype())
+    flagged = np.empty(mask.shape, dtype=bool)
+    _mask = np.empty_like(mask)
+
+    print('{0}x{0} mask with {1} bits; time per call in ms'.format(args.npix, len(bm.keys())))
+    print('    {0:>6s} {1:>10s} {2:>10s} {3:>8s} {4:>10s} {5:>10s} {6:>8s}'.format(
+            'nflags', 'flagged', 'loop', 'gain', 'turn_on', 'loop', 'gain'))
+    for nflags in [1, 2, 4, len(bm.keys())]:
+        flags = bm.keys()[:nflags]
+        # Make sure the flags are cached
+        bm.flagged(mask, flag=flags, out=flagged)
+        assert np.array_equal(flagged, _loop_flagged(bm, mask, flags))
+        bm.turn_on(mask, flags, out=_mask)
+        assert np.array_equal(_mask, _loop_turn_on(bm, mask, flags))
+        times = [min(timeit.repeat(func, number=args.nrep, repeat=3))/args.nrep*1e3
+                    for func in [lambda: bm.flagged(mask, flag=flags),
+                                 lambda: _loop_flagged(bm, mask, flags),
+                                 lambda: bm.turn_on(mask, flags),
+                                 lambda: _loop_turn_on(bm, mask, flags)]]
+        print('    {0:6d} {1:10.2f} {2:10.2f} {3:7.1f}x {4:10.2f} {5:10.2f} {6:7.1f}x'.format(
+                nflags, times[0], times[1], times[1]/times[0], times[2], times[3],
+                times[3]/times[2]))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+Benchmark the compression options of :func:`pypeit.io.write_to_fits`.
+
+A synthetic file with the images of a spec2d detector (four noisy
+floating-point images and an integer mask) is written without
+compression, gzipped with one thread and with ``nthreads`` threads (see
+:class:`pypeit.io.ParallelGzipFile`), and tile compressed with and
+without quantization of the floating-point images.  The time to write
+and the size of each file are printed.
+"""
+import os
+import time
+import argparse
+import tempfile
+
+import numpy as np
+
+from astropy.io import fits
+
+from pypeit import io
+
+
+def fake_hdulist(nspec, nspat, seed=3):
+    """Build an HDUList with spec2d-like images."""
+    rng = np.random.default_rng(seed)
+    hdus = [fits.PrimaryHDU()]
+    for name in ['SCIIMG', 'IVARRAW', 'SKYMODEL', 'WAVEIMG']:
+        hdus += [fits.ImageHDU(data=100. + rng.normal(size=(nspec, nspat)), name=name)]
+    hdus += [fits.ImageHDU(data=rng.integers(0, 4, size=(nspec, nspat), dtype=np.int32),
+                           name='BPMMASK')]
+    return fits.HDUList(hdus)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n\n')[0],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--nspec', type=int, default=4096, help='Spectral pixels per image')
+    parser.add_argument('--nspat', type=int, default=2048, help='Spatial pixels per image')
+    parser.add_argument('--nthreads', type=int, default=os.cpu_count(),
+                        help='Number of threads for the parallel gzip')
+    args = parser.parse_args()
+
+    hdul = fake_hdulist(args.nspec, args.nspat)
+    options = {'none': ('test.fits', {}),
+               'gzip, 1 thread': ('test_1.fits.gz', dict(nthreads=1)),
+               'gzip, {0} threads'.format(args.nthreads): ('test_n.fits.gz',
+                                                          dict(nthreads=args.nthreads)),
+               'tile, quantized': ('test_tile.fits', dict(compression='tile')),
+               'tile, lossless': ('test_lossless.fits', dict(compression='tile',
+                                                             quantize_level=0))}
+
+    print('Five {0}x{1} images ({2} cores available)'.format(args.nspec, args.nspat,
+                                                            os.cpu_count()))
+    print('    {0:<20s} {1:>8s} {2:>10s}'.format('Compression', 'Time (s)', 'Size (MB)'))
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for key, (ofile, kwargs) in options.items():
+            _ofile = os.path.join(tmpdir, ofile)
+            t = time.perf_counter()
+            io.write_to_fits(hdul, _ofile, overwrite=True, checksum=False, **kwargs)
+            elapsed = time.perf_counter() - t
+            print('    {0:<20s} {1:8.2f} {2:10.1f}'.format(key, elapsed,
+                                                          os.path.getsize(_ofile)/1024**2))
+            os.remove(_ofile)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Benchmark the assignment of frames to instrument configurations by
+:class:`pypeit.metadata.PypeItMetaData` as the number of frames grows.
+
+The frames are grouped by their configuration values before they are
+compared (see :func:`pypeit.metadata.PypeItMetaData.unique_configurations`
+and :func:`pypeit.metadata.PypeItMetaData.set_configurations`).  The
+previous implementation compared every frame to every configuration
+with :func:`pypeit.core.framematch.row_match_config`.  The frames are
+synthetic Keck/DEIMOS science frames with a dozen configurations.
+"""
+import time
+import argparse
+
+import numpy as np
+
+from pypeit import msgs
+from pypeit.metadata import PypeItMetaData
+from pypeit.spectrographs.util import load_spectrograph
+from pypeit.tests.test_metadata import _loop_configurations
+
+
+def fake_metadata(spec, n, seed=1):
+    """Build a table of ``n`` science frames."""
+    rng = np.random.default_rng(seed)
+    data = dict(filename=['f{0}.fits'.format(i) for i in range(n)],
+                dispname=rng.choice(['600ZD', '1200G'], n),
+                decker=rng.choice(['LongMirr', 'mask1', None], n).astype(object),
+                binning=np.full(n, '1,1'),
+                dispangle=rng.choice([7500., 7500.*(1+5e-6), 8000.], n),
+                amp=np.full(n, 'SINGLE:B'))
+    fitstbl = PypeItMetaData(spec, spec.default_pypeit_par(), data=data)
+    bm = fitstbl.type_bitmask
+    fitstbl.set_frame_types(bm.turn_on(np.zeros(n, dtype=bm.minimum_dtype()), 'science'))
+    return fitstbl
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n\n')[0],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--nframes', type=int, nargs='+', default=[100, 1000, 5000],
+                        help='Numbers of frames')
+    args = parser.parse_args()
+
+    # Only print the timings
+    msgs.reset(verbosity=0)
+    spec = load_spectrograph('keck_deimos')
+    print('    {0:>7s} {1:>8s} {2:>10s} {3:>10s} {4:>8s}'.format('nframes', 'nconfig',
+                                                             'grouped', 'loop', 'gain'))
+    for n in args.nframes:
+        fitstbl = fake_metadata(spec, n)
+        t = time.perf_counter()
+        ref_configs, ref_setup = _loop_configurations(fitstbl)
+        loop_time = time.perf_counter() - t
+        t = time.perf_counter()
+        configs = fitstbl.unique_configurations(force=True)
+        fitstbl.set_configurations(configs, force=True)
+        group_time = time.perf_counter() - t
+        if configs != ref_configs or not np.array_equal(fitstbl['setup'], ref_setup):
+            raise ValueError('Configurations differ!')
+        print('    {0:7d} {1:8d} {2:9.3f}s {3:9.3f}s {4:7.1f}x'.format(
+                n, len(configs), group_time, loop_time, loop_time/group_time))
+
+
+if __name__ == '__main__':
+    main()
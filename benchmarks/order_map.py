@@ -0,0 +1,59 @@
+"""
+Benchmark the parallel processing of echelle orders in
+:func:`pypeit.core.coadd.ech_combspec`.
+
+The orders are scaled and stacked by :func:`pypeit.core.coadd.order_map`,
+which uses a pool of ``nproc`` processes.  The coadd is timed for one
+process and for ``nproc`` processes, using synthetic spectra with
+``norder`` orders and ``nexp`` exposures.  The speed-up is bounded by
+the number of available cores and by the serial cross-order steps.
+"""
+import os
+import time
+import argparse
+
+import numpy as np
+
+from pypeit import msgs
+from pypeit.core import coadd
+from pypeit.tests.test_coadd import fake_echelle
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n\n')[0],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--norder', type=int, default=30, help='Number of orders')
+    parser.add_argument('--nexp', type=int, default=20, help='Number of exposures')
+    parser.add_argument('--nspec', type=int, default=2000, help='Spectral pixels per order')
+    parser.add_argument('--nproc', type=int, default=os.cpu_count(),
+                        help='Number of processes to compare to a single process')
+    args = parser.parse_args()
+
+    # Only print the timings
+    msgs.reset(verbosity=0)
+    waves, fluxes, ivars, masks, sensfile = fake_echelle(norder=args.norder, nexp=args.nexp,
+                                                         nspec=args.nspec)
+    stacks = {}
+    times = {}
+    try:
+        for nproc in [1, args.nproc]:
+            t = time.perf_counter()
+            stacks[nproc] = coadd.ech_combspec(waves, fluxes, ivars, masks, sensfile,
+                                               scale_method='median', nproc=nproc)
+            times[nproc] = time.perf_counter() - t
+    finally:
+        os.remove(sensfile)
+
+    identical = all([np.array_equal(ref, stack) for ref, stack
+                        in zip(stacks[1][0] + stacks[1][1],
+                               stacks[args.nproc][0] + stacks[args.nproc][1])])
+    print('{0} orders, {1} exposures, {2} pixels per order ({3} cores available)'.format(
+            args.norder, args.nexp, args.nspec, os.cpu_count()))
+    for nproc in [1, args.nproc]:
+        print('    nproc = {0:<4d} {1:7.2f} s'.format(nproc, times[nproc]))
+    print('    speed-up:    {0:7.1f}x'.format(times[1]/times[args.nproc]))
+    print('    identical:   {0}'.format(identical))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark :func:`pypeit.core.coadd.rebin2d` against the previous
+implementation, which called `numpy.histogram2d`_ for each image and
+each rebinned quantity.
+
+The default stack has two 4k x 2k images, each rebinned with five
+science images and one variance image, as in a 2D coadd.
+"""
+import time
+import argparse
+
+import numpy as np
+
+from pypeit.core import coadd
+from pypeit.tests.test_coadd2d import rebin2d_histogram2d
+
+
+def fake_stack(nimgs, nspec, nspat, seed=2):
+    """Build a synthetic stack of rectifiable images."""
+    rng = np.random.default_rng(seed)
+    spec, spat = np.mgrid[:nspec,:nspat]
+    waveimg_stack = np.stack([4000. + 1.1*spec + 0.001*spat + i*0.3 for i in range(nimgs)])
+    dspat_stack = np.stack([spat - nspat/2 + 0.01*spec + i*2.5 for i in range(nimgs)])
+    thismask_stack = np.ones(waveimg_stack.shape, dtype=bool)
+    thismask_stack[:,:,:nspat//20] = False
+    inmask_stack = rng.uniform(size=waveimg_stack.shape) > 0.05
+    sci_list = [rng.normal(size=waveimg_stack.shape) for i in range(5)]
+    var_list = [rng.uniform(size=waveimg_stack.shape)]
+    spec_bins = np.linspace(4000. + 0.05*1.1*nspec, 4000. + 0.95*1.1*nspec, int(0.75*nspec)+1)
+    spat_bins = np.arange(-0.45*nspat, 0.45*nspat + 1, 1.)
+    return spec_bins, spat_bins, waveimg_stack, dspat_stack, thismask_stack, inmask_stack, \
+                sci_list, var_list
+
+
+def best_time(func, args, nrep):
+    """Return the result and the shortest run time of ``nrep`` calls."""
+    times = []
+    for i in range(nrep):
+        t = time.perf_counter()
+        result = func(*args)
+        times += [time.perf_counter() - t]
+    return result, min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n\n')[0],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--nimgs', type=int, default=2, help='Number of images')
+    parser.add_argument('--nspec', type=int, default=4096, help='Spectral pixels per image')
+    parser.add_argument('--nspat', type=int, default=2048, help='Spatial pixels per image')
+    parser.add_argument('--nrep', type=int, default=3, help='Number of repeats')
+    args = parser.parse_args()
+
+    stack = fake_stack(args.nimgs, args.nspec, args.nspat)
+    hist, hist_time = best_time(rebin2d_histogram2d, stack, args.nrep)
+    bincount, bincount_time = best_time(coadd.rebin2d, stack, args.nrep)
+
+    identical = all([np.array_equal(h, b) for h, b in zip(hist[0] + hist[1] + list(hist[2:]),
+                                                         bincount[0] + bincount[1]
+                                                         + list(bincount[2:]))])
+    print('Stack of {0} {1}x{2} images'.format(args.nimgs, args.nspec, args.nspat))
+    print('    histogram2d: {0:7.3f} s'.format(hist_time))
+    print('    bincount:    {0:7.3f} s'.format(bincount_time))
+    print('    speed-up:    {0:7.1f}x'.format(hist_time/bincount_time))
+    print('    identical:   {0}'.format(identical))
+
+
+if __name__ == '__main__':
+    main()
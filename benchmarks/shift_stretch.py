@@ -0,0 +1,96 @@
+"""
+Benchmark the search for the shift and stretch between two arc spectra
+done by :func:`pypeit.core.wavecal.wvutils.xcorr_shift_stretch`.
+
+The coarse-to-fine grid search of
+:func:`pypeit.core.wavecal.wvutils.grid_shift_stretch` is compared to
+the same search on the full grid of stretches computed in one batch,
+and to the differential-evolution optimizer that was used before the
+grid search.  For each, the script prints the run time, the number of
+correlations evaluated, the number of evaluations per second, and the
+peak memory allocated while searching.
+
+The spectra are synthetic arcs with random lines, and the second one is
+shifted by 7.6 pixels and stretched by 1% with respect to the first.
+"""
+import time
+import argparse
+import tracemalloc
+
+import numpy as np
+import scipy.optimize
+
+from pypeit import msgs
+from pypeit.core.wavecal import wvutils
+
+
+def fake_arc(nspec, nlines=60, fwhm=4., seed=3):
+    """Build a synthetic arc spectrum with random lines."""
+    rng = np.random.default_rng(seed)
+    pix = np.arange(nspec)
+    centers = rng.uniform(0, nspec, nlines)
+    amps = 10**rng.uniform(2, 4, nlines)
+    sigma = fwhm/2.355
+    return np.sum(amps[:,None]*np.exp(-0.5*((pix[None,:]-centers[:,None])/sigma)**2), axis=0) \
+                + rng.normal(scale=3., size=nspec)
+
+
+def run(func, *args, **kwargs):
+    """Return the result, run time, and peak allocated memory of a call."""
+    tracemalloc.start()
+    t = time.perf_counter()
+    result = func(*args, **kwargs)
+    t = time.perf_counter() - t
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, t, peak/2**20
+
+
+def differential_evolution(y1, y2, shift_bounds, stretch_bounds):
+    """Search done with ``method='de'`` in xcorr_shift_stretch."""
+    result = scipy.optimize.differential_evolution(wvutils.zerolag_shift_stretch, args=(y1,y2),
+                                                   tol=1e-4, bounds=[shift_bounds, stretch_bounds],
+                                                   disp=False, polish=True,
+                                                   seed=np.random.RandomState(1))
+    return result.x[0], result.x[1], -result.fun, result.nfev
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n\n')[0],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--nspec', type=int, nargs='+', default=[2048, 4096, 8192],
+                        help='Number of pixels in the spectra')
+    parser.add_argument('--skip_de', default=False, action='store_true',
+                        help='Do not run the differential-evolution optimizer')
+    args = parser.parse_args()
+
+    msgs.reset(verbosity=0)
+    print('{0:>6s} {1:>8s} {2:>9s} {3:>9s} {4:>10s} {5:>10s} {6:>8s} {7:>10s}'.format(
+            'nspec', 'method', 'shift', 'stretch', 'time (s)', 'neval', 'eval/s', 'peak (MB)'))
+    for nspec in args.nspec:
+        arc = fake_arc(nspec)
+        y1 = wvutils.smooth_ceil_cont(wvutils.shift_and_stretch(arc, -7.6, 1.01), 1.0)
+        y2 = wvutils.smooth_ceil_cont(arc, 1.0)
+        shift_cc, _ = wvutils.xcorr_shift(y1, y2, smooth=None, percent_ceil=None,
+                                          use_raw_arc=True)
+        shift_bounds = (shift_cc - 0.05*nspec, shift_cc + 0.05*nspec)
+        stretch_bounds = (0.95, 1.05)
+
+        methods = {'grid': lambda: wvutils.grid_shift_stretch(y1, y2, shift_bounds,
+                                                              stretch_bounds),
+                   'full': lambda: wvutils.grid_shift_stretch(y1, y2, shift_bounds,
+                                                              stretch_bounds, step=1,
+                                                              nbatch=nspec)}
+        if not args.skip_de:
+            methods['de'] = lambda: differential_evolution(y1, y2, shift_bounds, stretch_bounds)
+        results = {}
+        for name, func in methods.items():
+            results[name], t, peak = run(func)
+            shift, stretch, cc, neval = results[name]
+            print('{0:6d} {1:>8s} {2:9.3f} {3:9.5f} {4:10.3f} {5:10d} {6:8.0f} {7:10.1f}'.format(
+                    nspec, name, shift, stretch, t, neval, neval/t, peak))
+        assert results['grid'][:3] == results['full'][:3], 'Coarse-to-fine search differs'
+
+
+if __name__ == '__main__':
+    main()
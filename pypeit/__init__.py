@@ -32,16 +32,15 @@ msgs = pypmsgs.Messages()
 
 from pypeit import check_requirements  # THIS IMPORT DOES THE CHECKING.  KEEP IT
 
-# Import the close_qa method so that it can be called when a hard stop
-# is requested by the user
-from pypeit.core.qa import close_qa
-
 # Send all signals to messages to be dealt with (i.e. someone hits ctrl+c)
 def signal_handler(signalnum, handler):
     """
     Handle signals sent by the keyboard during code execution
     """
     if signalnum == 2:
+        # Import the close_qa method here so that it is only imported
+        # when a hard stop is requested by the user
+        from pypeit.core.qa import close_qa
         msgs.info('Ctrl+C was pressed. Ending processes...')
         close_qa(msgs.pypeit_file)
         msgs.close()
@@ -14,7 +14,6 @@ Class usage examples
 .. include:: ../include/links.rst
 
 """
-from IPython import embed
 import numpy
 import os
 import textwrap
@@ -64,6 +63,13 @@ class BitMask:
             List of bit descriptions
         max_value (int):
             The maximum valid bitmask value given the number of bits.
+
+    .. note::
+
+        The integer with the bits of a set of flags turned on is
+        computed the first time the set is used and cached such that
+        each call to, e.g., :func:`flagged` or :func:`turn_on` only
+        applies a single bitwise operation to the full array.
     """
     prefix = 'BIT'
     version = None
@@ -96,6 +102,8 @@ class BitMask:
         self.bits = { k:i for i,k in enumerate(_keys) }
         self.max_value = (1 << self.nbits)-1
         self.descr = _descr
+        # Cache of the bit values for combinations of flags
+        self._bit_values = {}
         
     def _prep_flags(self, flag):
         """Prep the flags for use."""
@@ -114,6 +122,29 @@ class BitMask:
 #            raise TypeError('Provided bit names must be strings!')
         return _flag
 
+    def _bit_value(self, flag):
+        """
+        Return the integer with the bits of all the provided flags
+        turned on.
+
+        The result is cached for each combination of flags.
+
+        Args:
+            flag (:obj:`str`, array-like):
+                One or more bit names.  If None, all bits are included.
+
+        Returns:
+            :obj:`int`: The combined bit value.
+        """
+        key = flag if flag is None or isinstance(flag, str) \
+                    else tuple(numpy.atleast_1d(flag).ravel())
+        if key not in self._bit_values:
+            value = 0
+            for f in self._prep_flags(flag):
+                value |= 1 << self.bits[f]
+            self._bit_values[key] = value
+        return self._bit_values[key]
+
     @staticmethod
     def _fill_sequence(keys, vals, descr=None):
         r"""
@@ -221,7 +252,7 @@ class BitMask:
             return numpy.uint32 if asuint else numpy.int32
         return numpy.uint64 if asuint else numpy.int64
 
-    def flagged(self, value, flag=None):
+    def flagged(self, value, flag=None, out=None):
         """
         Determine if a bit is on in the provided bitmask value.  The
         function can be used to determine if any individual bit is on or
@@ -234,6 +265,9 @@ class BitMask:
             flag (str, array-like, optional):
                 One or more bit names to check.  If None, then it checks
                 if *any* bit is on.
+            out (`numpy.ndarray`_, optional):
+                Boolean array with the same shape as ``value`` used to
+                hold the result.
         
         Returns:
             bool: Boolean flags that the provided flags (or any flag) is
@@ -246,16 +280,10 @@ class BitMask:
             TypeError: Raised if the provided *flag* does not contain
                 one or more strings.
         """
-        _flag = self._prep_flags(flag)
-
-        out = value & (1 << self.bits[_flag[0]]) != 0
-        if len(_flag) == 1:
-            return out
-
-        nn = len(_flag)
-        for i in range(1,nn):
-            out |= (value & (1 << self.bits[_flag[i]]) != 0)
-        return out
+        _value = numpy.asarray(value)
+        return numpy.not_equal(numpy.bitwise_and(_value, self._bit_value(flag),
+                                                 dtype=_value.dtype, casting='unsafe'),
+                               0, out=out)
 
     def flagged_bits(self, value):
         """
@@ -285,7 +313,7 @@ class BitMask:
         indx = numpy.array([1<<self.bits[k] & value != 0 for k in keys])
         return (keys[indx]).tolist()
 
-    def toggle(self, value, flag):
+    def toggle(self, value, flag, out=None):
         """
         Toggle a bit in the provided bitmask value.
 
@@ -295,6 +323,9 @@ class BitMask:
                 :attr:`max_value`; however, that is not checked.
             flag (str, array-like):
                 Bit name(s) to toggle.
+            out (`numpy.ndarray`_, optional):
+                Array used to hold the result, which can be ``value``
+                itself.
 
         Returns:
             array-like: New bitmask value after toggling the selected
@@ -307,18 +338,10 @@ class BitMask:
         if flag is None:
             raise ValueError('Provided bit name cannot be None.')
 
-        _flag = self._prep_flags(flag)
-
-        out = value ^ (1 << self.bits[_flag[0]])
-        if len(_flag) == 1:
-            return out.astype(value.dtype)
-
-        nn = len(_flag)
-        for i in range(1,nn):
-            out ^= (1 << self.bits[_flag[i]])
-        return out.astype(value.dtype)
+        return numpy.bitwise_xor(value, self._bit_value(flag), dtype=value.dtype,
+                                 casting='unsafe', out=out)
 
-    def turn_on(self, value, flag):
+    def turn_on(self, value, flag, out=None):
         """
         Ensure that a bit is turned on in the provided bitmask value.
 
@@ -328,6 +351,9 @@ class BitMask:
                 :attr:`max_value`; however, that is not checked.
             flag (:obj:`list`, `numpy.ndarray`, :obj:`str`):
                 Bit name(s) to turn on.
+            out (`numpy.ndarray`_, optional):
+                Array used to hold the result, which can be ``value``
+                itself.
         
         Returns:
             :obj:`int`: New bitmask value after turning on the
@@ -341,18 +367,10 @@ class BitMask:
         if flag is None:
             raise ValueError('Provided bit name cannot be None.')
 
-        _flag = self._prep_flags(flag)
+        return numpy.bitwise_or(value, self._bit_value(flag), dtype=value.dtype,
+                                casting='unsafe', out=out)
 
-        out = value | (1 << self.bits[_flag[0]])
-        if len(_flag) == 1:
-            return out.astype(value.dtype)
-
-        nn = len(_flag)
-        for i in range(1,nn):
-            out |= (1 << self.bits[_flag[i]])
-        return out.astype(value.dtype)
-
-    def turn_off(self, value, flag):
+    def turn_off(self, value, flag, out=None):
         """
         Ensure that a bit is turned off in the provided bitmask value.
 
@@ -362,6 +380,9 @@ class BitMask:
                 :attr:`max_value`; however, that is not checked.
             flag (str, array-like):
                 Bit name(s) to turn off.
+            out (`numpy.ndarray`_, optional):
+                Array used to hold the result, which can be ``value``
+                itself.
         
         Returns:
             int: New bitmask value after turning off the selected bit.
@@ -374,16 +395,8 @@ class BitMask:
         if flag is None:
             raise ValueError('Provided bit name cannot be None.')
 
-        _flag = self._prep_flags(flag)
-
-        out = value & ~(1 << self.bits[_flag[0]])
-        if len(_flag) == 1:
-            return out.astype(value.dtype)
-
-        nn = len(_flag)
-        for i in range(1,nn):
-            out &= ~(1 << self.bits[_flag[i]])
-        return out.astype(value.dtype)
+        return numpy.bitwise_and(value, ~self._bit_value(flag), dtype=value.dtype,
+                                 casting='unsafe', out=out)
 
     def consolidate(self, value, flag_set, consolidated_flag):
         """
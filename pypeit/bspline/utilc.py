@@ -11,8 +11,6 @@ import os
 import warnings
 import ctypes
 
-from IPython import embed
-
 import numpy as np
 
 # Mimics astropy convention
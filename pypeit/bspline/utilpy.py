@@ -10,8 +10,6 @@ Implements pure python support methods for
 """
 import warnings
 
-from IPython import embed
-
 import numpy as np
 
 
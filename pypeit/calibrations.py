@@ -5,15 +5,15 @@ Class for guiding calibration object generation in PypeIt
 .. include:: ../include/links.rst
 """
 import os
+import shutil
 
 from abc import ABCMeta
 from collections import Counter
 
-from IPython import embed
-
 import numpy as np
 
 from pypeit import msgs
+from pypeit import profiling
 from pypeit import alignframe
 from pypeit import flatfield
 from pypeit import edgetrace
@@ -54,7 +54,10 @@ class Calibrations(object):
             Path for quality assessment output.  If not provided, no QA
             plots are saved.
         reuse_masters (:obj:`bool`, optional):
-            Load calibration files from disk if they exist
+            Load calibration files from disk if they exist.  Loaded
+            masters are kept in :attr:`pypeit.masterframe.master_cache`
+            so that they are not read again for subsequent exposures
+            and detectors.
         show (:obj:`bool`, optional):
             Show plots of PypeIt's results as the code progesses.
             Requires interaction from the users.
@@ -168,6 +171,7 @@ class Calibrations(object):
         self.flatimages = None
         self.calib_ID = None
         self.master_key_dict = {}
+        self.master_hash_dict = {}
 
         # Steps
         self.steps = []
@@ -193,6 +197,148 @@ class Calibrations(object):
         # Return
         return image_files, self.fitstbl.master_key(rows[0] if len(rows) > 0 else self.frame, det=self.det)
 
+    def _master_hash(self, ctype, raw_files, pars, upstream=None):
+        """
+        Construct the hash of the inputs used to build a master frame
+        and keep it in :attr:`master_hash_dict`.
+
+        Args:
+            ctype (:obj:`str`):
+                Calibration type, e.g. 'arc', 'bias'
+            raw_files (:obj:`list`):
+                Raw files used to build the master.
+            pars (:obj:`list`):
+                Parameter sets used to build the master.
+            upstream (:obj:`list`, optional):
+                Calibration types of the masters used to build this
+                one.
+
+        Returns:
+            :obj:`str`: The hash; see
+            :func:`pypeit.masterframe.master_hash`.
+        """
+        _upstream = None if upstream is None else [self.master_hash_dict.get(u) for u in upstream]
+        self.master_hash_dict[ctype] = masterframe.master_hash(self.spectrograph.name, self.det,
+                                                               raw_files=raw_files, pars=pars,
+                                                               upstream=_upstream)
+        return self.master_hash_dict[ctype]
+
+    def _reuse_master(self, master_class, masterframe_name, calib_hash):
+        """
+        Check if an existing master frame can be used.
+
+        A master in the master directory is reused if
+        :attr:`reuse_masters` is True and its inputs have not changed;
+        i.e., the hash in its header matches `calib_hash`. Masters
+        written without a hash are always reused. Otherwise, if
+        ``master_store`` is set (see
+        :class:`pypeit.par.pypeitpar.CalibrationsPar`), a master with
+        the same hash is copied from the store to the master directory.
+
+        Args:
+            master_class (:obj:`type`):
+                Class of the master frame.
+            masterframe_name (:obj:`str`):
+                Name of the master file in the master directory.
+            calib_hash (:obj:`str`):
+                Hash of the master inputs; see :func:`_master_hash`.
+
+        Returns:
+            :obj:`bool`: Flag that the master should be loaded from
+            `masterframe_name`.
+        """
+        # Make sure any queued write of the master is finished before
+        # checking that it exists
+        io.background_writer.wait(masterframe_name)
+        if self.reuse_masters and os.path.isfile(masterframe_name):
+            _calib_hash = masterframe.read_master_hash(masterframe_name)
+            if _calib_hash is None or _calib_hash == calib_hash:
+                return True
+            msgs.warn('Inputs to {0} have changed; rebuilding it.'.format(
+                        os.path.basename(masterframe_name)))
+        if self.par['master_store'] is None:
+            return False
+        stored_file = masterframe.construct_file_name(master_class, calib_hash,
+                                                      master_dir=self.par['master_store'])
+        if not os.path.isfile(stored_file):
+            return False
+        msgs.info('Using {0} from the master store'.format(os.path.basename(masterframe_name)))
+        # Rewrite the master so that its header has the correct key and
+        # directory
+        master_class.from_file(stored_file).to_master_file(masterframe_name,
+                                                           calib_hash=calib_hash)
+        return True
+
+    def _store_master(self, master_class, masterframe_name, calib_hash):
+        """
+        Copy a master frame to the master store, if it is defined.
+
+        Nothing is done if the store is not defined or `calib_hash` is
+        None.
+
+        Args:
+            master_class (:obj:`type`):
+                Class of the master frame.
+            masterframe_name (:obj:`str`):
+                Name of the master file in the master directory.
+            calib_hash (:obj:`str`):
+                Hash of the master inputs; see :func:`_master_hash`.
+        """
+        if self.par['master_store'] is None or calib_hash is None:
+            return
+        if not os.path.isdir(self.par['master_store']):
+            os.makedirs(self.par['master_store'])
+        stored_file = masterframe.construct_file_name(master_class, calib_hash,
+                                                      master_dir=self.par['master_store'])
+        # Make sure the file is written, and copy it such that other
+        # reductions never see a partial file
+        io.background_writer.wait(masterframe_name)
+        shutil.copyfile(masterframe_name, stored_file + '.tmp')
+        os.replace(stored_file + '.tmp', stored_file)
+
+    def _skip_readahead(self, ctype, *master_classes):
+        """
+        Stop reading ahead the raw frames of a calibration for the
+        detectors whose master will be reused.
+
+        When a master is built, :func:`pypeit.spectrographs.spectrograph.Spectrograph.load_rawimage`
+        reads the other detectors of each raw frame ahead of their use
+        (see :class:`pypeit.io.RawFileCache`).  If :attr:`reuse_masters`
+        is True and the master already exists for one of those
+        detectors, :func:`_reuse_master` loads it instead of processing
+        the raw frames, so reading that detector is wasted.  Because the
+        hashes of the masters of the other detectors depend on upstream
+        masters that are not yet available, an existing master is
+        assumed to be reused; if it ends up being rebuilt, its raw
+        frames are simply read when needed.
+
+        Args:
+            ctype (:obj:`str`):
+                Calibration type, e.g. 'arc', 'bias'
+            master_classes (:obj:`type`):
+                Classes of the masters built from the frames; the
+                frames are not read ahead if any of them exists.
+
+        Returns:
+            :obj:`contextlib.AbstractContextManager`: The context
+            manager returned by
+            :func:`pypeit.io.RawFileCache.exclude_detectors`.
+        """
+        if not self.reuse_masters or io.raw_file_cache.detectors is None:
+            return io.raw_file_cache.exclude_detectors([])
+        rows = self.fitstbl.find_frames(ctype, calib_ID=self.calib_ID, index=True)
+        row = rows[0] if len(rows) > 0 else self.frame
+        dets = []
+        for det in io.raw_file_cache.detectors:
+            if det == self.det:
+                continue
+            master_key = self.fitstbl.master_key(row, det=det)
+            if any([os.path.isfile(masterframe.construct_file_name(m, master_key,
+                                                                   master_dir=self.master_dir))
+                    for m in master_classes]):
+                dets += [det]
+        return io.raw_file_cache.exclude_detectors(dets)
+
     def set_config(self, frame, det, par=None):
         """
         Specify the parameters of the Calibrations class and reset all
@@ -219,8 +365,10 @@ class Calibrations(object):
 
         # Initialize the master key dict for this science/standard frame
         self.master_key_dict['frame'] = self.fitstbl.master_key(frame, det=det)
+        self.master_hash_dict = {}
         # Initialize the master dict for input, output
 
+    @profiling.stage('Calibrations.get_arc')
     def get_arc(self):
         """
         Load or generate the Arc image
@@ -241,24 +389,30 @@ class Calibrations(object):
         arc_files, self.master_key_dict['arc'] = self._prep_calibrations('arc')
         masterframe_name = masterframe.construct_file_name(
             buildimage.ArcImage, self.master_key_dict['arc'], master_dir=self.master_dir)
+        calib_hash = self._master_hash('arc', arc_files, [self.par['arcframe']],
+                                       upstream=['bias'])
 
         # Reuse master frame?
-        if os.path.isfile(masterframe_name) and self.reuse_masters:
-            self.msarc = buildimage.ArcImage.from_file(masterframe_name)
+        if self._reuse_master(buildimage.ArcImage, masterframe_name, calib_hash):
+            self.msarc = masterframe.master_cache.load(masterframe_name, buildimage.ArcImage)
         elif len(arc_files) == 0:
             msgs.warn("No frametype=arc files to build arc")
+            self.master_hash_dict['arc'] = None
             return
         else:  # Build it
             msgs.info("Preparing a master {0:s} frame".format(buildimage.ArcImage.master_type))
-            self.msarc = buildimage.buildimage_fromlist(self.spectrograph, self.det,
-                                                        self.par['arcframe'], arc_files,
-                                                        bias=self.msbias, bpm=self.msbpm)
+            with self._skip_readahead('arc', buildimage.ArcImage):
+                self.msarc = buildimage.buildimage_fromlist(self.spectrograph, self.det,
+                                                            self.par['arcframe'], arc_files,
+                                                            bias=self.msbias, bpm=self.msbpm)
             # Save
-            self.msarc.to_master_file(masterframe_name)
+            self.msarc.to_master_file(masterframe_name, calib_hash=calib_hash)
+            self._store_master(buildimage.ArcImage, masterframe_name, calib_hash)
 
         # Return
         return self.msarc
 
+    @profiling.stage('Calibrations.get_tiltimg')
     def get_tiltimg(self):
         """
         Load or generate the Tilt image
@@ -279,22 +433,27 @@ class Calibrations(object):
         tilt_files, self.master_key_dict['tilt'] = self._prep_calibrations('tilt')
         masterframe_name = masterframe.construct_file_name(
             buildimage.TiltImage, self.master_key_dict['tilt'], master_dir=self.master_dir)
+        calib_hash = self._master_hash('tilt', tilt_files, [self.par['tiltframe']],
+                                       upstream=['bias', 'trace'])
 
         # Reuse master frame?
-        if os.path.isfile(masterframe_name) and self.reuse_masters:
-            self.mstilt = buildimage.TiltImage.from_file(masterframe_name)
+        if self._reuse_master(buildimage.TiltImage, masterframe_name, calib_hash):
+            self.mstilt = masterframe.master_cache.load(masterframe_name, buildimage.TiltImage)
         elif len(tilt_files) == 0:
             msgs.warn("No frametype=tilt files to build tiltimg")
+            self.master_hash_dict['tilt'] = None
             return
         else: # Build
             msgs.info("Preparing a master {0:s} frame".format(buildimage.TiltImage.master_type))
-            self.mstilt = buildimage.buildimage_fromlist(self.spectrograph, self.det,
-                                                self.par['tiltframe'],
-                                                tilt_files, bias=self.msbias, bpm=self.msbpm,
-                                                         slits=self.slits)  # For flexure
+            with self._skip_readahead('tilt', buildimage.TiltImage):
+                self.mstilt = buildimage.buildimage_fromlist(self.spectrograph, self.det,
+                                                    self.par['tiltframe'],
+                                                    tilt_files, bias=self.msbias, bpm=self.msbpm,
+                                                             slits=self.slits)  # For flexure
 
             # Save to Masters
-            self.mstilt.to_master_file(masterframe_name)
+            self.mstilt.to_master_file(masterframe_name, calib_hash=calib_hash)
+            self._store_master(buildimage.TiltImage, masterframe_name, calib_hash)
 
         # TODO in the future add in a tilt_inmask
         #self._update_cache('tilt', 'tilt_inmask', self.mstilt_inmask)
@@ -302,6 +461,7 @@ class Calibrations(object):
         # Return
         return self.mstilt
 
+    @profiling.stage('Calibrations.get_align')
     def get_align(self):
         """
         Load or generate the alignment frame
@@ -325,15 +485,20 @@ class Calibrations(object):
         masterframe_filename = masterframe.construct_file_name(alignframe.Alignments,
                                                                self.master_key_dict['align'],
                                                                master_dir=self.master_dir)
+        calib_hash = self._master_hash('align', align_files,
+                                       [self.par['alignframe'], self.par['alignment']],
+                                       upstream=['bias', 'trace'])
 
         # Reuse master frame?
-        if os.path.isfile(masterframe_filename) and self.reuse_masters:
-            self.alignments = alignframe.Alignments.from_file(masterframe_filename)
+        if self._reuse_master(alignframe.Alignments, masterframe_filename, calib_hash):
+            self.alignments = masterframe.master_cache.load(masterframe_filename,
+                                                            alignframe.Alignments)
             self.alignments.is_synced(self.slits)
             return self.alignments
 
-        msalign = buildimage.buildimage_fromlist(self.spectrograph, self.det, self.par['alignframe'], align_files,
-                                                 bias=self.msbias, bpm=self.msbpm)
+        with self._skip_readahead('align', alignframe.Alignments):
+            msalign = buildimage.buildimage_fromlist(self.spectrograph, self.det, self.par['alignframe'], align_files,
+                                                     bias=self.msbias, bpm=self.msbpm)
 
         # Extract some header info needed by the algorithm
         binning = self.spectrograph.get_meta_value(align_files[0], 'binning')
@@ -344,10 +509,12 @@ class Calibrations(object):
         # Run
         self.alignments = alignment.run(show=self.show)
         # Save to Masters
-        self.alignments.to_master_file(masterframe_filename)
+        self.alignments.to_master_file(masterframe_filename, calib_hash=calib_hash)
+        self._store_master(alignframe.Alignments, masterframe_filename, calib_hash)
 
         return self.alignments
 
+    @profiling.stage('Calibrations.get_bias')
     def get_bias(self):
         """
         Load or generate the bias frame/command
@@ -372,22 +539,27 @@ class Calibrations(object):
 
         if self.par['biasframe']['useframe'] is not None:
             msgs.error("Not ready to load from disk")
+        calib_hash = self._master_hash('bias', bias_files, [self.par['biasframe']])
 
         # Try to load?
-        if os.path.isfile(masterframe_name) and self.reuse_masters:
-            self.msbias = buildimage.BiasImage.from_file(masterframe_name)
+        if self._reuse_master(buildimage.BiasImage, masterframe_name, calib_hash):
+            self.msbias = masterframe.master_cache.load(masterframe_name, buildimage.BiasImage)
         elif len(bias_files) == 0:
             self.msbias = None
+            self.master_hash_dict['bias'] = None
         else:
             # Build it
-            self.msbias = buildimage.buildimage_fromlist(self.spectrograph, self.det,
-                                                         self.par['biasframe'], bias_files)
+            with self._skip_readahead('bias', buildimage.BiasImage):
+                self.msbias = buildimage.buildimage_fromlist(self.spectrograph, self.det,
+                                                             self.par['biasframe'], bias_files)
             # Save it?
-            self.msbias.to_master_file(masterframe_name)
+            self.msbias.to_master_file(masterframe_name, calib_hash=calib_hash)
+            self._store_master(buildimage.BiasImage, masterframe_name, calib_hash)
 
         # Return
         return self.msbias
 
+    @profiling.stage('Calibrations.get_dark')
     def get_dark(self):
         """
         Load or generate the dark image
@@ -410,23 +582,29 @@ class Calibrations(object):
                                                            self.master_key_dict['dark'],
                                                            master_dir=self.master_dir)
 
+        calib_hash = self._master_hash('dark', dark_files, [self.par['darkframe']])
+
         # Try to load?
-        if os.path.isfile(masterframe_name) and self.reuse_masters:
-            self.msdark = buildimage.DarkImage.from_file(masterframe_name)
+        if self._reuse_master(buildimage.DarkImage, masterframe_name, calib_hash):
+            self.msdark = masterframe.master_cache.load(masterframe_name, buildimage.DarkImage)
         elif len(dark_files) == 0:
             self.msdark = None
+            self.master_hash_dict['dark'] = None
         else:
             # TODO: Should this include the bias?
             # Build it
-            self.msdark = buildimage.buildimage_fromlist(self.spectrograph, self.det,
-                                                    self.par['darkframe'], dark_files)
+            with self._skip_readahead('dark', buildimage.DarkImage):
+                self.msdark = buildimage.buildimage_fromlist(self.spectrograph, self.det,
+                                                        self.par['darkframe'], dark_files)
             # Save it?
-            self.msdark.to_master_file(masterframe_name)
+            self.msdark.to_master_file(masterframe_name, calib_hash=calib_hash)
+            self._store_master(buildimage.DarkImage, masterframe_name, calib_hash)
 
         # Return
         return self.msdark
 
 
+    @profiling.stage('Calibrations.get_bpm')
     def get_bpm(self):
         """
         Load or generate the bad pixel mask
@@ -464,6 +642,7 @@ class Calibrations(object):
         # Return
         return self.msbpm
 
+    @profiling.stage('Calibrations.get_flats')
     def get_flats(self):
         """
         Load or generate a normalized pixel flat and slit illumination
@@ -498,14 +677,24 @@ class Calibrations(object):
 
         masterframe_filename = masterframe.construct_file_name(flatfield.FlatImages,
                                                            self.master_key_dict['flat'], master_dir=self.master_dir)
+        calib_hash = self._master_hash('flat', pixflat_image_files + illum_image_files,
+                                       [self.par['pixelflatframe'], self.par['illumflatframe'],
+                                        self.par['flatfield']],
+                                       upstream=['bias', 'dark', 'trace', 'tilts', 'wvcalib'])
+        # The flats can tweak the slit edges, so the tweaked slits are
+        # stored under a hash that includes the flats; the slits stored
+        # under the trace hash are never tweaked.
+        slits_hash = self._master_hash('slits', None, None, upstream=['trace', 'flat'])
+        slits_masterframe_name = masterframe.construct_file_name(self.slits, self.slits.master_key,
+                                                                 master_dir=self.slits.master_dir)
         # The following if-elif-else does:
         #   1.  Try to load a MasterFrame (if reuse_masters is True).  If successful, pass it back
         #   2.  Build from scratch
         #   3.  Load any user-supplied images to over-ride any built
 
         # Load MasterFrame?
-        if os.path.isfile(masterframe_filename) and self.reuse_masters:
-            flatimages = flatfield.FlatImages.from_file(masterframe_filename)
+        if self._reuse_master(flatfield.FlatImages, masterframe_filename, calib_hash):
+            flatimages = masterframe.master_cache.load(masterframe_filename, flatfield.FlatImages)
             flatimages.is_synced(self.slits)
             # Load user defined files
             if self.par['flatfield']['pixelflat_file'] is not None:
@@ -515,6 +704,18 @@ class Calibrations(object):
                     nrm_image = flatfield.FlatImages(pixelflat_norm=hdu[self.det].data)
                     flatimages = flatfield.merge(flatimages, nrm_image)
             self.flatimages = flatimages
+            # Use the slit edges tweaked by these flats, if they are in
+            # the store
+            stored_slits = None if self.par['master_store'] is None \
+                    else masterframe.construct_file_name(slittrace.SlitTraceSet, slits_hash,
+                                                         master_dir=self.par['master_store'])
+            if stored_slits is not None and os.path.isfile(stored_slits):
+                _slits = slittrace.SlitTraceSet.from_file(stored_slits)
+                if not np.array_equal(_slits.left_tweak, self.slits.left_tweak) \
+                        or not np.array_equal(_slits.right_tweak, self.slits.right_tweak):
+                    self.slits.left_tweak = _slits.left_tweak
+                    self.slits.right_tweak = _slits.right_tweak
+                    self.slits.to_master_file(calib_hash=self.master_hash_dict.get('trace'))
             # update slits
             self.slits.mask_flats(self.flatimages)
             return self.flatimages
@@ -524,10 +725,11 @@ class Calibrations(object):
         # Check if the image files are the same
         pix_is_illum = Counter(illum_image_files) == Counter(pixflat_image_files)
         if len(pixflat_image_files) > 0:
-            pixel_flat = buildimage.buildimage_fromlist(self.spectrograph, self.det,
-                                                        self.par['pixelflatframe'],
-                                                        pixflat_image_files, dark=self.msdark,
-                                                        bias=self.msbias, bpm=self.msbpm)
+            with self._skip_readahead('pixelflat', flatfield.FlatImages):
+                pixel_flat = buildimage.buildimage_fromlist(self.spectrograph, self.det,
+                                                            self.par['pixelflatframe'],
+                                                            pixflat_image_files, dark=self.msdark,
+                                                            bias=self.msbias, bpm=self.msbpm)
             # Initialise the pixel flat
             pixelFlatField = flatfield.FlatField(pixel_flat, self.spectrograph,
                                                  self.par['flatfield'], self.slits, self.wavetilts, self.wv_calib)
@@ -536,10 +738,11 @@ class Calibrations(object):
 
         # Only build illum_flat if the input files are different from the pixel flat
         if (not pix_is_illum) and len(illum_image_files) > 0:
-            illum_flat = buildimage.buildimage_fromlist(self.spectrograph, self.det,
-                                                        self.par['illumflatframe'],
-                                                        illum_image_files, dark=self.msdark,
-                                                        bias=self.msbias, bpm=self.msbpm)
+            with self._skip_readahead('pixelflat', flatfield.FlatImages):
+                illum_flat = buildimage.buildimage_fromlist(self.spectrograph, self.det,
+                                                            self.par['illumflatframe'],
+                                                            illum_image_files, dark=self.msdark,
+                                                            bias=self.msbias, bpm=self.msbpm)
             # Initialise the pixel flat
             illumFlatField = flatfield.FlatField(illum_flat, self.spectrograph,
                                                  self.par['flatfield'], self.slits, self.wavetilts,
@@ -561,9 +764,11 @@ class Calibrations(object):
 
         # Save flat images
         if flatimages is not None:
-            flatimages.to_master_file(masterframe_filename)
+            flatimages.to_master_file(masterframe_filename, calib_hash=calib_hash)
+            self._store_master(flatfield.FlatImages, masterframe_filename, calib_hash)
             # Save slits too, in case they were tweaked
-            self.slits.to_master_file()
+            self.slits.to_master_file(calib_hash=self.master_hash_dict.get('trace'))
+            self._store_master(slittrace.SlitTraceSet, slits_masterframe_name, slits_hash)
 
         # 3) Load user-supplied images
         #  NOTE:  This is the *final* images, not just a stack
@@ -578,6 +783,7 @@ class Calibrations(object):
         # Return
         return self.flatimages
 
+    @profiling.stage('Calibrations.get_slits')
     def get_slits(self):
         """
         Load or generate the definition of the slit boundaries.
@@ -604,8 +810,12 @@ class Calibrations(object):
         slit_masterframe_name = masterframe.construct_file_name(slittrace.SlitTraceSet,
                                                            self.master_key_dict['trace'],
                                                            master_dir=self.master_dir)
-        if os.path.isfile(slit_masterframe_name) and self.reuse_masters:
-            self.slits = slittrace.SlitTraceSet.from_file(slit_masterframe_name)
+        calib_hash = self._master_hash('trace', trace_image_files,
+                                       [self.par['traceframe'], self.par['slitedges']],
+                                       upstream=['bias', 'dark'])
+        if self._reuse_master(slittrace.SlitTraceSet, slit_masterframe_name, calib_hash):
+            self.slits = masterframe.master_cache.load(slit_masterframe_name,
+                                                       slittrace.SlitTraceSet)
             # Reset the bitmask
             self.slits.mask = self.slits.mask_init.copy()
         else:
@@ -614,21 +824,26 @@ class Calibrations(object):
                                                                self.master_key_dict['trace'],
                                                                master_dir=self.master_dir)
             # Reuse master frame?
-            if os.path.isfile(edge_masterframe_name) and self.reuse_masters:
-                self.edges = edgetrace.EdgeTraceSet.from_file(edge_masterframe_name)
+            if self._reuse_master(edgetrace.EdgeTraceSet, edge_masterframe_name, calib_hash):
+                self.edges = masterframe.master_cache.load(edge_masterframe_name,
+                                                           edgetrace.EdgeTraceSet)
             elif len(trace_image_files) == 0:
                 msgs.warn("No frametype=trace files to build slits")
+                self.master_hash_dict['trace'] = None
                 return None
             else:
                 # Build the trace image
-                self.traceImage = buildimage.buildimage_fromlist(self.spectrograph, self.det,
-                                                        self.par['traceframe'], trace_image_files,
-                                                        bias=self.msbias, bpm=self.msbpm,
-                                                        dark=self.msdark)
+                with self._skip_readahead('trace', slittrace.SlitTraceSet,
+                                          edgetrace.EdgeTraceSet):
+                    self.traceImage = buildimage.buildimage_fromlist(self.spectrograph, self.det,
+                                                            self.par['traceframe'], trace_image_files,
+                                                            bias=self.msbias, bpm=self.msbpm,
+                                                            dark=self.msdark)
                 self.edges = edgetrace.EdgeTraceSet(self.traceImage, self.spectrograph,
                                                     self.par['slitedges'], bpm=self.msbpm,
                                                     auto=True)
-                self.edges.to_master_file(edge_masterframe_name)
+                self.edges.to_master_file(edge_masterframe_name, calib_hash=calib_hash)
+                self._store_master(edgetrace.EdgeTraceSet, edge_masterframe_name, calib_hash)
 
                 # Show the result if requested
                 if self.show:
@@ -638,7 +853,8 @@ class Calibrations(object):
             # the edges object, and save the slits, if requested
             self.slits = self.edges.get_slits()
             self.edges = None
-            self.slits.to_master_file(slit_masterframe_name)
+            self.slits.to_master_file(slit_masterframe_name, calib_hash=calib_hash)
+            self._store_master(slittrace.SlitTraceSet, slit_masterframe_name, calib_hash)
 
         # User mask?
         if self.slitspat_num is not None:
@@ -646,6 +862,7 @@ class Calibrations(object):
 
         return self.slits
 
+    @profiling.stage('Calibrations.get_wv_calib')
     def get_wv_calib(self):
         """
         Load or generate the 1D wavelength calibrations
@@ -679,8 +896,10 @@ class Calibrations(object):
         masterframe_name = masterframe.construct_file_name(wavecalib.WaveCalib,
                                                            self.master_key_dict['arc'],
                                                            master_dir=self.master_dir)
-        if os.path.isfile(masterframe_name) and self.reuse_masters:
-            self.wv_calib = wavecalib.WaveCalib.from_file(masterframe_name)
+        calib_hash = self._master_hash('wvcalib', None, [self.par['wavelengths']],
+                                       upstream=['arc', 'trace'])
+        if self._reuse_master(wavecalib.WaveCalib, masterframe_name, calib_hash):
+            self.wv_calib = masterframe.master_cache.load(masterframe_name, wavecalib.WaveCalib)
             self.wv_calib.chk_synced(self.slits)
             self.slits.mask_wvcalib(self.wv_calib)
         else:
@@ -692,11 +911,13 @@ class Calibrations(object):
                                              qa_path=self.qa_path, msbpm=self.msbpm)
             self.wv_calib = self.waveCalib.run(skip_QA=(not self.write_qa))
             # Save to Masters
-            self.wv_calib.to_master_file(masterframe_name)
+            self.wv_calib.to_master_file(masterframe_name, calib_hash=calib_hash)
+            self._store_master(wavecalib.WaveCalib, masterframe_name, calib_hash)
 
         # Return
         return self.wv_calib
 
+    @profiling.stage('Calibrations.get_tilts')
     def get_tilts(self):
         """
         Load or generate the tilts image
@@ -723,8 +944,10 @@ class Calibrations(object):
         # Load up?
         masterframe_name = masterframe.construct_file_name(wavetilts.WaveTilts, self.master_key_dict['tilt'],
                                                            master_dir=self.master_dir)
-        if os.path.isfile(masterframe_name) and self.reuse_masters:
-            self.wavetilts = wavetilts.WaveTilts.from_file(masterframe_name)
+        calib_hash = self._master_hash('tilts', None, [self.par['tilts'], self.par['wavelengths']],
+                                       upstream=['tilt', 'trace'])
+        if self._reuse_master(wavetilts.WaveTilts, masterframe_name, calib_hash):
+            self.wavetilts = masterframe.master_cache.load(masterframe_name, wavetilts.WaveTilts)
             self.wavetilts.is_synced(self.slits)
             self.slits.mask_wavetilts(self.wavetilts)
         else: # Build
@@ -740,7 +963,8 @@ class Calibrations(object):
             # TODO still need to deal with syntax for LRIS ghosts. Maybe we don't need it
             self.wavetilts = buildwaveTilts.run(doqa=self.write_qa, show=self.show)
             # Save?
-            self.wavetilts.to_master_file(masterframe_name)
+            self.wavetilts.to_master_file(masterframe_name, calib_hash=calib_hash)
+            self._store_master(wavetilts.WaveTilts, masterframe_name, calib_hash)
 
         return self.wavetilts
 
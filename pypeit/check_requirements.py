@@ -1,20 +1,30 @@
 """
 Version checking.
 """
+import os
 
-import pkg_resources
+from packaging import version
 
-requirements_file = pkg_resources.resource_filename('pypeit', 'requirements.txt')
+try:
+    # importlib.metadata is much faster to import than pkg_resources
+    from importlib.metadata import version as get_version, PackageNotFoundError
+except ImportError:
+    # Python < 3.8
+    import pkg_resources
+    def get_version(pkg):
+        return pkg_resources.get_distribution(pkg).version
+    PackageNotFoundError = pkg_resources.DistributionNotFound
+
+requirements_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'requirements.txt')
 install_requires = [line.strip().replace('==', '>=') for line in open(requirements_file)
                     if not line.strip().startswith('#') and line.strip() != '']
 for requirement in install_requires:
-    pkg, version = requirement.split('>=')
+    pkg, req_version = requirement.split('>=')
     try:
-        pv = pkg_resources.get_distribution(pkg).version
-    except pkg_resources.DistributionNotFound:
+        pv = get_version(pkg)
+    except PackageNotFoundError:
         raise ImportError("Package: {:s} not installed!".format(pkg))
     else:
-        if pkg_resources.parse_version(pv) < pkg_resources.parse_version(version):
+        if version.parse(pv) < version.parse(req_version):
             raise ImportError('Your version of {0} is incompatible with PypeIt.  '.format(pkg)
-                                + 'Please update to version >= {0}'.format(version))
-
+                                + 'Please update to version >= {0}'.format(req_version))
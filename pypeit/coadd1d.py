@@ -7,8 +7,7 @@ Coadding module.
 """
 import inspect
 import os
-
-from IPython import embed
+from concurrent import futures
 
 import numpy as np
 
@@ -123,11 +122,16 @@ class OneSpec(datamodel.DataContainer):
 class CoAdd1D(object):
 
     @classmethod
-    def get_instance(cls, spec1dfiles, objids, spectrograph=None, par=None, sensfile=None, debug=False, show=False):
+    def get_instance(cls, spec1dfiles, objids, spectrograph=None, par=None, sensfile=None, debug=False, show=False,
+                     pypeline=None):
         """
         Superclass factory method which generates the subclass instance. See __init__ docs for arguments.
+
+        If ``pypeline`` is None, it is read from the header of the first spec1d file.
         """
-        pypeline = fits.getheader(spec1dfiles[0])['PYPELINE'] + 'CoAdd1D'
+        if pypeline is None:
+            pypeline = fits.getheader(spec1dfiles[0])['PYPELINE']
+        pypeline += 'CoAdd1D'
         return next(c for c in cls.__subclasses__() if c.__name__ == pypeline)(
             spec1dfiles, objids, spectrograph=spectrograph, par=par, sensfile=sensfile, debug=debug, show=show)
 
@@ -169,34 +173,62 @@ class CoAdd1D(object):
         self.show = show
         self.nexp = len(self.spec1dfiles) # Number of exposures
         self.coaddfile = None
+        self.header = None
 
-    def run(self):
+    def run(self, sobjs_list=None):
         """
         Runs the coadding
+
+        Args:
+            sobjs_list (:obj:`list`, optional):
+                List of :class:`pypeit.specobjs.SpecObjs` already read
+                from each of the spec1d files; see :func:`load_arrays`.
         """
 
         # Load the data
-        self.waves, self.fluxes, self.ivars, self.masks, self.header = self.load_arrays()
+        self.waves, self.fluxes, self.ivars, self.masks, self.header = self.load_arrays(sobjs_list=sobjs_list)
         # Coadd the data
-        self.wave_coadd, self.flux_coadd, self.ivar_coadd, self.mask_coadd = self.coadd()
+        self.wave_coadd, self.flux_coadd, self.ivar_coadd, self.mask_coadd = self.combine()
+
+    def combine(self):
+        """
+        Coadd the loaded arrays and, if requested, scale the result to a
+        filter magnitude.
+
+        Returns:
+            tuple:
+               - wave, flux, ivar, mask
+        """
+        wave_coadd, flux_coadd, ivar_coadd, mask_coadd = self.coadd()
         # Scale to a filter magnitude?
         if self.par['filter'] != 'none':
-            scale = flux_calib.scale_in_filter(self.wave_coadd, self.flux_coadd, self.mask_coadd, self.par)
-            self.flux_coadd *= scale
-            self.ivar_coadd = self.ivar_coadd / scale**2
+            scale = flux_calib.scale_in_filter(wave_coadd, flux_coadd, mask_coadd, self.par)
+            flux_coadd *= scale
+            ivar_coadd = ivar_coadd / scale**2
+        return wave_coadd, flux_coadd, ivar_coadd, mask_coadd
 
-    def load_arrays(self):
+    def load_arrays(self, sobjs_list=None):
         """
         Load the arrays we need for performing coadds.
 
+        Args:
+            sobjs_list (:obj:`list`, optional):
+                List of :class:`pypeit.specobjs.SpecObjs`, one per
+                spec1d file, that contain (at least) the objects to
+                coadd.  If None, the objects are read from
+                :attr:`spec1dfiles`.
+
         Returns:
             tuple:
                - waves, fluxes, ivars, masks, header
         """
 
         for iexp in range(self.nexp):
-            sobjs = specobjs.SpecObjs.from_fitsfile(self.spec1dfiles[iexp])
-            indx = sobjs.name_indices(self.objids[iexp])
+            # Only read the requested object
+            sobjs = specobjs.SpecObjs.from_fitsfile(self.spec1dfiles[iexp], names=self.objids[iexp]) \
+                        if sobjs_list is None else sobjs_list[iexp]
+            indx = sobjs.name_indices(self.objids[iexp]) if sobjs.nobj > 0 \
+                        else np.zeros(0, dtype=bool)
             if not np.any(indx):
                 msgs.error("No matching objects for {:s}.  Odds are you input the wrong OBJID".format(self.objids[iexp]))
             wave_iexp, flux_iexp, ivar_iexp, mask_iexp, meta_spec, header = \
@@ -235,7 +267,7 @@ class CoAdd1D(object):
                           mask=self.mask_coadd[wave_mask].astype(int),
                           ext_mode=self.par['ex_value'],
                           fluxed=self.par['flux_value'])
-        onespec.head0 = fits.getheader(self.spec1dfiles[0])
+        onespec.head0 = fits.getheader(self.spec1dfiles[0]) if self.header is None else self.header
 
         # Add on others
         if telluric is not None:
@@ -325,6 +357,112 @@ class EchelleCoAdd1D(CoAdd1D):
             scale_method=self.par['scale_method'], sn_min_medscale=self.par['sn_min_medscale'],
             sn_min_polyscale=self.par['sn_min_polyscale'], maxiter_reject=self.par['maxiter_reject'],
             lower=self.par['lower'], upper=self.par['upper'], maxrej=self.par['maxrej'], sn_clip=self.par['sn_clip'],
-            debug = self.debug, show = self.show, extrap_sens=self.par['extrap_sens'])
+            debug = self.debug, show = self.show, extrap_sens=self.par['extrap_sens'],
+            nproc=self.par['nproc'])
 
         return wave_coadd, flux_coadd, ivar_coadd, mask_coadd
+
+
+def _combine_group(coadd1d):
+    """
+    Worker function used by :func:`batch_coadd1d` to coadd a single
+    group, possibly in a separate process.
+
+    Args:
+        coadd1d (:class:`CoAdd1D`):
+            Object with the arrays already loaded.
+
+    Returns:
+        tuple: wave, flux, ivar, mask of the coadded spectrum.
+    """
+    return coadd1d.combine()
+
+
+def batch_coadd1d(groups, coaddfiles, spectrograph=None, par=None, sensfile=None, nproc=1,
+                  debug=False, show=False, overwrite=True):
+    """
+    Coadd many objects, reading each spec1d file only once.
+
+    Each spec1d file that appears in any group is read a single time,
+    keeping only the objects requested by any of the groups.  The
+    coadd of each group (see :func:`CoAdd1D.combine`) is then performed
+    either serially or in a pool of ``nproc`` processes, and the
+    result of each group is written to its own :class:`OneSpec` file.
+
+    Args:
+        groups (:obj:`list`):
+            List of object groups.  Each group is a tuple with two
+            lists: the spec1d files and the object names in each of
+            those files to coadd; see :class:`CoAdd1D`.
+        coaddfiles (:obj:`list`):
+            Output file for each group.
+        spectrograph (:class:`pypeit.spectrographs.spectrograph.Spectrograph`, optional):
+            Spectrograph used for all groups.  If None, instantiated
+            from the header of the first spec1d file.
+        par (:class:`pypeit.par.pypeitpar.Coadd1DPar`, optional):
+            Parameters for the coadd; applied to all groups.
+        sensfile (:obj:`str`, optional):
+            File holding the sensitivity function.  Required for
+            echelle coadds only.
+        nproc (:obj:`int`, optional):
+            Number of processes used to coadd the groups.  If 1, the
+            groups are coadded serially.
+        debug (:obj:`bool`, optional):
+            Debug.
+        show (:obj:`bool`, optional):
+            Show QA plots.  Only used when ``nproc`` is 1.
+        overwrite (:obj:`bool`, optional):
+            Overwrite existing output files.
+
+    Returns:
+        :obj:`list`: List of :class:`CoAdd1D` objects, one per group.
+    """
+    if len(groups) != len(coaddfiles):
+        msgs.error('Must provide an output file for each group of objects to coadd.')
+
+    # Collect the object names needed from each file
+    names = {}
+    for spec1dfiles, objids in groups:
+        if len(spec1dfiles) != len(objids):
+            msgs.error('Each group must provide an objid for each spec1d file.')
+        for spec1dfile, objid in zip(spec1dfiles, objids):
+            names.setdefault(spec1dfile, [])
+            if objid not in names[spec1dfile]:
+                names[spec1dfile] += [objid]
+
+    # Read each file once
+    msgs.info('Reading {0} spec1d files for {1} coadds'.format(len(names), len(groups)))
+    sobjs = {}
+    for spec1dfile in names:
+        sobjs[spec1dfile] = specobjs.SpecObjs.from_fitsfile(spec1dfile, names=names[spec1dfile])
+
+    header = sobjs[groups[0][0][0]].header
+    if spectrograph is None:
+        spectrograph = load_spectrograph(header['PYP_SPEC'])
+    if par is None:
+        par = spectrograph.default_pypeit_par()['coadd1d']
+
+    # Load the arrays for each group
+    coadds = []
+    for spec1dfiles, objids in groups:
+        coadd1d = CoAdd1D.get_instance(spec1dfiles, objids, spectrograph=spectrograph, par=par,
+                                       sensfile=sensfile, debug=debug, show=show and nproc == 1,
+                                       pypeline=sobjs[spec1dfiles[0]].header['PYPELINE'])
+        coadd1d.waves, coadd1d.fluxes, coadd1d.ivars, coadd1d.masks, coadd1d.header \
+                = coadd1d.load_arrays(sobjs_list=[sobjs[f] for f in spec1dfiles])
+        coadds += [coadd1d]
+    del sobjs
+
+    # Coadd
+    if nproc > 1 and len(coadds) > 1:
+        with futures.ProcessPoolExecutor(max_workers=nproc) as executor:
+            results = list(executor.map(_combine_group, coadds))
+    else:
+        results = [_combine_group(coadd1d) for coadd1d in coadds]
+
+    # Save
+    for coadd1d, result, coaddfile in zip(coadds, results, coaddfiles):
+        coadd1d.wave_coadd, coadd1d.flux_coadd, coadd1d.ivar_coadd, coadd1d.mask_coadd = result
+        coadd1d.save(coaddfile, overwrite=overwrite)
+
+    return coadds
@@ -7,19 +7,19 @@ Module for performing two-dimensional coaddition of spectra.
 import os
 import copy
 
-from IPython import embed
-
 import numpy as np
 from scipy import ndimage
 from matplotlib import pyplot as plt
 
 from pypeit import msgs
+from pypeit import utils
 from pypeit import specobjs
 from pypeit import slittrace
 from pypeit import reduce
 from pypeit.images import pypeitimage
 from pypeit.core import extract
 from pypeit.core import coadd
+from pypeit.core import combine
 from pypeit.core import parse
 from pypeit import calibrations
 from pypeit import spec2dobj
@@ -127,6 +127,7 @@ class CoAdd2D:
         self.debug = debug
         self.stack_dict = None
         self.pseudo_dict = None
+        self.streaming = self.par['coadd2d']['streaming']
 
         self.objid_bri = None
         self.slitid_bri  = None
@@ -144,7 +145,7 @@ class CoAdd2D:
         # TODO: Do the same check above but for the shape and binning
         # of the input images?
         self.nslits = nslits_list[0]
-        self.nexp = len(self.stack_dict['specobjs_list'])
+        self.nexp = len(self.stack_dict['slits_list'])
         self.nspec = self.stack_dict['slits_list'][0].nspec
         self.binning = np.array([self.stack_dict['slits_list'][0].binspec,
                                  self.stack_dict['slits_list'][0].binspat])
@@ -223,8 +224,12 @@ class CoAdd2D:
                 slits.mask, flag=slits.bitmask.exclude_for_reducing)))
             good_slits = np.where(np.invert(reduce_bpm))[0]
         else:
+            from IPython import embed
             embed(header='DEAL WITH bitmask')
 
+        if self.streaming:
+            return self.coadd_streaming(good_slits, interp_dspat=interp_dspat)
+
         coadd_list = []
         for slit_idx in good_slits:
             slitord_id = self.stack_dict['slits_list'][0].slitord_id[slit_idx]
@@ -248,7 +253,9 @@ class CoAdd2D:
                                            self.stack_dict['tilts_stack'],
                                                thismask_stack,
                                            self.stack_dict['waveimg_stack'],
-                                           self.wave_grid, weights=weights, interp_dspat=interp_dspat)
+                                           self.wave_grid, weights=weights, interp_dspat=interp_dspat,
+                                           sigrej=self.par['coadd2d']['sigrej'],
+                                           maxiters=self.par['coadd2d']['maxiters'])
             coadd_list.append(coadd_dict)
 
         return coadd_list
@@ -570,30 +577,15 @@ class CoAdd2D:
         # TODO: Do we need this flag since we can determine whether or not we have specobjs from nobjs_tot?
         #  This all seems a bit hacky
         if self.par['coadd2d']['use_slits4wvgrid'] or nobjs_tot==0:
-            nslits_tot = np.sum([slits.nslits for slits in self.stack_dict['slits_list']])
-            waves = np.zeros((self.nspec, nslits_tot*3))
-            gpm = np.zeros_like(waves, dtype=bool)
-            box_radius = 3.
-            indx = 0
-            # Loop on the exposures
-            for waveimg, slitmask, slits in zip(self.stack_dict['waveimg_stack'],
-                                                self.stack_dict['slitmask_stack'],
-                                                self.stack_dict['slits_list']):
-                slits_left, slits_righ, _ = slits.select_edges()
-                row = np.arange(slits_left.shape[0])
-                # Loop on the slits
-                for kk, spat_id in enumerate(slits.spat_id):
-                    mask = slitmask == spat_id
-                    # Create apertures at 5%, 50%, and 95% of the slit width to cover full range of wavelengths
-                    # on this slit
-                    trace_spat = slits_left[:, kk][:,np.newaxis] +  np.outer((slits_righ[:,kk] - slits_left[:,kk]),[0.05,0.5,0.95])
-                    box_denom = moment1d(waveimg * mask > 0.0, trace_spat, 2 * box_radius, row=row)[0]
-                    wave_box = moment1d(waveimg * mask, trace_spat, 2 * box_radius,
-                                    row=row)[0] / (box_denom + (box_denom == 0.0))
-                    waves[:, indx:indx+3] = wave_box
-                    # TODO -- This looks a bit risky
-                    gpm[:, indx: indx+3] = wave_box > 0.
-                    indx += 3
+            # When streaming, these are computed as the files are read
+            slit_waves = self.stack_dict['slit_waves'] if self.streaming \
+                            else [self.slit_waves(waveimg, slitmask, slits)
+                                    for waveimg, slitmask, slits
+                                        in zip(self.stack_dict['waveimg_stack'],
+                                               self.stack_dict['slitmask_stack'],
+                                               self.stack_dict['slits_list'])]
+            waves = np.concatenate([w for w, _ in slit_waves], axis=1)
+            gpm = np.concatenate([g for _, g in slit_waves], axis=1)
         else:
             waves = np.zeros((self.nspec, nobjs_tot))
             gpm = np.zeros_like(waves, dtype=bool)
@@ -608,10 +600,58 @@ class CoAdd2D:
         wave_grid, wave_grid_mid, dsamp = coadd.get_wave_grid(waves, masks=gpm, **kwargs_wave)
         return wave_grid, wave_grid_mid, dsamp
 
+    @staticmethod
+    def slit_waves(waveimg, slitmask, slits):
+        """
+        Compute the wavelengths along each slit of one exposure.
+
+        Wavelengths are determined by boxcar extraction of the
+        wavelength image along apertures at 5%, 50%, and 95% of the slit
+        width.  Used by :func:`get_wave_grid`.
+
+        Args:
+            waveimg (`numpy.ndarray`_):
+                Wavelength image.
+            slitmask (`numpy.ndarray`_):
+                Slit image; see
+                :func:`pypeit.slittrace.SlitTraceSet.slit_img`.
+            slits (:class:`pypeit.slittrace.SlitTraceSet`):
+                Slits of the exposure.
+
+        Returns:
+            tuple: The wavelengths and good-pixel mask, both with shape
+            (nspec, 3*nslits).
+        """
+        waves = np.zeros((slits.nspec, slits.nslits*3))
+        gpm = np.zeros_like(waves, dtype=bool)
+        box_radius = 3.
+        slits_left, slits_righ, _ = slits.select_edges()
+        row = np.arange(slits_left.shape[0])
+        # Loop on the slits
+        for kk, spat_id in enumerate(slits.spat_id):
+            mask = slitmask == spat_id
+            # Create apertures at 5%, 50%, and 95% of the slit width to cover full range of wavelengths
+            # on this slit
+            trace_spat = slits_left[:, kk][:,np.newaxis] +  np.outer((slits_righ[:,kk] - slits_left[:,kk]),[0.05,0.5,0.95])
+            box_denom = moment1d(waveimg * mask > 0.0, trace_spat, 2 * box_radius, row=row)[0]
+            wave_box = moment1d(waveimg * mask, trace_spat, 2 * box_radius,
+                            row=row)[0] / (box_denom + (box_denom == 0.0))
+            waves[:, 3*kk:3*kk+3] = wave_box
+            # TODO -- This looks a bit risky
+            gpm[:, 3*kk:3*kk+3] = wave_box > 0.
+        return waves, gpm
+
     def load_coadd2d_stacks(self, spec2d):
         """
         Routine to read in required images for 2d coadds given a list of spec2d files.
 
+        If streaming (see :class:`pypeit.par.pypeitpar.Coadd2DPar`),
+        the image stacks are not constructed.  Instead, the footprint
+        of each slit in each exposure is recorded (see
+        :func:`pypeit.core.coadd.get_slit_footprints`), and the images
+        are re-read one exposure at a time when needed (see
+        :func:`rebin_exposures`).
+
         Args:
             spec2d_files: list
                List of spec2d filenames
@@ -636,21 +676,33 @@ class CoAdd2D:
         slits_list = []
         nfiles =len(spec2d)
         detectors_list = []
+        footprints_list = []
+        slit_waves_list = []
         for ifile, f in enumerate(spec2d):
+            nobj = 0
             if isinstance(f, spec2dobj.Spec2DObj):
                 # If spec2d is a list of objects
                 s2dobj = f
             else:
                 # If spec2d is a list of files, option to also use spec1ds
-                s2dobj = spec2dobj.Spec2DObj.from_file(f, self.det)
+                s2dobj = spec2dobj.Spec2DObj.from_file(f, self.det, lazy=self.streaming)
                 spec1d_file = f.replace('spec2d', 'spec1d')
                 if os.path.isfile(spec1d_file):
-                    sobjs = specobjs.SpecObjs.from_fitsfile(spec1d_file)
-                    this_det = sobjs.DET == self.det
-                    specobjs_list.append(sobjs[this_det])
+                    sobjs = specobjs.SpecObjs.from_fitsfile(spec1d_file, det=self.det)
+                    specobjs_list.append(sobjs)
+                    nobj = sobjs.nobj
             # TODO the code should run without a spec1d file, but we need to implement that
             slits_list.append(s2dobj.slits)
             detectors_list.append(s2dobj.detector)
+            if self.streaming:
+                # Only keep what is needed to set the rectification
+                # grid and the wavelength grid
+                slitmask = s2dobj.slits.slit_img(flexure=s2dobj.sci_spat_flexure)
+                footprints_list.append(coadd.get_slit_footprints(slitmask, s2dobj.waveimg,
+                                                                 slits_list[0].spat_id))
+                if self.par['coadd2d']['use_slits4wvgrid'] or nobj == 0:
+                    slit_waves_list.append(self.slit_waves(s2dobj.waveimg, slitmask, s2dobj.slits))
+                continue
             if ifile == 0:
                 sciimg_stack = np.zeros((nfiles,) + s2dobj.sciimg.shape, dtype=float)
                 waveimg_stack = np.zeros_like(sciimg_stack, dtype=float)
@@ -672,6 +724,13 @@ class CoAdd2D:
             #_tilt_flexure_shift = _spat_flexure - spec2DObj.tilts.spat_flexure if spec2DObj.tilts.spat_flexure is not None else _spat_flexure
             tilts_stack[ifile,:,:] = s2dobj.tilts #.fit2tiltimg(slitmask_stack[ifile, :, :], flexure=_tilt_flexure_shift)
 
+        if self.streaming:
+            return dict(specobjs_list=specobjs_list, slits_list=slits_list, spec2d=spec2d,
+                        footprints=footprints_list, slit_waves=slit_waves_list,
+                        redux_path=redux_path,
+                        detectors=detectors_list,
+                        spectrograph=self.spectrograph.name,
+                        pypeline=self.spectrograph.pypeline)
 
         return dict(specobjs_list=specobjs_list, slits_list=slits_list,
                     slitmask_stack=slitmask_stack,
@@ -683,6 +742,189 @@ class CoAdd2D:
                     spectrograph=self.spectrograph.name,
                     pypeline=self.spectrograph.pypeline)
 
+    def rectification_bins(self, slit_idx, ref_trace_stack):
+        """
+        Determine the rectification grid for a slit from the slit
+        footprints recorded when streaming.
+
+        This is equivalent to calling
+        :func:`pypeit.core.coadd.get_wave_bins` and
+        :func:`pypeit.core.coadd.get_spat_bins` with the full image
+        stacks.
+
+        Args:
+            slit_idx (:obj:`int`):
+                0-indexed slit number.
+            ref_trace_stack (`numpy.ndarray`_):
+                Reference traces for each exposure; shape is (nspec,
+                nexp).
+
+        Returns:
+            tuple: The wavelength and spatial bins.
+        """
+        footprints = self.stack_dict['footprints']
+        wave_lower = np.nanmin([fp['wave_min'][slit_idx] for fp in footprints])
+        wave_upper = np.nanmax([fp['wave_max'][slit_idx] for fp in footprints])
+        ind_lower, ind_upper = coadd.get_wave_ind(self.wave_grid, wave_lower, wave_upper)
+        wave_bins = self.wave_grid[ind_lower:ind_upper + 1]
+
+        spat_min = np.inf
+        spat_max = -np.inf
+        for iexp, fp in enumerate(footprints):
+            rows = fp['spat_min'][slit_idx] > -1
+            spat_min = np.fmin(spat_min, np.amin(fp['spat_min'][slit_idx,rows]
+                                                 - ref_trace_stack[rows,iexp]))
+            spat_max = np.fmax(spat_max, np.amax(fp['spat_max'][slit_idx,rows]
+                                                 - ref_trace_stack[rows,iexp]))
+        dspat_bins = np.arange(int(np.floor(spat_min)), int(np.ceil(spat_max)) + 1, 1, dtype=float)
+        return wave_bins, dspat_bins
+
+    def rebin_exposures(self, slit_idx, ref_trace_stack, wave_bins, dspat_bins, weights=None):
+        """
+        Read the spec2d files one at a time and rectify the slits of
+        each exposure.
+
+        This is a generator used when streaming.  Each file is read
+        lazily and only the image regions covering the requested slits
+        are rebinned.
+
+        Args:
+            slit_idx (array-like):
+                0-indexed slit numbers.
+            ref_trace_stack (:obj:`list`):
+                Reference traces for each slit; each element has shape
+                (nspec, nexp).
+            wave_bins (:obj:`list`):
+                Wavelength bins for each slit.
+            dspat_bins (:obj:`list`):
+                Spatial bins for each slit.
+            weights (:obj:`list`, optional):
+                Weights for each slit; see
+                :func:`pypeit.core.coadd.compute_coadd2d`.  If None, only
+                the sky-subtracted image is rebinned.
+
+        Yields:
+            :obj:`list`: For each exposure, a list with the rebinned
+            images for each slit.  Each element is the tuple returned by
+            :func:`pypeit.core.coadd.rebin2d_image`, where the science
+            images are the weights, the science image, the
+            sky-subtracted image, the tilts, the wavelengths, and the
+            spatial offsets if ``weights`` is provided, or just the
+            sky-subtracted image otherwise.
+        """
+        spat_ids = self.stack_dict['slits_list'][0].spat_id
+        for iexp, f in enumerate(self.stack_dict['spec2d']):
+            s2dobj = f if isinstance(f, spec2dobj.Spec2DObj) \
+                        else spec2dobj.Spec2DObj.from_file(f, self.det, lazy=True)
+            slitmask = self.stack_dict['slits_list'][iexp].slit_img(flexure=s2dobj.sci_spat_flexure)
+            footprints = self.stack_dict['footprints'][iexp]
+            rebinned = []
+            for kk, islit in enumerate(slit_idx):
+                # Only use the columns covered by the slit
+                rows = footprints['spat_min'][islit] > -1
+                if not np.any(rows):
+                    # Slit not in this exposure
+                    spat = slice(0,0)
+                else:
+                    spat = slice(np.amin(footprints['spat_min'][islit,rows]),
+                                 np.amax(footprints['spat_max'][islit,rows])+1)
+                thismask = slitmask[:,spat] == spat_ids[islit]
+                inmask = s2dobj.bpmmask[:,spat] == 0
+                waveimg = s2dobj.waveimg[:,spat]
+                dspat = np.arange(s2dobj.sciimg.shape[1])[spat][None,:] \
+                            - ref_trace_stack[kk][:,iexp,None]
+                imgminsky = s2dobj.sciimg[:,spat] - s2dobj.skymodel[:,spat]
+                var_list = [utils.calc_ivar(s2dobj.ivarmodel[:,spat])]
+                if weights is None:
+                    sci_list = [imgminsky]
+                else:
+                    _weights = np.asarray(weights[kk])
+                    if _weights.ndim == 1:
+                        weights_img = np.full(thismask.shape, _weights[iexp], dtype=float)
+                    elif _weights.ndim == 2:
+                        weights_img = np.repeat(_weights[iexp][:,None], thismask.shape[1], axis=1)
+                    else:
+                        weights_img = _weights[iexp][:,spat]
+                    sci_list = [weights_img, s2dobj.sciimg[:,spat], imgminsky,
+                                s2dobj.tilts[:,spat], waveimg, dspat]
+                rebinned += [coadd.rebin2d_image(wave_bins[kk], dspat_bins[kk], waveimg, dspat,
+                                                 thismask, inmask, sci_list, var_list)]
+            del s2dobj
+            yield rebinned
+
+    def coadd_streaming(self, good_slits, interp_dspat=True):
+        """
+        Perform the 2d coadd of all good slits, reading the spec2d files
+        one at a time.
+
+        The result is the same as :func:`coadd`, except for the
+        rejection of outlying pixels; see
+        :class:`pypeit.core.combine.StreamingWeightedCombine`.  Each
+        file is read once per rejection iteration (at most ``maxiters``
+        in the ``coadd2d`` parameters) and once to combine the images,
+        or only once if there are fewer than 3 exposures.
+
+        Args:
+            good_slits (`numpy.ndarray`_):
+                0-indexed numbers of the slits to coadd.
+            interp_dspat (:obj:`bool`, optional):
+                See :func:`pypeit.core.coadd.compute_coadd2d`.
+
+        Returns:
+            :obj:`list`: List of dictionaries with the coadd of each
+            slit; see :func:`pypeit.core.coadd.compute_coadd2d`.
+        """
+        ref_trace_stack = []
+        weights = []
+        wave_bins = []
+        dspat_bins = []
+        combiners = []
+        for slit_idx in good_slits:
+            slitord_id = self.stack_dict['slits_list'][0].slitord_id[slit_idx]
+            ref_trace_stack += [self.reference_trace_stack(slit_idx, offsets=self.offsets,
+                                                           objid=self.objid_bri)]
+            if 'auto_echelle' in self.use_weights:
+                rms_sn, _weights = self.optimal_weights(slitord_id, self.objid_bri)
+            elif 'uniform' in self.use_weights:
+                _weights = np.ones(self.nexp)/float(self.nexp)
+            else:
+                _weights = self.use_weights
+            weights += [_weights]
+            _wave_bins, _dspat_bins = self.rectification_bins(slit_idx, ref_trace_stack[-1])
+            wave_bins += [_wave_bins]
+            dspat_bins += [_dspat_bins]
+            # Combine the science image, sky-subtracted image, tilts,
+            # wavelengths, and spatial offsets
+            combiners += [combine.StreamingWeightedCombine(
+                                (_wave_bins.size-1, _dspat_bins.size-1), 5, 1,
+                                sigrej=self.par['coadd2d']['sigrej'],
+                                maxiters=self.par['coadd2d']['maxiters'])]
+
+        # Iterate the rejection statistics until they converge for all
+        # slits
+        iterate = self.nexp > 2
+        while iterate:
+            msgs.info('Collecting rejection statistics')
+            for rebinned in self.rebin_exposures(good_slits, ref_trace_stack, wave_bins,
+                                                 dspat_bins):
+                for combiner, (sci_list, var_list, norm, _) in zip(combiners, rebinned):
+                    # sci_list[0] = rebinned sciimg-sky_model image used for rejection
+                    combiner.add_clip_sample(sci_list[0], norm > 0, clip_var=var_list[0])
+            iterate = np.any([combiner.next_clip_iteration() for combiner in combiners])
+
+        msgs.info('Combining rectified images')
+        for rebinned in self.rebin_exposures(good_slits, ref_trace_stack, wave_bins, dspat_bins,
+                                             weights=weights):
+            for combiner, (sci_list, var_list, norm, _) in zip(combiners, rebinned):
+                # sci_list[0] = rebinned weights image
+                # sci_list[2] = rebinned sciimg-sky_model image used for rejection
+                combiner.add(sci_list[0], sci_list[1:], var_list, norm > 0,
+                             clip_img=sci_list[2], clip_var=var_list[0])
+
+        return [coadd.finalize_coadd2d(_wave_bins, _dspat_bins, *combiner.result(),
+                                       interp_dspat=interp_dspat)
+                    for _wave_bins, _dspat_bins, combiner in zip(wave_bins, dspat_bins, combiners)]
+
 # Multislit can coadd with:
 # 1) input offsets or if offsets is None, it will find the brightest trace and compute them
 # 2) specified weights, or if weights is None and auto_weights=True, it will compute weights using the brightest object
@@ -745,36 +987,43 @@ class MultiSlitCoAdd2D(CoAdd2D):
         objid_bri, slitidx_bri, spatid_bri, snr_bar_bri = self.get_brightest_obj(self.stack_dict['specobjs_list'],
                                                                     self.spat_ids)
         msgs.info('Determining offsets using brightest object on slit: {:d} with avg SNR={:5.2f}'.format(spatid_bri,np.mean(snr_bar_bri)))
-        thismask_stack = self.stack_dict['slitmask_stack'] == spatid_bri
         trace_stack_bri = np.zeros((self.nspec, self.nexp))
         # TODO Need to think abbout whether we have multiple tslits_dict for each exposure or a single one
         for iexp in range(self.nexp):
             trace_stack_bri[:,iexp] = self.stack_dict['slits_list'][iexp].center[:,slitidx_bri]
 #            trace_stack_bri[:,iexp] = (self.stack_dict['tslits_dict_list'][iexp]['slit_left'][:,slitid_bri] +
 #                                       self.stack_dict['tslits_dict_list'][iexp]['slit_righ'][:,slitid_bri])/2.0
-        # Determine the wavelength grid that we will use for the current slit/order
-        wave_bins = coadd.get_wave_bins(thismask_stack, self.stack_dict['waveimg_stack'], self.wave_grid)
-        dspat_bins, dspat_stack = coadd.get_spat_bins(thismask_stack, trace_stack_bri)
-
-        sci_list = [self.stack_dict['sciimg_stack'] - self.stack_dict['skymodel_stack']]
-        var_list = []
-
         msgs.info('Rebinning Images')
-        sci_list_rebin, var_list_rebin, norm_rebin_stack, nsmp_rebin_stack = coadd.rebin2d(
-            wave_bins, dspat_bins, self.stack_dict['waveimg_stack'], dspat_stack, thismask_stack,
-            (self.stack_dict['mask_stack'] == 0), sci_list, var_list)
-        thismask = np.ones_like(sci_list_rebin[0][0,:,:],dtype=bool)
-        nspec_pseudo, nspat_pseudo = thismask.shape
+        if self.streaming:
+            # Rebin one exposure at a time
+            wave_bins, dspat_bins = self.rectification_bins(slitidx_bri, trace_stack_bri)
+            rebinned = (r[0] for r in self.rebin_exposures([slitidx_bri], [trace_stack_bri],
+                                                           [wave_bins], [dspat_bins]))
+            rebinned = ((sci_list[0], norm > 0) for sci_list, _, norm, _ in rebinned)
+        else:
+            thismask_stack = self.stack_dict['slitmask_stack'] == spatid_bri
+            # Determine the wavelength grid that we will use for the current slit/order
+            wave_bins = coadd.get_wave_bins(thismask_stack, self.stack_dict['waveimg_stack'], self.wave_grid)
+            dspat_bins, dspat_stack = coadd.get_spat_bins(thismask_stack, trace_stack_bri)
+
+            sci_list = [self.stack_dict['sciimg_stack'] - self.stack_dict['skymodel_stack']]
+            var_list = []
+
+            sci_list_rebin, var_list_rebin, norm_rebin_stack, nsmp_rebin_stack = coadd.rebin2d(
+                wave_bins, dspat_bins, self.stack_dict['waveimg_stack'], dspat_stack, thismask_stack,
+                (self.stack_dict['mask_stack'] == 0), sci_list, var_list)
+            rebinned = zip(sci_list_rebin[0], norm_rebin_stack > 0)
+        nspec_pseudo, nspat_pseudo = wave_bins.size-1, dspat_bins.size-1
+        thismask = np.ones((nspec_pseudo, nspat_pseudo), dtype=bool)
         slit_left = np.full(nspec_pseudo, 0.0)
         slit_righ = np.full(nspec_pseudo, nspat_pseudo)
-        inmask = norm_rebin_stack > 0
         traces_rect = np.zeros((nspec_pseudo, self.nexp))
         sobjs = specobjs.SpecObjs()
         #specobj_dict = {'setup': 'unknown', 'slitid': 999, 'orderindx': 999, 'det': self.det, 'objtype': 'unknown',
         #                'pypeline': 'MultiSLit' + '_coadd_2d'}
-        for iexp in range(self.nexp):
-            sobjs_exp, _ = extract.objfind(sci_list_rebin[0][iexp,:,:], thismask, slit_left, slit_righ,
-                                           inmask=inmask[iexp,:,:], ir_redux=self.ir_redux,
+        for iexp, (imgminsky_rebin, inmask) in enumerate(rebinned):
+            sobjs_exp, _ = extract.objfind(imgminsky_rebin, thismask, slit_left, slit_righ,
+                                           inmask=inmask, ir_redux=self.ir_redux,
                                            fwhm=self.par['reduce']['findobj']['find_fwhm'],
                                            trim_edg=self.par['reduce']['findobj']['find_trim_edge'],
                                            npoly_cont=self.par['reduce']['findobj']['find_npoly_cont'],
@@ -21,7 +21,6 @@ from pypeit import utils
 from pypeit.core.wavecal import wvutils
 from pypeit.core.wavecal import wv_fitting
 from pypeit.core import fitting
-from IPython import embed
 
 
 from pypeit.core import pydl
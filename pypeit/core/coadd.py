@@ -7,10 +7,10 @@ Coadding module.
 """
 
 import os
+import functools
+from concurrent import futures
 from pkg_resources import resource_filename
 
-from IPython import embed
-
 import numpy as np
 import scipy
 
@@ -592,8 +592,12 @@ def interp_oned(wave_new, wave_old, flux_old, ivar_old, mask_old):
     '''
     Utility routine to perform 1d linear nterpolation of spectra onto a new wavelength grid
 
+    The flux, ivar and mask are interpolated using a single cubic
+    spline with three components, which is identical to (but faster
+    than) interpolating each one separately.
+
     Args:
-       wave_new: ndarray, (nspec_new)
+       wave_new: ndarray, (nspec_new) or (nspec_new, nimgs)
             New wavelengths that you want to interpolate onto.
        wave_old: ndarray, (nspec_old)
             Old wavelength grid
@@ -605,10 +609,10 @@ def interp_oned(wave_new, wave_old, flux_old, ivar_old, mask_old):
             Old mask on the wave_old grid. True=Good
 
     Returns:
-        (1) flux_new: ndarray, (nspec_new,) -- interpolated flux; (2)
-        ivar_new: ndarray, (nspec_new,) -- interpolated ivar; (3)
-        mask_new: ndarray, bool, (nspec_new,) -- interpolated mask.
-        True=Good.
+        (1) flux_new: ndarray, same shape as wave_new -- interpolated
+        flux; (2) ivar_new: ndarray, same shape as wave_new --
+        interpolated ivar; (3) mask_new: ndarray, bool, same shape as
+        wave_new -- interpolated mask.  True=Good.
     '''
 
     # Do not interpolate if the wavelength is exactly same with wave_new
@@ -618,12 +622,12 @@ def interp_oned(wave_new, wave_old, flux_old, ivar_old, mask_old):
     # make the mask array to be float, used for interpolation
     masks_float = mask_old.astype(float)
     wave_mask = wave_old > 1.0 # Deal with the zero wavelengths
-    flux_new = scipy.interpolate.interp1d(wave_old[wave_mask], flux_old[wave_mask], kind='cubic',
-                                    bounds_error=False, fill_value=np.nan)(wave_new)
-    ivar_new = scipy.interpolate.interp1d(wave_old[wave_mask], ivar_old[wave_mask], kind='cubic',
-                                    bounds_error=False, fill_value=np.nan)(wave_new)
-    mask_new_tmp = scipy.interpolate.interp1d(wave_old[wave_mask], masks_float[wave_mask], kind='cubic',
-                                        bounds_error=False, fill_value=np.nan)(wave_new)
+    vals_new = scipy.interpolate.interp1d(wave_old[wave_mask],
+                                          np.stack((flux_old[wave_mask], ivar_old[wave_mask],
+                                                    masks_float[wave_mask]), axis=-1),
+                                          kind='cubic', bounds_error=False, fill_value=np.nan,
+                                          axis=0)(wave_new)
+    flux_new, ivar_new, mask_new_tmp = vals_new[...,0], vals_new[...,1], vals_new[...,2]
     # Don't allow the ivar to be every less than zero
     ivar_new = (ivar_new > 0.0)*ivar_new
     mask_new = (mask_new_tmp > 0.8) & (ivar_new > 0.0) & np.isfinite(flux_new) & np.isfinite(ivar_new)
@@ -676,9 +680,16 @@ def interp_spec(wave_new, waves, fluxes, ivars, masks):
         ivars_inter = np.zeros_like(wave_new)
         masks_inter = np.zeros_like(wave_new, dtype=bool)
 
-        for ii in range(nexp):
-            fluxes_inter[:, ii], ivars_inter[:, ii], masks_inter[:, ii] = interp_oned(
-                wave_new[:, ii], waves, fluxes, ivars, masks)
+        # Exposures that are already on the old grid are not interpolated
+        same = np.array([np.array_equal(wave_new[:, ii], waves) for ii in range(nexp)])
+        if np.any(same):
+            fluxes_inter[:, same], ivars_inter[:, same], masks_inter[:, same] \
+                    = fluxes[:, None], ivars[:, None], masks[:, None]
+        # The spline is the same for all exposures, so interpolate them all at once
+        interp = np.invert(same)
+        if np.any(interp):
+            fluxes_inter[:, interp], ivars_inter[:, interp], masks_inter[:, interp] \
+                    = interp_oned(wave_new[:, interp], waves, fluxes, ivars, masks)
 
         return fluxes_inter, ivars_inter, masks_inter
 
@@ -1306,10 +1317,35 @@ def scale_spec(wave, flux, ivar, sn, wave_ref, flux_ref, ivar_ref, mask=None, ma
     return flux_scale, ivar_scale, scale, method_used
 
 
-def compute_stack(wave_grid, waves, fluxes, ivars, masks, weights, min_weight=1e-8):
+def wave_grid_indices(wave_grid, waves):
+    """
+    Compute the wavelength bin of each pixel in a set of spectra.
+
+    The bins are defined identically to `numpy.histogram`_: all bins are
+    half-open, except the last, which also includes its upper edge.
+
+    Args:
+        wave_grid (`numpy.ndarray`_):
+            Wavelength bin edges; shape is (ngrid+1,).
+        waves (`numpy.ndarray`_):
+            Wavelengths to bin.
+
+    Returns:
+        `numpy.ndarray`_: Index of the bin for each wavelength, with the
+        same shape as ``waves``.  Wavelengths outside the grid are given
+        an index of -1.
+    """
+    ngrid = wave_grid.size - 1
+    indx = np.searchsorted(wave_grid, waves, side='right') - 1
+    indx[waves == wave_grid[-1]] = ngrid - 1
+    indx[(indx < 0) | (indx >= ngrid)] = -1
+    return indx
+
+
+def compute_stack(wave_grid, waves, fluxes, ivars, masks, weights, min_weight=1e-8, grid_indx=None):
     '''
     Compute a stacked spectrum from a set of exposures on the specified wave_grid with proper treatment of
-    weights and masking. This code uses np.histogram to combine the data using NGP and does not perform any
+    weights and masking. This code uses np.bincount to combine the data using NGP and does not perform any
     interpolations and thus does not correlate errors. It uses wave_grid to determine the set of wavelength bins that
     the data are averaged on. The final spectrum will be on an ouptut wavelength grid which is not the same as wave_grid.
     The ouput wavelength grid is the weighted average of the individual wavelengths used for each exposure that fell into
@@ -1338,6 +1374,11 @@ def compute_stack(wave_grid, waves, fluxes, ivars, masks, weights, min_weight=1e
             Masks for each exposure on the waves grid. True=Good.
         weights: ndarray, (nspec, nexp)
             Weights to be used for combining your spectra. These are computed using sn_weights
+        grid_indx: ndarray, int, (nspec, nexp), optional
+            The bin in wave_grid of each pixel in waves; see
+            :func:`wave_grid_indices`.  If None, computed on the fly.
+            Provide this when stacking the same spectra many times,
+            e.g. in :func:`spec_reject_comb`.
 
     Returns:
         tuple: Returns the following objects
@@ -1367,30 +1408,34 @@ def compute_stack(wave_grid, waves, fluxes, ivars, masks, weights, min_weight=1e
 
     #mask bad values and extreme values (usually caused by extreme low sensitivity at the edge of detectors)
     ubermask = masks & (weights > 0.0) & (waves > 1.0) & (ivars > 0.0) & (utils.inverse(ivars)<1e10)
-    waves_flat = waves[ubermask].flatten()
-    fluxes_flat = fluxes[ubermask].flatten()
-    ivars_flat = ivars[ubermask].flatten()
-    vars_flat = utils.inverse(ivars_flat)
-    weights_flat = weights[ubermask].flatten()
+    if grid_indx is None:
+        grid_indx = wave_grid_indices(wave_grid, waves)
+    ubermask &= grid_indx > -1
+    indx_flat = grid_indx[ubermask]
+    waves_flat = waves[ubermask]
+    fluxes_flat = fluxes[ubermask]
+    vars_flat = utils.inverse(ivars[ubermask])
+    weights_flat = weights[ubermask]
+    ngrid = wave_grid.size - 1
 
     # Counts how many pixels in each wavelength bin
-    nused, wave_edges = np.histogram(waves_flat,bins=wave_grid,density=False)
+    nused = np.bincount(indx_flat, minlength=ngrid)
 
     # Calculate the summed weights for the denominator
-    weights_total, wave_edges = np.histogram(waves_flat,bins=wave_grid,density=False,weights=weights_flat)
+    weights_total = np.bincount(indx_flat, weights=weights_flat, minlength=ngrid)
 
     # Calculate the stacked wavelength
     ## TODO: JFH Made the minimum weight 1e-8 from 1e-4. I'm not sure what this min_weight is necessary for, or
     # is achieving FW.
-    wave_stack_total, wave_edges = np.histogram(waves_flat,bins=wave_grid,density=False,weights=waves_flat*weights_flat)
+    wave_stack_total = np.bincount(indx_flat, weights=waves_flat*weights_flat, minlength=ngrid)
     wave_stack = (weights_total > min_weight)*wave_stack_total/(weights_total+(weights_total==0.))
 
     # Calculate the stacked flux
-    flux_stack_total, wave_edges = np.histogram(waves_flat,bins=wave_grid,density=False,weights=fluxes_flat*weights_flat)
+    flux_stack_total = np.bincount(indx_flat, weights=fluxes_flat*weights_flat, minlength=ngrid)
     flux_stack = (weights_total > min_weight)*flux_stack_total/(weights_total+(weights_total==0.))
 
     # Calculate the stacked ivar
-    var_stack_total, wave_edges = np.histogram(waves_flat,bins=wave_grid,density=False,weights=vars_flat*weights_flat**2)
+    var_stack_total = np.bincount(indx_flat, weights=vars_flat*weights_flat**2, minlength=ngrid)
     var_stack = (weights_total > min_weight)*var_stack_total/(weights_total+(weights_total==0.))**2
     ivar_stack = utils.inverse(var_stack)
 
@@ -1895,12 +1940,14 @@ def spec_reject_comb(wave_grid, waves, fluxes, ivars, masks, weights, sn_clip=30
               in one bin versus another depending on the sampling.
 
     """
+    # The native wavelengths do not change, so bin them once
+    grid_indx = wave_grid_indices(wave_grid, waves)
     thismask = np.copy(masks)
     iter = 0
     qdone = False
     while (not qdone) and (iter < maxiter_reject):
         wave_stack, flux_stack, ivar_stack, mask_stack, nused = compute_stack(
-            wave_grid, waves, fluxes, ivars, thismask, weights)
+            wave_grid, waves, fluxes, ivars, thismask, weights, grid_indx=grid_indx)
         flux_stack_nat, ivar_stack_nat, mask_stack_nat = interp_spec(
             waves, wave_stack, flux_stack, ivar_stack, mask_stack)
         rejivars, sigma_corrs, outchi, maskchi = update_errors(fluxes, ivars, thismask,
@@ -1926,7 +1973,8 @@ def spec_reject_comb(wave_grid, waves, fluxes, ivars, masks, weights, sn_clip=30
             msgs.info("Rejected {:d} pixels in exposure {:d}/{:d}".format(nrej[iexp], iexp, nexp))
 
     # Compute the final stack using this outmask
-    wave_stack, flux_stack, ivar_stack, mask_stack, nused = compute_stack(wave_grid, waves, fluxes, ivars, outmask, weights)
+    wave_stack, flux_stack, ivar_stack, mask_stack, nused = compute_stack(wave_grid, waves, fluxes, ivars, outmask,
+                                                                          weights, grid_indx=grid_indx)
 
     # Used only for plotting below
     if debug:
@@ -2350,13 +2398,51 @@ def multi_combspec(waves, fluxes, ivars, masks, sn_smooth_npix=None,
     return wave_stack, flux_stack, ivar_stack, mask_stack
 
 
+def order_map(func, norder, nproc, order_arrays, *args, **kwargs):
+    """
+    Apply a function independently to each echelle order.
+
+    For each order ``iord``, ``func`` is called as::
+
+        func(*args, *[a[:,iord] for a in order_arrays], **kwargs)
+
+    Args:
+        func (callable):
+            Function to apply.  Must be defined at the top level of a
+            module so that it can be sent to other processes.
+        norder (int):
+            Number of orders.
+        nproc (int):
+            Number of processes to use.  If 1, the orders are processed
+            serially in the current process.
+        order_arrays (tuple):
+            Arrays to split by order, with the order along their second
+            axis; e.g., arrays with shape (nspec, norder, nexp).
+        *args:
+            Positional arguments passed to ``func`` for all orders,
+            before the arrays for each order.
+        **kwargs:
+            Keyword arguments passed to ``func`` for all orders.
+
+    Returns:
+        list: The result of ``func`` for each order, in order.  The
+        result does not depend on ``nproc``.
+    """
+    _func = functools.partial(func, *args, **kwargs)
+    order_args = [[a[:,iord] for a in order_arrays] for iord in range(norder)]
+    if nproc > 1 and norder > 1:
+        with futures.ProcessPoolExecutor(max_workers=min(nproc, norder)) as executor:
+            return list(executor.map(_func, *zip(*order_args)))
+    return [_func(*a) for a in order_args]
+
+
 def ech_combspec(waves, fluxes, ivars, masks, sensfile, nbest=None, wave_method='log10',
                  dwave=None, dv=None, dloglam=None, samp_fact=1.0, wave_grid_min=None, wave_grid_max=None,
                  ref_percentile=70.0, maxiter_scale=5, niter_order_scale=3, sigrej_scale=3.0, scale_method='auto',
                  hand_scale=None, sn_min_polyscale=2.0, sn_min_medscale=0.5,
                  sn_smooth_npix=None, const_weights=False, maxiter_reject=5, sn_clip=30.0, lower=3.0, upper=3.0,
                  maxrej=None, qafile=None, debug_scale=False, debug=False, show_order_stacks=False, show_order_scale=False,
-                 show_exp=False, show=False, verbose=False, extrap_sens=False):
+                 show_exp=False, show=False, verbose=False, extrap_sens=False, nproc=1):
     """
     Driver routine for coadding Echelle spectra. Calls combspec which is the main stacking algorithm. It will deliver
     three fits files: spec1d_order_XX.fits (stacked individual orders, one order per extension), spec1d_merge_XX.fits
@@ -2462,6 +2548,13 @@ def ech_combspec(waves, fluxes, ivars, masks, sensfile, nbest=None, wave_method=
              Show key QA plots or not
         extrap_sens (bool, optional):
             If True, allow the sensitivity function to extrapolate (and ignore it)
+        nproc (int, optional):
+            Number of processes used for the steps performed
+            independently for each order, i.e. the initial scaling of
+            the exposures and the per-order stacks; see
+            :func:`order_map`.  The scaling across orders and the giant
+            stack are always performed serially.  The result does not
+            depend on ``nproc``.
 
     Returns:
         tuple: Returns the following:
@@ -2540,17 +2633,18 @@ def ech_combspec(waves, fluxes, ivars, masks, sensfile, nbest=None, wave_method=
     ivars_scl_interord = np.zeros_like(ivars)
     scales_interord = np.zeros_like(fluxes)
     # First perform inter-order scaling once
+    # TODO Add checking here such that orders with low S/N ratio are instead scaled using scale factors from
+    # higher S/N ratio. The point is it makes no sense to take 0.0/0.0. In the low S/N regime, i.e. DLAs,
+    # GP troughs, we should be rescaling using scale factors from orders with signal. This also applies
+    # to the echelle combine below.
+    scaled_orders = order_map(
+        scale_spec_stack, norder, nproc, (waves, fluxes, ivars, masks, rms_sn.T, weights), wave_grid,
+        ref_percentile=ref_percentile, maxiter_scale=maxiter_scale, sigrej_scale=sigrej_scale,
+        scale_method=scale_method, hand_scale=hand_scale, sn_min_polyscale=sn_min_polyscale,
+        sn_min_medscale=sn_min_medscale, debug=debug_scale)
     for iord in range(norder):
-        # TODO Add checking here such that orders with low S/N ratio are instead scaled using scale factors from
-        # higher S/N ratio. The point is it makes no sense to take 0.0/0.0. In the low S/N regime, i.e. DLAs,
-        # GP troughs, we should be rescaling using scale factors from orders with signal. This also applies
-        # to the echelle combine below.
-        fluxes_scl_interord[:, iord], ivars_scl_interord[:,iord], scales_interord[:,iord], scale_method_used = \
-            scale_spec_stack(wave_grid, waves[:, iord, :], fluxes[:, iord, :], ivars[:, iord, :], masks[:, iord, :],
-                             rms_sn[iord, :], weights[:, iord, :], ref_percentile=ref_percentile,
-                             maxiter_scale=maxiter_scale, sigrej_scale=sigrej_scale, scale_method=scale_method,
-                             hand_scale=hand_scale,
-                             sn_min_polyscale=sn_min_polyscale, sn_min_medscale=sn_min_medscale, debug=debug_scale)
+        fluxes_scl_interord[:, iord], ivars_scl_interord[:,iord], scales_interord[:,iord], scale_method_used \
+                = scaled_orders[iord]
 
     # Arrays to store rescaled spectra. Need Fortran like order reshaping to create a (nspec, norder*nexp) stack of spectra.
     # The order of the reshaping in the second dimension is such that blocks norder long for each exposure are stacked
@@ -2593,13 +2687,13 @@ def ech_combspec(waves, fluxes, ivars, masks, sensfile, nbest=None, wave_method=
     masks_stack_orders = np.zeros_like(waves_stack_orders, dtype=bool)
     outmasks_orders = np.zeros_like(masks)
     # Now perform stacks order by order
+    order_stacks = order_map(
+        spec_reject_comb, norder, nproc, (waves, fluxes_scale, ivars_scale, masks, weights), wave_grid,
+        sn_clip=sn_clip, lower=lower, upper=upper, maxrej=maxrej, maxiter_reject=maxiter_reject, debug=debug,
+        title='order_stacks')
     for iord in range(norder):
-        # Rejecting and coadding
         waves_stack_orders[:, iord], fluxes_stack_orders[:, iord], ivars_stack_orders[:, iord], \
-        masks_stack_orders[:, iord],  outmasks_orders[:,iord,:], nused_iord = spec_reject_comb(
-            wave_grid, waves[:, iord, :], fluxes_scale[:, iord, :], ivars_scale[:, iord, :], masks[:, iord, :], weights[:, iord, :],
-            sn_clip=sn_clip, lower=lower, upper=upper, maxrej=maxrej, maxiter_reject=maxiter_reject, debug=debug,
-            title='order_stacks')
+        masks_stack_orders[:, iord],  outmasks_orders[:,iord,:], nused_iord = order_stacks[iord]
         if show_order_stacks:
             # TODO This will probably crash since sensfile is not guarnetted to have telluric.
             #if sensfile is not None:
@@ -2824,7 +2918,8 @@ def get_spat_bins(thismask_stack, trace_stack):
 
 def compute_coadd2d(ref_trace_stack, sciimg_stack, sciivar_stack, skymodel_stack,
                     inmask_stack, tilts_stack,
-                    thismask_stack, waveimg_stack, wave_grid, weights='uniform', interp_dspat=True):
+                    thismask_stack, waveimg_stack, wave_grid, weights='uniform', interp_dspat=True,
+                    sigrej=3.0, maxiters=10):
     """
     Construct a 2d co-add of a stack of PypeIt spec2d reduction outputs.
 
@@ -2887,6 +2982,10 @@ def compute_coadd2d(ref_trace_stack, sciimg_stack, sciivar_stack, skymodel_stack
         wave_grid (`numpy.ndarray`_, optional):
             Same as `loglam_grid` but in angstroms instead of
             log(angstroms). (TODO: Check units...)
+        sigrej (:obj:`float`, optional):
+            Rejection threshold used to sigma clip the rectified images.
+        maxiters (:obj:`int`, optional):
+            Maximum number of sigma-clipping iterations.
 
     Returns:
         tuple: Returns the following (TODO: This needs to be updated):
@@ -2945,8 +3044,6 @@ def compute_coadd2d(ref_trace_stack, sciimg_stack, sciivar_stack, skymodel_stack
             = rebin2d(wave_bins, dspat_bins, waveimg_stack, dspat_stack, thismask_stack,
                       inmask_stack, sci_list, var_list)
     # Now compute the final stack with sigma clipping
-    sigrej = 3.0
-    maxiters = 10
     # sci_list_rebin[0] = rebinned weights image stack
     # sci_list_rebin[1:] = stacks of images that we want to weighted combine
     # sci_list_rebin[2] = rebinned sciimg-sky_model images that we used for the sigma clipping
@@ -2955,6 +3052,39 @@ def compute_coadd2d(ref_trace_stack, sciimg_stack, sciivar_stack, skymodel_stack
                                norm_rebin_stack != 0, sigma_clip=True,
                                sigma_clip_stack=sci_list_rebin[2], sigrej=sigrej,
                                maxiters=maxiters)
+    return finalize_coadd2d(wave_bins, dspat_bins, sci_list_out, var_list_out, outmask, nused,
+                            interp_dspat=interp_dspat)
+
+
+def finalize_coadd2d(wave_bins, dspat_bins, sci_list_out, var_list_out, outmask, nused,
+                     interp_dspat=True):
+    """
+    Construct the output of a 2d coadd from the combined rectified images.
+
+    This is the last step of :func:`compute_coadd2d`, separated so that
+    it can be used with images combined by other means (e.g.,
+    :class:`pypeit.core.combine.StreamingWeightedCombine`).
+
+    Args:
+        wave_bins (`numpy.ndarray`_):
+            Wavelength bins of the rectified images.
+        dspat_bins (`numpy.ndarray`_):
+            Spatial bins of the rectified images.
+        sci_list_out (:obj:`list`):
+            The combined science, sky-subtracted science, tilts,
+            wavelength, and spatial offset images, in that order.
+        var_list_out (:obj:`list`):
+            List with the combined variance image.
+        outmask (`numpy.ndarray`_):
+            Boolean output mask for the combined images; True is good.
+        nused (`numpy.ndarray`_):
+            Number of images contributing to each pixel.
+        interp_dspat (:obj:`bool`, optional):
+            Interpolate the spatial offset image over masked pixels.
+
+    Returns:
+        :obj:`dict`: See :func:`compute_coadd2d`.
+    """
     sciimg, imgminsky, tilts, waveimg, dspat = sci_list_out
     sciivar = utils.calc_ivar(var_list_out[0])
 
@@ -3002,8 +3132,8 @@ def compute_coadd2d(ref_trace_stack, sciimg_stack, sciivar_stack, skymodel_stack
 def rebin2d(spec_bins, spat_bins, waveimg_stack, spatimg_stack, thismask_stack, inmask_stack, sci_list, var_list):
     """
     Rebin a set of images and propagate variance onto a new spectral and spatial grid. This routine effectively
-    "recitifies" images using np.histogram2d which is extremely fast and effectiveluy performs
-    nearest grid point interpolation.
+    "recitifies" images using the same binning as np.histogram2d, which effectively performs nearest grid point
+    interpolation. The bin of each pixel is only computed once per image; see :func:`rebin2d_image`.
 
     Args:
         spec_bins: float ndarray, shape = (nspec_rebin)
@@ -3069,40 +3199,162 @@ def rebin2d(spec_bins, spat_bins, waveimg_stack, spatimg_stack, thismask_stack,
         var_list_out.append(np.zeros(shape_out))
 
     for img in range(nimgs):
-        # This fist image is purely for bookeeping purposes to determine the number of times each pixel
-        # could have been sampled
-        thismask = thismask_stack[img, :, :]
-        spec_rebin_this = waveimg_stack[img, :, :][thismask]
-        spat_rebin_this = spatimg_stack[img, :, :][thismask]
-
-        nsmp_rebin_stack[img, :, :], spec_edges, spat_edges = np.histogram2d(spec_rebin_this, spat_rebin_this,
-                                                               bins=[spec_bins, spat_bins], density=False)
-
-        finmask = thismask & inmask_stack[img,:,:]
-        spec_rebin = waveimg_stack[img, :, :][finmask]
-        spat_rebin = spatimg_stack[img, :, :][finmask]
-        norm_img, spec_edges, spat_edges = np.histogram2d(spec_rebin, spat_rebin,
-                                                          bins=[spec_bins, spat_bins], density=False)
-        norm_rebin_stack[img, :, :] = norm_img
-
-        # Rebin the science images
-        for indx, sci in enumerate(sci_list):
-            weigh_sci, spec_edges, spat_edges = np.histogram2d(spec_rebin, spat_rebin,
-                                                               bins=[spec_bins, spat_bins], density=False,
-                                                               weights=sci[img,:,:][finmask])
-            sci_list_out[indx][img, :, :] = (norm_img > 0.0) * weigh_sci/(norm_img + (norm_img == 0.0))
-
-        # Rebin the variance images, note the norm_img**2 factor for correct error propagation
-        for indx, var in enumerate(var_list):
-            weigh_var, spec_edges, spat_edges = np.histogram2d(spec_rebin, spat_rebin,
-                                                               bins=[spec_bins, spat_bins], density=False,
-                                                               weights=var[img, :, :][finmask])
-            var_list_out[indx][img, :, :] = (norm_img > 0.0)*weigh_var/(norm_img + (norm_img == 0.0))**2
-
+        sci_list_img, var_list_img, norm_rebin_stack[img], nsmp_rebin_stack[img] \
+                = rebin2d_image(spec_bins, spat_bins, waveimg_stack[img], spatimg_stack[img],
+                                thismask_stack[img], inmask_stack[img],
+                                [sci[img] for sci in sci_list], [var[img] for var in var_list])
+        for indx, sci in enumerate(sci_list_img):
+            sci_list_out[indx][img] = sci
+        for indx, var in enumerate(var_list_img):
+            var_list_out[indx][img] = var
 
     return sci_list_out, var_list_out, norm_rebin_stack.astype(int), nsmp_rebin_stack.astype(int)
 
 
+def rebin2d_indices(spec_bins, spat_bins, spec, spat):
+    """
+    Compute the flattened 2D bin index for a set of coordinates.
+
+    The bins are defined identically to `numpy.histogram2d`_: all bins
+    are half-open (e.g., ``[spec_bins[0], spec_bins[1])``), except the
+    last bin along each axis, which also includes its upper edge.
+
+    Args:
+        spec_bins (`numpy.ndarray`_):
+            Spectral bin edges; shape is (nspec_rebin+1,).
+        spat_bins (`numpy.ndarray`_):
+            Spatial bin edges; shape is (nspat_rebin+1,).
+        spec (`numpy.ndarray`_):
+            Spectral coordinates to bin.
+        spat (`numpy.ndarray`_):
+            Spatial coordinates to bin.  Shape must match ``spec``.
+
+    Returns:
+        `numpy.ndarray`_: Index of the bin in the flattened
+        (nspec_rebin, nspat_rebin) array for each coordinate.
+        Coordinates outside the bins are given an index of -1.
+    """
+    nspec_rebin = spec_bins.size - 1
+    nspat_rebin = spat_bins.size - 1
+    ispec = np.searchsorted(spec_bins, spec, side='right') - 1
+    ispec[spec == spec_bins[-1]] = nspec_rebin - 1
+    ispat = np.searchsorted(spat_bins, spat, side='right') - 1
+    ispat[spat == spat_bins[-1]] = nspat_rebin - 1
+    indx = ispec * nspat_rebin + ispat
+    indx[(ispec < 0) | (ispec >= nspec_rebin) | (ispat < 0) | (ispat >= nspat_rebin)] = -1
+    return indx
+
+
+def rebin2d_image(spec_bins, spat_bins, waveimg, spatimg, thismask, inmask, sci_list, var_list):
+    """
+    Rebin a single image and propagate its variance onto a new spectral
+    and spatial grid.
+
+    This is the single-image version of :func:`rebin2d`; see that
+    function for the description of the arguments, except that all
+    images have shape (nspec, nspat).  The bin of each pixel is
+    computed once (see :func:`rebin2d_indices`) and all images are then
+    accumulated using `numpy.bincount`_.  The result is identical to
+    calling `numpy.histogram2d`_ for each image.
+
+    Returns:
+        tuple: Returns the lists of rebinned images and variance
+        images, and the rebinned occupation-number images including
+        (``norm_rebin``) and excluding (``nsmp_rebin``) the input mask.
+        All images have shape (nspec_rebin, nspat_rebin).
+    """
+    shape_out = (spec_bins.size - 1, spat_bins.size - 1)
+    nbins = np.prod(shape_out)
+
+    # The bin of every pixel on the slit
+    indx = rebin2d_indices(spec_bins, spat_bins, waveimg[thismask], spatimg[thismask])
+    binned = indx > -1
+
+    # This fist image is purely for bookeeping purposes to determine the number of times each pixel
+    # could have been sampled
+    nsmp_rebin = np.bincount(indx[binned], minlength=nbins).reshape(shape_out).astype(float)
+
+    # Pixels on the slit that are unmasked and within the bins
+    finmask = thismask.copy()
+    finmask[thismask] = binned & inmask[thismask]
+    finindx = indx[finmask[thismask]]
+    norm_img = np.bincount(finindx, minlength=nbins).reshape(shape_out).astype(float)
+    norm_gpm = norm_img > 0.0
+    _norm_img = norm_img + np.logical_not(norm_gpm)
+
+    # Rebin the science images
+    sci_list_out = []
+    for sci in sci_list:
+        weigh_sci = np.bincount(finindx, weights=sci[finmask], minlength=nbins).reshape(shape_out)
+        sci_list_out.append(norm_gpm * weigh_sci/_norm_img)
+
+    # Rebin the variance images, note the norm_img**2 factor for correct error propagation
+    var_list_out = []
+    for var in var_list:
+        weigh_var = np.bincount(finindx, weights=var[finmask], minlength=nbins).reshape(shape_out)
+        var_list_out.append(norm_gpm * weigh_var/_norm_img**2)
+
+    return sci_list_out, var_list_out, norm_img, nsmp_rebin
+
+
+def get_slit_footprints(slitmask, waveimg, spat_ids):
+    """
+    Determine the footprint of each slit in an image.
+
+    The footprints are used to construct the rectification grid for 2d
+    coadds without keeping the full image stacks in memory; see
+    :func:`get_wave_bins` and :func:`get_spat_bins`.
+
+    Args:
+        slitmask (`numpy.ndarray`_):
+            Image identifying the slit associated with each pixel; see
+            :func:`pypeit.slittrace.SlitTraceSet.slit_img`.  Pixels not
+            on any slit must be -1.  Shape is (nspec, nspat).
+        waveimg (`numpy.ndarray`_):
+            Wavelength image.  Shape is (nspec, nspat).
+        spat_ids (`numpy.ndarray`_):
+            The slit identifiers in ``slitmask``.
+
+    Returns:
+        :obj:`dict`: Dictionary with the minimum and maximum wavelength
+        on each slit (``wave_min``, ``wave_max``; shape is (nslits,);
+        NaN if there are no valid wavelengths), and the first and last
+        spatial pixel of each slit in each spectral row (``spat_min``,
+        ``spat_max``; shape is (nslits, nspec); -1 for rows without any
+        slit pixels).
+    """
+    nslits = len(spat_ids)
+    nspec = slitmask.shape[0]
+    wave_min = np.full(nslits, np.nan)
+    wave_max = np.full(nslits, np.nan)
+    spat_min = np.full((nslits, nspec), -1, dtype=int)
+    spat_max = np.full((nslits, nspec), -1, dtype=int)
+
+    # Pixel indices are returned in row-major order, such that the
+    # first and last pixel in each row are the slit edges
+    spec_indx, spat_indx = np.nonzero(slitmask > -1)
+    slit_indx = slitmask[spec_indx, spat_indx]
+    wave = waveimg[spec_indx, spat_indx]
+    for i, spat_id in enumerate(spat_ids):
+        on_slit = slit_indx == spat_id
+        if not np.any(on_slit):
+            continue
+        # TODO This cut on waveimg should not be necessary; see get_wave_bins
+        _wave = wave[on_slit]
+        _wave = _wave[_wave > 1.0]
+        if _wave.size > 0:
+            wave_min[i] = _wave.min()
+            wave_max[i] = _wave.max()
+        rows = spec_indx[on_slit]
+        cols = spat_indx[on_slit]
+        urows, first = np.unique(rows, return_index=True)
+        last = np.append(first[1:], rows.size) - 1
+        spat_min[i,urows] = cols[first]
+        spat_max[i,urows] = cols[last]
+
+    return dict(wave_min=wave_min, wave_max=wave_max, spat_min=spat_min, spat_max=spat_max)
+
+
 def spectra_to_peaks(spec, maxspat, det, extract='OPT', sigma=2.):
     """
     From a set of spectra in a :class:`pypeit.specobjs.Specobjs`
@@ -3253,6 +3505,7 @@ def sync_pair(spec1_file, spec2_file, det, sync_dict=None, sync_toler=3, debug=F
             done2[idx] = True
 
         else:
+            from IPython import embed
             embed(header="70 Should not get here")
         # Update
         update_sync_dict(sync_dict, indx1, files, names)
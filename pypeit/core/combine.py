@@ -7,8 +7,6 @@ from astropy import stats
 from pypeit import msgs
 from pypeit import utils
 
-from IPython import embed
-
 
 def masked_weightmean(a, maskvalue):
     """
@@ -157,6 +155,201 @@ def weighted_combine(weights, sci_list, var_list, inmask_stack,
     return sci_list_out, var_list_out, gpm, nused
 
 
+class StreamingWeightedCombine:
+    r"""
+    Bounded-memory alternative to :func:`weighted_combine`.
+
+    Images are added one at a time, such that the memory footprint
+    depends only on the image shape and not on the number of images
+    combined.  Without rejection, the result is identical to
+    :func:`weighted_combine` with ``sigma_clip=False``.
+
+    Because the full stack is never available, the iterative
+    median/MAD sigma clipping of :func:`weighted_combine` is replaced by
+    rejection iterations that each require a pass through the images
+    (see :func:`add_clip_sample` and :func:`next_clip_iteration`).  Each
+    pass accumulates the sum, sum of squares, minimum, and maximum of
+    the clipping quantity in each pixel.  For pixels with at least 3
+    good samples, the center and spread are then computed *excluding*
+    the minimum and maximum values (a min/max-trimmed mean and standard
+    deviation), and a sample in the next pass is rejected if
+
+    .. math::
+
+        (x - \mu)^2 > \sigma_{\rm rej}^2\ (\sigma^2 + V),
+
+    where :math:`V` is the variance of the sample itself.  Including
+    the sample variance prevents rejecting good data when the trimmed
+    standard deviation is poorly determined by only a few images.  The
+    iterations stop when they no longer change the samples used in any
+    pixel or after ``maxiters`` passes.
+
+    Args:
+        shape (:obj:`tuple`):
+            Shape of each image.
+        nsci (:obj:`int`):
+            Number of images to combine using the weights (i.e., the
+            length of ``sci_list`` in :func:`add`).
+        nvar (:obj:`int`):
+            Number of variance images to combine (i.e., the length of
+            ``var_list`` in :func:`add`).
+        sigrej (:obj:`float`, optional):
+            Rejection threshold.
+        maxiters (:obj:`int`, optional):
+            Maximum number of passes through the images used to set the
+            rejection.
+    """
+    def __init__(self, shape, nsci, nvar, sigrej=3.0, maxiters=1):
+        self.shape = shape
+        self.sigrej = sigrej
+        self.maxiters = maxiters
+        self.niter = 0
+        self._clip_done = False
+        self._combining = False
+        # Rejection statistics
+        self.nclip = np.zeros(shape, dtype=int)
+        self.clip_sum = np.zeros(shape, dtype=float)
+        self.clip_sumsq = np.zeros(shape, dtype=float)
+        self.clip_min = np.full(shape, np.inf, dtype=float)
+        self.clip_max = np.full(shape, -np.inf, dtype=float)
+        self._center = None
+        self._spread2 = None
+        self._last_nclip = None
+        # Weighted sums
+        self.nused = np.zeros(shape, dtype=int)
+        self.weights_sum = np.zeros(shape, dtype=float)
+        self.sci_sum = [np.zeros(shape, dtype=float) for i in range(nsci)]
+        self.var_sum = [np.zeros(shape, dtype=float) for i in range(nvar)]
+
+    def add_clip_sample(self, clip_img, gpm, clip_var=None):
+        """
+        Add an image to the statistics used for rejection.
+
+        This must be called for all images *before* any are added using
+        :func:`add`.  After the first pass, samples rejected by the
+        previous pass are excluded (see :func:`next_clip_iteration`).
+        Once the iterations are done, this does nothing.
+
+        Args:
+            clip_img (`numpy.ndarray`_):
+                The image used for rejection; e.g., the sky-subtracted
+                image.
+            gpm (`numpy.ndarray`_):
+                Good-pixel mask for the image.
+            clip_var (`numpy.ndarray`_, optional):
+                Variance in ``clip_img``.  If None, the variance is
+                assumed to be 0.
+        """
+        if self._combining:
+            msgs.error('Cannot add rejection samples after images have been combined.')
+        if self._clip_done:
+            return
+        if self._center is not None:
+            gpm = gpm & self._accept(clip_img, clip_var)
+        self.nclip += gpm
+        self.clip_sum[gpm] += clip_img[gpm]
+        self.clip_sumsq[gpm] += clip_img[gpm]**2
+        self.clip_min[gpm] = np.fmin(self.clip_min[gpm], clip_img[gpm])
+        self.clip_max[gpm] = np.fmax(self.clip_max[gpm], clip_img[gpm])
+
+    def _set_rejection(self):
+        """
+        Compute the trimmed center and spread used for rejection.
+        """
+        self._center = np.zeros(self.shape, dtype=float)
+        self._spread2 = np.full(self.shape, np.inf, dtype=float)
+        indx = self.nclip > 2
+        n = self.nclip[indx] - 2
+        self._center[indx] = (self.clip_sum[indx] - self.clip_min[indx]
+                              - self.clip_max[indx]) / n
+        self._spread2[indx] = np.fmax((self.clip_sumsq[indx] - self.clip_min[indx]**2
+                                       - self.clip_max[indx]**2) / n - self._center[indx]**2, 0.)
+
+    def _accept(self, clip_img, clip_var):
+        """
+        Return the samples that are not rejected.
+        """
+        _var = 0. if clip_var is None else clip_var
+        return (clip_img - self._center)**2 <= self.sigrej**2 * (self._spread2 + _var)
+
+    def next_clip_iteration(self):
+        """
+        Finish a pass of :func:`add_clip_sample` through all the images.
+
+        The rejection is set by the statistics of the finished pass.
+        If another pass is needed, the statistics are reset.
+
+        Returns:
+            :obj:`bool`: Flag that another pass through the images is
+            needed.
+        """
+        if self._clip_done:
+            return False
+        self.niter += 1
+        self._clip_done = self.niter >= self.maxiters \
+                            or (self.niter > 1 and np.array_equal(self.nclip, self._last_nclip))
+        self._set_rejection()
+        if not self._clip_done:
+            self._last_nclip = self.nclip
+            self.nclip = np.zeros(self.shape, dtype=int)
+            self.clip_sum = np.zeros(self.shape, dtype=float)
+            self.clip_sumsq = np.zeros(self.shape, dtype=float)
+            self.clip_min = np.full(self.shape, np.inf, dtype=float)
+            self.clip_max = np.full(self.shape, -np.inf, dtype=float)
+        return not self._clip_done
+
+    def add(self, weights, sci_list, var_list, gpm, clip_img=None, clip_var=None):
+        """
+        Add an image to the combination.
+
+        Args:
+            weights (`numpy.ndarray`_):
+                Weights for this image.  Must have the same shape as
+                the images.
+            sci_list (:obj:`list`):
+                List of images to combine.
+            var_list (:obj:`list`):
+                List of variance images to combine.
+            gpm (`numpy.ndarray`_):
+                Good-pixel mask for the image.
+            clip_img (`numpy.ndarray`_, optional):
+                The image used for rejection; must be the same quantity
+                provided to :func:`add_clip_sample`.  If None, or if no
+                rejection samples were added, no rejection is performed.
+            clip_var (`numpy.ndarray`_, optional):
+                Variance in ``clip_img``.  If None, the variance is
+                assumed to be 0.
+        """
+        self._combining = True
+        _gpm = gpm.copy()
+        if clip_img is not None and np.any(self.nclip > 2):
+            if self._center is None:
+                self._set_rejection()
+            _gpm &= self._accept(clip_img, clip_var)
+        self.nused += _gpm
+        weights_mask = weights * _gpm
+        self.weights_sum += weights_mask
+        for sci_sum, sci in zip(self.sci_sum, sci_list):
+            sci_sum += sci * weights_mask
+        for var_sum, var in zip(self.var_sum, var_list):
+            var_sum += var * weights_mask**2
+
+    def result(self):
+        """
+        Return the combined images.
+
+        Returns:
+            tuple: Returns the same objects as :func:`weighted_combine`:
+            the combined images, the combined variance images, the
+            good-pixel mask, and the number of images used for each
+            pixel.
+        """
+        denom = self.weights_sum + (self.weights_sum == 0.0)
+        sci_list_out = [sci_sum / denom for sci_sum in self.sci_sum]
+        var_list_out = [var_sum / denom**2 for var_sum in self.var_sum]
+        return sci_list_out, var_list_out, self.nused > 0, self.nused
+
+
 def img_list_error_check(sci_list, var_list):
     """
     Utility routine for dealing dealing with lists of image stacks for rebin2d and weigthed_combine routines below. This
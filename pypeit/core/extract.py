@@ -10,8 +10,6 @@ import numpy as np
 import scipy
 from matplotlib import pyplot as plt
 
-from IPython import embed
-
 from astropy import stats
 
 from pypeit import msgs
@@ -28,7 +26,6 @@ from pypeit.core import fitting
 from pypeit.core.trace import fit_trace
 from pypeit.core.moment import moment1d
 
-from IPython import embed
 
 def extract_optimal(sciimg,ivar, mask, waveimg, skyimg, rn2_img, thismask, oprof, box_radius, spec,
                     min_frac_use = 0.05):
@@ -556,6 +553,7 @@ def fit_profile(image, ivar, waveimg, thismask, spat_img, trace_in, wave, flux,
     try:
         cont_flux, _ = c_answer.value(wave[indsp])
     except:
+        from IPython import embed
         embed()
 
     sn2 = (np.fmax(spline_flux*(np.sqrt(np.fmax(fluxivar_sm[indsp], 0))*bmask2),0))**2
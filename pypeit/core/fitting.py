@@ -4,8 +4,10 @@
 .. include:: ../include/links.rst
 
 """
-import numpy as np
+from collections import OrderedDict
 import inspect
+
+import numpy as np
 from matplotlib import pyplot as plt
 
 
@@ -16,8 +18,6 @@ from pypeit import bspline
 from pypeit import msgs
 from pypeit.datamodel import DataContainer
 
-from IPython import embed
-
 class PypeItFit(DataContainer):
     # Set the version of this class
     version = '1.0.0'
@@ -166,21 +166,46 @@ class PypeItFit(DataContainer):
         self.success = 1
         return self.success
 
-    def eval(self, x, x2=None):
+    def eval(self, x, x2=None, dtype=None):
         """
         Return the evaluated fit
 
         Args:
             x (`numpy.ndarray`_, optional):
-            x2 (`numpy.ndarray`_, optional):
-                For 2D fits
+            x2 (`numpy.ndarray`_, :obj:`float`, optional):
+                For 2D fits.  Can be a single value used for all x.
+            dtype (`numpy.dtype`_, optional):
+                Data type for the evaluation (e.g., ``np.float32``).
 
         Returns:
             `numpy.ndarray`_:
 
         """
         return evaluate_fit(self.fitc, self.func, x, x2=x2, minx=self.minx,
-                            maxx=self.maxx, minx2=self.minx2, maxx2=self.maxx2)
+                            maxx=self.maxx, minx2=self.minx2, maxx2=self.maxx2, dtype=dtype)
+
+    def eval_grid(self, x, x2=None, dtype=None):
+        """
+        Return the fit evaluated on the grid defined by two vectors.
+
+        See :func:`evaluate_fit_grid`.
+
+        Args:
+            x (`numpy.ndarray`_):
+                Vector with the grid in the first dimension.
+            x2 (`numpy.ndarray`_, optional):
+                For 2D fits, the vector with the grid in the second
+                dimension.
+            dtype (`numpy.dtype`_, optional):
+                Data type for the evaluation (e.g., ``np.float32``).
+
+        Returns:
+            `numpy.ndarray`_: The evaluated fit with shape
+            ``(x.size, x2.size)`` for 2D fits or ``(x.size,)`` for 1D
+            fits.
+        """
+        return evaluate_fit_grid(self.fitc, self.func, x, x2=x2, minx=self.minx,
+                                 maxx=self.maxx, minx2=self.minx2, maxx2=self.maxx2, dtype=dtype)
 
     def calc_fit_rms(self, apply_mask=True, x2=None):
         """ Simple RMS calculation
@@ -217,14 +242,92 @@ class PypeItFit(DataContainer):
         return np.sqrt(np.sum(weights * (yval - values) ** 2))
 
 
-def evaluate_fit(fitc, func, x, x2=None, minx=None, maxx=None, minx2=None, maxx2=None):
+def clenshaw(x, c, func, dtype=None):
+    """
+    Evaluate a power, Legendre, or Chebyshev series.
+
+    The series is evaluated using the Clenshaw recurrence (or Horner's
+    method for a power series), as in `numpy.polynomial`_, but the
+    recurrence is done in place and can be done in single precision.
+
+    Args:
+        x (`numpy.ndarray`_, :obj:`float`):
+            Coordinates at which to evaluate the series.  For Legendre
+            and Chebyshev series, these must already be scaled to the
+            interval [-1,1].
+        c (`numpy.ndarray`_):
+            Coefficients of the series, ordered from low to high degree
+            along the first axis.  Any remaining dimensions must
+            broadcast with ``x`` (i.e., this is equivalent to
+            ``tensor=False`` in `numpy.polynomial`_).
+        func (:obj:`str`):
+            The type of series: 'polynomial', 'legendre', or
+            'chebyshev'.
+        dtype (`numpy.dtype`_, optional):
+            Data type used for the calculation and the returned array.
+            If None, use the result type of ``x``, ``c``, and
+            :obj:`float`.
+
+    Returns:
+        `numpy.ndarray`_: The evaluated series.
+    """
+    if func not in ['polynomial', 'legendre', 'chebyshev']:
+        msgs.error('Unknown series {0}.  Must be polynomial, legendre, or chebyshev.'.format(func))
+    _x = np.asarray(x)
+    _c = np.asarray(c)
+    _dtype = np.result_type(_x, _c, float) if dtype is None else dtype
+    _x = _x.astype(_dtype, copy=False)
+    _c = _c.astype(_dtype, copy=False)
+    n = _c.shape[0]
+    shape = np.broadcast(_c[0], _x).shape
+
+    c0 = np.empty(shape, dtype=_dtype)
+    c0[...] = _c[-1]
+    if func == 'polynomial':
+        # Horner's method
+        for i in range(2, n+1):
+            c0 *= _x
+            c0 += _c[-i]
+        return c0 if c0.ndim > 0 else c0[()]
+
+    if n == 1:
+        return c0 if c0.ndim > 0 else c0[()]
+
+    c1 = c0
+    c0 = np.empty(shape, dtype=_dtype)
+    c0[...] = _c[-2]
+    tmp = np.empty(shape, dtype=_dtype)
+    for i in range(3, n+1):
+        # On output, tmp is the new c1 and c1 is the new c0
+        np.multiply(c1, _x, out=tmp)
+        if func == 'legendre':
+            nd = n - i + 2
+            tmp *= (2*nd - 1)/nd
+            c1 *= -(nd - 1)/nd
+        else:
+            tmp *= 2
+            np.negative(c1, out=c1)
+        tmp += c0
+        c1 += _c[-i]
+        c0, c1, tmp = c1, tmp, c0
+    c1 *= _x
+    c0 += c1
+    return c0 if c0.ndim > 0 else c0[()]
+
+
+def evaluate_fit(fitc, func, x, x2=None, minx=None, maxx=None, minx2=None, maxx2=None,
+                 dtype=None):
     """
     Return the evaluated fit
 
     Args:
         x (`numpy.ndarray`_, optional):
-        x2 (`numpy.ndarray`_, optional):
-            For 2D fits
+        x2 (`numpy.ndarray`_, :obj:`float`, optional):
+            For 2D fits.  If this is a single value, the fit is
+            collapsed along the second dimension before evaluating it at
+            ``x``.
+        dtype (`numpy.dtype`_, optional):
+            Data type for the evaluation; see :func:`clenshaw`.
 
     Returns:
         `numpy.ndarray`_:
@@ -234,28 +337,144 @@ def evaluate_fit(fitc, func, x, x2=None, minx=None, maxx=None, minx2=None, maxx2
     if ('2d' in func) and (x2 is not None):
         # Is this a 2d fit?
         if func[:-2] == "polynomial":
-            return np.polynomial.polynomial.polyval2d(x, x2, fitc)
+            xv, x2v = x, x2
         elif func[:-2] in ["legendre", "chebyshev"]:
             # Scale x-direction
             xv, _, _ = scale_minmax(x, minx=minx, maxx=maxx)
             # Scale x2-direction
             x2v, _, _ = scale_minmax(x2, minx=minx2, maxx=maxx2)
-            return (np.polynomial.legendre.legval2d(xv, x2v, fitc) if func[:-2] == "legendre"
-                    else np.polynomial.chebyshev.chebval2d(xv, x2v, fitc))
         else:
             msgs.error("Function {0:s} has not yet been implemented for 2d fits".format(func))
-        return None
+            return None
+        if np.ndim(x2v) == 0:
+            # Collapse the coefficients along the second dimension
+            return clenshaw(xv, clenshaw(x2v, np.asarray(fitc).T, func[:-2]), func[:-2],
+                            dtype=dtype)
+        # Evaluate along the first dimension for each coefficient in
+        # the second dimension, and then along the second dimension
+        _fitc = np.asarray(fitc)
+        _fitc = _fitc.reshape(_fitc.shape + (1,)*np.ndim(xv))
+        return clenshaw(x2v, clenshaw(xv, _fitc, func[:-2], dtype=dtype), func[:-2],
+                        dtype=dtype)
     elif func == "polynomial":
-        return np.polynomial.polynomial.polyval(x, fitc)
+        return clenshaw(x, fitc, func, dtype=dtype)
     elif func == "legendre" or func == "chebyshev":
         xv, _, _ = scale_minmax(x, minx=minx, maxx=maxx)
-        return (np.polynomial.legendre.legval(xv, fitc) if func == "legendre"
-                else np.polynomial.chebyshev.chebval(xv, fitc))
+        return clenshaw(xv, fitc, func, dtype=dtype)
     else:
         msgs.error("Fitting function '{0:s}' is not implemented yet" + msgs.newline() +
                    "Please choose from 'polynomial', 'legendre', 'chebyshev', 'polynomial2d', 'legendre2d', 'chebyshev2d'")
 
 
+_basis_cache = OrderedDict()
+"""
+Cache of the basis matrices computed by :func:`basis_matrix`, keyed by
+the function, degree, scaling limits, and the grid values.
+"""
+
+_basis_cache_size = 16
+"""
+Maximum number of basis matrices kept in :attr:`_basis_cache`.
+"""
+
+
+def basis_matrix(x, deg, func, minx=None, maxx=None):
+    """
+    Construct the matrix with the basis functions evaluated on a grid.
+
+    The most recently used matrices are cached, such that repeated
+    evaluations on the same grid do not recompute the basis.
+
+    Args:
+        x (`numpy.ndarray`_):
+            1D vector with the grid coordinates.
+        deg (:obj:`int`):
+            Maximum degree of the basis.
+        func (:obj:`str`):
+            Type of basis: 'polynomial', 'legendre', or 'chebyshev'.
+        minx (:obj:`float`, optional):
+            Minimum value used to scale ``x`` for Legendre and
+            Chebyshev bases; see :func:`scale_minmax`.
+        maxx (:obj:`float`, optional):
+            Maximum value used to scale ``x`` for Legendre and
+            Chebyshev bases; see :func:`scale_minmax`.
+
+    Returns:
+        `numpy.ndarray`_: Read-only array with shape ``(x.size,
+        deg+1)``.
+    """
+    _x = np.asarray(x, dtype=float).ravel()
+    key = (func, deg, minx, maxx, _x.size, hash(_x.tobytes()))
+    if key in _basis_cache:
+        _basis_cache.move_to_end(key)
+        return _basis_cache[key]
+
+    if func == 'polynomial':
+        b = np.polynomial.polynomial.polyvander(_x, deg)
+    elif func in ['legendre', 'chebyshev']:
+        xv, _, _ = scale_minmax(_x, minx=minx, maxx=maxx)
+        b = np.polynomial.legendre.legvander(xv, deg) if func == 'legendre' \
+                else np.polynomial.chebyshev.chebvander(xv, deg)
+    else:
+        msgs.error('Unknown basis {0}.  Must be polynomial, legendre, or chebyshev.'.format(func))
+    b.setflags(write=False)
+
+    _basis_cache[key] = b
+    if len(_basis_cache) > _basis_cache_size:
+        _basis_cache.popitem(last=False)
+    return b
+
+
+def evaluate_fit_grid(fitc, func, x, x2=None, minx=None, maxx=None, minx2=None, maxx2=None,
+                      dtype=None):
+    """
+    Evaluate one or more fits on the grid defined by one or two vectors.
+
+    The fits are evaluated as products of the coefficients with the
+    (cached) basis matrices from :func:`basis_matrix`, which is much
+    faster than evaluating the fit at each grid point separately.
+
+    Args:
+        fitc (`numpy.ndarray`_):
+            Fit coefficients.  For 1D fits, the shape is ``(nx,)`` for a
+            single fit or ``(nfit, nx)`` for many fits evaluated on the
+            same grid.  For 2D fits, the shape is ``(nx, nx2)`` or
+            ``(nfit, nx, nx2)``.
+        func (:obj:`str`):
+            Fit function (e.g., 'legendre' or 'legendre2d').
+        x (`numpy.ndarray`_):
+            Vector with the grid coordinates along the first dimension.
+        x2 (`numpy.ndarray`_, optional):
+            For 2D fits, the vector with the grid coordinates along the
+            second dimension.
+        minx, maxx, minx2, maxx2 (:obj:`float`, optional):
+            Scaling limits; see :func:`evaluate_fit`.
+        dtype (`numpy.dtype`_, optional):
+            Data type for the evaluation.  If None, use :obj:`float`.
+
+    Returns:
+        `numpy.ndarray`_: The evaluated fits.  For 2D fits, the shape
+        is ``(x.size, x2.size)`` for a single fit or ``(nfit, x.size,
+        x2.size)`` for many fits; the last dimension is removed for 1D
+        fits.
+    """
+    _dtype = float if dtype is None else dtype
+    _fitc = np.asarray(fitc, dtype=_dtype)
+    if '2d' in func:
+        if x2 is None:
+            msgs.error('Must provide x2 to evaluate a 2D fit.')
+        b = basis_matrix(x, _fitc.shape[-2]-1, func[:-2], minx=minx, maxx=maxx)
+        b2 = basis_matrix(x2, _fitc.shape[-1]-1, func[:-2], minx=minx2, maxx=maxx2)
+        # Contract the second dimension first, which is the smaller
+        # intermediate product
+        return np.einsum('ik,...kj->...ij', b.astype(_dtype, copy=False),
+                         np.einsum('...kl,jl->...kj', _fitc, b2.astype(_dtype, copy=False)))
+    if func not in ['polynomial', 'legendre', 'chebyshev']:
+        msgs.error("Fitting function '{0:s}' is not implemented yet".format(func))
+    b = basis_matrix(x, _fitc.shape[-1]-1, func, minx=minx, maxx=maxx)
+    return np.einsum('...k,ik->...i', _fitc, b.astype(_dtype, copy=False))
+
+
 def robust_fit(xarray, yarray, order, x2=None, function='polynomial',
                minx=None, maxx=None, minx2=None, maxx2=None,
                maxiter=10, in_gpm=None, weights=None, invvar=None,
@@ -12,8 +12,6 @@ import numpy as np
 from scipy import interpolate, ndimage
 from matplotlib import pyplot as plt
 
-from IPython import embed
-
 from pypeit import msgs
 from pypeit.core import parse
 from pypeit.core import pixels
@@ -5,6 +5,7 @@
 
 """
 import inspect
+import functools
 
 import numpy as np
 import copy
@@ -14,11 +15,10 @@ from matplotlib import gridspec
 from astropy import stats
 from astropy import units
 import scipy.signal
+import scipy.ndimage
 import scipy.optimize as opt
 from scipy import interpolate
 
-from linetools.spectra import xspectrum1d
-
 from pypeit import msgs
 from pypeit import utils
 from pypeit.display import display
@@ -26,8 +26,6 @@ from pypeit.core import arc
 from pypeit.core import qa
 from pypeit.core import fitting
 
-from IPython import embed
-
 
 def spat_flexure_shift(sciimg, slits, debug=False, maxlag=20):
     """
@@ -73,6 +71,7 @@ def spat_flexure_shift(sciimg, slits, debug=False, maxlag=20):
     if len(tampl) == 0:
         msgs.warn('No peak found in spatial flexure.  Assuming there is none..')
         if debug:
+            from IPython import embed
             embed(header='68 of flexure')
         return 0.
 
@@ -100,6 +99,7 @@ def spat_flexure_shift(sciimg, slits, debug=False, maxlag=20):
         gpm = mask == 0
         viewer, ch = display.show_image(_sciimg)
         #display.show_slits(viewer, ch, left_flexure[:,gpm], right_flexure)[:,gpm]#, slits.id) #, args.det)
+        from IPython import embed
         embed(header='83 of flexure.py')
 
     return lag_max[0]
@@ -119,9 +119,39 @@ def load_sky_spectrum(sky_file):
         sky_spec: XSpectrum1D
           spectrum
     """
+    from linetools.spectra import xspectrum1d
     return xspectrum1d.XSpectrum1D.from_file(sky_file)
 
 
+def _sky_line_widths(wave, lines):
+    """
+    Measure the resolution and width of the 5 brightest lines in a sky
+    spectrum.
+
+    Args:
+        wave (`numpy.ndarray`_):
+            Wavelengths of the sky spectrum.
+        lines (:obj:`tuple`):
+            Line information returned by
+            :func:`~pypeit.core.arc.detect_lines` for the sky spectrum.
+
+    Returns:
+        :obj:`tuple`: Three `numpy.ndarray`_ objects with the resolution
+        (lambda/delta lambda_FWHM), the variance of the Gaussian line
+        profile (in Angstrom^2), and the dispersion (Angstrom per pixel)
+        at each line.
+    """
+    amp, _, cent, wid, _, w, _, _ = lines
+    # Keep only 5 brightest amplitude lines (keep is array of
+    # indices within w of the 5 brightest)
+    keep = np.argsort(amp[w])[-5:]
+    # Calculate wavelength (Angstrom per pixel)
+    disp = np.append(wave[1]-wave[0], wave[1:]-wave[:-1])
+    idx = (cent+0.5).astype(np.int)[w][keep]   # The +0.5 is for rounding
+    res = wave[idx]/(disp[idx]*(2*np.sqrt(2*np.log(2)))*wid[w][keep])
+    return res, np.power(disp[idx]*wid[w][keep], 2), disp[idx]
+
+
 def spec_flex_shift(obj_skyspec, arx_skyspec, arx_lines, mxshft=20):
     """ Calculate shift between object sky spectrum and archive sky spectrum
 
@@ -144,30 +174,12 @@ def spec_flex_shift(obj_skyspec, arx_skyspec, arx_lines, mxshft=20):
 
     # Determine the brightest emission lines
     msgs.warn("If we use Paranal, cut down on wavelength early on")
-    arx_amp, arx_amp_cont, arx_cent, arx_wid, _, arx_w, arx_yprep, nsig \
-            = arx_lines
-    obj_amp, obj_amp_cont, obj_cent, obj_wid, _, obj_w, obj_yprep, nsig_obj \
-            = arc.detect_lines(obj_skyspec.flux.value)
-
-    # Keep only 5 brightest amplitude lines (xxx_keep is array of
-    # indices within arx_w of the 5 brightest)
-    arx_keep = np.argsort(arx_amp[arx_w])[-5:]
-    obj_keep = np.argsort(obj_amp[obj_w])[-5:]
-
-    # Calculate wavelength (Angstrom per pixel)
-    arx_disp = np.append(arx_skyspec.wavelength.value[1]-arx_skyspec.wavelength.value[0],
-                         arx_skyspec.wavelength.value[1:]-arx_skyspec.wavelength.value[:-1])
-    obj_disp = np.append(obj_skyspec.wavelength.value[1]-obj_skyspec.wavelength.value[0],
-                         obj_skyspec.wavelength.value[1:]-obj_skyspec.wavelength.value[:-1])
+    obj_lines = arc.detect_lines(obj_skyspec.flux.value)
 
     # Calculate resolution (lambda/delta lambda_FWHM)..maybe don't need
     # this? can just use sigmas
-    arx_idx = (arx_cent+0.5).astype(np.int)[arx_w][arx_keep]   # The +0.5 is for rounding
-    arx_res = arx_skyspec.wavelength.value[arx_idx]/\
-              (arx_disp[arx_idx]*(2*np.sqrt(2*np.log(2)))*arx_wid[arx_w][arx_keep])
-    obj_idx = (obj_cent+0.5).astype(np.int)[obj_w][obj_keep]   # The +0.5 is for rounding
-    obj_res = obj_skyspec.wavelength.value[obj_idx]/ \
-              (obj_disp[obj_idx]*(2*np.sqrt(2*np.log(2)))*obj_wid[obj_w][obj_keep])
+    arx_res, arx_sig2, arx_disp = _sky_line_widths(arx_skyspec.wavelength.value, arx_lines)
+    obj_res, obj_sig2, _ = _sky_line_widths(obj_skyspec.wavelength.value, obj_lines)
 
     if not np.all(np.isfinite(obj_res)):
         msgs.warn('Failed to measure the resolution of the object spectrum, likely due to error '
@@ -177,15 +189,12 @@ def spec_flex_shift(obj_skyspec, arx_skyspec, arx_lines, mxshft=20):
                                                                      np.median(obj_res)))
 
     # Determine sigma of gaussian for smoothing
-    arx_sig2 = np.power(arx_disp[arx_idx]*arx_wid[arx_w][arx_keep], 2)
-    obj_sig2 = np.power(obj_disp[obj_idx]*obj_wid[obj_w][obj_keep], 2)
-
     arx_med_sig2 = np.median(arx_sig2)
     obj_med_sig2 = np.median(obj_sig2)
 
     if obj_med_sig2 >= arx_med_sig2:
         smooth_sig = np.sqrt(obj_med_sig2-arx_med_sig2)  # Ang
-        smooth_sig_pix = smooth_sig / np.median(arx_disp[arx_idx])
+        smooth_sig_pix = smooth_sig / np.median(arx_disp)
         arx_skyspec = arx_skyspec.gauss_smooth(smooth_sig_pix*2*np.sqrt(2*np.log(2)))
     else:
         msgs.warn("Prefer archival sky spectrum to have higher resolution")
@@ -304,6 +313,310 @@ def spec_flex_shift(obj_skyspec, arx_skyspec, arx_lines, mxshft=20):
                 corr_cen=corr.size/2, smooth=smooth_sig_pix, success=success)
 
 
+def _rebin(wave, flux, new_wave):
+    """
+    Rebin a spectrum onto a new wavelength grid, conserving the flux
+    density.
+
+    Args:
+        wave (`numpy.ndarray`_):
+            Monotonically increasing wavelengths of the spectrum.
+        flux (`numpy.ndarray`_):
+            Flux of the spectrum.
+        new_wave (`numpy.ndarray`_):
+            Monotonically increasing wavelengths of the new grid.
+
+    Returns:
+        `numpy.ndarray`_: The rebinned flux, which is 0 outside of the
+        wavelength range of the input spectrum.
+    """
+    # Edges of the pixels in both grids
+    edges = np.append(wave[0] - (wave[1]-wave[0])/2., (wave + np.roll(wave, -1))/2.)
+    edges[-1] = wave[-1] + (wave[-1]-wave[-2])/2.
+    new_edges = np.append(new_wave[0] - (new_wave[1]-new_wave[0])/2.,
+                          (new_wave + np.roll(new_wave, -1))/2.)
+    new_edges[-1] = new_wave[-1] + (new_wave[-1]-new_wave[-2])/2.
+    # Interpolate the cumulative integral of the flux
+    cumsum = np.append(0., np.cumsum(flux*np.diff(edges)))
+    newcum = np.interp(new_edges, edges, cumsum, left=0., right=cumsum[-1])
+    new_flux = np.diff(newcum)/np.diff(new_edges)
+    new_flux[(new_wave < wave[0]) | (new_wave > wave[-1])] = 0.
+    return new_flux
+
+
+def _interp_rows(x, xp, fp):
+    """
+    Linearly interpolate a set of spectra onto a common grid in a
+    single call to `numpy.interp`_.
+
+    The spectra are offset from one another along the abscissa such
+    that they can be concatenated into a single monotonic array.
+
+    Args:
+        x (`numpy.ndarray`_):
+            The common grid; shape is :math:`(N_{\\rm grid},)`.
+        xp (:obj:`list`):
+            List of monotonically increasing `numpy.ndarray`_ objects
+            with the abscissa of each spectrum.
+        fp (:obj:`list`):
+            List of `numpy.ndarray`_ objects with the values of each
+            spectrum.
+
+    Returns:
+        :obj:`tuple`: Two `numpy.ndarray`_ objects with shape
+        :math:`(N_{\\rm spec}, N_{\\rm grid})`: the interpolated
+        spectra and a boolean array that is True where the grid is
+        covered by each spectrum.  The interpolated spectra are set to 0
+        outside of the coverage.
+    """
+    nspec = len(xp)
+    lo = np.array([_xp[0] for _xp in xp])
+    hi = np.array([_xp[-1] for _xp in xp])
+    span = max(np.amax(hi), x[-1]) - min(np.amin(lo), x[0]) + 1.
+    offset = span*np.arange(nspec)
+    _xp = np.concatenate([_xp + o for _xp, o in zip(xp, offset)])
+    _fp = np.concatenate(fp)
+    flux = np.interp((x[None,:] + offset[:,None]).ravel(), _xp, _fp).reshape(nspec, -1)
+    covered = (x[None,:] >= lo[:,None]) & (x[None,:] <= hi[:,None])
+    flux[np.logical_not(covered)] = 0.
+    return flux, covered
+
+
+def spec_flex_shift_batch(obj_waves, obj_fluxes, arx_skyspec, arx_lines, mxshft=20,
+                          smooth_tol=0.05):
+    """
+    Calculate the shifts between a set of object sky spectra and the
+    archive sky spectrum.
+
+    This provides the same measurement as :func:`spec_flex_shift` for
+    many spectra at once.  The archive spectrum is smoothed once for
+    each resolution bin, all spectra are resampled onto a common
+    wavelength grid, and the cross-correlations of all the spectra are
+    computed using a single FFT.  The common grid is uniform in
+    wavelength or in the logarithm of the wavelength, depending on
+    which better matches the sampling of the object spectra, and has the
+    median sampling of the object spectra.  The shifts are converted to
+    the pixels of each object spectrum.
+
+    Args:
+        obj_waves (:obj:`list`):
+            List of `numpy.ndarray`_ objects with the wavelengths of
+            each object sky spectrum.
+        obj_fluxes (:obj:`list`):
+            List of `numpy.ndarray`_ objects with the flux of each
+            object sky spectrum.
+        arx_skyspec (:class:`linetools.spectra.xspectrum1d.XSpectrum1d`):
+            Archived sky spectrum
+        arx_lines (tuple): Line information returned by arc.detect_lines for
+            the Archived sky spectrum
+        mxshft (float, optional):
+            Maximum allowed shift from flexure in pixels of the object
+            spectra.
+        smooth_tol (:obj:`float`, optional):
+            Fractional width of the bins in the smoothing kernel width
+            used to group the object spectra.  The archive spectrum is
+            smoothed once per bin.
+
+    Returns:
+        :obj:`list`: A list with a :obj:`dict` with the flexure info
+        (see :func:`spec_flex_shift`) for each object spectrum; the
+        list element is None if the shift could not be measured.
+    """
+    from linetools.spectra import xspectrum1d
+
+    nspec = len(obj_waves)
+    result = [None]*nspec
+
+    # Archive
+    arx_wave = arx_skyspec.wavelength.value
+    arx_flux = arx_skyspec.flux.value
+    arx_res, arx_sig2, arx_disp = _sky_line_widths(arx_wave, arx_lines)
+    arx_med_sig2 = np.median(arx_sig2)
+
+    # Measure the resolution of each object spectrum and the width of
+    # the kernel needed to smooth the archive to match it
+    good = np.zeros(nspec, dtype=bool)
+    waves = [None]*nspec
+    fluxes = [None]*nspec
+    smooth_sig_pix = np.zeros(nspec, dtype=float)
+    for i in range(nspec):
+        gpm = (obj_waves[i] > 0) & np.isfinite(obj_waves[i]) & np.isfinite(obj_fluxes[i])
+        waves[i] = obj_waves[i][gpm]
+        fluxes[i] = obj_fluxes[i][gpm]
+        obj_lines = arc.detect_lines(fluxes[i])
+        obj_res, obj_sig2, _ = _sky_line_widths(waves[i], obj_lines)
+        if not np.all(np.isfinite(obj_res)):
+            msgs.warn('Failed to measure the resolution of the object spectrum, likely due to '
+                      'error in the wavelength image.')
+            continue
+        msgs.info("Resolution of Archive={0} and Observation={1}".format(np.median(arx_res),
+                                                                         np.median(obj_res)))
+        obj_med_sig2 = np.median(obj_sig2)
+        if obj_med_sig2 >= arx_med_sig2:
+            smooth_sig_pix[i] = np.sqrt(obj_med_sig2-arx_med_sig2) / np.median(arx_disp)
+        else:
+            msgs.warn("New Sky has higher resolution than Archive.  Not smoothing")
+        good[i] = True
+
+    # Select the wavelength sampling for the common grid
+    gdspec = np.where(good)[0]
+    if gdspec.size == 0:
+        return result
+    dwave = [np.diff(waves[i]) for i in gdspec]
+    dloglam = [np.diff(np.log10(waves[i])) for i in gdspec]
+    use_log = np.median([np.std(d)/np.mean(d) for d in dloglam]) \
+                < np.median([np.std(d)/np.mean(d) for d in dwave])
+    obj_samp = np.array([np.median(d) for d in (dloglam if use_log else dwave)])
+    samp = np.median(obj_samp)
+
+    # Build the grid over the region covered by the archive and any of
+    # the object spectra
+    min_wave = max(np.amin(arx_wave), min([waves[i][0] for i in gdspec]))
+    max_wave = min(np.amax(arx_wave), max([waves[i][-1] for i in gdspec]))
+    if max_wave <= min_wave:
+        msgs.warn("Not enough overlap between sky spectra")
+        return result
+    if use_log:
+        grid = np.power(10., np.arange(np.log10(min_wave), np.log10(max_wave), samp))
+    else:
+        grid = np.arange(min_wave, max_wave, samp)
+    ngrid = grid.size
+
+    # Resample all the object spectra
+    obj_flux, obj_gpm = _interp_rows(grid, [waves[i] for i in gdspec],
+                                     [fluxes[i] for i in gdspec])
+
+    # Smooth and resample the archive once per resolution bin
+    smooth_bin = np.zeros(nspec, dtype=float)
+    indx = smooth_sig_pix > 0
+    smooth_bin[indx] = np.power(1+smooth_tol, np.round(np.log(smooth_sig_pix[indx])
+                                                        / np.log1p(smooth_tol)))
+    arx_indx = np.where((arx_wave >= min_wave) & (arx_wave <= max_wave))[0]
+    arx_flux_bin = {}
+    arx_cont_bin = {}
+    for b in np.unique(smooth_bin[gdspec]):
+        if b > 0:
+            # Only smooth the relevant region of the archive
+            pad = int(np.ceil(5*b))+1
+            s = slice(max(arx_indx[0]-pad, 0), arx_indx[-1]+pad+1)
+            _arx_flux = scipy.ndimage.gaussian_filter1d(arx_flux[s], b, mode='nearest')
+            _arx_flux = _rebin(arx_wave[s], _arx_flux, grid)
+        else:
+            _arx_flux = _rebin(arx_wave, arx_flux, grid)
+        # Set minimum to 0.
+        arx_flux_bin[b] = np.maximum(_arx_flux, 0.)
+        # Fit the continuum over the full grid
+        arx_flux_bin[b][:2] = 0.
+        arx_flux_bin[b][-2:] = 0.
+        pypeitFit_sky, _ = fitting.iterfit(grid, arx_flux_bin[b], nord=3,
+                                           kwargs_bspline={'everyn': ngrid // 20},
+                                           kwargs_reject={'groupbadpix':True,'maxrej':1},
+                                           maxiter=15, upper=3.0, lower=3.0)
+        arx_cont_bin[b], _ = pypeitFit_sky.value(grid)
+
+    # Prepare each spectrum for the cross-correlation
+    obj_sub = np.zeros((gdspec.size, ngrid), dtype=float)
+    arx_sub = np.zeros((gdspec.size, ngrid), dtype=float)
+    norms = np.zeros((gdspec.size, 2), dtype=float)
+    scale = np.ones(gdspec.size, dtype=float)
+    for j, i in enumerate(gdspec):
+        keep_idx = np.where(obj_gpm[j])[0]
+        if len(keep_idx) <= 50:
+            msgs.warn("Not enough overlap between sky spectra")
+            good[i] = False
+            continue
+        # Trim edges (resampling is junk there)
+        obj_flux[j,keep_idx[:2]] = 0.
+        obj_flux[j,keep_idx[-2:]] = 0.
+        # Set minimum to 0.  For bad rebinning and for pernicious extractions
+        _obj_flux = np.maximum(obj_flux[j,keep_idx], 0.)
+        _arx_flux = arx_flux_bin[smooth_bin[i]][keep_idx]
+
+        # Normalize spectra to unit average sky count
+        norm = np.mean(_obj_flux)
+        norm2 = np.mean(_arx_flux)
+        if norm <= 0:
+            msgs.warn("Bad normalization of object in flexure algorithm")
+            msgs.warn("Will try the median")
+            norm = np.median(_obj_flux)
+            if norm <= 0:
+                msgs.warn("Improper sky spectrum for flexure.  Is it too faint??")
+                good[i] = False
+                continue
+        if norm2 <= 0:
+            msgs.warn('Bad normalization of archive in flexure. You are probably using '
+                      'wavelengths well beyond the archive.')
+            good[i] = False
+            continue
+        norms[j] = [norm, norm2]
+
+        # Deal with underlying continuum
+        pypeitFit_obj, _ = fitting.iterfit(grid[keep_idx], _obj_flux/norm, nord=3,
+                                           kwargs_bspline={'everyn': len(keep_idx) // 20},
+                                           kwargs_reject={'groupbadpix':True,'maxrej':1},
+                                           maxiter=15, upper=3.0, lower=3.0)
+        obj_sky_cont, _ = pypeitFit_obj.value(grid[keep_idx])
+        obj_sub[j,keep_idx] = _obj_flux/norm - obj_sky_cont
+        arx_sub[j,keep_idx] = (_arx_flux - arx_cont_bin[smooth_bin[i]][keep_idx])/norm2
+
+        # Number of object pixels per grid pixel
+        _obj_wave = waves[i][(waves[i] >= grid[keep_idx[0]]) & (waves[i] <= grid[keep_idx[-1]])]
+        _obj_samp = np.median(np.diff(np.log10(_obj_wave) if use_log else _obj_wave))
+        scale[j] = samp/_obj_samp
+
+    # Cross correlate all the spectra using a single FFT; this is
+    # identical to np.correlate(arx_sub[j], obj_sub[j], 'same')
+    nfft = 2*ngrid
+    corr = np.fft.irfft(np.fft.rfft(arx_sub, n=nfft, axis=1)
+                        * np.conj(np.fft.rfft(obj_sub, n=nfft, axis=1)), n=nfft, axis=1)
+    lag0 = ngrid//2
+    corr = np.roll(corr, lag0, axis=1)[:,:ngrid]
+
+    # Find the peak of each cross-correlation
+    for j, i in enumerate(gdspec):
+        if not good[i]:
+            continue
+        _mxshft = max(int(np.round(mxshft/scale[j])), 1)
+        lo = max(lag0-_mxshft, 3)
+        hi = min(lag0+_mxshft, ngrid-3)
+        max_corr = np.argmax(corr[j,lo:hi]) + lo
+        subpix_grid = np.linspace(max_corr-3., max_corr+3., 7)
+        _corr = corr[j,subpix_grid.astype(int)]
+        # Convert the lags to the pixels of the object spectrum
+        subpix = lag0 + (subpix_grid - lag0)*scale[j]
+
+        #Fit a 2-degree polynomial to peak of correlation function
+        if np.any(np.isfinite(_corr)):
+            fit = fitting.PypeItFit(xval=subpix, yval=_corr, func='polynomial',
+                                    order=np.atleast_1d(2))
+            fit.fit()
+            success = True
+            max_fit = -0.5 * fit.fitc[1] / fit.fitc[2]
+        else:
+            fit = fitting.PypeItFit(xval=subpix, yval=0.0*subpix, func='polynomial',
+                                    order=np.atleast_1d(2))
+            fit.fit()
+            success = False
+            max_fit = 0.0
+            msgs.warn('Flexure compensation failed for one of your objects')
+
+        #Calculate and apply shift in wavelength
+        shift = float(max_fit)-lag0
+        msgs.info("Flexure correction of {:g} pixels".format(shift))
+
+        # Spectra for the QA
+        keep_idx = np.where(obj_gpm[j])[0]
+        indx = (waves[i] >= grid[keep_idx[0]]) & (waves[i] <= grid[keep_idx[-1]])
+        sky_spec = xspectrum1d.XSpectrum1D.from_tuple((waves[i][indx],
+                                                       fluxes[i][indx]/norms[j,0]))
+        arx_spec = xspectrum1d.XSpectrum1D.from_tuple(
+                        (grid[keep_idx], arx_flux_bin[smooth_bin[i]][keep_idx]/norms[j,1]))
+        result[i] = dict(polyfit=fit, shift=shift, subpix=subpix, corr=_corr, sky_spec=sky_spec,
+                         arx_spec=arx_spec, corr_cen=float(lag0),
+                         smooth=smooth_bin[i], success=success)
+    return result
+
+
 def flexure_interp(shift, wave):
     """
     Perform interpolation on wave given a shift in pixels
@@ -326,10 +639,33 @@ def flexure_interp(shift, wave):
     return twave
 
 
+@functools.lru_cache(maxsize=4)
+def sky_archive(sky_file):
+    """
+    Load an archived sky spectrum and detect its lines.
+
+    Detecting the lines in large archive spectra is slow, so the results
+    for the most recently used files are cached.
+
+    Args:
+        sky_file (:obj:`str`):
+            Sky file; see :func:`load_sky_spectrum`.
+
+    Returns:
+        tuple: The sky spectrum and the result of
+        :func:`pypeit.core.arc.detect_lines` for its flux.
+    """
+    sky_spectrum = load_sky_spectrum(sky_file)
+    return sky_spectrum, arc.detect_lines(sky_spectrum.flux.value)
+
+
 def spec_flexure_slit(slits, slitord, slit_bpm, sky_file, method="boxcar", specobjs=None,
                       slit_specs=None, mxshft=None):
     """Calculate the spectral flexure for every slit (global) or object (local)
 
+    The shifts of all the slits or objects are measured at once using
+    :func:`spec_flex_shift_batch`.
+
     Args:
         slits (:class:`~pypeit.slittrace.SlitTraceSet`):
             Slit trace set
@@ -354,28 +690,50 @@ def spec_flexure_slit(slits, slitord, slit_bpm, sky_file, method="boxcar", speco
             A list of linetools.xspectrum1d, one for each slit. The spectra stored in
             this list are sky spectra, extracted from the center of each slit.
         mxshft (int, optional):
-            Passed to flex_shift()
+            Passed to :func:`spec_flex_shift_batch`.
 
     Returns:
         :obj:`list`: A list of :obj:`dict` objects containing flexure
         results of each slit. This is filled with a basically empty
         dict if the slit is skipped.
     """
+    from linetools.spectra import xspectrum1d
+
     sv_fdict = None
     msgs.work("Consider doing 2 passes in flexure as in LowRedux")
 
     # Determine the method
     slit_cen = True if (specobjs is None) or (method == "slitcen") else False
 
-    # Load Archive. Save the line information to avoid the performance hit from calling it on the archive sky spectrum
-    # multiple times
-    sky_spectrum = load_sky_spectrum(sky_file)
-    sky_lines = arc.detect_lines(sky_spectrum.flux.value)
+    # Load Archive. The line information is cached to avoid the performance hit from calling it on
+    # the archive sky spectrum multiple times
+    sky_spectrum, sky_lines = sky_archive(sky_file)
 
     nslits = slits.nslits
     gpm = np.logical_not(slit_bpm)
     gdslits = np.where(gpm)[0]
 
+    # Collect the sky spectra of all the slits or objects and measure
+    # all the shifts at once
+    spec_keys = []
+    sky_waves = []
+    sky_fluxes = []
+    for islit in gdslits:
+        if slit_cen:
+            spec_keys += [(islit, 0)]
+            sky_waves += [slit_specs[islit].wavelength.value]
+            sky_fluxes += [slit_specs[islit].flux.value]
+            continue
+        this_specobjs = specobjs[specobjs.slitorder_indices(slitord[islit])]
+        for ss, sobj in enumerate(this_specobjs):
+            if sobj is None or sobj['BOX_WAVE'] is None:
+                continue
+            spec_keys += [(islit, ss)]
+            sky_waves += [sobj.BOX_WAVE]
+            sky_fluxes += [sobj.BOX_COUNTS_SKY]
+    fdicts = dict(zip(spec_keys, spec_flex_shift_batch(sky_waves, sky_fluxes, sky_spectrum,
+                                                       sky_lines, mxshft=mxshft)))
+
     # Initialise the flexure list for each slit
     flex_list = []
     # Slit/objects to come back to
@@ -399,8 +757,8 @@ def spec_flexure_slit(slits, slitord, slit_bpm, sky_file, method="boxcar", speco
             sky_wave = slit_specs[islit].wavelength.value
             sky_flux = slit_specs[islit].flux.value
 
-            # Calculate the shift
-            fdict = spec_flex_shift(slit_specs[islit], sky_spectrum, sky_lines, mxshft=mxshft)
+            # Calculated shift
+            fdict = fdicts[(islit, 0)]
             # Failed?
             if fdict is not None:
                 # Update dict
@@ -422,15 +780,8 @@ def spec_flexure_slit(slits, slitord, slit_bpm, sky_file, method="boxcar", speco
                     continue
                 msgs.info("Working on flexure for object # {:d}".format(sobj.OBJID) + "in slit # {:d}".format(islit))
 
-                # Using boxcar
-                sky_wave = sobj.BOX_WAVE
-                sky_flux = sobj.BOX_COUNTS_SKY
-
-                # Generate 1D spectrum for object
-                obj_sky = xspectrum1d.XSpectrum1D.from_tuple((sky_wave, sky_flux))
-
-                # Calculate the shift
-                fdict = spec_flex_shift(obj_sky, sky_spectrum, sky_lines, mxshft=mxshft)
+                # Calculated shift using the boxcar sky spectrum
+                fdict = fdicts[(islit, ss)]
                 punt = False
                 if fdict is None:
                     msgs.warn("Flexure shift calculation failed for this spectrum.")
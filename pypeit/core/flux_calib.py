@@ -4,8 +4,6 @@ import os
 import glob
 from pkg_resources import resource_filename
 
-from IPython import embed
-
 import numpy as np
 
 from scipy import interpolate
@@ -18,8 +16,6 @@ from astropy import coordinates
 from astropy import table
 from astropy.io import ascii
 
-from linetools.spectra.xspectrum1d import XSpectrum1D
-
 from pypeit import msgs
 from pypeit import utils
 from pypeit import bspline
@@ -421,6 +417,7 @@ def find_standard(specobj_list):
     try:
         mxix = np.argmax(np.array(medfx))
     except:
+        from IPython import embed
         embed()
     msgs.info("Putative standard star {} has a median boxcar count of {}".format(specobj_list[mxix],
                                                                                  np.max(medfx)))
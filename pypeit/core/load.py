@@ -10,13 +10,8 @@ from astropy.time import Time
 from astropy.io import fits
 from astropy.table import Table
 
-from linetools.spectra.xspectrum1d import XSpectrum1D
-from linetools.spectra.utils import collate
-import linetools.utils
-
 from pypeit import msgs
 from pypeit import io
-from IPython import embed
 from pypeit.core import parse
 
 
@@ -270,6 +265,7 @@ def load_spec_order(fname,norder, objid=None, order=None, extract='OPT', flux=Tr
     bad_all = bad_flux + bad_wave
     ## trim bad part
     wave_out,flux_out,sig_out = spectrum.wavelength[~bad_all],spectrum.flux[~bad_all],spectrum.sig[~bad_all]
+    from linetools.spectra.xspectrum1d import XSpectrum1D
     spectrum_out = XSpectrum1D.from_tuple((wave_out,flux_out,sig_out), verbose=False)
     #if np.sum(bad_flux):
     #    msgs.warn("There are some bad flux values in this spectrum.  Will zero them out and mask them (not ideal)")
@@ -326,6 +322,7 @@ def ech_load_spec(files,objid=None,order=None,extract='OPT',flux=True):
             # Append
             spectra_list.append(spectrum)
     # Join into one XSpectrum1D object
+    from linetools.spectra.utils import collate
     spectra = collate(spectra_list)
     # Return
     return spectra
@@ -353,6 +350,7 @@ def load_sens_dict(filename):
         return None
     else:
         msgs.info("Loading sensfunc from file {:s}".format(filename))
+        import linetools.utils
         sens_dict = linetools.utils.loadjson(filename)
         # Recast a few items as arrays
         for key in sens_dict.keys():
@@ -4,7 +4,6 @@ Implement principle-component-analysis tools.
 .. include common links, assuming primary doc root is up one directory
 .. include:: ../include/links.rst
 """
-from IPython import embed
 
 import numpy as np
 
@@ -1,6 +1,5 @@
 """ Routines related to mapping pixels to physical positions
 """
-from IPython import embed
 
 import numpy as np
 
@@ -119,6 +118,7 @@ def pix_to_amp(naxis0, naxis1, datasec, numamplifiers):
         try:
             retarr[w] = i+1
         except IndexError:
+            from IPython import embed
             embed()
         # Save these locations for trimming
         if i == 0:
@@ -3,10 +3,11 @@
 .. include common links, assuming primary doc root is up one directory
 .. include:: ../include/links.rst
 """
+from collections import OrderedDict
+
 import numpy as np
 from scipy import signal, ndimage
 from scipy.optimize import curve_fit
-from IPython import embed
 
 from pypeit import msgs
 from pypeit import utils
@@ -256,13 +257,12 @@ def gain_frame(amp_img, gain):
     # TODO: Remove this or actually do it.
     # msgs.warn("Should probably be measuring the gain across the amplifier boundary")
 
-    # Build the gain image
-    gain_img = np.zeros_like(amp_img, dtype=float)
-    for i,_gain in enumerate(gain):
-        gain_img[amp_img == i+1] = _gain
-
-    # Return the image, trimming if requested
-    return gain_img
+    # Build the gain image using the amplifier image to index a lookup
+    # table; pixels not associated with an amplifier have 0 gain
+    lut = np.append(0., np.atleast_1d(gain).astype(float))
+    _amp_img = np.clip(amp_img, 0, None).astype(int)
+    _amp_img[_amp_img > lut.size-1] = 0
+    return lut[_amp_img]
 
 
 def rn_frame(datasec_img, gain, ronoise):
@@ -298,16 +298,11 @@ def rn_frame(datasec_img, gain, ronoise):
     if np.any(datasec_img > numamplifiers):
         raise ValueError('Pixel amplifier IDs do not match number of amplifiers.')
 
-    # ToDO We should not be using numpy masked arrays!!!
-
-    # Get the amplifier indices
-    indx = datasec_img.astype(int) == 0
-    amp = np.ma.MaskedArray(datasec_img.astype(int) - 1, mask=indx).filled(0)
-
-    # Return the read-noise image.  Any pixels without an assigned
-    # amplifier are given a noise of 0.
-    return np.ma.MaskedArray(np.square(_ronoise[amp]) + np.square(0.5*_gain[amp]),
-                             mask=indx).filled(0.0)
+    # Return the read-noise image, using the amplifier image to index a
+    # lookup table.  Any pixels without an assigned amplifier are given
+    # a noise of 0.
+    lut = np.append(0., np.square(_ronoise) + np.square(0.5*_gain))
+    return lut[np.clip(datasec_img, 0, None).astype(int)]
 
 
 def rect_slice_with_mask(image, mask, mask_val=1):
@@ -328,8 +323,228 @@ def rect_slice_with_mask(image, mask, mask_val=1):
     return image[slices], slices
 
 
+class AmpSections:
+    """
+    Geometry of the amplifier data and overscan sections of a raw image.
+
+    The geometry only depends on the detector, its binning, and the shape
+    of the raw image, such that it can be shared among all frames read
+    from the same detector.  The rectangular region of each amplifier is
+    kept as a pair of slices; the amplifier images (see
+    :attr:`datasec_img` and :attr:`oscansec_img`) are only constructed
+    when first requested, stored as read-only ``int8`` arrays, and then
+    reused.
+
+    Objects should typically be instantiated using :func:`amp_sections`,
+    which caches the result, or :func:`from_images`.
+
+    Args:
+        shape (:obj:`tuple`):
+            Shape of the raw image.
+        datasec (:obj:`list`):
+            Two-tuple of slices selecting the data section of each
+            amplifier; element 0 is for amplifier 1, etc.  An element can
+            be None if the amplifier does not have a data section.
+        oscansec (:obj:`list`):
+            Same as ``datasec``, but for the overscan sections.
+        datasec_img (`numpy.ndarray`_, optional):
+            Pre-constructed image with the 1-indexed amplifier of each
+            data pixel.  If None, the image is constructed from
+            ``datasec`` when needed.
+        oscansec_img (`numpy.ndarray`_, optional):
+            Same as ``datasec_img``, but for the overscan sections.
+    """
+    def __init__(self, shape, datasec, oscansec, datasec_img=None, oscansec_img=None):
+        self.shape = tuple(shape)
+        self.datasec = datasec
+        self.oscansec = oscansec
+        self._datasec_img = datasec_img
+        self._oscansec_img = oscansec_img
+        self._trim_indx = None
+
+    @staticmethod
+    def _bounding_slices(sec, shape):
+        """
+        Return the increasing slices that bound the region selected by
+        ``sec`` in an array with the provided ``shape``.
+        """
+        indx = [np.arange(n)[s] for n, s in zip(shape, sec)]
+        if np.any([i.size == 0 for i in indx]):
+            return None
+        return tuple([slice(np.amin(i), np.amax(i)+1) for i in indx])
+
+    @classmethod
+    def from_images(cls, datasec_img, oscansec_img):
+        """
+        Construct the geometry from a pair of amplifier images.
+
+        If the images were constructed by a cached :class:`AmpSections`
+        object (see :func:`amp_sections`), that object is returned.
+        Otherwise, the sections are set by the bounding box of the
+        pixels associated with each amplifier.
+
+        Args:
+            datasec_img (`numpy.ndarray`_):
+                Image with the 1-indexed amplifier used to read each
+                pixel in the data sections; 0 otherwise.
+            oscansec_img (`numpy.ndarray`_):
+                Image with the 1-indexed amplifier used to read each
+                pixel in the overscan sections; 0 otherwise.
+
+        Returns:
+            :class:`AmpSections`: The amplifier geometry.
+        """
+        for sections in _amp_sections_cache.values():
+            if sections._datasec_img is datasec_img and sections._oscansec_img is oscansec_img:
+                return sections
+        sections = []
+        for img in [datasec_img, oscansec_img]:
+            sections += [[None]*int(np.amax(img, initial=0))]
+            for amp in np.unique(img[img > 0]):
+                pix = np.where(img == amp)
+                sections[-1][amp-1] = (slice(np.amin(pix[0]), np.amax(pix[0])+1),
+                                       slice(np.amin(pix[1]), np.amax(pix[1])+1))
+        return cls(datasec_img.shape, sections[0], sections[1], datasec_img=datasec_img,
+                   oscansec_img=oscansec_img)
+
+    @property
+    def numamplifiers(self):
+        """The number of amplifiers."""
+        return len(self.datasec)
+
+    def _amp_image(self, sections):
+        """Construct a read-only image with the amplifier of each pixel."""
+        img = np.zeros(self.shape, dtype=np.int8)
+        for i, sec in enumerate(sections):
+            if sec is not None:
+                img[sec] = i+1
+        img.flags.writeable = False
+        return img
+
+    @property
+    def datasec_img(self):
+        """
+        Read-only image with the 1-indexed amplifier used to read each
+        pixel in the data sections; 0 otherwise.
+        """
+        if self._datasec_img is None:
+            self._datasec_img = self._amp_image(self.datasec)
+        return self._datasec_img
+
+    @property
+    def oscansec_img(self):
+        """
+        Read-only image with the 1-indexed amplifier used to read each
+        pixel in the overscan sections; 0 otherwise.
+        """
+        if self._oscansec_img is None:
+            self._oscansec_img = self._amp_image(self.oscansec)
+        return self._oscansec_img
+
+    def amp_slices(self, amp, overscan=False):
+        """
+        Return the slices that bound the data or overscan section of one
+        amplifier.
+
+        Args:
+            amp (:obj:`int`):
+                1-indexed amplifier number.
+            overscan (:obj:`bool`, optional):
+                Return the slices for the overscan section instead of the
+                data section.
+
+        Returns:
+            :obj:`tuple`: Two slices that select the section; None if
+            the amplifier has no such section.
+        """
+        sections = self.oscansec if overscan else self.datasec
+        if amp < 1 or amp > len(sections) or sections[amp-1] is None:
+            return None
+        return self._bounding_slices(sections[amp-1], self.shape)
+
+    def trim(self, frame):
+        """
+        Trim an image to include only the rows and columns with data.
+
+        This is equivalent to::
+
+            trim_frame(frame, self.datasec_img < 1)
+
+        but the indices of the rows and columns to keep are only
+        computed once.
+
+        Args:
+            frame (`numpy.ndarray`_):
+                Image to trim.  Must have the same shape as the raw image.
+
+        Returns:
+            `numpy.ndarray`_: Trimmed image.
+        """
+        if frame.shape != self.shape:
+            msgs.error('Image to trim has shape {0}; expected {1}.'.format(frame.shape,
+                                                                          self.shape))
+        if self._trim_indx is None:
+            mask = self.datasec_img < 1
+            rows = np.where(np.invert(np.all(mask, axis=1)))[0]
+            cols = np.where(np.invert(np.all(mask, axis=0)))[0]
+            if np.any(mask[np.ix_(rows, cols)]):
+                msgs.error('Data section is oddly shaped.  Trimming does not exclude all '
+                           'pixels outside the data sections.')
+            self._trim_indx = np.ix_(rows, cols)
+        return frame[self._trim_indx]
+
+
+_amp_sections_cache = OrderedDict()
+"""
+Cache of the :class:`AmpSections` objects constructed by :func:`amp_sections`.
+"""
+
+
+def amp_sections(shape, datasec, oscansec, binning=None, max_cache=32):
+    """
+    Construct the amplifier section geometry of a raw image.
+
+    The result is cached, such that the section strings are parsed only
+    once for each detector, binning, and image shape.
+
+    Args:
+        shape (:obj:`tuple`):
+            Shape of the raw image.
+        datasec (:obj:`list`, `numpy.ndarray`_):
+            Data section of each amplifier as a 1-indexed, FITS-like
+            section string (see :func:`pypeit.core.parse.sec2slice`).
+            Can be None.
+        oscansec (:obj:`list`, `numpy.ndarray`_):
+            Same as ``datasec``, but for the overscan sections.
+        binning (:obj:`str`, optional):
+            Comma-separated binning along each axis of the raw image.
+        max_cache (:obj:`int`, optional):
+            Maximum number of objects to keep in the cache.
+
+    Returns:
+        :class:`AmpSections`: The amplifier geometry.  The returned
+        object is shared, and should not be altered.
+    """
+    _datasec = None if datasec is None else tuple(np.atleast_1d(datasec).tolist())
+    _oscansec = None if oscansec is None else tuple(np.atleast_1d(oscansec).tolist())
+    key = (tuple(shape), _datasec, _oscansec, binning)
+    if key in _amp_sections_cache:
+        _amp_sections_cache.move_to_end(key)
+        return _amp_sections_cache[key]
+
+    sections = []
+    for sec in [_datasec, _oscansec]:
+        sections += [[] if sec is None else
+                        [parse.sec2slice(s, one_indexed=True, include_end=True, require_dim=2,
+                                         binning=binning) for s in sec]]
+    _amp_sections_cache[key] = AmpSections(shape, sections[0], sections[1])
+    while len(_amp_sections_cache) > max_cache:
+        _amp_sections_cache.popitem(last=False)
+    return _amp_sections_cache[key]
+
+
 def subtract_overscan(rawframe, datasec_img, oscansec_img,
-                          method='savgol', params=[5, 65]):
+                          method='savgol', params=[5, 65], sections=None):
     """
     Subtract overscan
 
@@ -355,6 +570,10 @@ def subtract_overscan(rawframe, datasec_img, oscansec_img,
             method=polynomial, set params = order, number of pixels,
             number of repeats ; for method=savgol, set params = order,
             window size ; for method=median, params are ignored.
+        sections (:class:`AmpSections`, optional):
+            Pre-computed geometry of the amplifier sections.  If
+            provided, the sections are taken from this object instead of
+            being searched for in ``datasec_img`` and ``oscansec_img``.
 
     Returns:
         :obj:`numpy.ndarray`: The input frame with the overscan region
@@ -364,14 +583,21 @@ def subtract_overscan(rawframe, datasec_img, oscansec_img,
     no_overscan = rawframe.copy()
 
     # Amplifiers
-    amps = np.unique(datasec_img[datasec_img > 0]).tolist()
+    amps = np.unique(datasec_img[datasec_img > 0]).tolist() if sections is None \
+                else [i+1 for i in range(sections.numamplifiers)
+                        if sections.amp_slices(i+1) is not None]
 
     # Perform the overscan subtraction for each amplifier
     for amp in amps:
-        # Pull out the overscan data
-        overscan, _ = rect_slice_with_mask(rawframe, oscansec_img, amp)
-        # Pull out the real data
-        data, data_slice = rect_slice_with_mask(rawframe, datasec_img, amp)
+        if sections is None:
+            # Pull out the overscan data
+            overscan, _ = rect_slice_with_mask(rawframe, oscansec_img, amp)
+            # Pull out the real data
+            data, data_slice = rect_slice_with_mask(rawframe, datasec_img, amp)
+        else:
+            overscan = rawframe[sections.amp_slices(amp, overscan=True)]
+            data_slice = sections.amp_slices(amp)
+            data = rawframe[data_slice]
 
         # Shape along at least one axis must match
         data_shape = data.shape
@@ -529,6 +755,7 @@ def subtract_pattern(rawframe, datasec_img, oscansec_img, frequency=None, axis=1
 
     debug = False
     if debug:
+        from IPython import embed
         embed()
         import astropy.io.fits as fits
         hdu = fits.PrimaryHDU(rawframe)
@@ -999,6 +1226,7 @@ def variance_frame(datasec_img, sciframe, gain, ronoise, darkcurr=None,
     _objframe = np.zeros_like(skyframe) if objframe is None else objframe
     var = np.abs(skyframe + _objframe - np.sqrt(2.0)*np.sqrt(rnoise)) + rnoise
     var = var + adderr ** 2 * (np.abs(sciframe)) ** 2
+    from IPython import embed
     embed(header='this appears to be broken!')
     return
 
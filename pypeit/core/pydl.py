@@ -1,7 +1,6 @@
 # Licensed under a 3-clause BSD style license - see PYDL_LICENSE.rst
 # -*- coding: utf-8 -*-
 # Also cite https://doi.org/10.5281/zenodo.1095150 when referencing PYDL
-from IPython import embed
 
 import numpy as np
 
@@ -7,8 +7,6 @@ import glob
 import numpy as np
 import yaml
 
-from IPython import embed
-
 # CANNOT INCLUDE msgs IN THIS MODULE AS
 #  THE HTML GENERATION OCCURS FROM msgs
 #from pypeit import msgs
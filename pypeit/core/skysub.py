@@ -3,6 +3,8 @@
 .. include common links, assuming primary doc root is up one directory
 .. include:: ../include/links.rst
 """
+from concurrent import futures
+
 import numpy as np
 
 from scipy import ndimage
@@ -10,12 +12,10 @@ from scipy.special import ndtr
 
 from matplotlib import pyplot as plt
 
-from IPython import embed
-
 from pypeit.images import imagebitmask
 from pypeit.core import basis, pixels, extract
 from pypeit.core import fitting
-from pypeit import msgs, utils, bspline, slittrace
+from pypeit import msgs, utils, bspline, slittrace, specobjs
 from pypeit.display import display
 
 def skysub_npoly(thismask):
@@ -905,16 +905,106 @@ def local_skysub_extract(sciimg, sciivar, tilts, waveimg, global_sky, rn2_img,
     return (skyimage[thismask], objimage[thismask], modelivar[thismask], outmask[thismask])
 
 
+def _order_cutout(sciimg, sciivar, fullmask, tilts, waveimg, global_sky, rn2img, thismask,
+                  slit_left, slit_righ, sobjs, spat_pix, box_rad):
+    """
+    Cut out the detector columns spanned by an echelle order.
+
+    The spatial coordinates of the order (slit edges and ``spat_pix``)
+    are shifted to the cutout; the object traces are shifted by
+    :func:`_order_local_skysub_extract`.
+
+    Args:
+        sciimg, sciivar, fullmask, tilts, waveimg, global_sky, rn2img (`numpy.ndarray`_):
+            Detector images; see :func:`ech_local_skysub_extract`.
+        thismask (`numpy.ndarray`_):
+            Boolean image selecting the pixels of the order.
+        slit_left, slit_righ (`numpy.ndarray`_):
+            Spatial-pixel coordinates of the order edges.
+        sobjs (`numpy.ndarray`_):
+            Array with the :class:`~pypeit.specobj.SpecObj` objects in
+            the order.
+        spat_pix (`numpy.ndarray`_):
+            Image with the spatial location of the pixels, or None.
+        box_rad (:obj:`float`):
+            Boxcar radius in pixels.
+
+    Returns:
+        :obj:`tuple`: The positional arguments for
+        :func:`_order_local_skysub_extract`.
+    """
+    spat = np.where(np.any(thismask, axis=0))[0]
+    x0, x1 = (spat[0], spat[-1]+1) if spat.size > 0 else (0, thismask.shape[1])
+    cut = np.s_[:, x0:x1]
+    # True  = Good, False = Bad for inmask
+    inmask = (fullmask[cut] == 0) & thismask[cut]
+    return float(x0), sciimg[cut], sciivar[cut], tilts[cut], waveimg[cut], global_sky[cut], \
+            rn2img[cut], thismask[cut], inmask, slit_left - x0, slit_righ - x0, sobjs, \
+            None if spat_pix is None else spat_pix[cut] - x0, box_rad
+
+
+def _order_local_skysub_extract(offset, sciimg, sciivar, tilts, waveimg, global_sky, rn2img,
+                                thismask, inmask, slit_left, slit_righ, sobjs, spat_pix, box_rad,
+                                **kwargs):
+    """
+    Perform the local sky subtraction and extraction of one echelle
+    order on the cutout returned by :func:`_order_cutout`.
+
+    The object traces are shifted to the cutout for
+    :func:`local_skysub_extract` and shifted back afterwards.
+
+    Args:
+        offset (:obj:`float`):
+            First detector column of the cutout.
+        sciimg, sciivar, tilts, waveimg, global_sky, rn2img, thismask, inmask (`numpy.ndarray`_):
+            Cutout images.
+        slit_left, slit_righ (`numpy.ndarray`_):
+            Order edges in the cutout.
+        sobjs (`numpy.ndarray`_):
+            Array with the :class:`~pypeit.specobj.SpecObj` objects in
+            the order. The objects are updated in place.
+        spat_pix (`numpy.ndarray`_):
+            Cutout of the image with the spatial location of the
+            pixels, or None.
+        box_rad (:obj:`float`):
+            Boxcar radius in pixels.
+        **kwargs:
+            Passed to :func:`local_skysub_extract`.
+
+    Returns:
+        :obj:`tuple`: The sky, object, and inverse variance models and
+        the extraction mask for the pixels in ``thismask`` (ordered as
+        in the full detector image), and the array of
+        :class:`~pypeit.specobj.SpecObj` objects of the order.
+    """
+    for spec in sobjs:
+        spec.TRACE_SPAT = spec.TRACE_SPAT - offset
+    skymodel, objmodel, ivarmodel, extractmask \
+            = local_skysub_extract(sciimg, sciivar, tilts, waveimg, global_sky, rn2img, thismask,
+                                   slit_left, slit_righ, specobjs.SpecObjs(specobjs=sobjs),
+                                   ingpm=inmask, spat_pix=spat_pix, box_rad=box_rad, **kwargs)
+    for spec in sobjs:
+        spec.TRACE_SPAT = spec.TRACE_SPAT + offset
+    return skymodel, objmodel, ivarmodel, extractmask, sobjs
+
+
 def ech_local_skysub_extract(sciimg, sciivar, fullmask, tilts, waveimg, global_sky, rn2img,
                              left, right, slitmask, sobjs, order_vec, spat_pix=None,
                              fit_fwhm=False, min_snr=2.0,bsp=0.6, extract_maskwidth=4.0,
                              trim_edg=(3,3), std=False, prof_nsigma=None, niter=4, box_rad_order=7,
                              sigrej=3.5, bkpts_optimal=True, sn_gauss=4.0, model_full_slit=False,
                              model_noise=True, debug_bkpts=False, show_profile=False,
-                             show_resids=False, show_fwhm=False):
+                             show_resids=False, show_fwhm=False, nproc=1):
     """
     Perform local sky subtraction, profile fitting, and optimal extraction slit by slit
 
+    Only orders with an object with S/N below ``min_snr`` can depend on
+    the FWHM measured in previously extracted orders.  If ``nproc > 1``,
+    all other orders are extracted first, in parallel on the detector
+    columns they span, and the results are merged in order of
+    decreasing S/N of the brightest object, as if the orders were
+    processed sequentially.
+
     Args:
         sciimg:
         sciivar:
@@ -955,6 +1045,15 @@ def ech_local_skysub_extract(sciimg, sciivar, fullmask, tilts, waveimg, global_s
         show_profile:
         show_resids:
         show_fwhm:
+        nproc (int, optional):
+            Number of processes used to extract the orders that do not
+            depend on the FWHM measured in other orders. Because these
+            orders are extracted on cutouts of the detector images, the
+            result can differ slightly from the serial extraction:
+            rounding differences can change the pixels rejected when
+            fitting the object profiles. The orders are always
+            processed serially if any of the debugging plots are
+            requested.
 
     Returns:
         skymodel, objmodel, ivarmodel, outmask, sobjs
@@ -1013,6 +1112,34 @@ def ech_local_skysub_extract(sciimg, sciivar, fullmask, tilts, waveimg, global_s
     msgs.info(msgs.newline() + 'Reducing orders in order of S/N of brightest object:' + msgs.newline() + dash +
               msgs.newline() + '{:<8s}{:<8s}{:>10s}'.format('slit','order','S/N') + msgs.newline() + dash +
               msgs.newline() + str_out)
+    # Keyword arguments for the local sky subtraction and extraction of each order
+    extract_kwargs = dict(std=std, bsp=bsp, extract_maskwidth=extract_maskwidth, trim_edg=trim_edg,
+                          prof_nsigma=prof_nsigma, niter=niter, sigrej=sigrej,
+                          bkpts_optimal=bkpts_optimal, sn_gauss=sn_gauss,
+                          model_full_slit=model_full_slit, model_noise=model_noise,
+                          debug_bkpts=debug_bkpts, show_resids=show_resids,
+                          show_profile=show_profile)
+
+    def cutout_args(iord):
+        return _order_cutout(sciimg, sciivar, fullmask, tilts, waveimg, global_sky, rn2img,
+                             slitmask == gdslit_spat[iord], left[:,iord], right[:,iord],
+                             sobjs[sobjs.ECH_ORDERINDX == iord].specobjs, spat_pix,
+                             box_rad_order[iord])
+
+    # Orders in which all objects are above min_snr never use the FWHM
+    # measured in other orders, so they can be extracted independently
+    # and ahead of time
+    independent = np.all(order_snr > min_snr, axis=1)
+    order_results = {}
+    _nproc = 1 if show_profile or show_resids or debug_bkpts else nproc
+    if _nproc > 1 and np.sum(independent) > 1:
+        with futures.ProcessPoolExecutor(max_workers=min(_nproc, int(np.sum(independent)))) \
+                as executor:
+            jobs = {iord: executor.submit(_order_local_skysub_extract, *cutout_args(iord),
+                                          **extract_kwargs)
+                        for iord in srt_order_snr if independent[iord]}
+            order_results = {iord: job.result() for iord, job in jobs.items()}
+
     # Loop over orders in order of S/N ratio (from highest to lowest) for the brightest object
     for iord in srt_order_snr:
         order = order_vec[iord]
@@ -1082,16 +1209,18 @@ def ech_local_skysub_extract(sciimg, sciivar, fullmask, tilts, waveimg, global_s
 
         thisobj = (sobjs.ECH_ORDERINDX == iord) # indices of objects for this slit
         thismask = slitmask == gdslit_spat[iord] # pixels for this slit
-        # True  = Good, False = Bad for inmask
-        inmask = (fullmask == 0) & thismask
         # Local sky subtraction and extraction
-        skymodel[thismask], objmodel[thismask], ivarmodel[thismask], extractmask[thismask] = local_skysub_extract(
-            sciimg, sciivar, tilts, waveimg, global_sky,rn2img, thismask,
-            left[:,iord], right[:,iord], sobjs[thisobj], spat_pix=spat_pix,
-            ingpm=inmask,std = std, bsp=bsp, extract_maskwidth=extract_maskwidth, trim_edg=trim_edg,
-            prof_nsigma=prof_nsigma, niter=niter, box_rad=box_rad_order[iord], sigrej=sigrej, bkpts_optimal=bkpts_optimal,
-            sn_gauss=sn_gauss, model_full_slit=model_full_slit, model_noise=model_noise, debug_bkpts=debug_bkpts,
-            show_resids=show_resids, show_profile=show_profile)
+        if iord in order_results:
+            skymodel[thismask], objmodel[thismask], ivarmodel[thismask], extractmask[thismask], \
+                sobjs.specobjs[thisobj] = order_results.pop(iord)
+        else:
+            # True  = Good, False = Bad for inmask
+            inmask = (fullmask == 0) & thismask
+            skymodel[thismask], objmodel[thismask], ivarmodel[thismask], extractmask[thismask] \
+                    = local_skysub_extract(sciimg, sciivar, tilts, waveimg, global_sky, rn2img,
+                                           thismask, left[:,iord], right[:,iord], sobjs[thisobj],
+                                           spat_pix=spat_pix, ingpm=inmask,
+                                           box_rad=box_rad_order[iord], **extract_kwargs)
 
         # update the FWHM fitting vector for the brighest object
         indx = (sobjs.ECH_OBJID == uni_objid[ibright]) & (sobjs.ECH_ORDERINDX == iord)
@@ -11,7 +11,6 @@ These routines are taken from the DEEP2 IDL-based pipeline.
 .. include:: ../include/links.rst
 
 """
-from IPython import embed
 
 import numpy as np
 from matplotlib import pyplot as plt
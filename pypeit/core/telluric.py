@@ -21,7 +21,6 @@ from pypeit import io
 from astropy.io import fits
 from sklearn import mixture
 
-from IPython import embed
 from pypeit.spectrographs.util import load_spectrograph
 
 
@@ -13,14 +13,14 @@ accessible by the docstring of all modules?
 """
 from collections import Counter
 
-from IPython import embed
-
 import numpy as np
 from scipy import ndimage, signal, interpolate
 from matplotlib import pyplot as plt
 
 from astropy.stats import sigma_clipped_stats, sigma_clip
 
+import numba as nb
+
 from pypeit import msgs
 from pypeit import utils
 from pypeit import sampling
@@ -512,9 +512,152 @@ def prepare_sobel_for_trace(sobel_sig, bpm=None, boxcar=5, side='left'):
     return utils.boxcar_smooth_rows(img, boxcar, wgt=wgt, replace='zero')
 
 
+# Bits used by _follow_centroid_rows to flag the measurements; these are
+# converted to the boolean or bitmask flags returned by follow_centroid.
+_follow_flags = [(1, 'MATHERROR'), (2, 'OUTSIDEAPERTURE'), (4, 'EDGEBUFFER'), (8, 'MOMENTERROR'),
+                 (16, 'LARGESHIFT')]
+
+
+@nb.jit(nopython=True, cache=True)
+def _pairwise_sum(a, n):
+    """
+    Sum the first `n` elements of `a` in the same order as numpy's
+    pairwise summation so that the compiled centroids are identical to
+    those from :func:`pypeit.core.moment.moment1d`.
+    """
+    if n < 8:
+        res = 0.
+        for i in range(n):
+            res += a[i]
+        return res
+    if n <= 128:
+        r = a[:8].copy()
+        i = 8
+        while i < n - (n % 8):
+            for j in range(8):
+                r[j] += a[i+j]
+            i += 8
+        res = ((r[0] + r[1]) + (r[2] + r[3])) + ((r[4] + r[5]) + (r[6] + r[7]))
+        while i < n:
+            res += a[i]
+            i += 1
+        return res
+    n2 = n // 2
+    n2 -= n2 % 8
+    return _pairwise_sum(a, n2) + _pairwise_sum(a[n2:], n - n2)
+
+
+@nb.jit(nopython=True, cache=True, error_model='numpy')
+def _follow_centroid_rows(flux, ivar, bpm, fwgt, xc, xe, flg, start_row, radius, maxshift_start,
+                          maxshift_follow, maxerror, fill_error):
+    """
+    Compiled version of the row-by-row recursion in
+    :func:`follow_centroid`.
+
+    All traces are advanced together, one row at a time, starting
+    from `start_row` and then proceeding to higher and then lower
+    rows. Each row replicates the uniformly weighted first moment
+    from :func:`pypeit.core.moment.moment1d` and the flagging and
+    'bound' filling in :func:`masked_centroid`. The centers, errors,
+    and flags (see ``_follow_flags``) are filled in place in `xc`,
+    `xe`, and `flg`.
+    """
+    nr, nc = flux.shape
+    nt = xc.shape[1]
+    tiny = np.finfo(np.float64).tiny
+    i1 = np.empty(nt, dtype=np.int64)
+    integ = np.empty(nc+4, dtype=np.float64)
+    integc = np.empty(nc+4, dtype=np.float64)
+    wt = np.empty(nc+4, dtype=np.float64)
+    var = np.empty(nc+4, dtype=np.float64)
+    for step in range(nr):
+        if step == 0:
+            i = start_row
+            p = start_row
+            maxshift = maxshift_start
+        elif step < nr - start_row:
+            i = start_row + step
+            p = i - 1
+            maxshift = maxshift_follow
+        else:
+            i = nr - 1 - step
+            p = i + 1
+            maxshift = maxshift_follow
+        cen = xc[p].copy()
+
+        # Size of the integration window; the same for all traces
+        npix = 0
+        for t in range(nt):
+            i1[t] = int(np.floor(cen[t] - radius[t] + 0.5))
+            d = int(np.floor(cen[t] + radius[t] + 0.5)) - i1[t]
+            if t == 0 or d < npix:
+                npix = d
+        npix += 3
+
+        for t in range(nt):
+            col = cen[t]
+            r = radius[t]
+            # Zeroth and first moment
+            for k in range(npix):
+                c = i1[t] - 1 + k
+                ih = min(max(c, 0), nc-1)
+                w = 0.
+                if c >= 0 and c < nc and not bpm[i,ih] and ivar[i,ih] > 0:
+                    w = min(max(r - np.absolute(c - col) + 0.5, 0.), 1.)
+                wt[k] = w
+                integ[k] = flux[i,ih] * w * fwgt[i,ih]
+                integc[k] = integ[k] * c
+            mu0 = _pairwise_sum(integ, npix)
+            num = _pairwise_sum(integc, npix)
+            xfit = num / mu0
+            matherr = not np.isfinite(xfit) or np.absolute(num) * tiny >= np.absolute(mu0)
+
+            # Error in the first moment
+            xerr = fill_error
+            if not matherr:
+                nvar = 0
+                for k in range(npix):
+                    c = i1[t] - 1 + k
+                    ih = min(max(c, 0), nc-1)
+                    v = wt[k] * (c - xfit)
+                    v *= v
+                    var[k] = 0.
+                    q = v / ivar[i,ih]
+                    if np.isfinite(q) and np.absolute(v) * tiny < np.absolute(ivar[i,ih]):
+                        var[k] = q
+                        nvar += 1
+                if nvar > 0:
+                    s = np.sqrt(_pairwise_sum(var, npix))
+                    q = s / np.absolute(mu0)
+                    if np.isfinite(s) and np.isfinite(q) and s * tiny < np.absolute(mu0):
+                        xerr = q
+            else:
+                xfit = col
+
+            # Flag centroids outside the aperture and near the image edge
+            outside_ap = np.absolute(xfit - col) > r + 0.5
+            edge_buffer = xfit < r - 0.5 or xfit > nc - 0.5 - r
+            bad = matherr or outside_ap or edge_buffer
+            if bad:
+                xfit = col
+                xerr = fill_error
+            # Limit the shift
+            large_shift = np.absolute(xfit - col) > maxshift
+            xfit = min(max(xfit - col, -maxshift), maxshift) + col
+            # Flag large errors
+            large_error = xerr > maxerror
+            if bad or large_error:
+                xfit = col
+                xerr = fill_error
+
+            xc[i,t] = xfit
+            xe[i,t] = xerr
+            flg[i,t] = matherr + 2*outside_ap + 4*edge_buffer + 8*large_error + 16*large_shift
+
+
 def follow_centroid(flux, start_row, start_cen, ivar=None, bpm=None, fwgt=None, width=6.0,
                     maxshift_start=0.5, maxshift_follow=0.15, maxerror=0.2, continuous=True,
-                    bitmask=None):
+                    bitmask=None, compiled=True):
     """
     Follow the centroid of features in an image along the first axis.
 
@@ -532,9 +675,12 @@ def follow_centroid(flux, start_row, start_cen, ivar=None, bpm=None, fwgt=None,
     but treats the calculation of the centroids sequentially where
     the result for each row is dependent on and starts from the
     result from the previous row. The only independent measurement is
-    the one performed at the input `start_row`. This function is much
-    slower than :func:`masked_centroid` because of this introduced
-    dependency.
+    the one performed at the input `start_row`. Because of this
+    introduced dependency, the recursion is performed by a compiled
+    kernel that advances all traces together, one row at a time. The
+    original row-by-row calls to :func:`masked_centroid` are kept as
+    the reference implementation (see `compiled`); both produce
+    identical results.
 
     .. note::
         - This is an adaptation of ``trace_crude`` from ``idlspec2d``.
@@ -597,6 +743,12 @@ def follow_centroid(flux, start_row, start_cen, ivar=None, bpm=None, fwgt=None,
             interpret the correct flag names defined. In addition to
             flags used by :func:`_recenter_trace_row`, this function
             uses the DISCONTINUOUS flag.
+        compiled (:obj:`bool`, optional):
+            Use the compiled kernel to follow the traces. If False,
+            use the reference implementation that calls
+            :func:`masked_centroid` for each row. The reference
+            implementation is always used if either `maxshift_start`
+            or `maxshift_follow` is None.
 
     Returns:
         Three numpy arrays are returned: the optimized center, an
@@ -634,25 +786,45 @@ def follow_centroid(flux, start_row, start_cen, ivar=None, bpm=None, fwgt=None,
 
     # NOTE: This is effectively the old trace_crude_init
 
-    # Recenter the starting row
-    i = start_row
-    xc[i,:], xe[i,:], xm[i,:] = masked_centroid(flux, xc[i,:], width, ivar=_ivar, bpm=_bpm,
-                                                fwgt=_fwgt, row=i, maxshift=maxshift_start,
-                                                maxerror=maxerror, bitmask=bitmask, fill='bound')
-
-    # Go to higher indices using the result from the previous row
-    for i in range(start_row+1,nr):
-        xc[i,:], xe[i,:], xm[i,:] = masked_centroid(flux, xc[i-1,:], width, ivar=_ivar, bpm=_bpm,
-                                                    fwgt=_fwgt, row=i, maxshift=maxshift_follow,
+    if compiled and maxshift_start is not None and maxshift_follow is not None:
+        # Follow all the traces using the compiled kernel
+        radius = np.broadcast_to(np.asarray(width, dtype=float)/2, (nt,)).copy()
+        flg = np.zeros(xc.shape, dtype=np.uint8)
+        _follow_centroid_rows(np.asarray(flux, dtype=float), np.asarray(_ivar, dtype=float),
+                              np.asarray(_bpm, dtype=bool), np.asarray(_fwgt, dtype=float), xc, xe,
+                              flg, start_row, radius, float(maxshift_start),
+                              float(maxshift_follow), np.inf if maxerror is None else float(maxerror),
+                              -1.)
+        # Convert the flags
+        if bitmask is None:
+            xm = flg & 15 > 0
+        else:
+            for bit, flag in _follow_flags:
+                indx = flg & bit > 0
+                xm[indx] = bitmask.turn_on(xm[indx], flag)
+    else:
+        # Recenter the starting row
+        i = start_row
+        xc[i,:], xe[i,:], xm[i,:] = masked_centroid(flux, xc[i,:], width, ivar=_ivar, bpm=_bpm,
+                                                    fwgt=_fwgt, row=i, maxshift=maxshift_start,
                                                     maxerror=maxerror, bitmask=bitmask,
                                                     fill='bound')
 
-    # Go to lower indices using the result from the previous row
-    for i in range(start_row-1,-1,-1):
-        xc[i,:], xe[i,:], xm[i,:] = masked_centroid(flux, xc[i+1,:], width, ivar=_ivar, bpm=_bpm,
-                                                    fwgt=_fwgt, row=i, maxshift=maxshift_follow,
-                                                    maxerror=maxerror, bitmask=bitmask,
-                                                    fill='bound')
+        # Go to higher indices using the result from the previous row
+        for i in range(start_row+1,nr):
+            xc[i,:], xe[i,:], xm[i,:] = masked_centroid(flux, xc[i-1,:], width, ivar=_ivar,
+                                                        bpm=_bpm, fwgt=_fwgt, row=i,
+                                                        maxshift=maxshift_follow,
+                                                        maxerror=maxerror, bitmask=bitmask,
+                                                        fill='bound')
+
+        # Go to lower indices using the result from the previous row
+        for i in range(start_row-1,-1,-1):
+            xc[i,:], xe[i,:], xm[i,:] = masked_centroid(flux, xc[i+1,:], width, ivar=_ivar,
+                                                        bpm=_bpm, fwgt=_fwgt, row=i,
+                                                        maxshift=maxshift_follow,
+                                                        maxerror=maxerror, bitmask=bitmask,
+                                                        fill='bound')
 
     # NOTE: In edgearr_tcrude, skip_bad (roughly opposite of continuous
     # here) was True by default, meaning continuous would be False by
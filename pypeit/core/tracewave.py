@@ -8,8 +8,6 @@ from scipy import interpolate, ndimage
 from matplotlib import pyplot as plt
 from matplotlib import cm, lines
 
-from IPython import embed
-
 from astropy.stats import sigma_clipped_stats
 
 from pypeit import msgs
@@ -821,11 +819,12 @@ def fit2tilts(shape, coeff2, func2d, spat_shift=None):
     xnspatmin1 = float(nspat - 1)
     spec_vec = np.arange(nspec)
     spat_vec = np.arange(nspat) - _spat_shift
-    spat_img, spec_img = np.meshgrid(spat_vec, spec_vec)
     #
     pypeitFit = fitting.PypeItFit(fitc=coeff2, minx=0.0, maxx=1.0,
                                   minx2=0.0, maxx2=1.0, func=func2d)
-    tilts = pypeitFit.eval(spec_img / xnspecmin1, x2=spat_img / xnspatmin1)
+    # The image is a regular grid, so evaluate the fit using the
+    # (cached) basis matrices along each axis
+    tilts = pypeitFit.eval_grid(spec_vec / xnspecmin1, x2=spat_vec / xnspatmin1)
     # Added this to ensure that tilts are never crazy values due to extrapolation of fits which can break
     # wavelength solution fitting
     return np.fmax(np.fmin(tilts, 1.2), -0.2)
@@ -15,8 +15,6 @@ from astropy.time import Time
 
 from pypeit import msgs
 
-from IPython import embed
-
 def geomotion_calculate(radec, time, longitude, latitude, elevation, refframe):
     """
     Correct the wavelength calibration solution to the desired reference frame
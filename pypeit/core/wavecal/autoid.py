@@ -1,15 +1,14 @@
 """ Module for finding patterns in arc line spectra
 """
-from scipy.ndimage.filters import gaussian_filter
 from scipy.spatial import cKDTree
 import itertools
+import time
+from concurrent import futures
 import scipy
-from linetools import utils as ltu
 from astropy import table
 import copy
 import numba as nb
 import numpy as np
-from IPython import embed
 
 from astropy.table import Table
 
@@ -512,7 +511,7 @@ def match_qa(arc_spec, tcent, line_list, IDs, scores, outfile = None, title=None
 
 def reidentify(spec, spec_arxiv_in, wave_soln_arxiv_in, line_list, nreid_min, det_arxiv=None, detections=None, cc_thresh=0.8,cc_local_thresh = 0.8,
                match_toler=2.0, nlocal_cc=11, nonlinear_counts=1e10,sigdetect=5.0,fwhm=4.0,
-               debug_xcorr=False, debug_reid=False, debug_peaks = False):
+               debug_xcorr=False, debug_reid=False, debug_peaks = False, templates=None):
     """ Determine  a wavelength solution for a set of spectra based on archival wavelength solutions
 
     Parameters
@@ -576,6 +575,11 @@ def reidentify(spec, spec_arxiv_in, wave_soln_arxiv_in, line_list, nreid_min, de
     debug_reid: bool, default = False
        Show plots useful for debugging the line reidentification
 
+    templates: list, default = None
+       List of :class:`~pypeit.core.wavecal.wvutils.XcorrTemplate` objects, one per archival spectrum, with the
+       archival spectra resized to the size of spec. These cache the processing of the archival spectra when they are
+       used to reidentify many spectra. If None, the archival spectra are processed for this spectrum only.
+
     Returns
     -------
     (detections, spec_cont_sub, patt_dict)
@@ -637,6 +641,11 @@ def reidentify(spec, spec_arxiv_in, wave_soln_arxiv_in, line_list, nreid_min, de
     if nspec_arxiv != nspec:
         msgs.error('Spectrum sizes do not match. Something is very wrong!')
 
+    if templates is None:
+        templates = [wvutils.XcorrTemplate(spec_arxiv[:,iarxiv]) for iarxiv in range(narxiv)]
+    elif len(templates) != narxiv or any([t.spec.size != nspec for t in templates]):
+        msgs.error('Templates do not match the archival spectra.')
+
     # Search for lines no matter what to continuum subtract the input arc
     tcent, ecent, cut_tcent, icut, spec_cont_sub = wvutils.arc_lines_from_spec(
         spec, sigdetect=sigdetect,nonlinear_counts=nonlinear_counts, fwhm = fwhm, debug = debug_peaks)
@@ -650,8 +659,12 @@ def reidentify(spec, spec_arxiv_in, wave_soln_arxiv_in, line_list, nreid_min, de
     # dispersion of wavelength arxiv
     det_arxiv1 = {}
     for iarxiv in range(narxiv):
-        tcent_arxiv, ecent_arxiv, cut_tcent_arxiv, icut_arxiv, spec_cont_sub_now = wvutils.arc_lines_from_spec(
-            spec_arxiv[:,iarxiv], sigdetect=sigdetect,nonlinear_counts=nonlinear_counts, fwhm = fwhm, debug = debug_peaks)
+        if debug_peaks:
+            tcent_arxiv, ecent_arxiv, cut_tcent_arxiv, icut_arxiv, spec_cont_sub_now = wvutils.arc_lines_from_spec(
+                spec_arxiv[:,iarxiv], sigdetect=sigdetect,nonlinear_counts=nonlinear_counts, fwhm = fwhm, debug = debug_peaks)
+        else:
+            tcent_arxiv, ecent_arxiv, cut_tcent_arxiv, icut_arxiv, spec_cont_sub_now = templates[iarxiv].arc_lines(
+                sigdetect=sigdetect,nonlinear_counts=nonlinear_counts, fwhm = fwhm)
         spec_arxiv_cont_sub[:,iarxiv] = spec_cont_sub_now
         det_arxiv1[str(iarxiv)] = tcent_arxiv[icut_arxiv]
 
@@ -687,7 +700,7 @@ def reidentify(spec, spec_arxiv_in, wave_soln_arxiv_in, line_list, nreid_min, de
         success, shift_vec[iarxiv], stretch_vec[iarxiv], ccorr_vec[iarxiv], _, _ = \
             wvutils.xcorr_shift_stretch(spec_cont_sub, spec_arxiv[:, iarxiv],
                                         cc_thresh=cc_thresh, fwhm=fwhm, seed=random_state,
-                                        debug=debug_xcorr)
+                                        debug=debug_xcorr, template=templates[iarxiv])
         # If cc < cc_thresh or if this optimization failed, don't reidentify from this arxiv spectrum
         if success != 1:
             continue
@@ -910,6 +923,7 @@ def full_template(spec, par, ok_mask, det, binspectral, nsnippet=2, debug_xcorr=
             ax.plot(xvals, temp_spec)  # Template
             ax.plot(xvals, np.roll(pspec, int(shift_cc)), 'k')  # Input
             plt.show()
+            from IPython import embed
             embed(header='909 autoid')
         i0 = npad // 2 + int(shift_cc)
 
@@ -978,6 +992,7 @@ def full_template(spec, par, ok_mask, det, binspectral, nsnippet=2, debug_xcorr=
                                               sigrej_first=par['sigrej_first'],
                                               sigrej_final=par['sigrej_final'])
         except TypeError:
+            from IPython import embed
             embed(header='974 of autoid')
             wvcalib[str(slit)] = None
         else:
@@ -986,6 +1001,52 @@ def full_template(spec, par, ok_mask, det, binspectral, nsnippet=2, debug_xcorr=
     return wvcalib
 
 
+def _reidentify_and_fit(spec, spec_arxiv, wave_soln_arxiv, templates, line_list, nreid_min,
+                        reid_kwargs, fit_kwargs):
+    """
+    Reidentify the arc lines in one spectrum and fit its wavelength
+    solution.
+
+    This is a convenience function for :class:`ArchiveReid`, which can
+    execute it in separate processes for each slit.
+
+    Args:
+        spec (`numpy.ndarray`_):
+            Arc spectrum.
+        spec_arxiv (`numpy.ndarray`_):
+            Archival arc spectra; see :func:`reidentify`.
+        wave_soln_arxiv (`numpy.ndarray`_):
+            Wavelength solutions of the archival spectra; see
+            :func:`reidentify`.
+        templates (:obj:`list`):
+            :class:`~pypeit.core.wavecal.wvutils.XcorrTemplate` objects
+            for the archival spectra; see :func:`reidentify`.
+        line_list (`astropy.table.Table`_):
+            The arc line list.
+        nreid_min (:obj:`int`):
+            See :func:`reidentify`.
+        reid_kwargs (:obj:`dict`):
+            Other keyword arguments passed to :func:`reidentify`.
+        fit_kwargs (:obj:`dict`):
+            Keyword arguments passed to
+            :func:`~pypeit.core.wavecal.wv_fitting.fit_slit`.
+
+    Returns:
+        :obj:`tuple`: The detected lines, the continuum-subtracted arc
+        spectrum, and the pattern dictionary returned by
+        :func:`reidentify`, and the fit returned by
+        :func:`~pypeit.core.wavecal.wv_fitting.fit_slit`.  The latter is
+        None if the reidentification is not acceptable.
+    """
+    detections, spec_cont_sub, patt_dict \
+            = reidentify(spec, spec_arxiv, wave_soln_arxiv, line_list, nreid_min,
+                         templates=templates, **reid_kwargs)
+    if not patt_dict['acceptable']:
+        return detections, spec_cont_sub, patt_dict, None
+    final_fit = wv_fitting.fit_slit(spec_cont_sub, patt_dict, detections, line_list, **fit_kwargs)
+    return detections, spec_cont_sub, patt_dict, final_fit
+
+
 class ArchiveReid:
     r"""
     Algorithm to wavelength calibrate spectroscopic data based on an
@@ -1163,42 +1224,71 @@ class ArchiveReid:
 #            orders, _ = self.spectrograph.slit2order(slit_spat_pos)
 
         ind_arxiv = np.arange(narxiv, dtype=int)
+        # The archival spectra resized to the size of the input spectra;
+        # the processing of each is cached and reused for all slits
+        templates = [wvutils.XcorrTemplate(s)
+                        for s in arc.resize_spec(self.spec_arxiv, self.nspec).T]
         # These are the final outputs
         self.all_patt_dict = {}
         self.detections = {}
         self.wv_calib = {}
         self.bad_slits = np.array([], dtype=np.int)
         # Reidentify each slit, and perform a fit
+        slits = []
+        slit_args = []
         for slit in range(self.nslits):
             # ToDO should we still be populating wave_calib with an empty dict here?
             if slit not in self.ok_mask:
                 self.wv_calib[str(slit)] = None
                 continue
-            msgs.info('Reidentifying and fitting slit # {0:d}/{1:d}'.format(slit,self.nslits-1))
             # If this is a fixed format echelle, arxiv has exactly the same orders as the data and so
             # we only pass in the relevant arxiv spectrum to make this much faster
             ind_sp = arxiv_orders.index(orders[slit]) if self.ech_fix_format else ind_arxiv
-            sigdetect = wvutils.parse_param(self.par, 'sigdetect', slit)
-            cc_thresh = wvutils.parse_param(self.par, 'cc_thresh', slit)
-            self.detections[str(slit)], self.spec_cont_sub[:,slit], self.all_patt_dict[str(slit)] = \
-                reidentify(self.spec[:,slit], self.spec_arxiv[:,ind_sp], self.wave_soln_arxiv[:,ind_sp],
-                           self.tot_line_list, self.nreid_min, cc_thresh=cc_thresh, match_toler=self.match_toler,
-                           cc_local_thresh=self.cc_local_thresh, nlocal_cc=self.nlocal_cc, nonlinear_counts=self.nonlinear_counts,
-                           sigdetect=sigdetect, fwhm=self.fwhm, debug_peaks=self.debug_peaks, debug_xcorr=self.debug_xcorr,
-                           debug_reid=self.debug_reid)
+            reid_kwargs = dict(cc_thresh=wvutils.parse_param(self.par, 'cc_thresh', slit),
+                               match_toler=self.match_toler, cc_local_thresh=self.cc_local_thresh,
+                               nlocal_cc=self.nlocal_cc, nonlinear_counts=self.nonlinear_counts,
+                               sigdetect=wvutils.parse_param(self.par, 'sigdetect', slit),
+                               fwhm=self.fwhm, debug_peaks=self.debug_peaks,
+                               debug_xcorr=self.debug_xcorr, debug_reid=self.debug_reid)
+            fit_kwargs = dict(match_toler=self.match_toler, func=self.func, n_first=self.n_first,
+                              sigrej_first=self.sigrej_first,
+                              n_final=wvutils.parse_param(self.par, 'n_final', slit),
+                              sigrej_final=self.sigrej_final)
+            slits += [slit]
+            slit_args += [(self.spec[:,slit], self.spec_arxiv[:,ind_sp],
+                           self.wave_soln_arxiv[:,ind_sp],
+                           [templates[i] for i in np.atleast_1d(ind_sp)], self.tot_line_list,
+                           self.nreid_min, reid_kwargs, fit_kwargs)]
+
+        # Slits are independent; the debugging plots require a single
+        # process
+        nproc = 1 if self.debug_peaks or self.debug_xcorr or self.debug_reid \
+                    else self.par['nproc']
+        if nproc > 1 and len(slits) > 1:
+            msgs.info('Reidentifying and fitting {0} slits using {1} processes'.format(
+                      len(slits), min(nproc, len(slits))))
+            # Send the slits in contiguous chunks so that the templates
+            # shared by the slits in a chunk are only processed once
+            chunksize = int(np.ceil(len(slits)/min(nproc, len(slits))))
+            with futures.ProcessPoolExecutor(max_workers=min(nproc, len(slits))) as executor:
+                results = list(executor.map(_reidentify_and_fit, *zip(*slit_args),
+                                            chunksize=chunksize))
+        else:
+            results = []
+            for slit, args in zip(slits, slit_args):
+                msgs.info('Reidentifying and fitting slit # {0:d}/{1:d}'.format(slit,self.nslits-1))
+                results += [_reidentify_and_fit(*args)]
+
+        for slit, (detections, spec_cont_sub, patt_dict, final_fit) in zip(slits, results):
+            self.detections[str(slit)] = detections
+            self.spec_cont_sub[:,slit] = spec_cont_sub
+            self.all_patt_dict[str(slit)] = patt_dict
             # Check if an acceptable reidentification solution was found
             if not self.all_patt_dict[str(slit)]['acceptable']:
                 self.wv_calib[str(slit)] = None
                 self.bad_slits = np.append(self.bad_slits, slit)
                 continue
 
-            # Perform the fit
-            n_final = wvutils.parse_param(self.par, 'n_final', slit)
-            final_fit = wv_fitting.fit_slit(self.spec_cont_sub[:, slit], self.all_patt_dict[str(slit)],
-                                         self.detections[str(slit)],
-                                         self.tot_line_list, match_toler=self.match_toler,func=self.func, n_first=self.n_first,
-                                         sigrej_first=self.sigrej_first, n_final=n_final,sigrej_final=self.sigrej_final)
-
             # Did the fit succeed?
             if final_fit is None:
                 # This pattern wasn't good enough
@@ -1415,6 +1505,30 @@ class HolyGrail:
         return
 
     def run_brute_loop(self, slit, tcent_ecent, wavedata=None):
+        """
+        Search the pattern matching parameter space for the best
+        solution of a slit.
+
+        The patterns are generated only once per algorithm and sign, for
+        the largest search windows; the patterns of any smaller window
+        are the subset of these that span fewer lines, so each
+        combination of search windows selects its patterns from this
+        set. Combinations that select the same patterns share their
+        solution.
+
+        Args:
+            slit (:obj:`int`):
+                Slit number
+            tcent_ecent (:obj:`list`):
+                List ``[tcent, ecent]`` with the detected lines to use
+            wavedata (`numpy.ndarray`_, optional):
+                Wavelengths of the line list. If None, use the lines of
+                all the lamps.
+
+        Returns:
+            tuple: The pattern and fit dictionaries of the best
+            solution; both are None if no solution was found.
+        """
         # Set the parameter space that gets searched
         rng_poly = [3, 4]            # Range of algorithms to check (only trigons+tetragons are supported)
         rng_list = range(3, 6)       # Number of lines to search over for the linelist
@@ -1423,29 +1537,50 @@ class HolyGrail:
         idthresh = 0.5               # Criteria for early return (at least this fraction of lines must have
                                      # an ID on either side of the spectrum)
 
+        nlines = tcent_ecent[0].size
         best_patt_dict, best_final_fit = None, None
         # Loop through parameter space
         for poly in rng_poly:
-            for detsrch in rng_detn:
-                for lstsrch in rng_list:
-                    for pix_tol in rng_pixt:
-                        # JFH Note that results_brute and solve_slit are running on the same set of detections. I think this is the way
-                        # it should be.
-                        psols, msols = self.results_brute(tcent_ecent,poly=poly, pix_tol=pix_tol,
-                                                          detsrch=detsrch, lstsrch=lstsrch,wavedata=wavedata)
-                        patt_dict, final_fit = self.solve_slit(slit, psols, msols,tcent_ecent)
+            for pix_tol in rng_pixt:
+                # Generate all patterns of the largest search windows
+                psols, msols = self.results_brute(tcent_ecent, poly=poly, pix_tol=pix_tol,
+                                                  detsrch=max(rng_detn), lstsrch=max(rng_list),
+                                                  wavedata=wavedata, check_nlines=False)
+                if psols is None:
+                    continue
+                psols, msols = self.valid_patterns(psols), self.valid_patterns(msols)
+                # Number of detected and listed lines spanned by each pattern
+                pspan = (psols[0][:,-1] - psols[0][:,0], psols[1][:,-1] - psols[1][:,0])
+                mspan = (msols[0][:,-1] - msols[0][:,0], msols[1][:,-1] - msols[1][:,0])
+                solutions = {}
+                for detsrch in rng_detn:
+                    for lstsrch in rng_list:
+                        if nlines < lstsrch or nlines < detsrch:
+                            if self._verbose:
+                                msgs.info("Not enough lines to test this solution, will attempt another.")
+                            continue
+                        # Select the patterns of these search windows
+                        pgd = (pspan[0] < detsrch) & (pspan[1] < lstsrch)
+                        mgd = (mspan[0] < detsrch) & (mspan[1] < lstsrch)
+                        key = np.packbits(pgd).tobytes() + b'|' + np.packbits(mgd).tobytes()
+                        if key not in solutions:
+                            # JFH Note that results_brute and solve_slit are running on the same set of detections. I think this is the way
+                            # it should be.
+                            solutions[key] = self.solve_slit(slit, tuple(s[pgd] for s in psols),
+                                                             tuple(s[mgd] for s in msols), tcent_ecent)
+                        patt_dict, final_fit = solutions[key]
                         if final_fit is None:
                             # This is not a good solution
                             continue
                         # Test if this solution is better than the currently favoured solution
                         if best_patt_dict is None:
                             # First time a fit is found
-                            best_patt_dict, best_final_fit = copy.deepcopy(patt_dict), copy.deepcopy(final_fit)
+                            best_patt_dict, best_final_fit = patt_dict, final_fit
                             continue
                         elif final_fit['rms'] < self._rms_threshold:
                             # Has a better fit been identified (i.e. more lines identified)?
                             if len(final_fit['pixel_fit']) > len(best_final_fit['pixel_fit']):
-                                best_patt_dict, best_final_fit = copy.deepcopy(patt_dict), copy.deepcopy(final_fit)
+                                best_patt_dict, best_final_fit = patt_dict, final_fit
                             # Decide if an early return is acceptable
                             nlft = np.sum(best_final_fit['tcent'] < best_final_fit['spec'].size/2.0)
                             nrgt = best_final_fit['tcent'].size-nlft
@@ -1466,6 +1601,7 @@ class HolyGrail:
         good_fit = np.zeros(self._nslit, dtype=np.bool)
         self._det_weak = {}
         self._det_stro = {}
+        self._brute_time = {}
         for slit in range(self._nslit):
             msgs.info("Working on slit: {}".format(slit))
             if slit not in self._ok_mask:
@@ -1494,7 +1630,11 @@ class HolyGrail:
             self._det_stro[str(slit)] = [self._all_tcent[self._icut].copy(),self._all_ecent[self._icut].copy()]
 
             # Run brute force algorithm on the weak lines
+            tstart = time.perf_counter()
             best_patt_dict, best_final_fit = self.run_brute_loop(slit, self._det_weak[str(slit)])
+            self._brute_time[str(slit)] = time.perf_counter() - tstart
+            msgs.info('Pattern matching for slit {0:d} took {1:.2f}s'.format(
+                      slit, self._brute_time[str(slit)]))
 
             # Print preliminary report
             good_fit[slit] = self.report_prelim(slit, best_patt_dict, best_final_fit)
@@ -1950,6 +2090,7 @@ class HolyGrail:
             plt.subplot(212)
             plt.plot(xplt, dplt, 'bx')
             plt.show()
+            from IPython import embed
             embed()
 
         fact_nl = 1.2  # Non linear factor
@@ -1999,6 +2140,7 @@ class HolyGrail:
                 waves[:, slit] = utils.func_val(fitc, xv, func, minx=fmin, maxx=fmax)
 
         msgs.info("Performing a PCA on the order wavelength solutions")
+        from IPython import embed
         embed()
         pca_wave, outpar = pca.basis(xcen, waves, coeffs, lnpc, ofit, x0in=ords, mask=maskord, skipx0=False, function=func)
 
@@ -2086,6 +2228,7 @@ class HolyGrail:
                 plt.plot(final_fit['pixel_fit'], final_fit['wave_fit'], 'bx')
                 plt.plot(xplt, yplt, 'r-')
                 plt.show()
+                from IPython import embed
                 embed()
 
         # debugging
@@ -2113,6 +2256,7 @@ class HolyGrail:
             plt.subplot(212)
             plt.plot(xplt, dplt, 'bx')
             plt.show()
+            from IPython import embed
             embed()
 
         return new_bad_slits
@@ -2145,12 +2289,14 @@ class HolyGrail:
                     arr = self._all_tcent_weak.copy()[self._icut_weak]
                     err = self._all_ecent_weak.copy()[self._icut_weak]
                 else:
+                    from IPython import embed
                     embed()
             else:
                 if cut:
                     arr = self._all_tcent.copy()[self._icut]
                     err = self._all_ecent.copy()[self._icut]
                 else:
+                    from IPython import embed
                     embed()
         else:
             arr, err = arr_err[0], arr_err[1]
@@ -2184,7 +2330,8 @@ class HolyGrail:
             return (self._npix - 1.0) - tcent[::-1], ecent[::-1]
 
 
-    def results_brute(self, tcent_ecent, poly=3, pix_tol=0.5, detsrch=5, lstsrch=5, wavedata=None):
+    def results_brute(self, tcent_ecent, poly=3, pix_tol=0.5, detsrch=5, lstsrch=5, wavedata=None,
+                      check_nlines=True):
         """
         Need some docs here. I think this routine generates the
         patterns, either triangles are quadrangles.
@@ -2204,6 +2351,9 @@ class HolyGrail:
             Number of lines to search over for the detected lines
         wavedata, optional:
         arrerr, optional:
+        check_nlines (bool), optional:
+            Return (None, None) if there are fewer detected lines than
+            either search window.
 
         """
         # Import the pattern matching algorithms
@@ -2220,7 +2370,7 @@ class HolyGrail:
 
         # Test if there are enough lines to generate a solution
         use_tcent, _ = self.get_use_tcent(1, tcent_ecent)
-        if use_tcent.size < lstsrch or use_tcent.size < detsrch:
+        if check_nlines and (use_tcent.size < lstsrch or use_tcent.size < detsrch):
             if self._verbose:
                 msgs.info("Not enough lines to test this solution, will attempt another.")
             return None, None
@@ -2266,6 +2416,25 @@ class HolyGrail:
                 cnt += 1
         return dind, lind, wvcent, wvdisp
 
+    def valid_patterns(self, sols):
+        """
+        Remove the patterns with a central wavelength or dispersion
+        outside of the grids used to identify the best solution.
+
+        Args:
+            sols (:obj:`tuple`):
+                The pattern indices, central wavelengths, and
+                dispersions, ``(dindex, lindex, wvcen, disps)``, as
+                returned by :func:`results_brute`.
+
+        Returns:
+            tuple: The same arrays, keeping only the valid patterns.
+        """
+        dindex, lindex, wvcen, disps = sols
+        ww = np.where((self._binw[0] < wvcen) & (wvcen < self._binw[-1]) &
+                      (10.0 ** self._bind[0] < disps) & (disps < 10.0 ** self._bind[-1]))
+        return dindex[ww[0], :], lindex[ww[0], :], wvcen[ww], disps[ww]
+
     def solve_slit(self, slit, psols, msols, tcent_ecent, nstore=1, nselw=3, nseld=3):
         """
         Need some docs here. I think this routine creates a 2d histogram
@@ -2291,35 +2460,16 @@ class HolyGrail:
             tuple: patt_dict, final_dict
         """
 
-        # Extract the solutions
-        dindexp, lindexp, wvcenp, dispsp = psols
-        dindexm, lindexm, wvcenm, dispsm = msols
-
-        # Remove any invalid results from correlate
-        ww = np.where((self._binw[0] < wvcenp) & (wvcenp < self._binw[-1]) &
-                      (10.0 ** self._bind[0] < dispsp) & (dispsp < 10.0 ** self._bind[-1]))
-        dindexp = dindexp[ww[0], :]
-        lindexp = lindexp[ww[0], :]
-        dispsp = dispsp[ww]
-        wvcenp = wvcenp[ww]
-
-        # Remove any invalid results from anticorrelate
-        ww = np.where((self._binw[0] < wvcenm) & (wvcenm < self._binw[-1]) &
-                      (10.0 ** self._bind[0] < dispsm) & (dispsm < 10.0 ** self._bind[-1]))
-        dindexm = dindexm[ww[0], :]
-        lindexm = lindexm[ww[0], :]
-        dispsm = dispsm[ww]
-        wvcenm = wvcenm[ww]
+        # Extract the solutions, removing any invalid results from
+        # correlate and anticorrelate
+        dindexp, lindexp, wvcenp, dispsp = self.valid_patterns(psols)
+        dindexm, lindexm, wvcenm, dispsm = self.valid_patterns(msols)
 
         # Construct the histograms
-        histimgp, xed, yed = np.histogram2d(wvcenp, np.log10(dispsp), bins=[self._binw, self._bind])
-        histimgm, xed, yed = np.histogram2d(wvcenm, np.log10(dispsm), bins=[self._binw, self._bind])
-        #histimgp = gaussian_filter(histimgp, 3)
-        #histimgm = gaussian_filter(histimgm, 3)
+        histimgp = patterns.histogram_patterns(wvcenp, np.log10(dispsp), self._binw, self._bind)
+        histimgm = patterns.histogram_patterns(wvcenm, np.log10(dispsm), self._binw, self._bind)
         histimg = histimgp - histimgm
-        sm_histimg = gaussian_filter(histimg, [30, 15])
 
-        #histpeaks = patterns.detect_2Dpeaks(np.abs(sm_histimg))
         histpeaks = patterns.detect_2Dpeaks(np.abs(histimg))
 
         # Find the indices of the nstore largest peaks
@@ -2340,13 +2490,10 @@ class HolyGrail:
             extent = [self._binw[0], self._binw[-1], self._bind[0], self._bind[-1]]
             # plt.subplot(221)
             # plt.imshow((np.abs(histimg[:, ::-1].T)), extent=extent, aspect='auto')
-            # plt.subplot(222)
-            # plt.imshow((np.abs(sm_histimg[:, ::-1].T)), extent=extent, aspect='auto')
             # plt.subplot(223)
             # plt.imshow((np.abs(histimgp[:, ::-1].T)), extent=extent, aspect='auto')
             # plt.subplot(224)
             # plt.imshow((np.abs(histimgm[:, ::-1].T)), extent=extent, aspect='auto')
-            #plt.imshow((np.abs(sm_histimg[:, ::-1].T)), extent=extent, aspect='auto')
             cimg = ax_image.imshow(this_hist.T, extent=extent, aspect='auto',vmin=-2.0,vmax=5.0,
                        interpolation='nearest',origin='lower',cmap='Set1')
             nm = histimg.max() - histimg.min()
@@ -2486,6 +2633,7 @@ class HolyGrail:
             if self._outroot is not None:
                 # Write IDs
                 out_dict = dict(pix=use_tcent, IDs=self._all_patt_dict[str(slit)]['IDs'])
+                from linetools import utils as ltu
                 jdict = ltu.jsonify(out_dict)
                 ltu.savejson(self._outroot + slittxt + '.json', jdict, easy_to_read=True, overwrite=True)
                 msgs.info("Wrote: {:s}".format(self._outroot + slittxt + '.json'))
@@ -40,6 +40,48 @@ def detect_2Dpeaks(image):
     return pimage
 
 
+@nb.jit(nopython=True, cache=True)
+def histogram_patterns(wvcen, logdisp, binw, bind):
+    """
+    Construct the 2D histogram of the central wavelength and
+    log10(dispersion) of a set of patterns in a single pass.
+
+    The binning is identical to numpy.histogram2d with ``bins=[binw,
+    bind]``: bins are closed on the left, the last bin is also closed on
+    the right, and patterns outside the grids are ignored.
+
+    Parameters
+    ----------
+    wvcen : ndarray
+        Central wavelength of each pattern
+    logdisp : ndarray
+        log10 of the dispersion of each pattern
+    binw : ndarray
+        Edges of the central wavelength bins (increasing)
+    bind : ndarray
+        Edges of the log10(dispersion) bins (increasing)
+
+    Returns
+    -------
+    hist : ndarray
+        Number of patterns in each bin, shape (binw.size-1, bind.size-1)
+    """
+    nw = binw.size - 1
+    nd = bind.size - 1
+    hist = np.zeros((nw, nd))
+    for ii in range(wvcen.size):
+        iw = np.searchsorted(binw, wvcen[ii], 'right') - 1
+        if wvcen[ii] == binw[nw]:
+            iw -= 1
+        idd = np.searchsorted(bind, logdisp[ii], 'right') - 1
+        if logdisp[ii] == bind[nd]:
+            idd -= 1
+        if iw < 0 or iw >= nw or idd < 0 or idd >= nd:
+            continue
+        hist[iw, idd] += 1.0
+    return hist
+
+
 def match_quad_to_list(spec_lines, line_list, wv_guess, dwv_guess,
                   tol=2., dwv_uncertainty=0.2, min_ftol=0.005):
     """
@@ -5,7 +5,6 @@
 
 import os
 import numpy as np
-from IPython import embed
 
 from matplotlib import pyplot as plt
 
@@ -18,8 +17,6 @@ from scipy.interpolate import interp1d
 from astropy.table import Table
 from astropy import units
 
-from linetools import utils as ltu
-
 from pypeit import utils
 from pypeit import io
 from pypeit import wavecalib
@@ -235,6 +232,7 @@ def pypeit_arcspec(in_file, slit, binspec, binning=None):
 
     """
     if 'json' in in_file:
+        from linetools import utils as ltu
         wv_dict = ltu.loadjson(in_file)
         iwv_calib = wv_dict[str(slit)]
         pypeitFitting = fitting.PypeItFit(fitc=np.array(iwv_calib['fitc']),
@@ -242,6 +240,7 @@ def pypeit_arcspec(in_file, slit, binspec, binning=None):
                                           minx=iwv_calib['fmin'], maxx=iwv_calib['fmax'])
 
         if binning is not None and binning != binspec:
+            from IPython import embed
             embed(header='Not ready for this yet!')
         else:
             x = np.arange(len(iwv_calib['spec']))
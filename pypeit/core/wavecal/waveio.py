@@ -10,14 +10,10 @@ import numpy as np
 
 from astropy.table import Table, Column, vstack
 
-import linetools.utils
-
 import pypeit  # For path
 from pypeit import msgs
 from pypeit.core.wavecal import defs
 
-from IPython import embed
-
 # TODO: These should not be declared here
 line_path = resource_filename('pypeit', '/data/arc_lines/lists/')
 nist_path = resource_filename('pypeit','/data/arc_lines/NIST/')
@@ -40,6 +36,7 @@ def load_wavelength_calibration(filename):
     if not os.path.isfile(filename):
         msgs.error('File does not exist: {0}'.format(filename))
 
+    import linetools.utils
     wv_calib = linetools.utils.loadjson(filename)
 
     # Recast a few items as arrays
@@ -16,8 +16,6 @@ from pypeit import msgs
 
 from pypeit import datamodel
 
-from IPython import embed
-
 
 class WaveFit(datamodel.DataContainer):
     """
@@ -102,7 +100,7 @@ class WaveFit(datamodel.DataContainer):
                                            limit_hdus=limit_hdus, force_to_bintbl=True)
 
     @classmethod
-    def from_hdu(cls, hdu, chk_version=True):
+    def from_hdu(cls, hdu, chk_version=True, lazy=False):
         """
         Parse the data from the provided HDU.
 
@@ -115,7 +113,7 @@ class WaveFit(datamodel.DataContainer):
         else:
             hdu_prefix = cls.hduext_prefix_from_spatid(hdu.header['SPAT_ID'])
         # Run the default parser to get the data
-        return super(WaveFit, cls).from_hdu(hdu, hdu_prefix=hdu_prefix)
+        return super(WaveFit, cls).from_hdu(hdu, hdu_prefix=hdu_prefix, lazy=lazy)
 
     @property
     def ions(self):
@@ -22,8 +22,6 @@ from astropy.table import Table
 from pypeit import msgs
 from pypeit.core import arc
 
-from IPython import embed
-
 def parse_param(par, key, slit):
     # Find good lines for the tilts
     param_in = par[key]
@@ -207,8 +205,11 @@ def zerolag_shift_stretch(theta, y1, y2):
 def smooth_ceil_cont(inspec1, smooth, percent_ceil = None, use_raw_arc=False,sigdetect = 10.0, fwhm = 4.0):
     """ Utility routine to smooth and apply a ceiling to spectra """
 
-    # ToDO can we improve the logic here. Technically if use_raw_arc = True and perecent_ceil=None
-    # we don't need to peak find or continuum subtract, but this makes the code pretty uggly.
+    # If using the raw arc without a ceiling, we don't need to peak
+    # find or continuum subtract
+    if use_raw_arc and percent_ceil is None:
+        return np.copy(inspec1) if smooth is None \
+                    else scipy.ndimage.filters.gaussian_filter(inspec1, smooth)
 
     # Run line detection to get the continuum subtracted arc
     tampl1, tampl1_cont, tcent1, twid1, centerr1, w1, arc1, nsig1 = arc.detect_lines(inspec1, sigdetect=sigdetect, fwhm=fwhm)
@@ -235,9 +236,96 @@ def smooth_ceil_cont(inspec1, smooth, percent_ceil = None, use_raw_arc=False,sig
 
 
 
+class XcorrTemplate:
+    """
+    Archived arc spectrum prepared for repeated cross-correlations.
+
+    When reidentifying arc lines, the same archived spectra are
+    cross-correlated against many slits or orders.  This object caches
+    the quantities that only depend on the archived spectrum: the
+    smoothed, continuum-subtracted spectrum (see
+    :func:`smooth_ceil_cont`), its Fourier transform used by
+    :func:`xcorr_shift`, and the lines detected by
+    :func:`arc_lines_from_spec`.  Each is computed the first time it is
+    requested for a given set of parameters.
+
+    Args:
+        spec (`numpy.ndarray`_):
+            The archived arc spectrum.  Should not be modified after
+            instantiating the object.
+    """
+    def __init__(self, spec):
+        self.spec = spec
+        self._smooth = {}
+        self._fft = {}
+        self._lines = {}
+
+    def smooth_ceil_cont(self, smooth, percent_ceil=None, use_raw_arc=False, sigdetect=10.0,
+                         fwhm=4.0):
+        """
+        Apply :func:`smooth_ceil_cont` to the archived spectrum.
+
+        See that function for the arguments.
+
+        Returns:
+            :class:`XcorrTemplate`: Object with the processed spectrum.
+        """
+        key = (smooth, percent_ceil, use_raw_arc, sigdetect, fwhm)
+        if key not in self._smooth:
+            self._smooth[key] = XcorrTemplate(smooth_ceil_cont(self.spec, smooth,
+                                                               percent_ceil=percent_ceil,
+                                                               use_raw_arc=use_raw_arc,
+                                                               sigdetect=sigdetect, fwhm=fwhm))
+        return self._smooth[key]
+
+    def fft(self, nfft):
+        """
+        Return the real FFT of the reversed spectrum.
+
+        Args:
+            nfft (:obj:`int`):
+                Length of the transform.
+
+        Returns:
+            `numpy.ndarray`_: The transform of the reversed spectrum.
+        """
+        if nfft not in self._fft:
+            self._fft[nfft] = scipy.fft.rfft(self.spec[::-1], nfft)
+        return self._fft[nfft]
+
+    def arc_lines(self, sigdetect=10.0, fwhm=4.0, nonlinear_counts=1e10):
+        """
+        Apply :func:`arc_lines_from_spec` to the archived spectrum.
+
+        See that function for the arguments and returned objects.
+        """
+        key = (sigdetect, fwhm, nonlinear_counts)
+        if key not in self._lines:
+            self._lines[key] = arc_lines_from_spec(self.spec, sigdetect=sigdetect, fwhm=fwhm,
+                                                   nonlinear_counts=nonlinear_counts)
+        return self._lines[key]
+
+
+def _correlate(y1, y2, template=None):
+    """
+    Full cross-correlation of two spectra.
+
+    Identical to ``scipy.signal.correlate(y1, y2, mode='full')``, but
+    the transform of ``y2`` is taken from ``template`` (an
+    :class:`XcorrTemplate` holding ``y2``), if provided, when the
+    correlation is computed using FFTs.
+    """
+    if template is None or scipy.signal.choose_conv_method(y1, y2, mode='full') != 'fft':
+        return scipy.signal.correlate(y1, y2, mode='full')
+    ncorr = y1.size + y2.size - 1
+    nfft = scipy.fft.next_fast_len(ncorr, True)
+    return scipy.fft.irfft(scipy.fft.rfft(y1, nfft) * template.fft(nfft), nfft)[:ncorr]
+
+
 # ToDO can we speed this code up? I've heard numpy.correlate is faster. Someone should investigate optimization. Also we don't need to compute
 # all these lags.
-def xcorr_shift(inspec1,inspec2, smooth=1.0, percent_ceil=80.0, use_raw_arc=False, sigdetect=10.0, fwhm=4.0, debug=False):
+def xcorr_shift(inspec1,inspec2, smooth=1.0, percent_ceil=80.0, use_raw_arc=False, sigdetect=10.0, fwhm=4.0, debug=False,
+                template=None):
 
     """ Determine the shift inspec2 relative to inspec1.  This routine computes the shift by finding the maximum of the
     the cross-correlation coefficient. The convention for the shift is that positive shift means inspec2 is shifted to the right
@@ -263,6 +351,9 @@ def xcorr_shift(inspec1,inspec2, smooth=1.0, percent_ceil=80.0, use_raw_arc=Fals
             If this parameter is True the raw arc will be used rather
             than the continuum subtracted arc
         debug: boolean, default = False
+        template (:class:`XcorrTemplate`, optional):
+            Cached quantities for inspec2, if it is an archived
+            spectrum that is correlated against many spectra.
 
     Returns:
        tuple: Returns the following:
@@ -274,11 +365,15 @@ def xcorr_shift(inspec1,inspec2, smooth=1.0, percent_ceil=80.0, use_raw_arc=Fals
     """
 
     y1 = smooth_ceil_cont(inspec1,smooth,percent_ceil=percent_ceil,use_raw_arc=use_raw_arc, sigdetect = sigdetect, fwhm = fwhm)
-    y2 = smooth_ceil_cont(inspec2,smooth,percent_ceil=percent_ceil,use_raw_arc=use_raw_arc, sigdetect = sigdetect, fwhm = fwhm)
+    if template is None:
+        y2 = smooth_ceil_cont(inspec2,smooth,percent_ceil=percent_ceil,use_raw_arc=use_raw_arc, sigdetect = sigdetect, fwhm = fwhm)
+    else:
+        template = template.smooth_ceil_cont(smooth,percent_ceil=percent_ceil,use_raw_arc=use_raw_arc, sigdetect = sigdetect, fwhm = fwhm)
+        y2 = template.spec
 
     nspec = y1.shape[0]
     lags = np.arange(-nspec + 1, nspec)
-    corr = scipy.signal.correlate(y1, y2, mode='full')
+    corr = _correlate(y1, y2, template=template)
     corr_denom = np.sqrt(np.sum(y1*y1)*np.sum(y2*y2))
     corr_norm = corr/corr_denom
     tampl_true, tampl, pix_max, twid, centerr, ww, arc_cont, nsig = arc.detect_lines(corr_norm, sigdetect=3.0,
@@ -298,13 +393,166 @@ def xcorr_shift(inspec1,inspec2, smooth=1.0, percent_ceil=80.0, use_raw_arc=Fals
     return lag_max[0], corr_max[0]
 
 
+def _stretch_correlation(y1, interp, nstretch, shifts, nfft):
+    """
+    Compute the zero-lag correlation of a spectrum with a set of
+    stretched versions of another at a set of integer shifts.
+
+    Args:
+        y1 (`numpy.ndarray`_):
+            Reference spectrum.
+        interp (:obj:`callable`):
+            Interpolator of the spectrum to stretch, as a function of
+            its fractional pixel coordinate.
+        nstretch (`numpy.ndarray`_):
+            Lengths of the stretched spectrum.
+        shifts (`numpy.ndarray`_):
+            Integer shifts.
+        nfft (:obj:`int`):
+            Length of the FFTs, which must be at least
+            ``y1.size + nstretch.max() - 1``.
+
+    Returns:
+        `numpy.ndarray`_: The (unnormalized) correlation for each
+        stretch (rows) and shift (columns).
+    """
+    nspec = y1.size
+    # Resample y2 for all stretches; this is the first interpolation
+    # in shift_and_stretch
+    y2_str = np.zeros((nstretch.size, nstretch.max()), dtype=float)
+    y1_str = np.zeros((nstretch.size, nspec), dtype=float)
+    for i, n in enumerate(nstretch):
+        y2_str[i,:n] = interp(np.arange(n)/float(n))
+        # Only the first min(nspec, n) pixels of the transformed
+        # spectrum are non-zero
+        y1_str[i,:min(nspec, n)] = y1[:min(nspec, n)]
+    # Correlation at all integer shifts: corr[s] = sum_i y1[i]*y2_str[i-s]
+    corr = scipy.fft.irfft(scipy.fft.rfft(y1_str, nfft, axis=1)
+                           * np.conj(scipy.fft.rfft(y2_str, nfft, axis=1)), nfft, axis=1)
+    return corr[:,shifts % nfft]
+
+
+def grid_shift_stretch(y1, y2, shift_bounds, stretch_bounds, ncand=3, step=4, nbatch=32):
+    """
+    Find the shift and stretch that maximize the zero-lag
+    cross-correlation of two spectra by evaluating it on a grid of
+    stretches and integer shifts.
+
+    The stretch applied by :func:`shift_and_stretch` only depends on the
+    length of the stretched spectrum, ``int(nspec*stretch)``, meaning
+    that the correlation only changes at a discrete set of stretches.
+    The correlations at all integer shifts within ``shift_bounds`` are
+    first computed with FFTs for every ``step``-th of these stretches.
+    The search is then refined by computing the correlations for all
+    the stretches within ``step`` of the ``ncand`` coarse stretches with
+    the highest correlation peaks (interpolated between the integer
+    shifts).  The FFTs are done in batches of ``nbatch`` stretches,
+    such that the memory used does not depend on the number of
+    stretches.  Finally, for the ``ncand`` stretches with the highest
+    peaks, the shift is refined by maximizing
+    :func:`zerolag_shift_stretch` within one pixel of the best integer
+    shift.
+
+    Args:
+        y1 (`numpy.ndarray`_):
+            Reference spectrum.
+        y2 (`numpy.ndarray`_):
+            Spectrum to shift and stretch to match ``y1``.
+        shift_bounds (:obj:`tuple`):
+            Minimum and maximum shift.
+        stretch_bounds (:obj:`tuple`):
+            Minimum and maximum stretch.
+        ncand (:obj:`int`, optional):
+            Number of coarse stretches around which the grid is refined,
+            and number of stretches for which the shift is refined.
+        step (:obj:`int`, optional):
+            Spacing of the coarse grid in number of distinct stretches.
+            Use 1 to compute the correlations for all stretches.
+        nbatch (:obj:`int`, optional):
+            Number of stretches for which the correlations are computed
+            at once.
+
+    Returns:
+        :obj:`tuple`: The shift, stretch, and correlation coefficient
+        of the best match, and the number of correlations evaluated.
+    """
+    nspec = y1.size
+    corr_denom = np.sqrt(np.sum(y1*y1)*np.sum(y2*y2))
+
+    # Distinct lengths of the stretched spectrum, and the stretch at
+    # the center of the interval that gives each length
+    nstretch = np.arange(int(nspec*stretch_bounds[0]), int(nspec*stretch_bounds[1])+1)
+    stretch = np.clip((nstretch + 0.5)/nspec, *stretch_bounds)
+    indx = (nspec*stretch).astype(int) == nstretch
+    nstretch, stretch = nstretch[indx], stretch[indx]
+
+    interp = scipy.interpolate.interp1d(np.arange(nspec)/float(nspec), y2, kind='quadratic',
+                                        bounds_error=False, fill_value=0.0)
+    nfft = scipy.fft.next_fast_len(nspec + nstretch[-1] - 1, True)
+    shifts = np.arange(int(np.ceil(shift_bounds[0])), int(np.floor(shift_bounds[1]))+1)
+    if shifts.size == 0:
+        shifts = np.array([int(np.round(np.mean(shift_bounds)))])
+
+    # Best integer shift, correlation at that shift, and interpolated
+    # correlation peak for each stretch; -inf if not evaluated
+    imax = np.zeros(nstretch.size, dtype=int)
+    cmax = np.full(nstretch.size, -np.inf)
+    peak = np.full(nstretch.size, -np.inf)
+    neval = 0
+
+    # Coarse grid, including both ends of the stretch range, and then
+    # all the stretches around the best coarse stretches
+    coarse = np.unique(np.append(np.arange(0, nstretch.size, max(step, 1)), nstretch.size-1))
+    for rows in [coarse, None]:
+        if rows is None:
+            rows = np.unique(np.concatenate([np.arange(i-step+1, i+step)
+                                             for i in np.argsort(-peak)[:ncand]]))
+            rows = rows[(rows >= 0) & (rows < nstretch.size)]
+            rows = rows[np.isinf(peak[rows])]
+        for i in range(0, rows.size, nbatch):
+            _rows = rows[i:i+nbatch]
+            corr = _stretch_correlation(y1, interp, nstretch[_rows], shifts, nfft) / corr_denom
+            neval += corr.size
+            # Estimate the peak of the correlation between the integer
+            # shifts by fitting a parabola to the three points around
+            # the maximum
+            _imax = np.argmax(corr, axis=1)
+            _cmax = corr[np.arange(_rows.size),_imax]
+            _peak = _cmax.copy()
+            if shifts.size > 2:
+                _i = np.clip(_imax, 1, shifts.size-2)
+                c0, c1, c2 = [corr[np.arange(_rows.size),_i+k] for k in [-1, 0, 1]]
+                curv = c0 - 2*c1 + c2
+                indx = curv < 0
+                _peak[indx] = c1[indx] - 0.125*(c0[indx]-c2[indx])**2/curv[indx]
+            imax[_rows], cmax[_rows], peak[_rows] = _imax, _cmax, _peak
+
+    # Refine the shift for the best grid points
+    best = (shifts[imax[0]], stretch[0], cmax[0])
+    for i in np.argsort(-peak)[:ncand]:
+        shift0 = shifts[imax[i]]
+        if cmax[i] > best[2]:
+            best = (shift0, stretch[i], cmax[i])
+        result = scipy.optimize.minimize_scalar(
+                    lambda x: zerolag_shift_stretch((x, stretch[i]), y1, y2),
+                    bounds=(max(shift0 - 1, shift_bounds[0]), min(shift0 + 1, shift_bounds[1])),
+                    method='bounded', options={'xatol': 1e-4})
+        neval += result.nfev
+        if -result.fun > best[2]:
+            best = (result.x, stretch[i], -result.fun)
+    return best + (neval,)
+
+
 def xcorr_shift_stretch(inspec1, inspec2, cc_thresh=-1.0, smooth=1.0, percent_ceil=80.0, use_raw_arc=False,
-                        shift_mnmx=(-0.05,0.05), stretch_mnmx=(0.95,1.05), sigdetect = 10.0, fwhm = 4.0,debug=False, seed = None):
+                        shift_mnmx=(-0.05,0.05), stretch_mnmx=(0.95,1.05), sigdetect = 10.0, fwhm = 4.0,debug=False, seed = None,
+                        template=None, method='grid'):
 
     """ Determine the shift and stretch of inspec2 relative to inspec1.  This routine computes an initial
     guess for the shift via maximimizing the cross-correlation. It then performs a two parameter search for the shift and stretch
     by optimizing the zero lag cross-correlation between the inspec1 and the transformed inspec2 (shifted and stretched via
-    wvutils.shift_and_stretch()) in a narrow window about the initial estimated shift. The convention for the shift is that
+    wvutils.shift_and_stretch()) in a narrow window about the initial estimated shift. By default, the search is
+    performed on a grid of stretches and integer shifts, followed by a refinement of the shift (see
+    :func:`grid_shift_stretch`). The convention for the shift is that
     positive shift means inspec2 is shifted to the right (higher pixel values) relative to inspec1. The convention for the stretch is
     that it is float near unity that increases the size of the inspec2 relative to the original size (which is the size of inspec1)
 
@@ -349,9 +597,17 @@ def xcorr_shift_stretch(inspec1, inspec2, cc_thresh=-1.0, smooth=1.0, percent_ce
         starts to break down.
     seed: int or np.random.RandomState, optional, default = None
         Seed for scipy.optimize.differential_evolution optimizer. If not
-        specified, the calculation will not be repeatable
+        specified, the calculation will not be repeatable. Only used
+        if method = 'de'.
     debug = False
        Show plots to the screen useful for debugging.
+    template: :class:`XcorrTemplate`, optional
+        Cached quantities for inspec2, if it is an archived spectrum
+        that is correlated against many spectra.
+    method: str, default = 'grid'
+        Method used to search for the shift and stretch: 'grid' uses
+        :func:`grid_shift_stretch` and 'de' uses
+        scipy.optimize.differential_evolution.
 
     Returns
     -------
@@ -394,22 +650,33 @@ def xcorr_shift_stretch(inspec1, inspec2, cc_thresh=-1.0, smooth=1.0, percent_ce
     nspec = inspec1.size
 
     y1 = smooth_ceil_cont(inspec1,smooth,percent_ceil=percent_ceil,use_raw_arc=use_raw_arc, sigdetect = sigdetect, fwhm = fwhm)
-    y2 = smooth_ceil_cont(inspec2,smooth,percent_ceil=percent_ceil,use_raw_arc=use_raw_arc, sigdetect = sigdetect, fwhm = fwhm)
+    if template is None:
+        y2 = smooth_ceil_cont(inspec2,smooth,percent_ceil=percent_ceil,use_raw_arc=use_raw_arc, sigdetect = sigdetect, fwhm = fwhm)
+    else:
+        template = template.smooth_ceil_cont(smooth,percent_ceil=percent_ceil,use_raw_arc=use_raw_arc, sigdetect = sigdetect, fwhm = fwhm)
+        y2 = template.spec
 
     # Do the cross-correlation first and determine the initial shift
-    shift_cc, corr_cc = xcorr_shift(y1, y2, smooth = None, percent_ceil = None, use_raw_arc = True, sigdetect = sigdetect, fwhm=fwhm, debug = debug)
+    shift_cc, corr_cc = xcorr_shift(y1, y2, smooth = None, percent_ceil = None, use_raw_arc = True, sigdetect = sigdetect, fwhm=fwhm, debug = debug,
+                                    template=template)
 
     if corr_cc < cc_thresh:
         return -1, shift_cc, 1.0, corr_cc, shift_cc, corr_cc
     else:
         bounds = [(shift_cc + nspec*shift_mnmx[0],shift_cc + nspec*shift_mnmx[1]), stretch_mnmx]
-        # TODO Can we make the differential evolution run faster?
-        result = scipy.optimize.differential_evolution(zerolag_shift_stretch, args=(y1,y2), tol=1e-4,
-                                                       bounds=bounds, disp=False, polish=True, seed=seed)
-        corr_de = -result.fun
-        shift_de = result.x[0]
-        stretch_de = result.x[1]
-        if not result.success:
+        if method == 'grid':
+            shift_de, stretch_de, corr_de, _ = grid_shift_stretch(y1, y2, bounds[0], bounds[1])
+            success = True
+        elif method == 'de':
+            result = scipy.optimize.differential_evolution(zerolag_shift_stretch, args=(y1,y2), tol=1e-4,
+                                                           bounds=bounds, disp=False, polish=True, seed=seed)
+            corr_de = -result.fun
+            shift_de = result.x[0]
+            stretch_de = result.x[1]
+            success = result.success
+        else:
+            msgs.error('Unknown shift and stretch search method: {0}'.format(method))
+        if not success:
             msgs.warn('Fit for shift and stretch did not converge!')
 
         if(corr_de < corr_cc):
@@ -426,7 +693,7 @@ def xcorr_shift_stretch(inspec1, inspec2, cc_thresh=-1.0, smooth=1.0, percent_ce
             corr_out = corr_de
             shift_out = shift_de
             stretch_out = stretch_de
-            result_out = int(result.success)
+            result_out = int(success)
 
         if debug:
             x1 = np.arange(nspec)
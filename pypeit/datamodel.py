@@ -462,10 +462,9 @@ With this implementation:
 
 """
 import os
+import contextlib
 import warnings
 
-from IPython import embed
-
 import numpy as np
 import inspect
 
@@ -476,6 +475,102 @@ from pypeit import io
 from pypeit import masterframe
 from pypeit import msgs
 
+class LazyHDUData:
+    """
+    Placeholder for array data in an HDU that is only read when needed.
+
+    Used by :func:`DataContainer._parse` when ``lazy=True``. The HDU is
+    kept (along with its parent, open file) until the data is accessed
+    via the :class:`DataContainer` attribute, at which point
+    :func:`load` is called and the placeholder is replaced by the array.
+    When the file is not compressed, the array is memory mapped such
+    that only the accessed extensions are read from disk.
+
+    Args:
+        hdu (`astropy.io.fits.ImageHDU`_):
+            HDU with the data.
+
+    Attributes:
+        openfile (:class:`_OpenFile`):
+            The file shared by all the placeholders read from it, which
+            is closed when none of them are pending; see
+            :func:`close_when_loaded`.  If None, the file is not closed.
+    """
+    def __init__(self, hdu):
+        self.hdu = hdu
+        self.openfile = None
+
+    def load(self):
+        """
+        Read and return the data.
+
+        The data are converted to native byte ordering, matching the
+        behavior of :func:`DataContainer._parse` when ``lazy=False``.
+
+        Returns:
+            `numpy.ndarray`_: The HDU data.
+        """
+        data = self.hdu.data
+        if isinstance(data, np.chararray):
+            data = np.asarray(data)
+        elif isinstance(data, np.ndarray) and data.dtype.byteorder not in ['=', '|']:
+            data = data.astype(data.dtype.type)
+        self.release()
+        return data
+
+    def release(self):
+        """
+        Signal that the data are no longer needed from the file.
+
+        The file is closed if this is the last pending placeholder
+        for it.
+        """
+        if self.openfile is None:
+            return
+        self.openfile.npending -= 1
+        if self.openfile.npending == 0:
+            self.openfile.hdul.close()
+        self.openfile = None
+
+
+class _OpenFile:
+    """
+    File kept open for the pending :class:`LazyHDUData` placeholders.
+
+    Args:
+        hdul (`astropy.io.fits.HDUList`_):
+            The opened file.
+    """
+    def __init__(self, hdul):
+        self.hdul = hdul
+        self.npending = 0
+
+
+def close_when_loaded(hdul, *objs):
+    """
+    Close a file once all the data lazily read from it have been loaded.
+
+    Args:
+        hdul (`astropy.io.fits.HDUList`_):
+            The file with the data.  If none of the objects have
+            pending data, the file is closed immediately.
+        *objs (:class:`DataContainer`):
+            The objects instantiated from the file using ``lazy=True``.
+            Nested :class:`DataContainer` objects are included.
+    """
+    openfile = _OpenFile(hdul)
+    objs = list(objs)
+    while len(objs) > 0:
+        obj = objs.pop()
+        for lazy in obj._lazy.values():
+            lazy.openfile = openfile
+            openfile.npending += 1
+        objs += [obj.__dict__[key] for key in obj.keys()
+                    if isinstance(obj.__dict__.get(key), DataContainer)]
+    if openfile.npending == 0:
+        hdul.close()
+
+
 class DataContainer:
     """
     Defines an abstract class for holding and manipulating data.
@@ -617,6 +712,8 @@ class DataContainer:
 
         # Ensure the dictionary has all the expected keys
         self.__dict__.update(dict.fromkeys(self.datamodel.keys()))
+        # Holds data that have not yet been read; see LazyHDUData
+        self._lazy = {}
 
         # Initialize other internals
         self._init_internals()
@@ -815,7 +912,7 @@ class DataContainer:
         return [d] if ext is None else [{ext:d}]
 
     @classmethod
-    def _parse(cls, hdu, ext=None, transpose_table_arrays=False, hdu_prefix=None):
+    def _parse(cls, hdu, ext=None, transpose_table_arrays=False, hdu_prefix=None, lazy=False):
         """
         Parse data read from one or more HDUs.
 
@@ -874,6 +971,12 @@ class DataContainer:
                 prefix. If None, :attr:`hdu_prefix` is used. If the
                 latter is also None, all HDUs are parsed. See
                 :func:`pypeit.io.hdu_iter_by_ext`.
+            lazy (:obj:`bool`, optional):
+                Do not read the image data.  Instead, images are
+                returned as :class:`LazyHDUData` placeholders that are
+                only read when the relevant attribute of the
+                instantiated object is accessed.  The HDUs must remain
+                open until then.
 
         Returns:
             :obj:`tuple`: Return three objects
@@ -898,8 +1001,11 @@ class DataContainer:
         # Construct instantiation dictionary
         _d = dict.fromkeys(cls.datamodel.keys())
 
-        # Log if relevant data is found for this datamodel
-        if np.all([_hdu[e].data is None for e in _ext]):
+        # Log if relevant data is found for this datamodel.  In lazy
+        # mode, avoid reading the data by checking its size.
+        if (lazy and np.all([_hdu[e].size == 0 and not isinstance(_hdu[e], fits.BinTableHDU)
+                                for e in _ext])) \
+                or (not lazy and np.all([_hdu[e].data is None for e in _ext])):
             # TODO: This is a KLUDGE. Not sure we should allow this...
             msgs.warn('Extensions to be read by {0} have no data!'.format(cls.__name__))
             # This is so that the returned booleans for reading the
@@ -945,8 +1051,10 @@ class DataContainer:
                     dm_type_passed &= hdu[hduindx].header['DMODCLS'] == cls.__name__
                     dm_version_passed &= hdu[hduindx].header['DMODVER'] == cls.version
                     # Grab it
-                    _d[e] = _hdu[hduindx].data if isinstance(hdu[hduindx], fits.ImageHDU) \
-                        else Table.read(hdu[hduindx])
+                    if not isinstance(hdu[hduindx], (fits.ImageHDU, fits.CompImageHDU)):
+                        _d[e] = Table.read(hdu[hduindx])
+                    else:
+                        _d[e] = LazyHDUData(_hdu[hduindx]) if lazy else _hdu[hduindx].data
 
         for e in _ext:
             if 'DMODCLS' not in _hdu[e].header.keys() or 'DMODVER' not in _hdu[e].header.keys() \
@@ -1042,6 +1150,18 @@ class DataContainer:
 
         Items are restricted to those defined by the datamodel.
         """
+        _lazy = self.__dict__.get('_lazy', {})
+        if item in _lazy:
+            # Replacing data that was never read
+            _lazy.pop(item).release()
+            self.__dict__[item] = None
+        if isinstance(value, LazyHDUData) and item in self.keys():
+            # Defer reading the data until the item is accessed.  The
+            # item is removed from the internal dictionary so that
+            # attribute access goes through __getattr__.
+            del self.__dict__[item]
+            _lazy[item] = value
+            return
         if item not in self.__dict__.keys():
             raise KeyError('Key {0} not part of the internals nor data model'.format(item))
         # Internal?
@@ -1066,9 +1186,27 @@ class DataContainer:
         self.__dict__[item] = value
 
     def __getitem__(self, item):
-        """Get an item directly from the internal dict."""
+        """
+        Get an item directly from the internal dict.
+
+        Data that have not yet been read (see :class:`LazyHDUData`)
+        are read and validated when first accessed.
+        """
+        _lazy = self.__dict__.get('_lazy', {})
+        if item in _lazy:
+            self.__setitem__(item, _lazy[item].load())
         return self.__dict__[item]
 
+    def __getstate__(self):
+        """
+        Read any data that have not yet been read (see
+        :class:`LazyHDUData`) before the object is pickled or copied,
+        such that it no longer refers to the open file.
+        """
+        for item in list(self.__dict__.get('_lazy', {}).keys()):
+            self.__getitem__(item)
+        return self.__dict__
+
     def keys(self):
         """
         Return the keys for the data objects only
@@ -1241,7 +1379,7 @@ class DataContainer:
         return fits.HDUList([fits.PrimaryHDU(header=_primary_hdr)] + hdu) if add_primary else hdu
 
     @classmethod
-    def from_hdu(cls, hdu, hdu_prefix=None, chk_version=True):
+    def from_hdu(cls, hdu, hdu_prefix=None, chk_version=True, lazy=False):
         """
         Instantiate the object from an HDU extension.
 
@@ -1255,6 +1393,9 @@ class DataContainer:
             chk_version (:obj:`bool`, optional):
                 If True, raise an error if the datamodel version or
                 type check failed. If False, throw a warning only.
+            lazy (:obj:`bool`, optional):
+                Only read image data when accessed.  Passed to
+                :func:`_parse`; the HDUs must remain open.
         """
         # NOTE: We can't use `cls(cls._parse(hdu))` here because this
         # will call the `__init__` method of the derived class and we
@@ -1264,7 +1405,8 @@ class DataContainer:
         # result. The call to `DataContainer.__init__` is explicit to
         # deal with objects inheriting from both DataContainer and
         # other base classes, like MasterFrame.
-        d, dm_version_passed, dm_type_passed, parsed_hdus = cls._parse(hdu, hdu_prefix=hdu_prefix)
+        d, dm_version_passed, dm_type_passed, parsed_hdus \
+                = cls._parse(hdu, hdu_prefix=hdu_prefix, lazy=lazy)
         # Check version and type?
         if not dm_type_passed:
             msgs.error('The HDU(s) cannot be parsed by a {0} object!'.format(cls.__name__))
@@ -1299,7 +1441,8 @@ class DataContainer:
         return self
 
     def to_file(self, ofile, overwrite=False, checksum=True, primary_hdr=None, hdr=None,
-                limit_hdus=None):
+                limit_hdus=None, compression=None, quantize_level=None, nthreads=None,
+                background=False):
         """
         Write the data to a file.
 
@@ -1326,14 +1469,33 @@ class DataContainer:
                 the DATASUM and CHECKSUM keywords fits header(s).
             limit_hdus (:obj:`list`, optional):
                 Passed to :func:`to_hdu`; see usage there
+            compression (:obj:`str`, optional):
+                Compression of the image extensions ('none' or
+                'tile').  Passed to :func:`pypeit.io.write_to_fits`;
+                if None, the default set by
+                :func:`pypeit.io.BackgroundWriter.set_compression` is used.
+                Compressed files are read transparently by
+                :func:`from_file`.
+            quantize_level (:obj:`float`, optional):
+                Quantization level for tile-compressed floating-point
+                images.  Passed to :func:`pypeit.io.write_to_fits`.
+            nthreads (:obj:`int`, optional):
+                Number of threads used to gzip files with a '.gz'
+                extension.  Passed to :func:`pypeit.io.write_to_fits`.
+            background (:obj:`bool`, optional):
+                Write the file using
+                :attr:`pypeit.io.background_writer`.  Passed to
+                :func:`pypeit.io.write_to_fits`.
         """
         io.write_to_fits(self.to_hdu(add_primary=True, primary_hdr=primary_hdr,
                                      limit_hdus=limit_hdus, hdr=hdr),
-                         ofile, overwrite=overwrite, checksum=checksum, hdr=hdr)
+                         ofile, overwrite=overwrite, checksum=checksum, hdr=hdr,
+                         compression=compression, quantize_level=quantize_level,
+                         nthreads=nthreads, background=background)
 
     # TODO: This requires that master_key be an attribute... This
     # method is a bit too ad hoc for me...
-    def to_master_file(self, master_filename=None, **kwargs):
+    def to_master_file(self, master_filename=None, calib_hash=None, **kwargs):
         """
         Wrapper on to_file() that deals with masterframe naming and header
 
@@ -1346,7 +1508,15 @@ class DataContainer:
             master_filename (str, optional):
                 Name of masterfile;  if provided, parsed for master_key, master_dir
                 If not provided, constructed from internal master_key, master_dir
+            calib_hash (str, optional):
+                Hash of the inputs used to construct the master; written
+                to the header.  See :func:`pypeit.masterframe.master_hash`.
             **kwargs: passed to to_file()
+
+        Master files are written using
+        :attr:`pypeit.io.background_writer`, if it is enabled. Any
+        object previously read from the file is removed from
+        :attr:`pypeit.masterframe.master_cache`.
         """
         # Output file
         if master_filename is None:
@@ -1365,14 +1535,16 @@ class DataContainer:
         else:
             raw_files = None
         hdr = masterframe.build_master_header(self, self.master_key, self.master_dir,
-                                              steps=steps, raw_files=raw_files)
+                                              steps=steps, raw_files=raw_files,
+                                              calib_hash=calib_hash)
         # Finish
+        masterframe.master_cache.invalidate(master_filename)
         self.to_file(master_filename, primary_hdr=hdr,
-                     limit_hdus=self.output_to_disk, overwrite=True, **kwargs)
+                     limit_hdus=self.output_to_disk, overwrite=True, background=True, **kwargs)
 
     # TODO: Add options to compare the checksum and/or check the package versions
     @classmethod
-    def from_file(cls, ifile, verbose=True, chk_version=True):
+    def from_file(cls, ifile, verbose=True, chk_version=True, lazy=False):
         """
         Instantiate the object from an extension in the specified fits file.
 
@@ -1385,20 +1557,30 @@ class DataContainer:
                 Print informational messages
             chk_version (:obj:`bool`, optional):
                 Passed to from_hdu().  See those docs for details
+            lazy (:obj:`bool`, optional):
+                Only read image data when the relevant attribute is
+                accessed.  The file is kept open (and memory mapped,
+                if not compressed) until all the deferred data have
+                been read (see :func:`close_when_loaded`) or the object
+                is deleted.
 
         Raises:
             FileNotFoundError:
                 Raised if the specified file does not exist.
         """
+        # Make sure any queued write of this file is finished before
+        # checking that it exists
+        io.background_writer.wait(ifile)
         if not os.path.isfile(ifile):
             raise FileNotFoundError('{0} does not exist!'.format(ifile))
 
         if verbose:
             msgs.info("Loading {} from {}".format(cls.__name__, ifile))
 
-        # Do it
-        with io.fits_open(ifile) as hdu:
-            obj = cls.from_hdu(hdu, chk_version=chk_version)
+        # Do it.  In lazy mode, the file cannot be closed here.
+        with contextlib.nullcontext(io.fits_open(ifile)) if lazy \
+                else io.fits_open(ifile) as hdu:
+            obj = cls.from_hdu(hdu, chk_version=chk_version, lazy=lazy)
             if hasattr(obj, 'head0'):
                 obj.head0 = hdu[0].header
             if hasattr(obj, 'filename'):
@@ -1416,6 +1598,8 @@ class DataContainer:
                     else:
                         msgs.warn('DataContainer has `master_type` attribute but is missing the '
                                   'MSTRTYP header keyword!')
+        if lazy:
+            close_when_loaded(hdu, obj)
         return obj
 
     def __repr__(self):
@@ -1423,7 +1607,7 @@ class DataContainer:
         # Image
         rdict = {}
         for attr in self.datamodel.keys():
-            if hasattr(self, attr) and getattr(self, attr) is not None:
+            if attr in self._lazy or (hasattr(self, attr) and getattr(self, attr) is not None):
                 rdict[attr] = True
             else:
                 rdict[attr] = False
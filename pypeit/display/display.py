@@ -7,7 +7,6 @@ Module for ginga routines.  Mainly for debugging
 import os
 import numpy as np
 import time
-from IPython import embed
 
 import subprocess
 
@@ -104,8 +104,6 @@ import time
 import inspect
 from collections import OrderedDict
 
-from IPython import embed
-
 import numpy as np
 
 from scipy import ndimage
@@ -127,7 +125,7 @@ from pypeit.datamodel import DataContainer
 from pypeit.bitmask import BitMask
 from pypeit.display import display
 from pypeit.par.pypeitpar import EdgeTracePar
-from pypeit.core import parse, pydl, procimg, pca, trace, slitdesign_matching
+from pypeit.core import parse, pydl, procimg, trace, slitdesign_matching
 from pypeit.images.buildimage import TraceImage
 from pypeit.tracepca import TracePCA
 from pypeit.spectrographs.spectrograph import Spectrograph
@@ -1161,7 +1159,7 @@ class EdgeTraceSet(DataContainer):
         return hdu
 
     @classmethod
-    def from_hdu(cls, hdu, hdu_prefix=None, chk_version=True):
+    def from_hdu(cls, hdu, hdu_prefix=None, chk_version=True, lazy=False):
         """
         Instantiate the object from an HDU extension.
 
@@ -1180,12 +1178,16 @@ class EdgeTraceSet(DataContainer):
             chk_version (:obj:`bool`, optional):
                 If True, raise an error if the datamodel version or
                 type check failed. If False, throw a warning only.
+            lazy (:obj:`bool`, optional):
+                Only read image data when accessed.  See
+                :func:`~pypeit.datamodel.DataContainer._parse`.
         """
         # Run the default parser to get most of the data. This won't
         # parse traceimg because it's not a single-extension
         # DataContainer. It *will* parse pca, left_pca, and right_pca,
         # if they exist, but not their model components.
-        d, version_passed, type_passed, parsed_hdus = super(EdgeTraceSet, cls)._parse(hdu)
+        d, version_passed, type_passed, parsed_hdus = super(EdgeTraceSet, cls)._parse(hdu,
+                                                                                      lazy=lazy)
         if not type_passed:
             msgs.error('The HDU(s) cannot be parsed by a {0} object!'.format(cls.__name__))
         if not version_passed:
@@ -1194,7 +1196,7 @@ class EdgeTraceSet(DataContainer):
                + ' does not match version used to write your HDU(s)!')
 
         # Instantiate the TraceImage from the header
-        d['traceimg'] = TraceImage.from_hdu(hdu, chk_version=chk_version)
+        d['traceimg'] = TraceImage.from_hdu(hdu, chk_version=chk_version, lazy=lazy)
 
         # Check if there should be any PCAs
         parsed_pcas = np.any(['PCA' in h for h in parsed_hdus]) 
@@ -13,8 +13,6 @@ from scipy import interpolate
 
 from matplotlib import pyplot as plt
 
-from IPython import embed
-
 from pypeit import msgs
 from pypeit import utils
 from pypeit import bspline
@@ -138,12 +136,12 @@ class FlatImages(datamodel.DataContainer):
         return d
 
     @classmethod
-    def _parse(cls, hdu, ext=None, transpose_table_arrays=False, hdu_prefix=None):
+    def _parse(cls, hdu, ext=None, transpose_table_arrays=False, hdu_prefix=None, lazy=False):
 
         # Grab everything but the bsplines. The bsplines are not parsed
         # because the tailored extension names do not match any of the
         # datamodel keys.
-        d, version_passed, type_passed, parsed_hdus = super(FlatImages, cls)._parse(hdu)
+        d, version_passed, type_passed, parsed_hdus = super(FlatImages, cls)._parse(hdu, lazy=lazy)
 
         # Find bsplines, if they exist
         nspat = len(d['spat_id'])
@@ -803,6 +801,7 @@ class FlatField(object):
                                             kwargs_bspline={'bkspace': spec_samp_fine},
                                             kwargs_reject={'groupbadpix': True, 'maxrej': 5})
             except:
+                from IPython import embed
                 embed(header='808 of flatfield')
 
             if exit_status > 1:
@@ -1276,6 +1275,7 @@ class FlatField(object):
                 scale_model[onslit_init] = 1/slit_bspl.value((waveimg[onslit_init] - minw) / (maxw - minw))[0]
 
         if debug:
+            from IPython import embed
             embed()
             pltflat = self.rawflatimg.image.copy() / self.msillumflat.copy()
             censpec = np.round(0.5 * (self.slits.left_init + self.slits.right_init)).astype(np.int)
@@ -14,8 +14,6 @@ from pypeit.images import pypeitimage
 from pypeit.core import procimg
 from pypeit import utils
 
-from IPython import embed
-
 
 class ArcImage(pypeitimage.PypeItImage):
     """
@@ -186,6 +184,7 @@ def buildimage_fromlist(spectrograph, det, frame_par, file_list,
         finalImage = pypeitImage
     else:
         finalImage = None
+        from IPython import embed
         embed(header=utils.embed_header())
 
     # Internals
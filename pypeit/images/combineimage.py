@@ -11,6 +11,7 @@ import numpy as np
 
 
 from pypeit import msgs
+from pypeit import profiling
 
 from pypeit.core import combine
 from pypeit.par import pypeitpar
@@ -20,8 +21,6 @@ from pypeit.images import pypeitimage
 from pypeit.images import rawimage
 from pypeit.images import imagebitmask
 
-from IPython import embed
-
 
 class CombineImage:
     """
@@ -53,6 +52,7 @@ class CombineImage:
         if self.nfiles == 0:
             msgs.error('Combineimage requires a list of files to instantiate')
 
+    @profiling.stage('CombineImage.run')
     def run(self, bias=None, flatimages=None, ignore_saturation=False, sigma_clip=True,
             bpm=None, sigrej=None, maxiters=5, slits=None, dark=None, combine_method='weightmean'):
         """
@@ -127,9 +127,8 @@ class CombineImage:
             # TODO This seems kludgy to me. Why not just pass ignore_saturation to process_one and ignore the saturation
             # when the mask is actually built, rather than untoggling the bit here
             if ignore_saturation:  # Important for calibrations as we don't want replacement by 0
-                indx = pypeitImage.bitmask.flagged(pypeitImage.fullmask, flag=['SATURATION'])
-                pypeitImage.fullmask[indx] = pypeitImage.bitmask.turn_off(
-                    pypeitImage.fullmask[indx], 'SATURATION')
+                pypeitImage.bitmask.turn_off(pypeitImage.fullmask, 'SATURATION',
+                                             out=pypeitImage.fullmask)
             mask_stack[kk, :, :] = pypeitImage.fullmask
 
         # Check that the lamps being combined are all the same:
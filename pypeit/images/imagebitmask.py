@@ -4,8 +4,6 @@ import numpy as np
 from pypeit.bitmask import BitMask
 from collections import OrderedDict
 
-from IPython import embed
-
 # I am keeping this here to avoid circular imports as even core routines need occasional access
 
 class ImageBitMask(BitMask):
@@ -15,8 +15,6 @@ from pypeit import datamodel
 from pypeit import utils
 from pypeit import masterframe
 
-from IPython import embed
-
 
 class PypeItImage(datamodel.DataContainer):
     """
@@ -10,6 +10,7 @@ import numpy as np
 from astropy import stats
 
 from pypeit import msgs
+from pypeit import profiling
 from pypeit.core import procimg
 from pypeit.core import flat
 from pypeit.core import flexure
@@ -17,8 +18,6 @@ from pypeit.images import pypeitimage
 from pypeit import utils
 from pypeit.display import display
 
-from IPython import embed
-
 class RawImage(object):
     """
     Class to load and process a raw image
@@ -39,6 +38,9 @@ class RawImage(object):
         spat_flexure_shift (float):
             Holds the spatial flexure shift, if calculated
         image (`numpy.ndarray`_):
+        sections (:class:`pypeit.core.procimg.AmpSections`):
+            Geometry of the amplifier data and overscan sections in the
+            raw image.
     """
     def __init__(self, ifile, spectrograph, det):
 
@@ -50,12 +52,16 @@ class RawImage(object):
         # Load
         # Load the raw image and the other items of interest
         self.detector, self.rawimage, self.hdu, self.exptime, self.rawdatasec_img, \
-            self.oscansec_img = self.spectrograph.get_rawimage(self.filename, self.det)
+            self.oscansec_img = self.spectrograph.load_rawimage(self.filename, self.det)
 
         # Grab items from rawImage (for convenience and for processing)
         #   Could just keep rawImage in the object, if preferred
         self.headarr = deepcopy(self.spectrograph.get_headarr(self.hdu))
 
+        # Geometry of the amplifier sections; this is shared among all
+        # frames read from this detector (see procimg.amp_sections)
+        self.sections = procimg.AmpSections.from_images(self.rawdatasec_img, self.oscansec_img)
+
         # Key attributes
         self.rawimage = self.rawimage.copy()
         self.image = self.rawimage.copy()
@@ -170,6 +176,7 @@ class RawImage(object):
         # Return
         return self.rn2img.copy()
 
+    @profiling.stage('RawImage.process')
     def process(self, par, bpm=bpm, flatimages=None, bias=None,
                 slits=None, debug=False, dark=None):
         """
@@ -395,7 +402,8 @@ class RawImage(object):
 
         temp = procimg.subtract_overscan(self.image, self.datasec_img, self.oscansec_img,
                                          method=self.par['overscan_method'],
-                                         params=self.par['overscan_par'])
+                                         params=self.par['overscan_par'],
+                                         sections=self.sections)
         # Fill
         self.steps[step] = True
         self.image = temp
@@ -450,8 +458,8 @@ class RawImage(object):
             msgs.warn("Image was already trimmed.  Returning current image")
             return self.image
         # Do it
-        self.image = procimg.trim_frame(self.image, self.datasec_img < 1)
-        self.datasec_img = procimg.trim_frame(self.datasec_img, self.datasec_img < 1)
+        self.image = self.sections.trim(self.image)
+        self.datasec_img = self.sections.trim(self.datasec_img)
         #
         self.steps[step] = True
 
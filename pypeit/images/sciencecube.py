@@ -15,8 +15,6 @@ from pypeit import msgs
 from pypeit.par import pypeitpar
 from pypeit.images import pypeitimage
 
-from IPython import embed
-
 
 class ScienceCube(pypeitimage.PypeItImage):
     """
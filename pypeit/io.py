@@ -9,9 +9,15 @@ Provides a set of I/O routines.
 """
 import os
 import sys
+import atexit
 import warnings
 import gzip
 import shutil
+import queue
+import threading
+import contextlib
+from collections import OrderedDict
+from concurrent import futures
 from packaging import version
 
 import numpy
@@ -21,18 +27,16 @@ from configobj import ConfigObj
 from astropy.io import fits
 from astropy.table import Table
 
-from pypeit import par, msgs
+from pypeit import par, msgs, profiling
 
 # These imports are largely just to make the versions available for
-# writing to the header. See `initialize_header`
+# writing to the header. See `initialize_header`.  sklearn is slow to
+# import, so it is only imported when needed.
 import scipy
 import astropy
-import sklearn
 import pypeit
 import time
 
-from IPython import embed
-
 # TODO -- Move this module to core/
 
 def init_record_array(shape, dtype):
@@ -154,7 +158,85 @@ def rec_to_bintable(arr, name=None, hdr=None):
                                             for n in arr.dtype.names], name=name, header=hdr)
 
 
-def compress_file(ifile, overwrite=False, rm_original=True):
+class ParallelGzipFile:
+    """
+    Write-only file object that gzips its contents using multiple
+    threads.
+
+    The data written to the object are buffered and split into blocks
+    of ``block_size`` bytes, which are compressed in parallel (`zlib`
+    releases the GIL) and written to disk as independent gzip members.
+    The concatenation of gzip members is a valid gzip file that can be
+    read by any gzip reader, including `astropy.io.fits.open`_. At most
+    ``nthreads`` blocks are held in memory.
+
+    Args:
+        ofile (:obj:`str`):
+            Name of the output file.
+        nthreads (:obj:`int`, optional):
+            Number of threads used for the compression.
+        block_size (:obj:`int`, optional):
+            Number of (uncompressed) bytes in each block.
+        compresslevel (:obj:`int`, optional):
+            Compression level passed to `gzip.compress`.
+    """
+    def __init__(self, ofile, nthreads=4, block_size=2**24, compresslevel=9):
+        self.name = ofile
+        self.mode = 'wb'
+        self.nthreads = nthreads
+        self.block_size = block_size
+        self.compresslevel = compresslevel
+        self.closed = False
+        self._pos = 0
+        self._buffer = bytearray()
+        self._file = open(ofile, 'wb')
+        self._executor = futures.ThreadPoolExecutor(max_workers=nthreads)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _compress(self, block):
+        return gzip.compress(block, compresslevel=self.compresslevel)
+
+    def _write_blocks(self):
+        """Compress and write all the buffered data."""
+        blocks = [bytes(self._buffer[i:i+self.block_size])
+                    for i in range(0, len(self._buffer), self.block_size)]
+        self._buffer = bytearray()
+        for b in self._executor.map(self._compress, blocks):
+            self._file.write(b)
+
+    def write(self, data):
+        """Buffer the data, compressing when ``nthreads`` blocks are full."""
+        self._buffer += data
+        self._pos += len(data)
+        if len(self._buffer) >= self.nthreads*self.block_size:
+            self._write_blocks()
+        return len(data)
+
+    def tell(self):
+        """Number of uncompressed bytes written."""
+        return self._pos
+
+    def flush(self):
+        pass
+
+    def close(self):
+        """Compress any remaining data and close the file."""
+        if self.closed:
+            return
+        try:
+            self._write_blocks()
+        finally:
+            self._file.close()
+            self._executor.shutdown()
+            self.closed = True
+
+
+def compress_file(ifile, overwrite=False, rm_original=True, nthreads=1):
     """
     Compress a file using gzip package.
     
@@ -169,6 +251,8 @@ def compress_file(ifile, overwrite=False, rm_original=True):
             uncompressed and compressed file will exist when the
             compression is finished.  If this is True, the original
             (uncompressed) file is removed.
+        nthreads (:obj:`int`, optional):
+            Number of threads to use; see :class:`ParallelGzipFile`.
 
     Raises:
         ValueError:
@@ -186,7 +270,8 @@ def compress_file(ifile, overwrite=False, rm_original=True):
 
     # Compress the file
     with open(ifile, 'rb') as f_in:
-        with gzip.open(ofile, 'wb') as f_out:
+        with (gzip.open(ofile, 'wb') if nthreads == 1
+                else ParallelGzipFile(ofile, nthreads=nthreads)) as f_out:
             shutil.copyfileobj(f_in, f_out)
 
     if rm_original:
@@ -258,6 +343,8 @@ def initialize_header(hdr=None, primary=False):
         `astropy.io.fits.Header`: The initialized (or edited)
         fits header.
     """
+    import sklearn
+
     # Add versioning; this hits the highlights but should it add
     # the versions of all packages included in the requirements.txt
     # file?
@@ -307,6 +394,8 @@ def header_version_check(hdr, warning_only=True):
             Raised if `warning_only` is False and the system versions
             are different from those logged in the header.
     """
+    import sklearn
+
     # Compile the packages and versions to check
     packages = ['python', 'numpy', 'scipy', 'astropy', 'sklearn', 'pypeit']
     hdr_versions = [hdr['VERSPYT'], hdr['VERSNPY'], hdr['VERSSCI'], hdr['VERSAST'], hdr['VERSSKL'],
@@ -608,7 +697,50 @@ def write_to_hdu(d, name=None, hdr=None, force_to_bintbl=False):
     raise TypeError('Input must be a dictionary, astropy.table.Table, list, or numpy.ndarray.')
 
 
-def write_to_fits(d, ofile, name=None, hdr=None, overwrite=False, checksum=True):
+def tile_compress_hdus(hdul, quantize_level=16.):
+    """
+    Replace the image extensions in an `astropy.io.fits.HDUList`_ with
+    tile-compressed versions.
+
+    Integer images are compressed losslessly with the RICE algorithm.
+    Floating-point images are quantized and compressed with the RICE
+    algorithm, unless ``quantize_level`` is 0, in which case they are
+    compressed losslessly with GZIP.  Quantization is lossy: the
+    quantization step is the image noise (estimated by cfitsio)
+    divided by ``quantize_level``.  The dithering is seeded by the
+    image checksum such that the compression is repeatable.  The
+    primary HDU, tables, empty images, and 64-bit integer images
+    (not supported by tile compression) are not changed.
+
+    Compressed images are read transparently by `astropy.io.fits`_
+    and, therefore, by :func:`pypeit.datamodel.DataContainer.from_file`.
+
+    Args:
+        hdul (`astropy.io.fits.HDUList`_):
+            HDUs to compress.
+        quantize_level (:obj:`float`, optional):
+            Quantization level for floating-point images.
+
+    Returns:
+        `astropy.io.fits.HDUList`_: List with the compressed HDUs.
+    """
+    _hdul = fits.HDUList()
+    for hdu in hdul:
+        if not isinstance(hdu, fits.ImageHDU) or hdu.data is None \
+                or hdu.data.dtype.kind not in ['i', 'u', 'f'] \
+                or (hdu.data.dtype.kind in ['i', 'u'] and hdu.data.dtype.itemsize > 4):
+            _hdul.append(hdu)
+            continue
+        lossless_float = hdu.data.dtype.kind == 'f' and quantize_level == 0
+        _hdul.append(fits.CompImageHDU(data=hdu.data, header=hdu.header, name=hdu.name,
+                                       compression_type='GZIP_2' if lossless_float else 'RICE_1',
+                                       quantize_level=quantize_level,
+                                       dither_seed=fits.hdu.compressed.DITHER_SEED_CHECKSUM))
+    return _hdul
+
+
+def write_to_fits(d, ofile, name=None, hdr=None, overwrite=False, checksum=True,
+                  compression=None, quantize_level=None, nthreads=None, background=False):
     """
     Write the provided object to a fits file.
 
@@ -619,7 +751,19 @@ def write_to_fits(d, ofile, name=None, hdr=None, overwrite=False, checksum=True)
 
     If the provided file name includes the '.gz' extension, the file
     is first written using `astropy.io.fits.HDUList.writeto`_ and
-    then compressed using :func:`compress_file`.
+    then compressed using :func:`compress_file`.  If more than one
+    thread is used for the compression, the file is instead streamed
+    directly to a :class:`ParallelGzipFile`.
+
+    The image extensions can also be tile compressed; see
+    :func:`tile_compress_hdus`.  The defaults for the compression
+    options are held by :attr:`background_writer`; see
+    :func:`BackgroundWriter.set_compression`.
+
+    If ``background`` is True, the HDUs are constructed immediately,
+    but the file is written (and compressed) by the
+    :attr:`background_writer` thread.  The image data are copied so that
+    the caller can continue to alter its arrays.
     
     .. note::
 
@@ -651,7 +795,21 @@ def write_to_fits(d, ofile, name=None, hdr=None, overwrite=False, checksum=True)
         checksum (:obj:`bool`, optional):
             Passed to `astropy.io.fits.HDUList.writeto`_ to add the
             DATASUM and CHECKSUM keywords fits header(s).
+        compression (:obj:`str`, optional):
+            Compression for the image extensions, 'none' or 'tile'.
+            If None, use the default.
+        quantize_level (:obj:`float`, optional):
+            Quantization level for tile-compressed floating-point
+            images.  If None, use the default.
+        nthreads (:obj:`int`, optional):
+            Number of threads used to gzip the file.  If None, use the
+            default.
+        background (:obj:`bool`, optional):
+            Write the file using the :attr:`background_writer`.  If the
+            writer is disabled, the file is written immediately.
     """
+    # Make sure any queued write of this file is finished
+    background_writer.wait(ofile)
     if os.path.isfile(ofile) and not overwrite:
         raise FileExistsError('File already exists; to overwrite, set overwrite=True.')
     
@@ -660,15 +818,49 @@ def write_to_fits(d, ofile, name=None, hdr=None, overwrite=False, checksum=True)
         warnings.warn('Making root directory for output file: {0}'.format(root))
         os.makedirs(root)
 
+    _compression = background_writer.compression if compression is None else compression
+    _quantize_level = background_writer.quantize_level if quantize_level is None \
+                            else quantize_level
+    _nthreads = background_writer.nthreads if nthreads is None else nthreads
+
+    _hdr = initialize_header() if hdr is None else hdr.copy()
+
+    # Construct the hdus
+    hdul = d if isinstance(d, fits.HDUList) else \
+                fits.HDUList([fits.PrimaryHDU(header=_hdr)] + [write_to_hdu(d, name=name, hdr=_hdr)])
+
+    if background and background_writer.enabled:
+        # Decouple the image data from the caller's arrays
+        for hdu in hdul:
+            if isinstance(hdu, (fits.PrimaryHDU, fits.ImageHDU)) and hdu.data is not None:
+                hdu.data = hdu.data.copy()
+        background_writer.submit(ofile, _write_hdulist, hdul, ofile, checksum, _compression,
+                                 _quantize_level, _nthreads)
+        return
+    _write_hdulist(hdul, ofile, checksum, _compression, _quantize_level, _nthreads)
+
+
+@profiling.stage('write')
+def _write_hdulist(hdul, ofile, checksum, compression, quantize_level, nthreads):
+    """
+    Compress and write an HDUList; see :func:`write_to_fits`.
+    """
     # Determine if the file should be compressed
     _ofile = ofile[:ofile.rfind('.')] if ofile.split('.')[-1] == 'gz' else ofile
 
-    _hdr = initialize_header() if hdr is None else hdr.copy()
+    if compression == 'tile':
+        hdul = tile_compress_hdus(hdul, quantize_level=quantize_level)
+
+    if _ofile is not ofile and nthreads > 1:
+        # Stream the file directly through the parallel compression
+        pypeit.msgs.info('Compressing file: {0}'.format(_ofile))
+        with ParallelGzipFile(ofile, nthreads=nthreads) as f:
+            hdul.writeto(f, checksum=checksum)
+        pypeit.msgs.info('File written to: {0}'.format(ofile))
+        return
 
-    # Construct the hdus and write the fits file.
-    fits.HDUList(d if isinstance(d, fits.HDUList) else 
-                 [fits.PrimaryHDU(header=_hdr)] + [write_to_hdu(d, name=name, hdr=_hdr)]
-                 ).writeto(_ofile, overwrite=True, checksum=checksum)
+    # Write the fits file.
+    hdul.writeto(_ofile, overwrite=True, checksum=checksum)
 
     # Compress the file if the output filename has a '.gz' extension;
     # this is slow but still faster than if you have astropy.io.fits do
@@ -765,8 +957,522 @@ def fits_open(filename, **kwargs):
         hdulist: an :obj:`astropy.io.fits.HDUList` object that contains all the
         HDUs in the fits file
     """
+    # Make sure any queued write of this file is finished
+    background_writer.wait(filename)
     try:
         return fits.open(filename, **kwargs)
     except OSError as e:
         msgs.warn('Error opening {0}: {1}'.format(filename, str(e)) + '\nTrying again, assuming the error was a header problem.')
         return fits.open(filename, ignore_missing_end=True, **kwargs)
+
+
+class RawFileCache:
+    """
+    Bounded, least-recently-used cache of opened raw fits files.
+
+    Raw frames are read once per detector (see
+    :func:`pypeit.spectrographs.spectrograph.Spectrograph.get_rawimage`),
+    which means multi-extension files are fully decompressed many times
+    when they are gzipped (e.g., the 8 detectors of Keck/DEIMOS). This
+    object keeps the fully loaded `astropy.io.fits.HDUList`_ objects in
+    memory such that subsequent reads of the same file are served
+    without re-reading it from disk.
+
+    Files are identified by their absolute path, modification time, and
+    size, such that a file that is changed on disk is re-read. The
+    memory footprint is estimated by the total number of bytes in the
+    data arrays of all cached files; the least recently used files are
+    removed when the footprint exceeds :attr:`max_size`.
+
+    .. warning::
+
+        The `astropy.io.fits.HDUList`_ objects returned by :func:`open`
+        are shared among all callers and must be treated as read-only.
+
+    The cache can also hold the images of detectors that have been read
+    ahead of their use (see :func:`add_detectors`).  For multi-detector
+    instruments, :func:`pypeit.spectrographs.spectrograph.Spectrograph.load_rawimage`
+    extracts the detectors listed in :attr:`detectors` that follow the
+    requested one, as long as their images fit in the cache, and each
+    detector image is removed from the cache when it is used.  The
+    section images of each detector are the same for all files, so they
+    are kept once per identifier and detector and shared by all the
+    images read ahead.
+
+    Args:
+        max_size (:obj:`float`, optional):
+            Maximum size of the cache in MB.  If 0, nothing is cached.
+
+    Attributes:
+        hits (:obj:`int`):
+            Number of requests served by the cache.
+        misses (:obj:`int`):
+            Number of requests that required reading the file.
+        detectors (:obj:`list`):
+            The 1-indexed detectors being reduced, which are read
+            together.  If None, only the requested detector is read.
+    """
+    def __init__(self, max_size=1024.):
+        self.max_size = max_size
+        self._cache = OrderedDict()
+        self._detectors = OrderedDict()
+        self._sections = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.detectors = None
+
+    @property
+    def nbytes(self):
+        """Total number of bytes held by the cache."""
+        return sum([c[1] for c in self._cache.values()]) \
+                    + sum([c[1] for c in self._detectors.values()]) \
+                    + sum([c[1] for c in self._sections.values()])
+
+    @staticmethod
+    def _rawimage_nbytes(rawimage):
+        """
+        Return the number of bytes in the image arrays and in the section
+        images (the last two elements) of a tuple returned by
+        :func:`pypeit.spectrographs.spectrograph.Spectrograph.get_rawimage`.
+        """
+        return sum([r.nbytes for r in rawimage[:-2] if isinstance(r, numpy.ndarray)]), \
+                    sum([r.nbytes for r in rawimage[-2:] if isinstance(r, numpy.ndarray)])
+
+    @staticmethod
+    def _key(filename):
+        """Construct the key used to identify a file."""
+        _filename = os.path.abspath(filename)
+        stat = os.stat(_filename)
+        return _filename, stat.st_mtime_ns, stat.st_size
+
+    def set_limit(self, max_size):
+        """
+        Set the maximum size of the cache, removing files as needed.
+
+        Args:
+            max_size (:obj:`float`):
+                Maximum size of the cache in MB.  If 0, the cache is
+                emptied and nothing is cached.
+        """
+        self.max_size = max_size
+        self._trim()
+
+    def clear(self):
+        """Remove all files from the cache and reset the statistics."""
+        self._cache.clear()
+        self.reset_detectors()
+        self.hits = 0
+        self.misses = 0
+
+    def reset_detectors(self):
+        """
+        Stop reading detectors ahead of their use and remove the images
+        already read.
+        """
+        self._detectors.clear()
+        self._sections.clear()
+        self.detectors = None
+
+    def get(self, filename):
+        """
+        Return the cached HDUList for a file, if available.
+
+        This does *not* read the file if it is not in the cache.
+
+        Args:
+            filename (:obj:`str`):
+                Name of the fits file.
+
+        Returns:
+            `astropy.io.fits.HDUList`_: The cached HDUList or None if
+            the file is not in the cache.
+        """
+        try:
+            key = self._key(filename)
+        except OSError:
+            return None
+        if key not in self._cache:
+            return None
+        self._cache.move_to_end(key)
+        self.hits += 1
+        msgs.info('Raw file cache hit: {0}'.format(os.path.basename(filename)))
+        return self._cache[key][0]
+
+    def open(self, filename):
+        """
+        Open a raw fits file, using the cache if possible.
+
+        On a cache miss, the file is read using :func:`fits_open`, all
+        of its data arrays are loaded into memory, and the result is
+        added to the cache.
+
+        Args:
+            filename (:obj:`str`):
+                Name of the fits file.
+
+        Returns:
+            `astropy.io.fits.HDUList`_: The fully loaded HDUList.
+        """
+        hdu = self.get(filename)
+        if hdu is not None:
+            return hdu
+        self.misses += 1
+        if self.max_size <= 0:
+            return fits_open(filename)
+        msgs.info('Raw file cache miss: {0}'.format(os.path.basename(filename)))
+        hdu = fits_open(filename, memmap=False)
+        # Force all the data to be read before closing the file
+        nbytes = sum([h.data.nbytes for h in hdu if h.data is not None])
+        hdu.close()
+        if nbytes > self.max_size * 2**20:
+            msgs.warn('{0} is larger than the raw file cache; not caching.'.format(filename))
+            return hdu
+        self._cache[self._key(filename)] = (hdu, nbytes)
+        self._trim()
+        return hdu
+
+    def prefetch_detectors(self, filename, tag, det, rawimage):
+        """
+        Return the other detectors to read ahead of their use.
+
+        Detectors are only read ahead if the requested detector is
+        one of :attr:`detectors`, if they follow the requested detector
+        in that list, and if they are not already in the cache.  The
+        size of the image of each detector is taken to be the same as
+        the one of the requested detector, and only the detectors whose
+        images fit in the cache are returned.  The section images only
+        count for the detectors for which they are not already kept.
+
+        Args:
+            filename (:obj:`str`):
+                Name of the fits file.
+            tag (:obj:`str`):
+                Identifier for the method used to read the detectors
+                (e.g., the spectrograph name).
+            det (:obj:`int`):
+                The requested 1-indexed detector.
+            rawimage (:obj:`tuple`):
+                The tuple returned by
+                :func:`pypeit.spectrographs.spectrograph.Spectrograph.get_rawimage`
+                for the requested detector.
+
+        Returns:
+            :obj:`list`: The 1-indexed detectors to read ahead.
+        """
+        if self.max_size <= 0 or self.detectors is None or det not in self.detectors:
+            return []
+        try:
+            key = self._key(filename)
+        except OSError:
+            return []
+        image_nbytes, section_nbytes = self._rawimage_nbytes(rawimage)
+        available = self.max_size * 2**20 - self.nbytes
+        # Detectors are reduced in order, so only read the ones that follow
+        dets = []
+        for d in self.detectors[self.detectors.index(det)+1:]:
+            if (key, tag, d) in self._detectors:
+                continue
+            nbytes = image_nbytes + (0 if (tag, d) in self._sections else section_nbytes)
+            if nbytes > available:
+                break
+            dets += [d]
+            available -= nbytes
+        return dets
+
+    @contextlib.contextmanager
+    def exclude_detectors(self, dets):
+        """
+        Context manager that temporarily stops reading a set of
+        detectors ahead of their use.
+
+        This is used for the raw frames of calibrations whose masters
+        will be reused for the other detectors; see
+        :func:`pypeit.calibrations.Calibrations._skip_readahead`.
+
+        Args:
+            dets (:obj:`list`):
+                The 1-indexed detectors to exclude from
+                :attr:`detectors`.
+        """
+        detectors = self.detectors
+        if detectors is not None:
+            self.detectors = [d for d in detectors if d not in dets]
+        try:
+            yield
+        finally:
+            self.detectors = detectors
+
+    def add_detectors(self, filename, tag, dets, rawimages):
+        """
+        Add the images read ahead for a set of detectors.
+
+        Args:
+            filename (:obj:`str`):
+                Name of the fits file.
+            tag (:obj:`str`):
+                Identifier for the method used to read the detectors.
+            dets (:obj:`list`):
+                The 1-indexed detectors.
+            rawimages (:obj:`list`):
+                The tuples returned by
+                :func:`pypeit.spectrographs.spectrograph.Spectrograph.get_rawimage`
+                for each detector.  Only the arrays in each tuple count
+                toward the size of the cache.
+        """
+        if len(dets) == 0:
+            return
+        key = self._key(filename)
+        for det, rawimage in zip(dets, rawimages):
+            # Share the section images of the detector among all files
+            sections = self._sections.get((tag, det))
+            if sections is not None \
+                    and all([numpy.array_equal(s, r) for s, r in zip(sections[0], rawimage[-2:])]):
+                rawimage = tuple(rawimage[:-2]) + sections[0]
+                self._sections.move_to_end((tag, det))
+            else:
+                self._sections[(tag, det)] = (tuple(rawimage[-2:]),
+                                              self._rawimage_nbytes(rawimage)[1])
+            self._detectors[(key, tag, det)] = (rawimage, self._rawimage_nbytes(rawimage)[0])
+        self._trim()
+
+    def pop_detector(self, filename, tag, det):
+        """
+        Remove and return the image of a detector read ahead of its use.
+
+        Args:
+            filename (:obj:`str`):
+                Name of the fits file.
+            tag (:obj:`str`):
+                Identifier for the method used to read the detector.
+            det (:obj:`int`):
+                The 1-indexed detector.
+
+        Returns:
+            :obj:`tuple`: The tuple returned by
+            :func:`pypeit.spectrographs.spectrograph.Spectrograph.get_rawimage`
+            or None if the detector is not in the cache.
+        """
+        if len(self._detectors) == 0:
+            return None
+        try:
+            key = self._key(filename)
+        except OSError:
+            return None
+        rawimage = self._detectors.pop((key, tag, det), None)
+        if rawimage is None:
+            return None
+        self.hits += 1
+        msgs.info('Raw file cache hit: {0}, detector {1}'.format(os.path.basename(filename),
+                                                                  det))
+        return rawimage[0]
+
+    def _trim(self):
+        """Remove the least recently used files until within the size limit."""
+        while len(self._detectors) > 0 and self.nbytes > self.max_size * 2**20:
+            self._detectors.popitem(last=False)
+        # Remove the section images that are not used by any of the
+        # remaining detectors
+        used = set([(k[1], k[2]) for k in self._detectors.keys()])
+        for k in list(self._sections.keys()):
+            if self.nbytes <= self.max_size * 2**20:
+                break
+            if k not in used:
+                del self._sections[k]
+        while len(self._cache) > 0 and self.nbytes > self.max_size * 2**20:
+            self._cache.popitem(last=False)
+
+    def report(self):
+        """Print the cache statistics."""
+        msgs.info('Raw file cache: {0} hit(s), {1} miss(es), {2} file(s), {3} detector(s), '
+                  '{4:.1f} MB'.format(self.hits, self.misses, len(self._cache),
+                                      len(self._detectors), self.nbytes / 2**20))
+
+
+class BackgroundWriter:
+    """
+    Write output files in a background thread.
+
+    Writing (and compressing) large fits files can take a significant
+    amount of time, particularly on slow storage, during which the
+    reduction would otherwise sit idle.  Instead, write requests are put
+    in a queue and executed, in the order they were submitted, by a
+    single background thread.
+
+    The queue is bounded such that only a limited number of constructed
+    files (and the memory they occupy) wait to be written; submitting a
+    new file blocks when the queue is full.  Any exception raised while
+    writing a file is kept and re-raised in the main thread at the next
+    call to :func:`submit`, :func:`wait`, or :func:`flush`.
+
+    The writer also holds the compression used by :func:`write_to_fits`
+    for all output files, whether or not they are written in the
+    background; see :func:`set_compression`.
+
+    Args:
+        max_queue (:obj:`int`, optional):
+            Maximum number of files waiting to be written.  If 0, the
+            writer is disabled and files are written immediately by the
+            calling thread.
+    """
+    def __init__(self, max_queue=0):
+        self.max_queue = max_queue
+        self.set_compression()
+        self._queue = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._errors = []
+
+    @property
+    def enabled(self):
+        """Files are written by the background thread."""
+        return self.max_queue > 0
+
+    def set_limit(self, max_queue):
+        """
+        Set the maximum number of files waiting to be written.
+
+        Any queued files are written before the change.
+
+        Args:
+            max_queue (:obj:`int`):
+                Maximum number of queued files.  If 0, the writer is
+                disabled.
+        """
+        self.close()
+        self.max_queue = max_queue
+
+    def set_compression(self, compression='none', quantize_level=16., nthreads=1):
+        """
+        Set the default compression used by :func:`write_to_fits`.
+
+        Files already submitted keep the compression set when they were
+        submitted.
+
+        Args:
+            compression (:obj:`str`, optional):
+                Compression applied to the image extensions: 'none' or
+                'tile'; see :func:`tile_compress_hdus`.
+            quantize_level (:obj:`float`, optional):
+                Quantization level for floating-point images when using
+                tile compression.  If 0, they are compressed losslessly.
+            nthreads (:obj:`int`, optional):
+                Number of threads used to gzip files with a '.gz'
+                extension.
+        """
+        if compression not in ['none', 'tile']:
+            msgs.error('Unknown output compression: {0}'.format(compression))
+        self.compression = compression
+        self.quantize_level = quantize_level
+        self.nthreads = nthreads
+
+    def _start(self):
+        """Start the background thread."""
+        self._queue = queue.Queue(maxsize=self.max_queue)
+        self._thread = threading.Thread(target=self._work, args=(self._queue,),
+                                        name='pypeit-writer', daemon=True)
+        self._thread.start()
+
+    def _work(self, q):
+        """Execute the queued writes until receiving None."""
+        while True:
+            item = q.get()
+            if item is None:
+                q.task_done()
+                return
+            ofile, func, args, kwargs, context = item
+            try:
+                with profiling.profiler.resume(context):
+                    func(*args, **kwargs)
+            except Exception as e:
+                self._errors.append((ofile, e))
+            finally:
+                with self._lock:
+                    self._pending[ofile] -= 1
+                    if self._pending[ofile] == 0:
+                        del self._pending[ofile]
+                q.task_done()
+
+    def _raise(self):
+        """Re-raise the first exception raised by the background thread."""
+        if len(self._errors) == 0:
+            return
+        errors, self._errors = self._errors, []
+        for ofile, e in errors:
+            msgs.warn('Failed to write {0}: {1}'.format(ofile, e))
+        raise errors[0][1]
+
+    def submit(self, ofile, func, *args, **kwargs):
+        """
+        Queue a function that writes a file.
+
+        Blocks if the queue is full.  The profiled stages of the function
+        (see :mod:`pypeit.profiling`) are enclosed in the stage in which
+        the file was queued, such that they keep its labels.
+
+        Args:
+            ofile (:obj:`str`):
+                The file written by the function.
+            func (callable):
+                The function to call.
+            *args, **kwargs:
+                Passed to the function.
+        """
+        self._raise()
+        if not self.enabled:
+            func(*args, **kwargs)
+            return
+        if self._thread is None:
+            self._start()
+        _ofile = os.path.abspath(ofile)
+        with self._lock:
+            self._pending[_ofile] = self._pending.get(_ofile, 0) + 1
+        self._queue.put((_ofile, func, args, kwargs, profiling.profiler.context()))
+
+    def pending(self, filename):
+        """Return True if the file is queued to be written."""
+        with self._lock:
+            return os.path.abspath(filename) in self._pending
+
+    def wait(self, filename):
+        """
+        Wait until a file is written, if it is in the queue.
+
+        Args:
+            filename (:obj:`str`):
+                Name of the file.
+        """
+        if self.pending(filename):
+            self.flush()
+        else:
+            self._raise()
+
+    def flush(self):
+        """Wait until all the queued files are written."""
+        if self._queue is not None:
+            self._queue.join()
+        self._raise()
+
+    def close(self):
+        """Write all queued files and stop the background thread."""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._queue.join()
+            self._thread.join()
+            self._queue = None
+            self._thread = None
+        self._raise()
+
+
+raw_file_cache = RawFileCache()
+"""
+Global :class:`RawFileCache` shared by all raw-image reading methods.
+"""
+
+
+background_writer = BackgroundWriter()
+"""
+Global :class:`BackgroundWriter` used to write the reduction outputs; see
+:func:`write_to_fits`.
+"""
+atexit.register(background_writer.close)
@@ -6,13 +6,18 @@ Implements the master frame base class.
 
 """
 import os
-from IPython import embed
+import copy
+import hashlib
 from abc import ABCMeta
+from collections import OrderedDict
 
 import numpy as np
 
 from pypeit import msgs
+from pypeit import __version__
+from pypeit import io
 from pypeit.io import initialize_header
+from pypeit.par.parset import ParSet
 
 from astropy.io import fits
 
@@ -72,8 +77,67 @@ def grab_key_mdir(inp, from_filename=False):
     return master_key, master_dir
 
 
+def master_hash(spectrograph, det, raw_files=None, pars=None, upstream=None):
+    """
+    Construct a hash that identifies the inputs used to build a master
+    frame.
+
+    The hash is built from the PypeIt version, the spectrograph name,
+    the detector, the names and sizes of the raw files, the relevant
+    parameters, and the hashes of any masters used to construct this
+    one. The master key is *not* included so that the same master can
+    be identified in different reduction directories.
+
+    Args:
+        spectrograph (:obj:`str`):
+            Name of the spectrograph.
+        det (:obj:`int`):
+            Detector number.
+        raw_files (:obj:`list`, optional):
+            Raw files combined to construct the master. The order of
+            the files is ignored.
+        pars (:obj:`list`, optional):
+            List of :class:`pypeit.par.parset.ParSet` objects with the
+            parameters used to construct the master.
+        upstream (:obj:`list`, optional):
+            Hashes of the masters used to construct this one; can
+            include None for masters that are not available.
+
+    Returns:
+        :obj:`str`: The hexadecimal hash.
+    """
+    lines = [__version__, spectrograph, str(det)]
+    if raw_files is not None:
+        lines += sorted(['{0} {1}'.format(os.path.basename(f),
+                                          os.path.getsize(f) if os.path.isfile(f) else -1)
+                            for f in raw_files])
+    if pars is not None:
+        for par in pars:
+            lines += ParSet.config_lines(par, section_name='par', include_descr=False)
+    if upstream is not None:
+        lines += [str(u) for u in upstream]
+    return hashlib.sha1('\n'.join(lines).encode('utf-8')).hexdigest()
+
+
+def read_master_hash(filename):
+    """
+    Read the hash of the master inputs from the master file header.
+
+    Args:
+        filename (:obj:`str`):
+            Name of the master file.
+
+    Returns:
+        :obj:`str`: The hash recorded in the header (see
+        :func:`master_hash`) or None if the header does not include it.
+    """
+    # Make sure any queued write of this file is finished
+    io.background_writer.wait(filename)
+    return fits.getheader(filename).get('MSTRHASH')
+
+
 def build_master_header(master_obj, master_key, master_dir,
-                        hdr=None, steps=None, raw_files=None):
+                        hdr=None, steps=None, raw_files=None, calib_hash=None):
     """
     Initialize the master frame header.
 
@@ -101,6 +165,9 @@ def build_master_header(master_obj, master_key, master_dir,
         raw_files (:obj:`list`, optional):
             List of processed raw files used to construct the master
             frame.
+        calib_hash (:obj:`str`, optional):
+            Hash of the inputs used to construct the master frame; see
+            :func:`master_hash`.
     Returns:
         `astropy.io.fits.Header`: The initialized (or edited)
         fits header.
@@ -115,6 +182,8 @@ def build_master_header(master_obj, master_key, master_dir,
     _hdr['MSTRKEY'] = (master_key, 'PypeIt: Calibration key')
     _hdr['MSTRVER'] = (master_obj.version, 'PypeIt: Master datamodel version')
     #_hdr['MSTRREU'] = (self.reuse_masters, 'PypeIt: Reuse existing masters')
+    if calib_hash is not None:
+        _hdr['MSTRHASH'] = (calib_hash, 'PypeIt: Hash of the master inputs')
 
     # Spectrograph
     if master_obj.PYP_SPEC is None:
@@ -133,3 +202,173 @@ def build_master_header(master_obj, master_key, master_dir,
     # Return
     return _hdr
 
+
+
+def _nbytes(obj, _seen=None):
+    """
+    Estimate the memory used by the arrays held by an object.
+
+    Args:
+        obj (object):
+            Object to inspect. Arrays are found recursively in
+            dictionaries, lists, tuples, and object attributes.
+
+    Returns:
+        :obj:`int`: Total number of bytes in the arrays.
+    """
+    _seen = set() if _seen is None else _seen
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes if obj.dtype != object \
+                    else obj.nbytes + sum([_nbytes(o, _seen) for o in obj.flat])
+    if isinstance(obj, dict):
+        return sum([_nbytes(o, _seen) for o in obj.values()])
+    if isinstance(obj, (list, tuple)):
+        return sum([_nbytes(o, _seen) for o in obj])
+    return _nbytes(vars(obj), _seen) if hasattr(obj, '__dict__') else 0
+
+
+class MasterFrameCache:
+    """
+    Bounded, least-recently-used cache of objects read from master
+    frames.
+
+    :class:`pypeit.calibrations.Calibrations` is instantiated for every
+    exposure and detector, meaning that, when reusing masters, the same
+    master files are read and decoded for every science frame in a
+    calibration group. This object keeps the objects read from the
+    master files in memory such that subsequent loads are served without
+    re-reading them from disk.
+
+    Objects are identified by the absolute path of their master file
+    (which includes the master type, master key, and detector),
+    modification time, and size, such that a master that is changed on
+    disk is re-read. Entries are also explicitly invalidated whenever a
+    master is (re)built and written; see
+    :func:`pypeit.datamodel.DataContainer.to_master_file`. The memory
+    footprint is estimated by the total number of bytes in the arrays of
+    all cached objects; the least recently used objects are removed when
+    the footprint exceeds :attr:`max_size`.
+
+    Because the calibrations objects are modified during the reduction
+    (e.g., the slit masks), the objects are copied when added to and
+    returned by the cache.
+
+    Args:
+        max_size (:obj:`float`, optional):
+            Maximum size of the cache in MB.  If 0, nothing is cached.
+
+    Attributes:
+        hits (:obj:`int`):
+            Number of requests served by the cache.
+        misses (:obj:`int`):
+            Number of requests that required reading the file.
+    """
+    def __init__(self, max_size=2048.):
+        self.max_size = max_size
+        self._cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._cache)
+
+    @property
+    def nbytes(self):
+        """Total number of bytes held by the cache."""
+        return sum([c[2] for c in self._cache.values()])
+
+    @staticmethod
+    def _key(filename):
+        """Construct the key used to identify a file."""
+        _filename = os.path.abspath(filename)
+        stat = os.stat(_filename)
+        return _filename, stat.st_mtime_ns, stat.st_size
+
+    def set_limit(self, max_size):
+        """
+        Set the maximum size of the cache, removing objects as needed.
+
+        Args:
+            max_size (:obj:`float`):
+                Maximum size of the cache in MB.  If 0, the cache is
+                emptied and nothing is cached.
+        """
+        self.max_size = max_size
+        self._trim()
+
+    def clear(self):
+        """Remove all objects from the cache and reset the statistics."""
+        self._cache.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def invalidate(self, filename):
+        """
+        Remove the object read from a master file from the cache.
+
+        Args:
+            filename (:obj:`str`):
+                Name of the master file.
+        """
+        self._cache.pop(os.path.abspath(filename), None)
+
+    def load(self, filename, master_class):
+        """
+        Load an object from a master file, using the cache if possible.
+
+        Args:
+            filename (:obj:`str`):
+                Name of the master file.
+            master_class (:obj:`type`):
+                Class used to read the file; must provide a
+                ``from_file`` method.
+
+        Returns:
+            object: A copy of the object read from the file.
+        """
+        _filename = os.path.abspath(filename)
+        # Make sure any queued write of this file is finished
+        io.background_writer.wait(filename)
+        try:
+            key = self._key(filename)
+        except OSError:
+            key = None
+        if _filename in self._cache and self._cache[_filename][0] == key \
+                and isinstance(self._cache[_filename][1], master_class):
+            self._cache.move_to_end(_filename)
+            self.hits += 1
+            msgs.info('Master frame cache hit: {0}'.format(os.path.basename(filename)))
+            return copy.deepcopy(self._cache[_filename][1])
+        self.misses += 1
+        obj = master_class.from_file(filename)
+        if self.max_size <= 0:
+            return obj
+        nbytes = _nbytes(obj)
+        if nbytes > self.max_size * 2**20:
+            msgs.warn('{0} is larger than the master frame cache; not caching.'.format(filename))
+            return obj
+        self._cache[_filename] = (self._key(filename), copy.deepcopy(obj), nbytes)
+        self._cache.move_to_end(_filename)
+        self._trim()
+        return obj
+
+    def _trim(self):
+        """Remove the least recently used objects until within the size limit."""
+        while len(self._cache) > 0 and self.nbytes > self.max_size * 2**20:
+            self._cache.popitem(last=False)
+
+    def report(self):
+        """Print the cache statistics."""
+        msgs.info('Master frame cache: {0} hit(s), {1} miss(es), {2} object(s), '
+                  '{3:.1f} MB'.format(self.hits, self.misses, len(self._cache),
+                                      self.nbytes / 2**20))
+
+
+master_cache = MasterFrameCache()
+"""
+Cache of the objects read from master frames; see
+:class:`MasterFrameCache`.
+"""
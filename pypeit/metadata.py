@@ -25,7 +25,6 @@ from pypeit.io import dict_to_lines
 from pypeit.par import PypeItPar
 from pypeit.par.util import make_pypeit_file
 from pypeit.bitmask import BitMask
-from IPython import embed
 
 # TODO: Turn this into a DataContainer
 # Initially tried to subclass this from astropy.table.Table, but that
@@ -293,6 +292,7 @@ class PypeItMetaData:
         if len(existing_keys) > 0 and match_type:
             for key in existing_keys:
                 if len(self.table[key].shape) > 1:  # NOT ALLOWED!!
+                    from IPython import embed
                     embed(header='372 of metadata')
                 elif key in meta_data_model.keys(): # Is this meta data??
                     dtype = meta_data_model[key]['dtype']
@@ -549,6 +549,43 @@ class PypeItMetaData:
             del _cfg['None']
         return _cfg
 
+    def _group_configurations(self, cfg_keys, indx=None):
+        """
+        Group frames with identical values for a set of configuration
+        keys.
+
+        The values in each column are factorized (floating-point values
+        and masked entries are compared by their exact representation)
+        and frames are grouped by the combination of these codes.
+        Frames in the same group are guaranteed to be assigned to the
+        same configuration by :func:`row_match_config`, meaning that the
+        (slower) comparisons with the configurations only need to be
+        performed for one frame per group.
+
+        Args:
+            cfg_keys (:obj:`list`):
+                The list of metadata keys used to group the frames.
+            indx (`numpy.ndarray`_, optional):
+                The sorted indices of the frames to group. If None, all
+                frames are grouped.
+
+        Returns:
+            :obj:`tuple`: Two `numpy.ndarray`_ objects: the index of
+            the first frame in each group, in the order the groups first
+            appear in the table, and the group index of each selected
+            frame.
+        """
+        _indx = np.arange(len(self)) if indx is None else np.asarray(indx)
+        if len(cfg_keys) == 0 or _indx.size == 0:
+            return _indx[:1], np.zeros(_indx.size, dtype=int)
+        codes = np.array([_factorize_column(self.table[k], _indx) for k in cfg_keys])
+        _, first, inverse = np.unique(codes, axis=1, return_index=True, return_inverse=True)
+        # Order the groups by their first appearance
+        srt = np.argsort(first)
+        rank = np.empty_like(srt)
+        rank[srt] = np.arange(srt.size)
+        return _indx[first[srt]], rank[inverse.ravel()]
+
     def unique_configurations(self, force=False, copy=False, rm_none=False):
         """
         Return the unique instrument configurations.
@@ -657,8 +694,16 @@ class PypeItMetaData:
         cfg_indx += 1
 
         # Check if any of the other files show a different
-        # configuration.
-        for i in indx[1:]:
+        # configuration.  Frames with identical metadata match the same
+        # configurations, so only the first frame in each group needs
+        # to be checked, unless the frame does not match its own
+        # configuration (e.g., because a floating-point value is 0).
+        first, group = self._group_configurations(cfg_keys, indx=indx)
+        selfmatch = np.array([row_match_config(self.table[i],
+                                               self.get_configuration(i, cfg_keys=cfg_keys),
+                                               self.spectrograph) for i in first])
+        check = np.isin(indx, first[selfmatch]) | np.logical_not(selfmatch[group])
+        for i in indx[check][1:]:
             j = 0
             for c in self.configs.values():
                 if row_match_config(self.table[i], c, self.spectrograph):
@@ -724,11 +769,18 @@ class PypeItMetaData:
                 msgs.error('Configuration {0} defined using unavailable keywords!'.format(k))
 
         self.table['setup'] = 'None'
-        nrows = len(self)
-        for i in range(nrows):
+        # Frames with identical metadata match the same configurations,
+        # so only check the first frame in each group
+        cfg_keys = []
+        for cfg in _configs.values():
+            cfg_keys += [k for k in cfg.keys() if k not in cfg_keys]
+        first, group = self._group_configurations(cfg_keys)
+        setup = np.full(first.size, 'None', dtype=object)
+        for j, i in enumerate(first):
             for d, cfg in _configs.items():
                 if row_match_config(self.table[i], cfg, self.spectrograph):
-                    self.table['setup'][i] = d
+                    setup[j] = d
+        self.table['setup'][:] = setup[group]
 
         # Check if any of the configurations are not set
         not_setup = self.table['setup'] == 'None'
@@ -1618,6 +1670,44 @@ class PypeItMetaData:
         return self.calib_bitmask.flagged_bits(self['calibbit'][row])
 
 
+def _factorize_column(col, indx):
+    """
+    Assign an integer code to each unique value in a table column.
+
+    Values are compared using their exact representation; e.g.,
+    floating-point values only have the same code if their bits are
+    identical, and masked values never share a code with unmasked ones.
+
+    Args:
+        col (`astropy.table.Column`_):
+            Column to factorize. Elements can be arrays.
+        indx (`numpy.ndarray`_):
+            Indices of the rows to factorize.
+
+    Returns:
+        `numpy.ndarray`_: The integer code for each selected row.
+    """
+    data = np.asarray(col)[indx]
+    mask = np.ma.getmaskarray(col)[indx].reshape(data.shape[0], -1).any(axis=1)
+    if data.dtype == object:
+        # Objects (e.g., None mixed with strings) can only be compared
+        # by value
+        codes = {}
+        inv = np.empty(data.shape[0], dtype=int)
+        for i, v in enumerate(data):
+            key = (type(v), v, np.signbit(v)) if isinstance(v, float) else (type(v), v)
+            try:
+                inv[i] = codes.setdefault(key, len(codes))
+            except TypeError:
+                inv[i] = codes.setdefault((type(v), repr(v)), len(codes))
+    else:
+        # Compare the bytes of each element
+        data = np.ascontiguousarray(data).reshape(data.shape[0], -1)
+        data = data.view(np.dtype((np.void, data.dtype.itemsize*data.shape[1]))).ravel()
+        inv = np.unique(data, return_inverse=True)[1].ravel()
+    return 2*inv + mask
+
+
 # TODO: Is there a reason why this is not an attribute of
 # PypeItMetaData?
 def row_match_config(row, config, spectrograph):
@@ -11,8 +11,6 @@ import warnings
 import textwrap
 import sys
 
-from IPython import embed
-
 import numpy
 
 from astropy.io import fits
@@ -60,7 +60,6 @@ import os
 import warnings
 from pkg_resources import resource_filename
 import inspect
-from IPython import embed
 from collections import OrderedDict
 
 import numpy
@@ -834,7 +833,8 @@ class Coadd1DPar(ParSet):
                  sn_smooth_npix=None, wave_method=None, samp_fact=None, ref_percentile=None, maxiter_scale=None,
                  sigrej_scale=None, scale_method=None, sn_min_medscale=None, sn_min_polyscale=None, maxiter_reject=None,
                  lower=None, upper=None, maxrej=None, sn_clip=None, nbest=None, sensfuncfile=None, coaddfile=None,
-                 mag_type=None, filter=None, filter_mag=None, filter_mask=None, extrap_sens=None):
+                 mag_type=None, filter=None, filter_mag=None, filter_mask=None, extrap_sens=None,
+                 nproc=None):
 
         # Grab the parameter names and values from the function
         # arguments
@@ -994,6 +994,12 @@ class Coadd1DPar(ParSet):
         dtypes['coaddfile'] = str
         descr['coaddfile'] = 'Output filename'
 
+        defaults['nproc'] = 1
+        dtypes['nproc'] = int
+        descr['nproc'] = 'Number of processes used to scale and stack the individual orders of an ' \
+                         'echelle coadd.  The result does not depend on this number.  This is only ' \
+                         'used for Echelle'
+
         # Instantiate the parameter set
         super(Coadd1DPar, self).__init__(list(pars.keys()),
                                          values=list(pars.values()),
@@ -1009,7 +1015,7 @@ class Coadd1DPar(ParSet):
                    'samp_fact', 'ref_percentile', 'maxiter_scale', 'sigrej_scale', 'scale_method',
                    'sn_min_medscale', 'sn_min_polyscale', 'maxiter_reject', 'lower', 'upper',
                    'maxrej', 'sn_clip', 'nbest', 'sensfuncfile', 'coaddfile',
-                   'filter', 'mag_type', 'filter_mag', 'filter_mask', 'extrap_sens']
+                   'filter', 'mag_type', 'filter_mag', 'filter_mask', 'extrap_sens', 'nproc']
 
         badkeys = numpy.array([pk not in parkeys for pk in k])
         if numpy.any(badkeys):
@@ -1041,7 +1047,8 @@ class Coadd2DPar(ParSet):
     For a table with the current keywords, defaults, and descriptions,
     see :ref:`pypeitpar`.
     """
-    def __init__(self, offsets=None, weights=None, use_slits4wvgrid=None):
+    def __init__(self, offsets=None, weights=None, use_slits4wvgrid=None, sigrej=None,
+                 maxiters=None, streaming=None):
 
         # Grab the parameter names and values from the function
         # arguments
@@ -1070,6 +1077,25 @@ class Coadd2DPar(ParSet):
         dtypes['weights'] = [str, list]
         descr['weights'] = 'Mode for the weights used to coadd images.  See coadd2d.py for all options.'
 
+        # Rejection
+        defaults['sigrej'] = 3.0
+        dtypes['sigrej'] = [int, float]
+        descr['sigrej'] = 'Rejection threshold used to sigma clip the rectified images.'
+
+        defaults['maxiters'] = 10
+        dtypes['maxiters'] = int
+        descr['maxiters'] = 'Maximum number of sigma-clipping iterations of the rectified images.'
+
+        # Streaming
+        defaults['streaming'] = False
+        dtypes['streaming'] = bool
+        descr['streaming'] = 'Read the spec2d files one at a time instead of building stacks of ' \
+                             'all the images in memory.  This bounds the memory use for large ' \
+                             'numbers of exposures at the cost of reading each file more than ' \
+                             'once.  The sigma clipping of the rectified images then ' \
+                             'rejects pixels about the min/max-trimmed mean instead of the ' \
+                             'median, and each iteration reads all the files.'
+
         # Instantiate the parameter set
         super(Coadd2DPar, self).__init__(list(pars.keys()),
                                                  values=list(pars.values()),
@@ -1081,7 +1107,7 @@ class Coadd2DPar(ParSet):
     @classmethod
     def from_dict(cls, cfg):
         k = numpy.array([*cfg.keys()])
-        parkeys = ['offsets', 'weights', 'use_slits4wvgrid']
+        parkeys = ['offsets', 'weights', 'use_slits4wvgrid', 'sigrej', 'maxiters', 'streaming']
 
         badkeys = numpy.array([pk not in parkeys for pk in k])
         if numpy.any(badkeys):
@@ -2074,7 +2100,10 @@ class ReduxPar(ParSet):
     see :ref:`pypeitpar`.
     """
     def __init__(self, spectrograph=None, detnum=None, sortroot=None, calwin=None, scidir=None,
-                 qadir=None, redux_path=None, ignore_bad_headers=None, slitspatnum=None):
+                 qadir=None, redux_path=None, ignore_bad_headers=None, slitspatnum=None,
+                 raw_cache_size=None, output_compression=None, quantize_level=None,
+                 gzip_nthreads=None, write_queue_size=None,
+                 master_cache_size=None, perf_report=None):
 
         # Grab the parameter names and values from the function
         # arguments
@@ -2140,6 +2169,56 @@ class ReduxPar(ParSet):
         descr['redux_path'] = 'Path to folder for performing reductions.  Default is the ' \
                               'current working directory.'
 
+        defaults['raw_cache_size'] = 1024.
+        dtypes['raw_cache_size'] = [int, float]
+        descr['raw_cache_size'] = 'Maximum memory (in MB) used to keep previously read raw ' \
+                                  'files in memory so that they are not re-read (and ' \
+                                  'decompressed) for each detector.  Set to 0 to turn off the ' \
+                                  'cache.'
+
+        defaults['output_compression'] = 'none'
+        options['output_compression'] = ReduxPar.valid_output_compression()
+        dtypes['output_compression'] = str
+        descr['output_compression'] = 'Compression of the images in the output spec2d and ' \
+                                      'master files.  Options are: {0}.  '.format(
+                                        ', '.join(options['output_compression'])) \
+                                      + 'Use \'tile\' for fits tile compression, which is ' \
+                                        'read transparently; integer images are compressed ' \
+                                        'losslessly and floating-point images are quantized ' \
+                                        '(see quantize_level).'
+
+        defaults['quantize_level'] = 16.
+        dtypes['quantize_level'] = [int, float]
+        descr['quantize_level'] = 'Quantization level for tile-compressed floating-point ' \
+                                  'images; the quantization step is the image noise divided ' \
+                                  'by this number.  Set to 0 for lossless compression.'
+
+        defaults['gzip_nthreads'] = 1
+        dtypes['gzip_nthreads'] = int
+        descr['gzip_nthreads'] = 'Number of threads used to gzip output files with a .gz ' \
+                                 'extension (e.g., the MasterEdges files).'
+
+        defaults['write_queue_size'] = 2
+        dtypes['write_queue_size'] = int
+        descr['write_queue_size'] = 'Maximum number of output files (spec1d, spec2d, and ' \
+                                    'master frames) waiting to be written by a background ' \
+                                    'thread while the reduction continues.  Set to 0 to write ' \
+                                    'the files immediately.'
+
+        defaults['master_cache_size'] = 2048.
+        dtypes['master_cache_size'] = [int, float]
+        descr['master_cache_size'] = 'Maximum memory (in MB) used to keep the calibrations ' \
+                                     'read from master frames in memory so that they are not ' \
+                                     're-read for each exposure when reusing masters.  Set to ' \
+                                     '0 to turn off the cache.'
+
+        defaults['perf_report'] = False
+        dtypes['perf_report'] = bool
+        descr['perf_report'] = 'Record the wall time, CPU time (of PypeIt and, separately, of ' \
+                               'its worker processes), and peak memory of the main ' \
+                               'reduction stages for each exposure and detector, and write ' \
+                               'them to a JSON file in the QA directory.'
+
         # Instantiate the parameter set
         super(ReduxPar, self).__init__(list(pars.keys()),
                                         values=list(pars.values()),
@@ -2155,7 +2234,9 @@ class ReduxPar(ParSet):
 
         # Basic keywords
         parkeys = [ 'spectrograph', 'detnum', 'sortroot', 'calwin', 'scidir', 'qadir',
-                    'redux_path', 'ignore_bad_headers', 'slitspatnum']
+                    'redux_path', 'ignore_bad_headers', 'slitspatnum', 'raw_cache_size',
+                    'output_compression', 'quantize_level', 'gzip_nthreads',
+                    'write_queue_size', 'master_cache_size', 'perf_report']
 
         badkeys = numpy.array([pk not in parkeys for pk in k])
         if numpy.any(badkeys):
@@ -2174,6 +2255,13 @@ class ReduxPar(ParSet):
 #    def valid_spectrographs():
 #        return available_spectrographs
 
+    @staticmethod
+    def valid_output_compression():
+        """
+        Return the valid options for the compression of output images.
+        """
+        return ['none', 'tile']
+
     def validate(self):
         pass
 
@@ -2193,7 +2281,7 @@ class WavelengthSolutionPar(ParSet):
                  rms_threshold=None, match_toler=None, func=None, n_first=None, n_final=None,
                  sigrej_first=None, sigrej_final=None, wv_cen=None, disp=None, numsearch=None,
                  nfitpix=None, IDpixels=None, IDwaves=None, refframe=None,
-                 nsnippet=None):
+                 nsnippet=None, nproc=None):
 
         # Grab the parameter names and values from the function
         # arguments
@@ -2432,6 +2520,12 @@ class WavelengthSolutionPar(ParSet):
         descr['refframe'] = 'Frame of reference for the wavelength calibration.  ' \
                          'Options are: {0}'.format(', '.join(options['refframe']))
 
+        defaults['nproc'] = 1
+        dtypes['nproc'] = int
+        descr['nproc'] = 'Number of processes used to reidentify and fit the arc lines of ' \
+                         'the individual slits or orders when using the reidentify method.  ' \
+                         'The result does not depend on the number of processes.'
+
         # Instantiate the parameter set
         super(WavelengthSolutionPar, self).__init__(list(pars.keys()),
                                                     values=list(pars.values()),
@@ -2449,7 +2543,7 @@ class WavelengthSolutionPar(ParSet):
                    'fwhm', 'reid_arxiv', 'nreid_min', 'cc_thresh', 'cc_local_thresh',
                    'nlocal_cc', 'rms_threshold', 'match_toler', 'func', 'n_first','n_final',
                    'sigrej_first', 'sigrej_final', 'wv_cen', 'disp', 'numsearch', 'nfitpix',
-                   'IDpixels', 'IDwaves', 'refframe', 'nsnippet']
+                   'IDpixels', 'IDwaves', 'refframe', 'nsnippet', 'nproc']
 
         badkeys = numpy.array([pk not in parkeys for pk in k])
         if numpy.any(badkeys):
@@ -3484,7 +3578,7 @@ class ExtractionPar(ParSet):
 
     def __init__(self, boxcar_radius=None, std_prof_nsigma=None, sn_gauss=None,
                  model_full_slit=None, manual=None, skip_optimal=None,
-                 use_2dmodel_mask=None):
+                 use_2dmodel_mask=None, nproc=None):
 
         # Grab the parameter names and values from the function
         # arguments
@@ -3531,6 +3625,13 @@ class ExtractionPar(ParSet):
         descr['use_2dmodel_mask'] = 'Mask pixels rejected during profile fitting when extracting.' \
                              'Turning this off may help with bright emission lines.'
 
+        defaults['nproc'] = 1
+        dtypes['nproc'] = int
+        descr['nproc'] = 'Number of processes used for the local sky subtraction and extraction ' \
+                         'of the echelle orders that do not depend on the FWHM measured in ' \
+                         'other orders.  With more than one process, these orders are ' \
+                         'extracted on the detector columns they span, which can change the ' \
+                         'result slightly.  This is only used for Echelle'
 
         defaults['manual'] = ManualExtractionPar()
         dtypes['manual'] = [ ParSet, dict ]
@@ -3552,7 +3653,7 @@ class ExtractionPar(ParSet):
 
         # Basic keywords
         parkeys = ['boxcar_radius', 'std_prof_nsigma', 'sn_gauss', 'model_full_slit', 'manual',
-                   'skip_optimal', 'use_2dmodel_mask']
+                   'skip_optimal', 'use_2dmodel_mask', 'nproc']
 
         badkeys = numpy.array([pk not in parkeys for pk in k])
         if numpy.any(badkeys):
@@ -3588,7 +3689,7 @@ class CalibrationsPar(ParSet):
                  pinholeframe=None, alignframe=None, alignment=None, traceframe=None,
                  illumflatframe=None,
                  standardframe=None, flatfield=None, wavelengths=None, slitedges=None, tilts=None,
-                 raise_chk_error=None):
+                 raise_chk_error=None, master_store=None):
 
 
         # Grab the parameter names and values from the function
@@ -3610,6 +3711,13 @@ class CalibrationsPar(ParSet):
         descr['master_dir'] = 'If provided, it should be the name of the folder to ' \
                           'write master files. NOT A PATH. '
 
+        dtypes['master_store'] = str
+        descr['master_store'] = 'If provided, the path to a directory used to share master ' \
+                                'frames among reductions.  Masters are saved to and ' \
+                                'retrieved from this directory based on a hash of their ' \
+                                'inputs (raw files, parameters, upstream masters, and PypeIt ' \
+                                'version), such that identical masters are not rebuilt.'
+
         dtypes['setup'] = str
         descr['setup'] = 'If masters=\'force\', this is the setup name to be used: e.g., ' \
                          'C_02_aa .  The detector number is ignored but the other information ' \
@@ -3731,7 +3839,7 @@ class CalibrationsPar(ParSet):
         k = numpy.array([*cfg.keys()])
 
         # Basic keywords
-        parkeys = [ 'master_dir', 'setup', 'bpm_usebias', 'raise_chk_error']
+        parkeys = [ 'master_dir', 'setup', 'bpm_usebias', 'raise_chk_error', 'master_store']
 
         allkeys = parkeys + ['biasframe', 'darkframe', 'arcframe', 'tiltframe', 'pixelflatframe',
                              'illumflatframe',
@@ -0,0 +1,305 @@
+"""
+Record the wall time, CPU time, and peak memory of the main stages of a
+reduction.
+
+The methods of the main reduction stages are decorated with
+:func:`stage`, and the reduction loops in :class:`pypeit.pypeit.PypeIt`
+open stages labeled by exposure and detector.  Nothing is recorded
+unless the profiler is enabled (see the ``perf_report`` parameter in
+:class:`pypeit.par.pypeitpar.ReduxPar`), in which case
+:func:`StageProfiler.write` saves the records to a JSON file.
+"""
+import os
+import time
+import json
+import threading
+import functools
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+from pypeit import msgs
+
+
+def _read_hwm():
+    """
+    Return the peak resident set size of the process in bytes.
+
+    On Linux, this is the high-water mark since it was last reset with
+    :func:`_reset_hwm`; otherwise, this is the peak over the lifetime of
+    the process. Returns None if the peak is not available.
+    """
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])*1024
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss if os.uname().sysname == 'Darwin' else maxrss*1024
+
+
+def _children_cpu():
+    """
+    Return the CPU time used by the terminated child processes (e.g., the
+    workers of a process pool), or None if not available.
+    """
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _reset_hwm():
+    """
+    Reset the peak resident set size of the process, if possible.
+
+    Returns:
+        :obj:`bool`: Flag that the peak was reset.
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        return False
+    return True
+
+
+class StageProfiler:
+    """
+    Record the wall time, CPU time, and peak resident memory of nested
+    reduction stages.
+
+    Each stage is timed with ``time.perf_counter`` and
+    ``time.process_time``; the CPU time is that of the whole process
+    (including all of its threads) during the stage.  The CPU time of
+    the child processes (e.g., the workers used with ``nproc > 1``) that
+    finished during a stage is recorded separately for stages in the
+    main thread, using ``resource.getrusage``.  On Linux, the peak memory of each stage is measured by
+    resetting the high-water mark of the resident set size when the
+    stage starts; elsewhere, the reported peak is the peak of the
+    process up to the end of the stage.  The high-water mark is only
+    reset by stages in the main thread, such that stages running in
+    other threads (e.g., the files written by
+    :attr:`pypeit.io.background_writer`) only report their times.
+
+    Stages inherit the labels (e.g., the exposure and detector) of the
+    stages that enclose them in the same thread.  The enclosing stages
+    of another thread can be restored with :func:`resume`; e.g., the
+    files written by :attr:`pypeit.io.background_writer` are labeled by
+    the stage in which they were queued.
+
+    Attributes:
+        enabled (:obj:`bool`):
+            Record the stages.  If False, :func:`stage` does nothing.
+        records (:obj:`list`):
+            One dictionary per finished stage, in the order in which
+            they finished.  The labels of the stage are kept in a
+            separate dictionary, ``labels``, such that they cannot
+            clash with the recorded quantities.
+    """
+    def __init__(self):
+        self.enabled = False
+        self.records = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._hwm_reset = True
+
+    def _stack(self):
+        """The stack of open stages in the current thread."""
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    def reset(self, enabled=None):
+        """
+        Remove all records.
+
+        Args:
+            enabled (:obj:`bool`, optional):
+                Enable or disable the profiler. If None, this is not
+                changed.
+        """
+        if enabled is not None:
+            self.enabled = enabled
+        with self._lock:
+            self.records = []
+
+    def context(self):
+        """
+        Return the path and labels of the innermost open stage of the
+        current thread, to be restored in another thread with
+        :func:`resume`.
+
+        Returns:
+            :obj:`dict`: The path and labels, or None if the profiler
+            is disabled or no stage is open.
+        """
+        stack = self._stack()
+        if not self.enabled or len(stack) == 0:
+            return None
+        return dict(path='/'.join([s['name'] for s in stack]), labels=dict(stack[-1]['labels']))
+
+    @contextmanager
+    def resume(self, context):
+        """
+        Context manager that encloses the stages of the current thread in
+        the stages of another thread, without recording them.
+
+        Args:
+            context (:obj:`dict`):
+                The path and labels returned by :func:`context`.  If
+                None, nothing is done.
+        """
+        if context is None:
+            yield
+            return
+        stack = self._stack()
+        stack.append(dict(name=context['path'], labels=context['labels'], peak=0))
+        try:
+            yield
+        finally:
+            stack.pop()
+
+    @contextmanager
+    def stage(self, name, **labels):
+        """
+        Context manager that records a stage.
+
+        Args:
+            name (:obj:`str`):
+                Name of the stage.
+            **labels:
+                Labels of the stage; e.g., ``det=1``.  Labels that are
+                None are ignored.
+        """
+        if not self.enabled:
+            yield
+            return
+
+        stack = self._stack()
+        main = threading.current_thread() is threading.main_thread()
+        _labels = dict(stack[-1]['labels']) if len(stack) > 0 else {}
+        _labels.update({k: v for k, v in labels.items() if v is not None})
+        if main and self._hwm_reset:
+            # Keep the peak of the enclosing stage before resetting it
+            if len(stack) > 0:
+                stack[-1]['peak'] = max(stack[-1]['peak'], _read_hwm() or 0)
+            self._hwm_reset = _reset_hwm()
+        frame = dict(name=name, labels=_labels, peak=0)
+        stack.append(frame)
+        wall, cpu = time.perf_counter(), time.process_time()
+        cpu_children = _children_cpu() if main else None
+        try:
+            yield
+        finally:
+            wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+            if cpu_children is not None:
+                cpu_children = _children_cpu() - cpu_children
+            stack.pop()
+            peak = max(frame['peak'], _read_hwm() or 0)
+            if main and len(stack) > 0:
+                stack[-1]['peak'] = max(stack[-1]['peak'], peak)
+            record = dict(stage=name, path='/'.join([s['name'] for s in stack] + [name]),
+                          labels=_labels, wall=wall, cpu=cpu, cpu_children=cpu_children,
+                          peak_rss=peak/1024**2 if main and peak > 0 else None)
+            with self._lock:
+                self.records.append(record)
+
+    def summary(self):
+        """
+        Summarize the records by stage.
+
+        Stages called within a stage with the same name (e.g., a
+        subclass method that calls the method of its parent) are only
+        counted once.
+
+        Returns:
+            :obj:`dict`: The number of calls, total wall time, total CPU
+            time of the process and of its child processes, and maximum
+            peak memory of each stage.
+        """
+        summary = {}
+        for r in self.records:
+            if r['stage'] in r['path'].split('/')[:-1]:
+                continue
+            if r['stage'] not in summary:
+                summary[r['stage']] = dict(ncalls=0, wall=0., cpu=0., cpu_children=0.,
+                                           peak_rss=None)
+            s = summary[r['stage']]
+            s['ncalls'] += 1
+            s['wall'] += r['wall']
+            s['cpu'] += r['cpu']
+            s['cpu_children'] += r['cpu_children'] or 0.
+            if r['peak_rss'] is not None:
+                s['peak_rss'] = r['peak_rss'] if s['peak_rss'] is None \
+                                    else max(s['peak_rss'], r['peak_rss'])
+        return summary
+
+    def report(self):
+        """Print the summary of the recorded stages."""
+        if not self.enabled or len(self.records) == 0:
+            return
+        summary = self.summary()
+        dash = '-'*82
+        lines = [dash, '{0:<40s}{1:>6s}{2:>9s}{3:>9s}{4:>10s}{5:>8s}'.format(
+                        'Stage', 'Calls', 'Wall (s)', 'CPU (s)', 'Child (s)', 'RSS (MB)'), dash]
+        for name in sorted(summary, key=lambda k: summary[k]['wall'], reverse=True):
+            s = summary[name]
+            rss = '' if s['peak_rss'] is None else '{0:.0f}'.format(s['peak_rss'])
+            lines += ['{0:<40s}{1:>6d}{2:>9.2f}{3:>9.2f}{4:>10.2f}{5:>8s}'.format(
+                        name[:39], s['ncalls'], s['wall'], s['cpu'], s['cpu_children'], rss)]
+        msgs.info('Time and memory used by each stage:' + msgs.newline()
+                  + msgs.newline().join(lines + [dash]))
+
+    def write(self, ofile):
+        """
+        Write the records and their summary to a JSON file.
+
+        Args:
+            ofile (:obj:`str`):
+                Output file name.
+        """
+        if not self.enabled:
+            return
+        odir = os.path.dirname(ofile)
+        if odir != '' and not os.path.isdir(odir):
+            os.makedirs(odir)
+        with open(ofile, 'w') as f:
+            json.dump(dict(stages=self.records, summary=self.summary()), f, indent=1,
+                      default=str)
+        msgs.info('Wrote the time and memory used by each stage to {0}'.format(ofile))
+
+
+profiler = StageProfiler()
+"""
+The profiler used for the reduction.
+"""
+
+
+def stage(name):
+    """
+    Decorator that records each call of a function as a stage of
+    :attr:`profiler`.
+
+    Args:
+        name (:obj:`str`):
+            Name of the stage.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not profiler.enabled:
+                return func(*args, **kwargs)
+            with profiler.stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
@@ -12,7 +12,10 @@ import copy
 from astropy.io import fits
 from astropy.table import Table
 from pypeit import msgs
+from pypeit import io
+from pypeit import profiling
 from pypeit import calibrations
+from pypeit import masterframe
 from pypeit.images import buildimage
 from pypeit.display import display
 from pypeit import reduce
@@ -27,8 +30,6 @@ from pypeit.par.util import parse_pypeit_file
 from pypeit.par import PypeItPar
 from pypeit.metadata import PypeItMetaData
 
-from IPython import embed
-
 class PypeIt(object):
     """
     This class runs the primary calibration and extraction in PypeIt
@@ -120,6 +121,19 @@ class PypeIt(object):
         if redux_path is not None:
             self.par['rdx']['redux_path'] = redux_path
 
+        # Set the memory limit for the raw-file cache
+        io.raw_file_cache.set_limit(self.par['rdx']['raw_cache_size'])
+        # Set the compression of the output files
+        io.background_writer.set_compression(compression=self.par['rdx']['output_compression'],
+                                             quantize_level=self.par['rdx']['quantize_level'],
+                                             nthreads=self.par['rdx']['gzip_nthreads'])
+        # Set the number of output files that can wait to be written
+        io.background_writer.set_limit(self.par['rdx']['write_queue_size'])
+        # Set the memory limit for the master-frame cache
+        masterframe.master_cache.set_limit(self.par['rdx']['master_cache_size'])
+        # Record the time and memory used by the reduction stages
+        profiling.profiler.reset(enabled=self.par['rdx']['perf_report'])
+
         # TODO: Write the full parameter set here?
         # --------------------------------------------------------------
 
@@ -217,7 +231,9 @@ class PypeIt(object):
         Returns:
             bool: True if the 2d file exists, False if it does not exist
         """
-        return os.path.isfile(self.spec_output_file(frame, twod=True))
+        outfile = self.spec_output_file(frame, twod=True)
+        io.background_writer.wait(outfile)
+        return os.path.isfile(outfile)
 
     def get_std_outfile(self, standard_frames):
         """
@@ -242,6 +258,9 @@ class PypeIt(object):
         if std_frame is not None:
             std_outfile = self.spec_output_file(std_frame) \
                             if isinstance(std_frame, (int,np.integer)) else None
+        if std_outfile is not None:
+            # The standard may still be waiting to be written
+            io.background_writer.wait(std_outfile)
         if std_outfile is not None and not os.path.isfile(std_outfile):
             msgs.error('Could not find standard file: {0}'.format(std_outfile))
         return std_outfile
@@ -267,19 +286,24 @@ class PypeIt(object):
             # Find the detectors to reduce
             detectors = PypeIt.select_detectors(detnum=self.par['rdx']['detnum'],
                                             ndet=self.spectrograph.ndet)
+            # Read all the detectors from each raw file at once
+            io.raw_file_cache.detectors = detectors
             # Loop on Detectors
             for self.det in detectors:
-                # Instantiate Calibrations class
-                self.caliBrate = calibrations.Calibrations.get_instance(
-                    self.fitstbl, self.par['calibrations'], self.spectrograph,
-                    self.calibrations_path, qadir=self.qa_path, reuse_masters=self.reuse_masters,
-                    show=self.show, slitspat_num=self.par['rdx']['slitspatnum'])
-                # Do it
-                self.caliBrate.set_config(grp_frames[0], self.det, self.par['calibrations'])
-                self.caliBrate.run_the_steps()
+                with profiling.profiler.stage('calibrations', calib_group=i, det=self.det):
+                    # Instantiate Calibrations class
+                    self.caliBrate = calibrations.Calibrations.get_instance(
+                        self.fitstbl, self.par['calibrations'], self.spectrograph,
+                        self.calibrations_path, qadir=self.qa_path,
+                        reuse_masters=self.reuse_masters, show=self.show,
+                        slitspat_num=self.par['rdx']['slitspatnum'])
+                    # Do it
+                    self.caliBrate.set_config(grp_frames[0], self.det, self.par['calibrations'])
+                    self.caliBrate.run_the_steps()
 
         # Finish
         self.print_end_time()
+        io.raw_file_cache.clear()
 
     def reduce_all(self):
         """
@@ -319,7 +343,9 @@ class PypeIt(object):
                 if not self.outfile_exists(frames[0]) or self.overwrite:
                     std_spec2d, std_sobjs = self.reduce_exposure(frames, bg_frames=bg_frames)
                     # TODO come up with sensible naming convention for save_exposure for combined files
-                    self.save_exposure(frames[0], std_spec2d, std_sobjs, self.basename)
+                    with profiling.profiler.stage('save_exposure',
+                                                  frame=self.fitstbl['filename'][frames[0]]):
+                        self.save_exposure(frames[0], std_spec2d, std_sobjs, self.basename)
                 else:
                     msgs.info('Output file: {:s} already exists'.format(self.fitstbl.construct_basename(frames[0])) +
                               '. Set overwrite=True to recreate and overwrite.')
@@ -352,7 +378,9 @@ class PypeIt(object):
                                                     std_outfile=std_outfile)
                     science_basename[j] = self.basename
                     # TODO come up with sensible naming convention for save_exposure for combined files
-                    self.save_exposure(frames[0], sci_spec2d, sci_sobjs, self.basename)
+                    with profiling.profiler.stage('save_exposure',
+                                                  frame=self.fitstbl['filename'][frames[0]]):
+                        self.save_exposure(frames[0], sci_spec2d, sci_sobjs, self.basename)
                 else:
                     msgs.warn('Output file: {:s} already exists'.format(self.fitstbl.construct_basename(frames[0])) +
                               '. Set overwrite=True to recreate and overwrite.')
@@ -361,6 +389,7 @@ class PypeIt(object):
 
         # Finish
         self.print_end_time()
+        io.raw_file_cache.clear()
 
     # This is a static method to allow for use in coadding script 
     @staticmethod
@@ -455,24 +484,32 @@ class PypeIt(object):
             msgs.warn('Not reducing detectors: {0}'.format(' '.join([ str(d) for d in 
                                 set(np.arange(self.spectrograph.ndet))-set(detectors)])))
 
+        # Read all the detectors from each raw file at once
+        io.raw_file_cache.detectors = detectors
+
         # Loop on Detectors
         # TODO: Attempt to put in a multiprocessing call here?
         for self.det in detectors:
             msgs.info("Working on detector {0}".format(self.det))
-            # Instantiate Calibrations class
-            self.caliBrate = calibrations.Calibrations.get_instance(
-                self.fitstbl, self.par['calibrations'], self.spectrograph,
-                self.calibrations_path, qadir=self.qa_path, reuse_masters=self.reuse_masters,
-                show=self.show, slitspat_num=self.par['rdx']['slitspatnum'])
-            # These need to be separate to accomodate COADD2D
-            self.caliBrate.set_config(frames[0], self.det, self.par['calibrations'])
-            self.caliBrate.run_the_steps()
+            with profiling.profiler.stage('calibrations', frame=self.fitstbl['filename'][frames[0]],
+                                          det=self.det):
+                # Instantiate Calibrations class
+                self.caliBrate = calibrations.Calibrations.get_instance(
+                    self.fitstbl, self.par['calibrations'], self.spectrograph,
+                    self.calibrations_path, qadir=self.qa_path,
+                    reuse_masters=self.reuse_masters, show=self.show,
+                    slitspat_num=self.par['rdx']['slitspatnum'])
+                # These need to be separate to accomodate COADD2D
+                self.caliBrate.set_config(frames[0], self.det, self.par['calibrations'])
+                self.caliBrate.run_the_steps()
             # Extract
             # TODO: pass back the background frame, pass in background
             # files as an argument. extract one takes a file list as an
             # argument and instantiates science within
-            all_spec2d[self.det], tmp_sobjs \
-                    = self.reduce_one(frames, self.det, bg_frames, std_outfile=std_outfile)
+            with profiling.profiler.stage('reduce_one', frame=self.fitstbl['filename'][frames[0]],
+                                          det=self.det):
+                all_spec2d[self.det], tmp_sobjs \
+                        = self.reduce_one(frames, self.det, bg_frames, std_outfile=std_outfile)
             # Hold em
             if tmp_sobjs.nobj > 0:
                 all_specobjs.add_sobj(tmp_sobjs)
@@ -745,7 +782,14 @@ class PypeIt(object):
     def print_end_time(self):
         """
         Print the elapsed time
+
+        This first waits for all queued output files to be written.  If
+        the ``perf_report`` parameter is set, this also reports the time
+        and memory used by each reduction stage and writes them to
+        ``<root>_perf.json`` in the QA directory, where ``<root>`` is
+        the root name of the pypeit file.
         """
+        io.background_writer.flush()
         # Capture the end time and print it to user
         tend = time.time()
         codetime = tend-self.tstart
@@ -760,6 +804,15 @@ class PypeIt(object):
             mns = int(60.0*(codetime/3600.0 - hrs))
             scs = codetime - 60.0*mns - 3600.0*hrs
             msgs.info('Execution time: {0:d}h {1:d}m {2:.2f}s'.format(hrs, mns, scs))
+        io.raw_file_cache.report()
+        # Stop reading detectors ahead and restore the default output
+        # compression for later reductions
+        io.raw_file_cache.reset_detectors()
+        io.background_writer.set_compression()
+        masterframe.master_cache.report()
+        profiling.profiler.report()
+        profiling.profiler.write(os.path.join(self.qa_path, '{0}_perf.json'.format(
+                                    os.path.splitext(os.path.basename(self.pypeit_file))[0])))
 
     # TODO: Move this to fitstbl?
     def show_science(self):
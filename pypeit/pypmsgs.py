@@ -12,10 +12,6 @@ import glob
 import textwrap
 import inspect
 
-# Imported for versioning
-import scipy
-import numpy
-import astropy
 import pypeit
 
 from pypeit.core.qa import close_qa
@@ -125,6 +121,11 @@ class Messages:
         if log is None:
             return
 
+        # Imported for versioning
+        import scipy
+        import numpy
+        import astropy
+
         # Initialize the log
         self._log = open(log, 'w')
 
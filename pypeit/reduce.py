@@ -13,22 +13,18 @@ import os
 from astropy import stats
 from abc import ABCMeta
 
-from linetools import utils as ltu
 from scipy import interpolate
 from scipy.optimize import least_squares
 
 from pypeit import specobjs
 from pypeit import msgs, utils
+from pypeit import profiling
 from pypeit import masterframe, flatfield
 from pypeit.display import display
 from pypeit.core import skysub, extract, pixels, wave, flexure, flat
 from pypeit.images import buildimage
 from pypeit.core.moment import moment1d
 
-from linetools.spectra import xspectrum1d
-
-from IPython import embed
-
 
 class Reduce(object):
     """
@@ -455,6 +451,7 @@ class Reduce(object):
         return self.skymodel, self.objmodel, self.ivarmodel, self.outmask, self.sobjs, \
                self.scaleimg, self.waveimg, self.tilts
 
+    @profiling.stage('Reduce.find_objects')
     def find_objects(self, image, std_trace=None,
                      show_peaks=False, show_fits=False,
                      show_trace=False, show=False, manual_extract_dict=None,
@@ -527,6 +524,7 @@ class Reduce(object):
          """
         return None, None, None
 
+    @profiling.stage('Reduce.global_skysub')
     def global_skysub(self, skymask=None, update_crmask=True, trim_edg=(3,3),
                       show_fit=False, show=False, show_objs=False):
         """
@@ -605,6 +603,7 @@ class Reduce(object):
         # Return
         return self.global_sky
 
+    @profiling.stage('Reduce.local_skysub_extract')
     def local_skysub_extract(self, global_sky, sobjs,
                              model_noise=True, spat_pix=None,
                              show_profile=False, show_resids=False, show=False):
@@ -675,6 +674,7 @@ class Reduce(object):
                 usersky = True
         return skymask_init, usersky
 
+    @profiling.stage('Reduce.spec_flexure_correct')
     def spec_flexure_correct(self, mode="local", sobjs=None):
         """ Correct for spectral flexure
 
@@ -698,6 +698,7 @@ class Reduce(object):
 
             # Prepare a list of slit spectra, if required.
             if mode == "global":
+                from linetools.spectra import xspectrum1d
                 gd_slits = np.logical_not(self.reduce_bpm)
                 # TODO :: Need to think about spatial flexure - is the appropriate spatial flexure already included in trace_spat via left/right slits?
                 trace_spat = 0.5 * (self.slits_left + self.slits_right)
@@ -781,6 +782,7 @@ class Reduce(object):
                 Spectrally extracted objects
 
         """
+        from linetools import utils as ltu
         radec = ltu.radec_to_coord((ra, dec))
         # Correct Telescope's motion
         refframe = self.par['calibrations']['wavelengths']['refframe']
@@ -1046,6 +1048,7 @@ class MultiSlitReduce(Reduce):
 
     # JFH TODO Should we reduce the number of iterations for standards or near-IR redux where the noise model is not
     # being updated?
+    @profiling.stage('Reduce.local_skysub_extract')
     def local_skysub_extract(self, global_sky, sobjs, spat_pix=None, model_noise=True, show_resids=False,
                              show_profile=False, show=False):
         """
@@ -1250,6 +1253,7 @@ class EchelleReduce(Reduce):
 
     # JFH TODO Should we reduce the number of iterations for standards or near-IR redux where the noise model is not
     # being updated?
+    @profiling.stage('Reduce.local_skysub_extract')
     def local_skysub_extract(self, global_sky, sobjs,
                              spat_pix=None, model_noise=True, min_snr=2.0, fit_fwhm=False,
                              show_profile=False, show_resids=False, show_fwhm=False, show=False):
@@ -1280,6 +1284,7 @@ class EchelleReduce(Reduce):
         sigrej = self.par['reduce']['skysub']['sky_sigrej']
         sn_gauss = self.par['reduce']['extraction']['sn_gauss']
         model_full_slit = self.par['reduce']['extraction']['model_full_slit']
+        nproc = self.par['reduce']['extraction']['nproc']
 
         self.skymodel, self.objmodel, self.ivarmodel, self.outmask, self.sobjs \
                 = skysub.ech_local_skysub_extract(self.sciImg.image, self.sciImg.ivar,
@@ -1295,7 +1300,8 @@ class EchelleReduce(Reduce):
                                                   model_full_slit=model_full_slit,
                                                   model_noise=model_noise,
                                                   show_profile=show_profile,
-                                                  show_resids=show_resids, show_fwhm=show_fwhm)
+                                                  show_resids=show_resids, show_fwhm=show_fwhm,
+                                                  nproc=nproc)
 
         # Step
         self.steps.append(inspect.stack()[0][3])
@@ -1529,6 +1535,7 @@ class IFUReduce(MultiSlitReduce, Reduce):
             self.show('global', slits=True, sobjs=sobjs_show, clear=False)
         return self.global_sky
 
+    @profiling.stage('Reduce.global_skysub')
     def global_skysub(self, skymask=None, update_crmask=True, trim_edg=(0,0),
                       show_fit=False, show=False, show_objs=False):
         """
@@ -1569,6 +1576,7 @@ class IFUReduce(MultiSlitReduce, Reduce):
 
         debug = False
         if debug:
+            from IPython import embed
             embed()
             wavefull = np.linspace(3950, 4450, 10000)
             import matplotlib.pylab as pl
@@ -14,8 +14,6 @@ from pypeit.par import pypeitpar
 from pypeit.spectrographs.util import load_spectrograph
 from astropy.io import fits
 
-from IPython import embed
-
 # TODO JFH: Put this SmartFormatter in a common place, like pypeit.pypmsgs
 
 # A trick from stackoverflow to allow multi-line output in the help:
@@ -103,6 +101,10 @@ def read_coaddfile(ifile):
 
 def coadd1d_filelist(files, outroot, det, debug=False, show=False):
     """
+    Coadd all the objects synced across a set of spec1d files.
+
+    Each spec1d file is read only once; see
+    :func:`pypeit.coadd1d.batch_coadd1d`.
 
     Args:
         files:
@@ -127,22 +129,12 @@ def coadd1d_filelist(files, outroot, det, debug=False, show=False):
     par['coadd1d']['flux_value'] = False
 
     sensfile = None
-    outfiles = []
-    # Loop on entries
-    for key in sync_dict:
-
-        coaddfile = outroot+'-SPAT{:04d}-DET{:02d}'.format(key, det)+'.fits'
-
-        coAdd1d = coadd1d.CoAdd1D.get_instance(sync_dict[key]['files'],
-                                               sync_dict[key]['names'],
-                                               spectrograph=spectrograph, par=par['coadd1d'],
-                                               sensfile=sensfile, debug=debug, show=show)
-        # Run
-        coAdd1d.run()
-        # Save to file
-        coAdd1d.save(coaddfile)
-        outfiles.append(coaddfile)
-    
+    # One group per synced object
+    groups = [(sync_dict[key]['files'], sync_dict[key]['names']) for key in sync_dict]
+    outfiles = [outroot+'-SPAT{:04d}-DET{:02d}'.format(key, det)+'.fits' for key in sync_dict]
+    # Coadd, reading each file only once
+    coadd1d.batch_coadd1d(groups, outfiles, spectrograph=spectrograph, par=par['coadd1d'],
+                          sensfile=sensfile, debug=debug, show=show)
     return outfiles
 
 
@@ -175,6 +167,19 @@ def parse_args(options=None, return_parser=False):
                              "That is the coadd1d block must either be a two column list of spec1dfiles and objids,\n"
                              "or you can specify a single objid for all spec1dfiles on the first line\n"
                              "\n"
+                             "To coadd many objects at once, give a comma-separated list of objids\n"
+                             "(no spaces) on each line, e.g.\n"
+                             "\n"
+                             "  coadd1d read\n"
+                             "     spec1dfile1 objidA1,objidB1\n"
+                             "     spec1dfile2 objidA2,objidB2\n"
+                             "  coadd1d end\n"
+                             "\n"
+                             "The n-th objid on each line defines the n-th coadd, and each spec1dfile\n"
+                             "is read only once.  The coadd of each object is written to the coaddfile\n"
+                             "with the objid of the first spec1dfile appended, e.g.\n"
+                             "output_filename-objidA1.fits\n"
+                             "\n"
                              "Where: \n"
                              "\n"
                              "   spec1dfile -- full path to a PypeIt spec1dfile\n"
@@ -185,6 +190,8 @@ def parse_args(options=None, return_parser=False):
     parser.add_argument("--show", default=False, action="store_true", help="show QA during coadding process")
     parser.add_argument("--par_outfile", default='coadd1d.par', action="store_true", help="Output to save the parameters")
     parser.add_argument("--test_spec_path", type=str, help="Path for testing")
+    parser.add_argument("--nproc", type=int, default=1,
+                        help="Number of processes used to coadd multiple objects")
 #    parser.add_argument("--plot", default=False, action="store_true", help="Show the sensitivity function?")
 
     if return_parser:
@@ -232,14 +239,27 @@ def main(args):
     if spectrograph.pypeline == 'Echelle' and sensfile is None:
         msgs.error('You must specify set the sensfuncfile in the .coadd1d file for Echelle coadds')
 
-    # Instantiate
-    coAdd1d = coadd1d.CoAdd1D.get_instance(spec1dfiles, objids,
-                                           spectrograph=spectrograph, par=par['coadd1d'],
-                                           sensfile=sensfile,
-                                           debug=args.debug, show=args.show)
-    # Run
-    coAdd1d.run()
-    # Save to file
-    coAdd1d.save(coaddfile)
+    # Groups of objects
+    objid_groups = [objid.split(',') for objid in objids]
+    ngroups = len(objid_groups[0])
+    if np.any([len(o) != ngroups for o in objid_groups]):
+        msgs.error('The same number of objids must be provided for each spec1dfile.')
+
+    if ngroups == 1:
+        # Instantiate
+        coAdd1d = coadd1d.CoAdd1D.get_instance(spec1dfiles, objids,
+                                               spectrograph=spectrograph, par=par['coadd1d'],
+                                               sensfile=sensfile,
+                                               debug=args.debug, show=args.show)
+        # Run
+        coAdd1d.run()
+        # Save to file
+        coAdd1d.save(coaddfile)
+    else:
+        groups = [(spec1dfiles, [o[i] for o in objid_groups]) for i in range(ngroups)]
+        root, ext = os.path.splitext(coaddfile)
+        coaddfiles = ['{0}-{1}{2}'.format(root, group[1][0], ext) for group in groups]
+        coadd1d.batch_coadd1d(groups, coaddfiles, spectrograph=spectrograph, par=par['coadd1d'],
+                              sensfile=sensfile, nproc=args.nproc, debug=args.debug, show=args.show)
     msgs.info('Coadding complete')
 
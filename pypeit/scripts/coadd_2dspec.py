@@ -21,8 +21,6 @@ from pypeit.spectrographs.util import load_spectrograph
 from pypeit import specobjs
 from pypeit import spec2dobj
 
-from IPython import embed
-
 
 def parse_args(options=None, return_parser=False):
 
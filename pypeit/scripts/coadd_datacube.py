@@ -24,8 +24,6 @@ from pypeit.core.flux_calib import load_extinction_data, extinction_correction
 from pypeit.core.flexure import calculate_image_offset
 from pypeit.core import parse
 
-from IPython import embed
-
 
 def parse_args(options=None, return_parser=False):
 
@@ -13,8 +13,6 @@ from pypeit.par import pypeitpar
 from pypeit.spectrographs.util import load_spectrograph
 from astropy.io import fits
 
-from IPython import embed
-
 
 
 # A trick from stackoverflow to allow multi-line output in the help:
@@ -2,7 +2,6 @@
 """
 Wrapper to the linetools XSpecGUI
 """
-from IPython import embed
 
 def parse_args(options=None, return_parser=False):
     import argparse
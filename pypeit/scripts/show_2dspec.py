@@ -11,8 +11,6 @@ import os
 
 import numpy as np
 
-from IPython import embed
-
 from astropy.io import fits
 from astropy.stats import sigma_clipped_stats
 
@@ -80,7 +78,7 @@ def main(args):
         return
 
     # Load it up -- NOTE WE ALLOW *OLD* VERSIONS TO GO FORTH
-    spec2DObj = spec2dobj.Spec2DObj.from_file(args.file, args.det, chk_version=False)
+    spec2DObj = spec2dobj.Spec2DObj.from_file(args.file, args.det, chk_version=False, lazy=True)
 
     # Setup for PypeIt imports
     msgs.reset(verbosity=2)
@@ -114,7 +112,7 @@ def main(args):
     if args.file[-2:] == 'gz':
         spec1d_file = spec1d_file[:-3]
     if os.path.isfile(spec1d_file):
-        sobjs = specobjs.SpecObjs.from_fitsfile(spec1d_file)
+        sobjs = specobjs.SpecObjs.from_fitsfile(spec1d_file, det=args.det)
     else:
         sobjs = None
         msgs.warn('Could not find spec1d file: {:s}'.format(spec1d_file) + msgs.newline() +
@@ -193,6 +191,7 @@ def main(args):
     shell.call_global_plugin_method('WCSMatch', 'set_reference_channel', [channel_names[-1]], {})
 
     if args.embed:
+        from IPython import embed
         embed()
 
         # Playing with some mask stuff
@@ -7,8 +7,6 @@ Implements the objects used to hold slit edge data.
 """
 import inspect
 
-from IPython import embed
-
 import numpy as np
 
 from astropy.table import Table
@@ -276,7 +274,7 @@ class SlitTraceSet(datamodel.DataContainer):
             return bndl
 
     @classmethod
-    def _parse(cls, hdu, hdu_prefix=None):
+    def _parse(cls, hdu, hdu_prefix=None, lazy=False):
         """
         Parse the data that was previously written to a fits file.
 
@@ -285,10 +283,10 @@ class SlitTraceSet(datamodel.DataContainer):
         """
         try:
             return super(SlitTraceSet, cls)._parse(hdu, ext=['SLITS', 'MASKDEF_DESIGNTAB'],
-                                                   transpose_table_arrays=True)
+                                                   transpose_table_arrays=True, lazy=lazy)
         except KeyError:
             return super(SlitTraceSet, cls)._parse(hdu, ext='SLITS',
-                                                   transpose_table_arrays=True)
+                                                   transpose_table_arrays=True, lazy=lazy)
 
     def init_tweaked(self):
         """
@@ -8,7 +8,6 @@ Module for the Spec2DObj class
 import os
 import inspect
 import datetime
-from IPython import embed
 
 import numpy as np
 
@@ -92,7 +91,7 @@ class Spec2DObj(datamodel.DataContainer):
                  'det': dict(otype=int, descr='Detector index')}
 
     @classmethod
-    def from_file(cls, file, det, chk_version=True):
+    def from_file(cls, file, det, chk_version=True, lazy=False):
         """
         Overload :func:`pypeit.datamodel.DataContainer.from_file` to allow det
         input and to slurp the header
@@ -102,6 +101,9 @@ class Spec2DObj(datamodel.DataContainer):
             det (:obj:`int`):
             chk_version (:obj:`bool`):
                 If False, allow a mismatch in datamodel to proceed
+            lazy (:obj:`bool`, optional):
+                Only read the images when they are accessed.  See
+                :func:`pypeit.datamodel.DataContainer._parse`.
 
         Returns:
             `Spec2DObj`:
@@ -112,8 +114,11 @@ class Spec2DObj(datamodel.DataContainer):
         if not np.any(['DET{:02d}'.format(det) in hdu.name for hdu in hdul]):
             msgs.error("Requested detector {} is not in this file - {}".format(det, file))
         #
-        slf = super(Spec2DObj, cls).from_hdu(hdul, hdu_prefix=spec2d_hdu_prefix(det), chk_version=chk_version)
+        slf = super(Spec2DObj, cls).from_hdu(hdul, hdu_prefix=spec2d_hdu_prefix(det),
+                                             chk_version=chk_version, lazy=lazy)
         slf.head0 = hdul[0].header
+        if lazy:
+            datamodel.close_when_loaded(hdul, slf)
         return slf
 
     def __init__(self, det, sciimg, ivarraw, skymodel, objmodel, ivarmodel,
@@ -248,7 +253,7 @@ class AllSpec2DObj(object):
     """
     hdr_prefix = 'ALLSPEC2D_'
     @classmethod
-    def from_fits(cls, filename, chk_version=True):
+    def from_fits(cls, filename, chk_version=True, dets=None, lazy=False):
         """
 
         Args:
@@ -256,6 +261,12 @@ class AllSpec2DObj(object):
             chk_version (bool, optional):
                 If True, demand the on-disk datamodel equals the current
                 Passed to from_hdu() of DataContainer
+            dets (:obj:`int`, :obj:`list`, optional):
+                One or more detectors to read.  If None, all the
+                detectors in the file are read.
+            lazy (:obj:`bool`, optional):
+                Only read the images when they are accessed.  See
+                :func:`pypeit.datamodel.DataContainer._parse`.
 
         Returns:
             :class:`AllSpec2DObj`:
@@ -271,12 +282,21 @@ class AllSpec2DObj(object):
             if slf.hdr_prefix in key:
                 slf['meta'][key.split(slf.hdr_prefix)[-1]] = hdul[0].header[key]
         # Detectors included
-        detectors = hdul[0].header[slf.hdr_prefix+'DETS']
-        for det in [int(item) for item in detectors.split(',')]:
-            obj = Spec2DObj.from_hdu(hdul, hdu_prefix=spec2d_hdu_prefix(det), chk_version=chk_version)
+        detectors = [int(item) for item in str(hdul[0].header[slf.hdr_prefix+'DETS']).split(',')]
+        if dets is not None:
+            _dets = np.atleast_1d(dets).tolist()
+            if not np.all(np.isin(_dets, detectors)):
+                msgs.error('Requested detector(s) {0} not in {1}; detectors in the file '
+                           'are {2}.'.format(_dets, filename, detectors))
+            detectors = _dets
+        for det in detectors:
+            obj = Spec2DObj.from_hdu(hdul, hdu_prefix=spec2d_hdu_prefix(det),
+                                     chk_version=chk_version, lazy=lazy)
             slf[det] = obj
         # Header
         slf['meta']['head0'] = hdul[0].header
+        if lazy:
+            datamodel.close_when_loaded(hdul, *[slf[det] for det in detectors])
         return slf
 
     def __init__(self):
@@ -414,6 +434,8 @@ class AllSpec2DObj(object):
             overwrite (bool, optional):
 
         """
+        # Finish any queued write of this file
+        io.background_writer.wait(outfile)
         if os.path.isfile(outfile):
             if not overwrite:
                 msgs.warn("File {} exits.  Use -o to overwrite.".format(outfile))
@@ -459,9 +481,11 @@ class AllSpec2DObj(object):
         prihdu.header[self.hdr_prefix+'DETS'] = detectors
 
         # Finish
-        hdulist = fits.HDUList(hdus)
-        hdulist.writeto(outfile, overwrite=overwrite)
-        msgs.info("Wrote: {:s}".format(outfile))
+        # Write, applying any requested compression (see
+        # io.BackgroundWriter.set_compression), using the background
+        # writer, if enabled
+        io.write_to_fits(fits.HDUList(hdus), outfile, overwrite=overwrite, checksum=False,
+                         background=True)
 
     def __repr__(self):
         # Generate sets string
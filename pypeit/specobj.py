@@ -7,7 +7,6 @@ Module for the SpecObj classes
 """
 import copy
 import inspect
-from IPython import embed
 
 import numpy as np
 
@@ -15,8 +14,6 @@ from scipy import interpolate
 
 from astropy import units
 
-from linetools.spectra import xspectrum1d
-
 from pypeit import msgs
 from pypeit.core import flexure
 from pypeit.core import parse
@@ -384,6 +381,7 @@ class SpecObj(datamodel.DataContainer):
                           msgs.newline() + "{0:s}".format(str(self.NAME)))
                 self[attr+'_WAVE'] = flexure.flexure_interp(shift, self[attr+'_WAVE']).copy()
         # Shift sky spec too
+        from linetools.spectra import xspectrum1d
         twave = flexure.flexure_interp(shift, sky_spec.wavelength.value) * units.AA
         new_sky = xspectrum1d.XSpectrum1D.from_tuple((twave, sky_spec.flux))
         # Save - since flexure may have been applied/calculated twice, this needs to be additive
@@ -552,5 +550,6 @@ class SpecObj(datamodel.DataContainer):
         wave, flux, ivar, _ = self.to_arrays(**kwargs)
         sig = np.sqrt(utils.inverse(ivar))
         # Create
+        from linetools.spectra import xspectrum1d
         return xspectrum1d.XSpectrum1D.from_tuple((wave, flux, sig))
 
@@ -21,8 +21,6 @@ from pypeit.core import parse
 from pypeit.images import detector_container
 from pypeit import slittrace
 
-from IPython import embed
-
 
 class SpecObjs:
     """
@@ -46,16 +44,25 @@ class SpecObjs:
     version = '1.0.0'
 
     @classmethod
-    def from_fitsfile(cls, fits_file, det=None, chk_version=True):
+    def from_fitsfile(cls, fits_file, det=None, names=None, chk_version=True):
         """
         Instantiate from a FITS file
 
         Also tag on the Header
 
+        Objects are selected using only the header of each extension
+        (see :func:`index`), such that the data are only read and parsed
+        for the selected objects.  Extensions with headers lacking the
+        relevant keywords are always parsed and then selected.
+
         Args:
             fits_file (str):
             det (int, optional):
                 Only load SpecObj matching this det value
+            names (:obj:`str`, :obj:`list`, optional):
+                Only load the SpecObj with these names.  Names are
+                matched to either the ``NAME`` or ``ECH_NAME`` of each
+                object; see :func:`name_indices`.
             chk_version (:obj:`bool`):
                 If False, allow a mismatch in datamodel to proceed
 
@@ -63,6 +70,7 @@ class SpecObjs:
             specobsj.SpecObjs
 
         """
+        _names = None if names is None else np.atleast_1d(names)
         # HDUList
         hdul = io.fits_open(fits_file)
         # Init
@@ -80,10 +88,20 @@ class SpecObjs:
         for hdu in hdul[1:]:
             if 'DETECTOR' in hdu.name:
                 continue
+            # Skip objects based on the header, when possible
+            if det is not None and 'DET' in hdu.header and hdu.header['DET'] != det:
+                continue
+            if _names is not None:
+                hdr_names = [hdu.header[key] for key in ['NAME', 'ECH_NAME'] if key in hdu.header]
+                if len(hdr_names) > 0 and not np.any(np.isin(hdr_names, _names)):
+                    continue
             sobj = specobj.SpecObj.from_hdu(hdu, chk_version=chk_version)
             # Restrict on det?
             if det is not None and sobj.DET != det:
                 continue
+            # Restrict on name?
+            if _names is not None and sobj.NAME not in _names and sobj.ECH_NAME not in _names:
+                continue
             # Check for detector
             if sobj.DET in detector_hdus.keys():
                 sobj.DETECTOR = detector_hdus[sobj.DET]
@@ -93,6 +111,36 @@ class SpecObjs:
         hdul.close()
         return slf
 
+    @staticmethod
+    def index(fits_file):
+        """
+        Construct an index of the objects in a spec1d file.
+
+        The index is constructed using only the extension headers, such
+        that none of the spectra are read.
+
+        Args:
+            fits_file (:obj:`str`):
+                spec1d file
+
+        Returns:
+            `astropy.table.Table`_: Table with the extension number
+            (``HDU``), and the ``NAME``, ``ECH_NAME``, ``DET``,
+            ``SLITID``, and ``OBJID`` of each object.  Missing values
+            are set to an empty string or -1.
+        """
+        index = dict(HDU=[], NAME=[], ECH_NAME=[], DET=[], SLITID=[], OBJID=[])
+        with io.fits_open(fits_file) as hdul:
+            for i, hdu in enumerate(hdul):
+                if i == 0 or 'DETECTOR' in hdu.name:
+                    continue
+                index['HDU'] += [i]
+                for key in ['NAME', 'ECH_NAME']:
+                    index[key] += [hdu.header[key] if key in hdu.header else '']
+                for key in ['DET', 'SLITID', 'OBJID']:
+                    index[key] += [hdu.header[key] if key in hdu.header else -1]
+        return Table(index)
+
     def __init__(self, specobjs=None, header=None):
 
         # Only two attributes are allowed for this Object -- specobjs, header
@@ -538,6 +586,8 @@ class SpecObjs:
               the indicated detectors.  Useful for re-running on a subset of detectors
 
         """
+        # Finish any queued write of this file
+        io.background_writer.wait(outfile)
         if os.path.isfile(outfile) and (not overwrite):
             msgs.warn("Outfile exists.  Set overwrite=True to clobber it")
             return
@@ -630,8 +680,8 @@ class SpecObjs:
         hdulist = fits.HDUList(hdus)
         if debug:
             import pdb; pdb.set_trace()
-        hdulist.writeto(outfile, overwrite=overwrite)
-        msgs.info("Wrote 1D spectra to {:s}".format(outfile))
+        # Use the background writer, if enabled
+        io.write_to_fits(hdulist, outfile, overwrite=overwrite, checksum=False, background=True)
         return
 
     def write_info(self, outfile, pypeline):
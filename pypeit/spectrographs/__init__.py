@@ -1,37 +1,99 @@
+"""
+Spectrograph modules.
 
-from pypeit.spectrographs import spectrograph
-
-# The import of all the spectrograph modules here is what enables the dynamic
-# compiling of all the available spectrographs below
-from pypeit.spectrographs import gemini_flamingos
-from pypeit.spectrographs import gemini_gmos
-from pypeit.spectrographs import gemini_gnirs
-from pypeit.spectrographs import keck_deimos
-from pypeit.spectrographs import keck_hires
-from pypeit.spectrographs import keck_kcwi
-from pypeit.spectrographs import keck_lris
-from pypeit.spectrographs import keck_mosfire
-from pypeit.spectrographs import keck_nires
-from pypeit.spectrographs import keck_nirspec
-from pypeit.spectrographs import lbt_luci
-from pypeit.spectrographs import lbt_mods
-from pypeit.spectrographs import magellan_fire
-from pypeit.spectrographs import magellan_mage
-from pypeit.spectrographs import mdm_osmos
-from pypeit.spectrographs import mmt_binospec
-from pypeit.spectrographs import mmt_bluechannel
-from pypeit.spectrographs import mmt_mmirs
-from pypeit.spectrographs import not_alfosc
-from pypeit.spectrographs import p200_dbsp
-from pypeit.spectrographs import p200_tspec
-from pypeit.spectrographs import shane_kast
-from pypeit.spectrographs import tng_dolores
-from pypeit.spectrographs import vlt_fors
-from pypeit.spectrographs import vlt_xshooter
-from pypeit.spectrographs import wht_isis
+The spectrograph modules are only imported when they are needed.  The
+names of the available spectrographs and the module and class that
+define each of them are kept in :attr:`spectrograph_registry`, which
+must be updated when a new spectrograph is added.
+"""
+import importlib
+
+spectrograph_registry = {
+    'gemini_flamingos1': ('gemini_flamingos', 'GeminiFLAMINGOS1Spectrograph'),
+    'gemini_flamingos2': ('gemini_flamingos', 'GeminiFLAMINGOS2Spectrograph'),
+    'gemini_gmos_north_e2v': ('gemini_gmos', 'GeminiGMOSNE2VSpectrograph'),
+    'gemini_gmos_north_ham': ('gemini_gmos', 'GeminiGMOSNHamSpectrograph'),
+    'gemini_gmos_north_ham_ns': ('gemini_gmos', 'GeminiGMOSNHamNSSpectrograph'),
+    'gemini_gmos_south_ham': ('gemini_gmos', 'GeminiGMOSSHamSpectrograph'),
+    'gemini_gnirs': ('gemini_gnirs', 'GeminiGNIRSSpectrograph'),
+    'keck_deimos': ('keck_deimos', 'KeckDEIMOSSpectrograph'),
+    'keck_hires_red': ('keck_hires', 'KECKHIRESRSpectrograph'),
+    'keck_kcwi': ('keck_kcwi', 'KeckKCWISpectrograph'),
+    'keck_lris_blue': ('keck_lris', 'KeckLRISBSpectrograph'),
+    'keck_lris_blue_orig': ('keck_lris', 'KeckLRISBOrigSpectrograph'),
+    'keck_lris_red': ('keck_lris', 'KeckLRISRSpectrograph'),
+    'keck_lris_red_orig': ('keck_lris', 'KeckLRISROrigSpectrograph'),
+    'keck_mosfire': ('keck_mosfire', 'KeckMOSFIRESpectrograph'),
+    'keck_nires': ('keck_nires', 'KeckNIRESSpectrograph'),
+    'keck_nirspec_low': ('keck_nirspec', 'KeckNIRSPECLowSpectrograph'),
+    'lbt_luci1': ('lbt_luci', 'LBTLUCI1Spectrograph'),
+    'lbt_luci2': ('lbt_luci', 'LBTLUCI2Spectrograph'),
+    'lbt_mods1b': ('lbt_mods', 'LBTMODS1BSpectrograph'),
+    'lbt_mods1r': ('lbt_mods', 'LBTMODS1RSpectrograph'),
+    'lbt_mods2b': ('lbt_mods', 'LBTMODS2BSpectrograph'),
+    'lbt_mods2r': ('lbt_mods', 'LBTMODS2RSpectrograph'),
+    'magellan_fire': ('magellan_fire', 'MagellanFIREEchelleSpectrograph'),
+    'magellan_fire_long': ('magellan_fire', 'MagellanFIRELONGSpectrograph'),
+    'magellan_mage': ('magellan_mage', 'MagellanMAGESpectrograph'),
+    'mdm_osmos_mdm4k': ('mdm_osmos', 'MDMOSMOSMDM4KSpectrograph'),
+    'mmt_binospec': ('mmt_binospec', 'MMTBINOSPECSpectrograph'),
+    'mmt_bluechannel': ('mmt_bluechannel', 'MMTBlueChannelSpectrograph'),
+    'mmt_mmirs': ('mmt_mmirs', 'MMTMMIRSSpectrograph'),
+    'not_alfosc': ('not_alfosc', 'NOTALFOSCSpectrograph'),
+    'p200_dbsp_blue': ('p200_dbsp', 'P200DBSPBlueSpectrograph'),
+    'p200_dbsp_red': ('p200_dbsp', 'P200DBSPRedSpectrograph'),
+    'p200_tspec': ('p200_tspec', 'P200TSPECSpectrograph'),
+    'shane_kast_blue': ('shane_kast', 'ShaneKastBlueSpectrograph'),
+    'shane_kast_red': ('shane_kast', 'ShaneKastRedSpectrograph'),
+    'shane_kast_red_ret': ('shane_kast', 'ShaneKastRedRetSpectrograph'),
+    'tng_dolores': ('tng_dolores', 'TNGDoloresSpectrograph'),
+    'vlt_fors2': ('vlt_fors', 'VLTFORS2Spectrograph'),
+    'vlt_xshooter_nir': ('vlt_xshooter', 'VLTXShooterNIRSpectrograph'),
+    'vlt_xshooter_uvb': ('vlt_xshooter', 'VLTXShooterUVBSpectrograph'),
+    'vlt_xshooter_vis': ('vlt_xshooter', 'VLTXShooterVISSpectrograph'),
+    'wht_isis_blue': ('wht_isis', 'WHTISISBlueSpectrograph'),
+    'wht_isis_red': ('wht_isis', 'WHTISISRedSpectrograph'),
+}
+"""
+Dictionary with the name of each available spectrograph and the module
+and name of the class that defines it.
+"""
 
 # Build the list of names for the available spectrographs
-import numpy as np
+available_spectrographs = list(spectrograph_registry.keys())
+
+# All spectrograph modules
+spectrograph_modules = sorted(set([m for m, c in spectrograph_registry.values()]))
+
+
+def __getattr__(name):
+    """
+    Import spectrograph modules when they are first accessed as
+    attributes of the package (e.g., ``spectrographs.keck_deimos``).
+    """
+    if name == 'spectrograph' or name in spectrograph_modules:
+        return importlib.import_module('{0}.{1}'.format(__name__, name))
+    raise AttributeError('module {0} has no attribute {1}'.format(__name__, name))
+
+
+def spectrograph_class(name):
+    """
+    Return the class for the named spectrograph, importing only its
+    module.
+
+    Args:
+        name (:obj:`str`):
+            Name of the spectrograph; see :attr:`available_spectrographs`.
+
+    Returns:
+        :obj:`type`: The spectrograph class or None if the name is not
+        recognized.
+    """
+    if name not in spectrograph_registry:
+        return None
+    module, cls = spectrograph_registry[name]
+    return getattr(importlib.import_module('{0}.{1}'.format(__name__, module)), cls)
+
 
 def all_subclasses(cls):
     """
@@ -41,15 +103,12 @@ def all_subclasses(cls):
     return set(cls.__subclasses__()).union(
         [s for c in cls.__subclasses__() for s in all_subclasses(c)])
 
-def spectrograph_classes():
-    # Recursively collect all subclasses
-    spec_c = np.array(list(all_subclasses(spectrograph.Spectrograph)))
-    # Select spectrograph classes with a defined name; spectrographs without a
-    # name are either undefined or a base class.
-    spec_c = spec_c[[c.name is not None for c in spec_c]]
-    # Construct a dictionary with the spectrograph name and class
-    srt = np.argsort(np.array([c.name for c in spec_c]))
-    return dict([ (c.name,c) for c in spec_c[srt]])
 
-available_spectrographs = list(spectrograph_classes().keys())
+def spectrograph_classes():
+    """
+    Return a dictionary with the name and class of all the available
+    spectrographs, sorted by name.
 
+    This imports all the spectrograph modules.
+    """
+    return dict([(name, spectrograph_class(name)) for name in sorted(available_spectrographs)])
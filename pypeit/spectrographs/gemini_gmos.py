@@ -6,8 +6,6 @@ Module for Gemini GMOS specific methods.
 import glob
 from pkg_resources import resource_filename
 
-from IPython import embed
-
 import numpy as np
 
 from pypeit import msgs
@@ -240,7 +238,7 @@ class GeminiGMOSSpectrograph(spectrograph.Spectrograph):
 
         # Read
         msgs.info("Reading GMOS file: {:s}".format(fil[0]))
-        hdu = io.fits_open(fil[0])
+        hdu = io.raw_file_cache.open(fil[0])
         head0 = hdu[0].header
         head1 = hdu[1].header
 
@@ -286,6 +284,7 @@ class GeminiGMOSSpectrograph(spectrograph.Spectrograph):
             elif det == 3:  # BLUEST DETECTOR
                 order = range(4, 0, -1)
         else:
+            from IPython import embed
             embed()
 
         # insert extensions into master image...
@@ -508,6 +507,7 @@ class GeminiGMOSSHamSpectrograph(GeminiGMOSSpectrograph):
             # Apply the mask
             xbin = int(binning.split(' ')[0])
             if xbin != 2:
+                from IPython import embed
                 embed()
             badr = (281*2)//xbin # Transposed
             bpm_img[badr:badr+(2*2)//xbin,:] = 1
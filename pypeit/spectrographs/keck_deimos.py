@@ -10,8 +10,6 @@ import re
 import warnings
 from pkg_resources import resource_filename
 
-from IPython import embed
-
 import numpy as np
 
 from scipy import interpolate
@@ -509,6 +507,40 @@ class KeckDEIMOSSpectrograph(spectrograph.Spectrograph):
             (1-indexed) number of the amplifier used to read each detector
             pixel. Pixels unassociated with any amplifier are set to 0.
         """
+        return self.read_rawimage(self.open_rawfile(raw_file), det)
+
+    def get_rawimages(self, raw_file, dets):
+        """
+        Read the raw images for a set of detectors from a single file.
+
+        The file is opened and validated once, and each detector is
+        then extracted using :func:`read_rawimage`.
+
+        Args:
+            raw_file (:obj:`str`):
+                File to read
+            dets (:obj:`list`):
+                1-indexed detectors to read
+
+        Returns:
+            :obj:`list`: The tuples returned by :func:`get_rawimage`
+            for each detector.
+        """
+        hdu = self.open_rawfile(raw_file)
+        return [self.read_rawimage(hdu, det) for det in dets]
+
+    def open_rawfile(self, raw_file):
+        """
+        Open a raw DEIMOS file and check that it can be reduced.
+
+        Args:
+            raw_file (:obj:`str`):
+                File to read.  The file name can be missing an extra
+                suffix (e.g., ``.gz``).
+
+        Returns:
+            `astropy.io.fits.HDUList`_: The opened fits file.
+        """
         # Check for file; allow for extra .gz, etc. suffix
         # TODO: Why not use os.path.isfile?
         fil = glob.glob(raw_file + '*')
@@ -517,12 +549,29 @@ class KeckDEIMOSSpectrograph(spectrograph.Spectrograph):
         # Read
         msgs.info("Reading DEIMOS file: {:s}".format(fil[0]))
 
-        hdu = io.fits_open(fil[0])
+        hdu = io.raw_file_cache.open(fil[0])
         if hdu[0].header['AMPMODE'] != 'SINGLE:B':
             msgs.error('PypeIt can only reduce images with AMPMODE == SINGLE:B.')
         if hdu[0].header['MOSMODE'] != 'Spectral':
             msgs.error('PypeIt can only reduce images with MOSMODE == Spectral.')
+        if hdu[0].header['BINNING'] != '1,1':
+            msgs.error("This binning for DEIMOS might not work.  But it might..")
+        return hdu
 
+    def read_rawimage(self, hdu, det):
+        """
+        Extract the raw image of a detector from an opened DEIMOS file.
+
+        Args:
+            hdu (`astropy.io.fits.HDUList`_):
+                The opened fits file; see :func:`open_rawfile`.
+            det (:obj:`int`):
+                1-indexed detector to read.  If None, the mosaic of all
+                detectors is constructed.
+
+        Returns:
+            :obj:`tuple`: See :func:`get_rawimage`.
+        """
         # Get post, pre-pix values
         postpix = hdu[0].header['POSTPIX']
         detlsize = hdu[0].header['DETLSIZE']
@@ -534,11 +583,6 @@ class KeckDEIMOSSpectrograph(spectrograph.Spectrograph):
             rawdatasec_img = np.zeros_like(image, dtype=int)
             oscansec_img = np.zeros_like(image, dtype=int)
 
-        # get the x and y binning factors...
-        binning = hdu[0].header['BINNING']
-        if binning != '1,1':
-            msgs.error("This binning for DEIMOS might not work.  But it might..")
-
         # DEIMOS detectors
         nchip = 8
 
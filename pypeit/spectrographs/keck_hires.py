@@ -7,8 +7,6 @@ files.
 """
 import glob
 
-from IPython import embed
-
 import numpy as np
 
 from scipy import interpolate
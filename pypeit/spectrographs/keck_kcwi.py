@@ -7,8 +7,6 @@ Implements KCWI-specific functions.
 
 import glob
 
-from IPython import embed
-
 import numpy as np
 
 from astropy import wcs, units
@@ -488,6 +486,8 @@ class KeckKCWISpectrograph(spectrograph.Spectrograph):
 
         # Read
         msgs.info("Reading KCWI file: {:s}".format(fil[0]))
+        # Do not use the raw-file cache: calc_pattern_freq adds the pattern
+        # frequencies to the primary header of the returned HDUList
         hdu = io.fits_open(fil[0])
         detpar = self.get_detector_par(hdu, det if det is None else 1)
         head0 = hdu[0].header
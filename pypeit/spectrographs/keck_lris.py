@@ -6,8 +6,6 @@ Module for LRIS specific methods.
 import glob
 import os
 
-from IPython import embed
-
 from pkg_resources import resource_filename
 
 import numpy as np
@@ -302,14 +300,65 @@ class KeckLRISSpectrograph(spectrograph.Spectrograph):
             (1-indexed) number of the amplifier used to read each detector
             pixel. Pixels unassociated with any amplifier are set to 0.
         """
+        return self.read_rawimage(self.open_rawfile(raw_file), det)
+
+    def get_rawimages(self, raw_file, dets):
+        """
+        Read the raw images for a set of detectors from a single file.
+
+        The file is opened once, and each detector is then extracted
+        using :func:`read_rawimage`.
+
+        Args:
+            raw_file (:obj:`str`):
+                File to read
+            dets (:obj:`list`):
+                1-indexed detectors to read
+
+        Returns:
+            :obj:`list`: The tuples returned by :func:`get_rawimage`
+            for each detector.
+        """
+        hdu = self.open_rawfile(raw_file)
+        return [self.read_rawimage(hdu, det) for det in dets]
+
+    def open_rawfile(self, raw_file):
+        """
+        Open a raw LRIS file.
+
+        Args:
+            raw_file (:obj:`str`):
+                File to read.  The file name can be missing an extra
+                suffix (e.g., ``.gz``).
+
+        Returns:
+            `astropy.io.fits.HDUList`_: The opened fits file.
+        """
         # Check for file; allow for extra .gz, etc. suffix
         fil = glob.glob(raw_file + '*')
         if len(fil) != 1:
-            msgs.error("Found {:d} files matching {:s}".format(len(fil)))
+            msgs.error("Found {:d} files matching {:s}".format(len(fil), raw_file + '*'))
 
         # Read
         msgs.info("Reading LRIS file: {:s}".format(fil[0]))
-        hdu = io.fits_open(fil[0])
+        return io.raw_file_cache.open(fil[0])
+
+    def read_rawimage(self, hdu, det):
+        """
+        Extract the raw image of a detector from an opened LRIS file.
+
+        Based on readmhdufits.pro
+
+        Args:
+            hdu (`astropy.io.fits.HDUList`_):
+                The opened fits file; see :func:`open_rawfile`.
+            det (:obj:`int`):
+                1-indexed detector to read.  If None, the image with
+                both detectors is constructed.
+
+        Returns:
+            :obj:`tuple`: See :func:`get_rawimage`.
+        """
         head0 = hdu[0].header
 
         # Get post, pre-pix values
@@ -750,6 +799,25 @@ class KeckLRISBOrigSpectrograph(KeckLRISBSpectrograph):
         return detector_par, image, hdul, elaptime, rawdatasec_img, oscansec_img
 
 
+    def get_rawimages(self, raw_file, dets):
+        """
+        Read the raw images for a set of detectors.
+
+        The original LRISb files are read as a single image, which is
+        separated into detectors by :func:`get_rawimage`.
+
+        Args:
+            raw_file (:obj:`str`):
+                File to read
+            dets (:obj:`list`):
+                1-indexed detectors to read
+
+        Returns:
+            :obj:`list`: The tuples returned by :func:`get_rawimage`
+            for each detector.
+        """
+        return [self.get_rawimage(raw_file, det) for det in dets]
+
     def bpm(self, filename, det, shape=None, msbias=None):
         """
         Generate a default bad-pixel mask.
@@ -1172,6 +1240,25 @@ class KeckLRISROrigSpectrograph(KeckLRISRSpectrograph):
         # Return
         return detector_par, image, hdul, elaptime, rawdatasec_img, oscansec_img
 
+    def get_rawimages(self, raw_file, dets):
+        """
+        Read the raw images for a set of detectors.
+
+        The original LRISr files are read as a single image, which is
+        separated into detectors by :func:`get_rawimage`.
+
+        Args:
+            raw_file (:obj:`str`):
+                File to read
+            dets (:obj:`list`):
+                1-indexed detectors to read
+
+        Returns:
+            :obj:`list`: The tuples returned by :func:`get_rawimage`
+            for each detector.
+        """
+        return [self.get_rawimage(raw_file, det) for det in dets]
+
     def bpm(self, filename, det, shape=None, msbias=None):
         """
         Generate a default bad-pixel mask.
@@ -1358,7 +1445,7 @@ def get_orig_rawimage(raw_file, debug=False):
         Pixels unassociated with any amplifier are set to 0.
     """
     # Open
-    hdul = io.fits_open(raw_file)
+    hdul = io.raw_file_cache.open(raw_file)
     head0 = hdul[0].header
     # TODO -- Check date here and error/warn if not after the upgrade
     image = hdul[0].data.astype(float)
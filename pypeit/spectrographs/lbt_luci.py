@@ -4,8 +4,6 @@ Module for LBT/LUCI specific methods.
 .. include:: ../include/links.rst
 """
 
-from IPython import embed
-
 import numpy as np
 
 from pypeit import msgs
@@ -185,7 +185,7 @@ class LBTMODSSpectrograph(spectrograph.Spectrograph):
 
         # Read
         msgs.info("Reading LBT/MODS file: {:s}".format(fil[0]))
-        hdu = io.fits_open(fil[0])
+        hdu = io.raw_file_cache.open(fil[0])
         head = hdu[0].header
 
         # TODO These parameters should probably be stored in the detector par
@@ -4,8 +4,6 @@ Module for Magellan/MAGE specific methods.
 .. include:: ../include/links.rst
 """
 
-from IPython import embed
-
 import numpy as np
 
 from astropy.time import Time
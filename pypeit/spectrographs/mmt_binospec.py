@@ -6,8 +6,6 @@ Module for MMT/BINOSPEC specific methods.
 import glob
 from pkg_resources import resource_filename
 
-from IPython import embed
-
 import numpy as np
 
 from pypeit import msgs
@@ -336,7 +334,7 @@ class MMTBINOSPECSpectrograph(spectrograph.Spectrograph):
 
         # Read
         msgs.info("Reading BINOSPEC file: {:s}".format(fil[0]))
-        hdu = io.fits_open(fil[0])
+        hdu = io.raw_file_cache.open(fil[0])
         head1 = hdu[1].header
 
         # TOdO Store these parameters in the DetectorPar.
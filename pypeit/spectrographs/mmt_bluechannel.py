@@ -5,10 +5,10 @@ Module for MMT/Blue Channel specific methods.
 """
 import glob
 import numpy as np
-from astropy.io import fits
 from astropy.time import Time
 
 from pypeit import msgs
+from pypeit import io
 from pypeit import telescopes
 from pypeit.core import framematch
 from pypeit.par import pypeitpar
@@ -331,7 +331,7 @@ class MMTBlueChannelSpectrograph(spectrograph.Spectrograph):
 
         # Read FITS image
         msgs.info("Reading MMT Blue Channel file: {:s}".format(fil[0]))
-        hdu = fits.open(fil[0])
+        hdu = io.raw_file_cache.open(fil[0])
         hdr = hdu[0].header
 
         # we're flipping FITS x/y to pypeit y/x here. pypeit wants blue on the
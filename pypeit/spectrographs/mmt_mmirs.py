@@ -6,8 +6,6 @@ Module for MMT MMIRS
 import glob
 from pkg_resources import resource_filename
 
-from IPython import embed
-
 import numpy as np
 from scipy.signal import savgol_filter
 
@@ -335,7 +333,7 @@ class MMTMMIRSSpectrograph(spectrograph.Spectrograph):
 
         # Read
         msgs.info("Reading MMIRS file: {:s}".format(fil[0]))
-        hdu = io.fits_open(fil[0])
+        hdu = io.raw_file_cache.open(fil[0])
         head1 = fits.getheader(fil[0],1)
 
         detector_par = self.get_detector_par(hdu, det if det is None else 1)
@@ -3,7 +3,6 @@ Module for NOT ALFOSC spectrograph
 
 .. include:: ../include/links.rst
 """
-from IPython import embed
 
 import numpy as np
 
@@ -6,8 +6,6 @@ Module for Shane/Kast specific methods.
 import os
 from pkg_resources import resource_filename
 
-from IPython import embed
-
 import numpy as np
 
 from astropy.time import Time
@@ -15,8 +15,6 @@ from astropy.stats import sigma_clip
 from pypeit.bitmask import BitMask
 from pypeit.utils import index_of_x_eq_y
 
-from IPython import embed
-
 class SlitMaskBitMask(BitMask):
     """
     Mask bits used for slit mask design data.
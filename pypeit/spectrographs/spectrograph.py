@@ -33,14 +33,11 @@ import numpy as np
 from pypeit import msgs
 from pypeit import utils
 from pypeit import io
-from pypeit.core.wavecal import wvutils
 from pypeit.core import parse
 from pypeit.core import procimg
 from pypeit.core import meta
 from pypeit.par import pypeitpar
 
-from IPython import embed
-
 # TODO: Create an EchelleSpectrograph derived class that holds all of
 # the echelle specific methods.
 
@@ -631,7 +628,7 @@ class Spectrograph:
             pixel. Pixels unassociated with any amplifier are set to 0.
         """
         # Open
-        hdu = io.fits_open(raw_file)
+        hdu = io.raw_file_cache.open(raw_file)
 
         # Grab the DetectorContainer
         detector = self.get_detector_par(hdu, det)
@@ -660,43 +657,74 @@ class Spectrograph:
         else:
             binning_raw = binning
 
-        for section in ['datasec', 'oscansec']:
-
-            # Get the data section
-            # Try using the image sections as header keywords
-            # TODO -- Deal with user windowing of the CCD (e.g. Kast red)
-            #  Code like the following maybe useful
-            #hdr = hdu[detector[det - 1]['dataext']].header
-            #image_sections = [hdr[key] for key in detector[det - 1][section]]
-            # Grab from Detector
-            image_sections = detector[section]
-            #if not isinstance(image_sections, list):
-            #    image_sections = [image_sections]
-            # Always assume normal FITS header formatting
-            one_indexed = True
-            include_last = True
-
-            # Initialize the image (0 means no amplifier)
-            pix_img = np.zeros(raw_img.shape, dtype=int)
-            for i in range(detector['numamplifiers']):
-
-                if image_sections is not None:  # and image_sections[i] is not None:
-                    # Convert the data section from a string to a slice
-                    datasec = parse.sec2slice(image_sections[i], one_indexed=one_indexed,
-                                              include_end=include_last, require_dim=2,
-                                              binning=binning_raw)
-                    # Assign the amplifier
-                    pix_img[datasec] = i+1
-
-            # Finish
-            if section == 'datasec':
-                rawdatasec_img = pix_img.copy()
-            else:
-                oscansec_img = pix_img.copy()
+        # Rawdatasec, oscansec images.  The section geometry only depends
+        # on the detector, binning, and image shape, so it is cached and
+        # the images are shared (read-only) among all frames.
+        # TODO -- Deal with user windowing of the CCD (e.g. Kast red)
+        #  Code like the following maybe useful
+        #hdr = hdu[detector[det - 1]['dataext']].header
+        #image_sections = [hdr[key] for key in detector[det - 1][section]]
+        # Always assume normal FITS header formatting
+        sections = procimg.amp_sections(raw_img.shape, detector['datasec'],
+                                        detector['oscansec'], binning=binning_raw)
+        rawdatasec_img = sections.datasec_img
+        oscansec_img = sections.oscansec_img
 
         # Return
         return detector, raw_img, hdu, exptime, rawdatasec_img, oscansec_img
 
+    def get_rawimages(self, raw_file, dets):
+        """
+        Read the raw images for a set of detectors from a single file.
+
+        The base-class method simply calls :func:`get_rawimage` for each
+        detector.  Spectrographs that pack multiple detectors in a
+        single file (e.g., Keck/DEIMOS) should overwrite this method
+        such that the file is opened and validated only once.
+
+        Args:
+            raw_file (:obj:`str`):
+                File to read
+            dets (:obj:`list`):
+                1-indexed detectors to read
+
+        Returns:
+            :obj:`list`: The tuples returned by :func:`get_rawimage`
+            for each detector.
+        """
+        return [self.get_rawimage(raw_file, det) for det in dets]
+
+    def load_rawimage(self, raw_file, det):
+        """
+        Load the raw image for a detector using the raw-file cache.
+
+        If the detector was read ahead of its use, its image is taken
+        (and removed) from :attr:`pypeit.io.raw_file_cache`.  Otherwise,
+        the requested detector is read, and the images of the detectors
+        being reduced after it (see
+        :attr:`pypeit.io.RawFileCache.detectors`) that fit in the cache
+        are read using :func:`get_rawimages` and kept in the cache for
+        later use.
+
+        Args:
+            raw_file (:obj:`str`):
+                File to read
+            det (:obj:`int`):
+                1-indexed detector to read
+
+        Returns:
+            :obj:`tuple`: The tuple returned by :func:`get_rawimage`.
+        """
+        rawimage = io.raw_file_cache.pop_detector(raw_file, self.name, det)
+        if rawimage is not None:
+            return rawimage
+        rawimage = self.get_rawimage(raw_file, det)
+        dets = io.raw_file_cache.prefetch_detectors(raw_file, self.name, det, rawimage)
+        if len(dets) > 0:
+            io.raw_file_cache.add_detectors(raw_file, self.name, dets,
+                                            self.get_rawimages(raw_file, dets))
+        return rawimage
+
     def get_lamps_status(self, headarr):
         """
         Return a string containing the information on the lamp status.
@@ -844,6 +872,7 @@ class Spectrograph:
                     # Bomb out?
                     if kerror:
                         # TODO: Do we want this embed here?
+                        from IPython import embed
                         embed(header=utils.embed_header())
                         msgs.error('Required meta "{0}" did not load!'.format(meta_key)
                                    + 'You may have a corrupt header.')
@@ -957,6 +986,12 @@ class Spectrograph:
         # Faster to open the whole file and then assign the headers,
         # particularly for gzipped files (e.g., DEIMOS)
         if isinstance(inp, str):
+            # Use the raw file if it has already been read, but don't
+            # add it to the cache; this avoids reading all the data
+            # when only the headers are needed (e.g., in pypeit_setup).
+            hdu = io.raw_file_cache.get(inp)
+            if hdu is not None:
+                return [hdu[k].header for k in range(len(hdu))]
             try:
                 hdu = io.fits_open(inp)
             except:
@@ -1179,6 +1214,7 @@ class Spectrograph:
             `numpy.ndarray`_: The logarithmically sampled wavelength grid;
             grid points are in wavelength, *not* ``log10(wavelength)``.
         """
+        from pypeit.core.wavecal import wvutils
         binspectral, binspatial = parse.parse_binning(binning)
         logmin, logmax = self.loglam_minmax
         loglam_grid = wvutils.wavegrid(logmin, logmax, self.dloglam*binspectral,
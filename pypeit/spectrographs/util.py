@@ -1,7 +1,6 @@
 """
 Spectrograph utility methods.
 """
-from IPython import embed
 
 import numpy as np
 
@@ -34,9 +33,10 @@ def load_spectrograph(spec):
     if spec is None or isinstance(spec, spectrographs.spectrograph.Spectrograph):
         return spec
 
-    classes = spectrographs.spectrograph_classes()
-    if spec in classes.keys():
-        return classes[spec]()
+    # Only import the module with the requested spectrograph
+    cls = spectrographs.spectrograph_class(spec)
+    if cls is not None:
+        return cls()
 
     msgs.error('{0} is not a supported spectrograph.'.format(spec))
 
@@ -6,8 +6,6 @@ Module for VLT X-Shooter
 import glob
 from pkg_resources import resource_filename
 
-from IPython import embed
-
 import numpy as np
 
 from astropy.coordinates import SkyCoord
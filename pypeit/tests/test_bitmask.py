@@ -110,3 +110,58 @@ def test_wrong_bits():
 
     assert numpy.sum(image_bm.flagged(mask, flag='COSMIC')) == numpy.sum(cosmics_indx)
 
+
+
+def test_out():
+    image_bm = ImageBitMask()
+    mask = numpy.array([0, 1, 2, 3, 4, 7], dtype=image_bm.minimum_dtype())
+    flagged = numpy.zeros(mask.shape, dtype=bool)
+    image_bm.flagged(mask, flag=['BPM', 'SATURATED'], out=flagged)
+    assert numpy.array_equal(flagged, [False, True, False, True, True, True])
+
+    # Operate in place
+    _mask = mask.copy()
+    image_bm.turn_on(_mask, ['COSMIC', 'SATURATED'], out=_mask)
+    assert numpy.array_equal(_mask, [6, 7, 6, 7, 6, 7])
+    image_bm.turn_off(_mask, 'COSMIC', out=_mask)
+    assert numpy.array_equal(_mask, [4, 5, 4, 5, 4, 5])
+    image_bm.toggle(_mask, ['BPM', 'SATURATED'], out=_mask)
+    assert numpy.array_equal(_mask, [1, 0, 1, 0, 1, 0])
+    assert _mask.dtype == mask.dtype
+
+
+def _loop_flagged(bm, value, flag):
+    """The per-flag evaluation of BitMask.flagged."""
+    out = value & (1 << bm.bits[flag[0]]) != 0
+    for f in flag[1:]:
+        out |= (value & (1 << bm.bits[f]) != 0)
+    return out
+
+
+def _loop_turn_on(bm, value, flag):
+    """The per-flag evaluation of BitMask.turn_on."""
+    out = value | (1 << bm.bits[flag[0]])
+    for f in flag[1:]:
+        out |= (1 << bm.bits[f])
+    return out.astype(value.dtype)
+
+
+def test_loop_equivalence():
+    image_bm = ImageBitMask()
+    rng = numpy.random.default_rng(99)
+    mask = rng.integers(0, high=image_bm.max_value+1, size=(256,256)).astype(image_bm.minimum_dtype())
+    flagged = numpy.empty(mask.shape, dtype=bool)
+    _mask = numpy.empty_like(mask)
+
+    for flags in [image_bm.keys(), image_bm.keys()[1:3], image_bm.keys()[-1:]]:
+        ref = _loop_flagged(image_bm, mask, flags)
+        assert numpy.array_equal(image_bm.flagged(mask, flag=flags), ref), \
+                'Vectorized flagged should match'
+        image_bm.flagged(mask, flag=flags, out=flagged)
+        assert numpy.array_equal(flagged, ref), 'Vectorized flagged should match'
+
+        ref = _loop_turn_on(image_bm, mask, flags)
+        assert numpy.array_equal(image_bm.turn_on(mask, flags), ref), \
+                'Vectorized turn_on should match'
+        image_bm.turn_on(mask, flags, out=_mask)
+        assert numpy.array_equal(_mask, ref), 'Vectorized turn_on should match'
@@ -11,9 +11,14 @@ import shutil
 import numpy as np
 
 from pypeit import calibrations
+from pypeit import io
 from pypeit.par import pypeitpar
 from pypeit.spectrographs.util import load_spectrograph
 from pypeit import wavecalib
+from pypeit import masterframe
+from pypeit import flatfield
+from pypeit import slittrace
+from pypeit.images import buildimage
 from IPython import embed
 
 from pypeit.tests.tstutils import dev_suite_required, dummy_fitstbl
@@ -111,6 +116,153 @@ def test_tiltimg(multi_caliBrate):
     # Cleanup
     shutil.rmtree(multi_caliBrate.master_dir)
 
+def test_skip_readahead(multi_caliBrate, monkeypatch):
+    # Pretend the spectrograph has two detectors
+    monkeypatch.setattr(multi_caliBrate.fitstbl.spectrograph, 'ndet', 2)
+    cache = io.raw_file_cache
+    monkeypatch.setattr(cache, 'detectors', [1,2])
+    os.makedirs(multi_caliBrate.master_dir, exist_ok=True)
+
+    # Detectors are read ahead if their masters are not reused
+    with multi_caliBrate._skip_readahead('arc', buildimage.ArcImage):
+        assert cache.detectors == [1,2], 'Detectors should be read ahead'
+    master_key = multi_caliBrate.fitstbl.master_key(
+                    multi_caliBrate.fitstbl.find_frames('arc', index=True)[0], det=2)
+    master_file = masterframe.construct_file_name(buildimage.ArcImage, master_key,
+                                                  master_dir=multi_caliBrate.master_dir)
+    open(master_file, 'w').close()
+    with multi_caliBrate._skip_readahead('arc', buildimage.ArcImage):
+        assert cache.detectors == [1,2], 'Masters are not reused'
+
+    # Skip the detectors whose masters will be reused
+    multi_caliBrate.reuse_masters = True
+    with multi_caliBrate._skip_readahead('arc', buildimage.ArcImage):
+        assert cache.detectors == [1], 'Second detector should not be read ahead'
+    assert cache.detectors == [1,2], 'Detectors not restored'
+    with multi_caliBrate._skip_readahead('tilt', buildimage.TiltImage):
+        assert cache.detectors == [1,2], 'Only the arc master exists'
+
+    # Cleanup
+    shutil.rmtree(multi_caliBrate.master_dir)
+
+
+def test_master_store(multi_caliBrate, monkeypatch):
+    store = data_path('MasterStore')
+    multi_caliBrate.par['master_store'] = store
+    # Build the arc and save it to the store
+    multi_caliBrate.get_arc()
+    calib_hash = multi_caliBrate.master_hash_dict['arc']
+    master_file = masterframe.construct_file_name(buildimage.ArcImage,
+                                                  multi_caliBrate.master_key_dict['arc'],
+                                                  master_dir=multi_caliBrate.master_dir)
+    assert masterframe.read_master_hash(master_file) == calib_hash, 'Hash not in header'
+    assert os.path.isfile(masterframe.construct_file_name(buildimage.ArcImage, calib_hash,
+                                                          master_dir=store)), 'Arc not stored'
+
+    # A different reduction gets the arc from the store
+    def no_build(*args, **kwargs):
+        raise ValueError('Master should not be rebuilt')
+    with monkeypatch.context() as m:
+        m.setattr(buildimage, 'buildimage_fromlist', no_build)
+        other = reset_calib(calibrations.MultiSlitCalibrations(
+                                multi_caliBrate.fitstbl, multi_caliBrate.par,
+                                multi_caliBrate.spectrograph, data_path('OtherMasters')))
+        arc = other.get_arc()
+    assert arc.master_dir == data_path('OtherMasters'), 'Bad master directory'
+    assert other.master_hash_dict['arc'] == calib_hash, 'Hash should not change'
+
+    # Masters are reused unless their inputs changed
+    multi_caliBrate.reuse_masters = True
+    with monkeypatch.context() as m:
+        m.setattr(buildimage, 'buildimage_fromlist', no_build)
+        multi_caliBrate.get_arc()
+    multi_caliBrate.par['arcframe']['process']['sigclip'] += 1.
+    multi_caliBrate.get_arc()
+    assert multi_caliBrate.master_hash_dict['arc'] != calib_hash, 'Hash did not change'
+    assert masterframe.read_master_hash(master_file) == multi_caliBrate.master_hash_dict['arc'], \
+            'Master not rebuilt'
+
+    # Cleanup
+    for d in [store, data_path('OtherMasters'), multi_caliBrate.master_dir]:
+        shutil.rmtree(d)
+
+
+def test_tweaked_slits_store(multi_caliBrate, monkeypatch):
+    store = data_path('MasterStore')
+
+    class FakeFlatField:
+        """Offset the left slit edges by ``spat_samp``."""
+        def __init__(self, rawflat, spectrograph, flatpar, slits, *args, **kwargs):
+            self.slits = slits
+            self.offset = flatpar['spat_samp']
+
+        def run(self, show=False):
+            self.slits.init_tweaked()
+            self.slits.left_tweak += self.offset
+            return flatfield.FlatImages(pixelflat_norm=np.ones((2048,350)),
+                                        pixelflat_bpm=np.zeros(1, dtype=int),
+                                        spat_id=self.slits.spat_id, PYP_SPEC='shane_kast_blue')
+
+    def setup(calib):
+        calib.par['master_store'] = store
+        calib.shape = (2048,350)
+        calib.get_bpm()
+        calib.master_hash_dict['trace'] = 'trace'
+        calib.slits = slittrace.SlitTraceSet(left_init=np.full((2048,1), 50.),
+                                             right_init=np.full((2048,1), 300.),
+                                             pypeline='MultiSlit', nspat=350,
+                                             PYP_SPEC='shane_kast_blue')
+        calib.slits.to_master_file(masterframe.construct_file_name(
+                                        slittrace.SlitTraceSet, calib.master_key_dict['trace'],
+                                        master_dir=calib.master_dir))
+        calib.msarc = calib.wavetilts = calib.wv_calib = 'fake'
+        return calib
+
+    def no_build(*args, **kwargs):
+        raise ValueError('Master should not be rebuilt')
+
+    multi_caliBrate.master_key_dict['trace'] = 'A_1_01'
+    setup(multi_caliBrate)
+    with monkeypatch.context() as m:
+        m.setattr(buildimage, 'buildimage_fromlist', lambda *args, **kwargs: None)
+        m.setattr(flatfield, 'FlatField', FakeFlatField)
+        multi_caliBrate.get_flats()
+    assert np.all(multi_caliBrate.slits.left_tweak == 55.), 'Slits not tweaked'
+    # The tweaked slits are not stored under the hash of the traces
+    assert not os.path.isfile(masterframe.construct_file_name(slittrace.SlitTraceSet, 'trace',
+                                                              master_dir=store)), \
+            'Tweaked slits should not be stored under the trace hash'
+
+    # A reduction that reuses the flats from the store gets the slits
+    # tweaked by those flats
+    other = reset_calib(calibrations.MultiSlitCalibrations(
+                            multi_caliBrate.fitstbl, multi_caliBrate.par,
+                            multi_caliBrate.spectrograph, data_path('OtherMasters')))
+    other.master_key_dict['trace'] = 'A_1_01'
+    setup(other)
+    with monkeypatch.context() as m:
+        m.setattr(buildimage, 'buildimage_fromlist', no_build)
+        other.get_flats()
+    assert np.all(other.slits.left_tweak == 55.), 'Tweaks not restored'
+
+    # Different flats tweak the slits again
+    other = reset_calib(calibrations.MultiSlitCalibrations(
+                            multi_caliBrate.fitstbl, multi_caliBrate.par,
+                            multi_caliBrate.spectrograph, data_path('OtherMasters')))
+    other.master_key_dict['trace'] = 'A_1_01'
+    setup(other)
+    other.par['flatfield']['spat_samp'] += 1.
+    with monkeypatch.context() as m:
+        m.setattr(buildimage, 'buildimage_fromlist', lambda *args, **kwargs: None)
+        m.setattr(flatfield, 'FlatField', FakeFlatField)
+        other.get_flats()
+    assert np.all(other.slits.left_tweak == 56.), 'Slits tweaked by the wrong flats'
+
+    # Cleanup
+    for d in [store, data_path('OtherMasters'), multi_caliBrate.master_dir]:
+        shutil.rmtree(d)
+
+
 def test_bpm(multi_caliBrate):
     # Prep
     multi_caliBrate.shape = (2048,350)
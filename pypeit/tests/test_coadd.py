@@ -351,3 +351,115 @@ def test_coadd_datacube():
     files = [spec2d_file1, spec2d_file2]
     coadd_cube(files, None, overwrite=True)
     os.remove('datacube.fits')
+
+
+def test_batch_coadd1d():
+    from pypeit import coadd1d
+
+    spec1dfiles = [data_path('spec1d_b27.fits'), data_path('spec1d_b28.fits')]
+    objids = ['SPAT0176-SLIT0175-DET01', 'SPAT0175-SLIT0175-DET01']
+    par = kast_blue.default_pypeit_par()['coadd1d']
+    par['flux_value'] = False
+
+    # Single coadd
+    single = coadd1d.CoAdd1D.get_instance(spec1dfiles, objids, spectrograph=kast_blue, par=par)
+    single.run()
+
+    # Batch, with the second group listing the exposures in reverse order
+    groups = [(spec1dfiles, objids), (spec1dfiles[::-1], objids[::-1])]
+    coaddfiles = [data_path('tst_batch_coadd_{0}.fits'.format(i)) for i in range(len(groups))]
+    for nproc in [1, 2]:
+        coadds = coadd1d.batch_coadd1d(groups, coaddfiles, spectrograph=kast_blue, par=par,
+                                       nproc=nproc)
+        assert len(coadds) == 2, 'Should be one coadd per group'
+        assert np.array_equal(coadds[0].flux_coadd, single.flux_coadd), \
+                'Batch coadd should match the single coadd'
+        onespec = coadd1d.OneSpec.from_file(coaddfiles[1])
+        assert np.all(np.isfinite(onespec.flux)), 'Bad coadd written'
+
+    for f in coaddfiles:
+        os.remove(f)
+
+
+def test_spec_reject_comb():
+    import scipy.interpolate
+
+    rng = np.random.default_rng(1)
+    nspec, nexp = 4000, 20
+    # Exposures with slightly different wavelength grids
+    waves = np.linspace(4000., 8000., nspec)[:, None] + rng.uniform(-1., 1., nexp)[None, :]
+    fluxes = 10. + np.sin(waves/100.) + rng.normal(size=(nspec, nexp))
+    ivars = np.ones((nspec, nexp))
+    masks = np.ones((nspec, nexp), dtype=bool)
+    weights = np.ones((nspec, nexp))
+    # Cosmic rays
+    fluxes[1000, 3] += 100.
+    fluxes[2500, 7] += 100.
+    wave_grid, _, _ = coadd.get_wave_grid(waves, masks=masks, wave_method='linear')
+
+    # Stack with np.histogram, as was done before binning once
+    ubermask = masks & (waves > 1.0)
+    nused_hist, _ = np.histogram(waves[ubermask], bins=wave_grid)
+    flux_hist, _ = np.histogram(waves[ubermask], bins=wave_grid, weights=fluxes[ubermask])
+    wave_stack, flux_stack, ivar_stack, mask_stack, nused \
+            = coadd.compute_stack(wave_grid, waves, fluxes, ivars, masks, weights,
+                                  grid_indx=coadd.wave_grid_indices(wave_grid, waves))
+    assert np.array_equal(nused, nused_hist), 'Different number of pixels per bin'
+    assert np.allclose(flux_stack[nused > 0], flux_hist[nused > 0]/nused[nused > 0]), \
+            'Different stacked flux'
+
+    # Interpolate the stack onto the exposures one at a time
+    gpm = wave_stack > 1.0
+    flux_loop = np.zeros_like(waves)
+    for iexp in range(nexp):
+        flux_loop[:,iexp] = scipy.interpolate.interp1d(wave_stack[gpm], flux_stack[gpm], kind='cubic',
+                                                       bounds_error=False,
+                                                       fill_value=np.nan)(waves[:,iexp])
+    flux_nat, ivar_nat, mask_nat = coadd.interp_spec(waves, wave_stack, flux_stack, ivar_stack,
+                                                     mask_stack)
+    assert np.array_equal(flux_nat[mask_nat], flux_loop[mask_nat]), 'Different interpolated flux'
+
+    # Iterative rejection
+    _, flux_stack, _, _, outmask, _ = coadd.spec_reject_comb(wave_grid, waves, fluxes, ivars, masks,
+                                                             weights)
+    assert not outmask[1000, 3] and not outmask[2500, 7], 'Cosmic rays should be rejected'
+    assert np.sum(np.invert(outmask)) < 0.01*outmask.size, 'Too many pixels rejected'
+
+
+def fake_echelle(norder=30, nexp=20, nspec=200, seed=2):
+    """
+    Generate synthetic echelle spectra and a flat sensitivity function.
+    """
+    from astropy.table import Table
+    from astropy.io import fits
+
+    rng = np.random.default_rng(seed)
+    wave_min = 4000. * 1.02**np.arange(norder)
+    waves = np.zeros((nspec, norder, nexp))
+    for iord in range(norder):
+        waves[:, iord, :] = np.linspace(wave_min[iord], 1.03*wave_min[iord], nspec)[:, None] \
+                                + rng.uniform(-0.5, 0.5, nexp)[None, :]
+    fluxes = 10. + np.sin(waves/50.) + rng.normal(size=waves.shape)
+    ivars = np.ones_like(waves)
+    masks = np.ones_like(waves, dtype=bool)
+
+    # Flat sensitivity function
+    wave_sens = np.linspace(0.9*wave_min, 1.1*wave_min, 100)
+    sensfile = data_path('tst_ech_sensfunc.fits')
+    hdul = fits.HDUList([fits.PrimaryHDU(),
+                         fits.ImageHDU(data=wave_sens, name='WAVE'),
+                         fits.ImageHDU(data=np.ones_like(wave_sens), name='SENSFUNC'),
+                         fits.BinTableHDU(Table({'ORDER': np.arange(norder)}), name='METADATA'),
+                         fits.BinTableHDU(Table({'ORDER': np.arange(norder)}), name='OUT_TABLE')])
+    hdul.writeto(sensfile, overwrite=True)
+    return waves, fluxes, ivars, masks, sensfile
+
+
+def test_ech_combspec_nproc():
+    waves, fluxes, ivars, masks, sensfile = fake_echelle(norder=6, nexp=5)
+    stacks = [coadd.ech_combspec(waves, fluxes, ivars, masks, sensfile, scale_method='median',
+                                 nproc=n) for n in [1, 2]]
+    os.remove(sensfile)
+
+    for ref, stack in zip(stacks[0][0] + stacks[0][1], stacks[1][0] + stacks[1][1]):
+        assert np.array_equal(ref, stack), 'Result should not depend on the number of processes'
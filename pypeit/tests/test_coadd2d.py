@@ -0,0 +1,202 @@
+"""
+Module to run tests on 2D coadds
+"""
+import os
+
+import numpy as np
+
+from astropy.table import Table
+
+from pypeit import coadd2d
+from pypeit import spec2dobj
+from pypeit import slittrace
+from pypeit.core import coadd
+from pypeit.core import combine
+from pypeit.spectrographs.util import load_spectrograph
+from pypeit.tests import tstutils
+
+
+def data_path(filename):
+    data_dir = os.path.join(os.path.dirname(__file__), 'files')
+    return os.path.join(data_dir, filename)
+
+
+def fake_spec2dobj(rng, nspec=200, nspat=100, cosmic_ray=False):
+    """Build a two-slit exposure with one object on the first slit."""
+    left = np.full((nspec, 2), 10., dtype=float)
+    right = np.full((nspec, 2), 40., dtype=float)
+    left[:,1] = 55.
+    right[:,1] = 85.
+    slits = slittrace.SlitTraceSet(left, right, 'MultiSlit', nspat=nspat,
+                                   PYP_SPEC='shane_kast_blue')
+    spec, spat = np.mgrid[:nspec,:nspat]
+    skymodel = np.full((nspec,nspat), 10.)
+    sciimg = skymodel + 50*np.exp(-0.5*(spat-25.)**2/4) + rng.normal(size=(nspec,nspat))
+    if cosmic_ray:
+        sciimg[100,25] += 1e4
+    spec_flex_table = Table()
+    spec_flex_table['spat_id'] = slits.spat_id
+    spec_flex_table['sci_spec_flexure'] = np.zeros(slits.nslits)
+    return spec2dobj.Spec2DObj(sciimg=sciimg, ivarraw=np.ones_like(sciimg), skymodel=skymodel,
+                               objmodel=np.zeros_like(sciimg), ivarmodel=np.ones_like(sciimg),
+                               scaleimg=np.ones_like(sciimg),
+                               waveimg=4000. + 2.*spec + 0.01*spat,
+                               bpmmask=np.zeros_like(sciimg, dtype=int), det=1,
+                               detector=tstutils.get_kastb_detector(), slits=slits,
+                               tilts=spec/(nspec-1.), sci_spat_flexure=0.,
+                               sci_spec_flexure=spec_flex_table, vel_type=None, vel_corr=None)
+
+
+def rebin2d_histogram2d(spec_bins, spat_bins, waveimg_stack, spatimg_stack, thismask_stack,
+                        inmask_stack, sci_list, var_list):
+    """Rebin the images by calling np.histogram2d for each image."""
+    nimgs = waveimg_stack.shape[0]
+    shape_out = (nimgs, spec_bins.size - 1, spat_bins.size - 1)
+    nsmp_rebin_stack = np.zeros(shape_out)
+    norm_rebin_stack = np.zeros(shape_out)
+    sci_list_out = [np.zeros(shape_out) for sci in sci_list]
+    var_list_out = [np.zeros(shape_out) for var in var_list]
+    for img in range(nimgs):
+        thismask = thismask_stack[img]
+        nsmp_rebin_stack[img] = np.histogram2d(waveimg_stack[img][thismask],
+                                               spatimg_stack[img][thismask],
+                                               bins=[spec_bins, spat_bins])[0]
+        finmask = thismask & inmask_stack[img]
+        spec_rebin = waveimg_stack[img][finmask]
+        spat_rebin = spatimg_stack[img][finmask]
+        norm_img = np.histogram2d(spec_rebin, spat_rebin, bins=[spec_bins, spat_bins])[0]
+        norm_rebin_stack[img] = norm_img
+        for indx, sci in enumerate(sci_list):
+            weigh_sci = np.histogram2d(spec_rebin, spat_rebin, bins=[spec_bins, spat_bins],
+                                       weights=sci[img][finmask])[0]
+            sci_list_out[indx][img] = (norm_img > 0.0) * weigh_sci/(norm_img + (norm_img == 0.0))
+        for indx, var in enumerate(var_list):
+            weigh_var = np.histogram2d(spec_rebin, spat_rebin, bins=[spec_bins, spat_bins],
+                                       weights=var[img][finmask])[0]
+            var_list_out[indx][img] = (norm_img > 0.0)*weigh_var/(norm_img + (norm_img == 0.0))**2
+    return sci_list_out, var_list_out, norm_rebin_stack.astype(int), nsmp_rebin_stack.astype(int)
+
+
+def test_rebin2d():
+    # Synthetic stack of two small images
+    rng = np.random.default_rng(2)
+    nimgs, nspec, nspat = 2, 256, 128
+    spec, spat = np.mgrid[:nspec,:nspat]
+    waveimg_stack = np.stack([4000. + 1.1*spec + 0.001*spat + i*0.3 for i in range(nimgs)])
+    dspat_stack = np.stack([spat - 64. + 0.01*spec + i*2.5 for i in range(nimgs)])
+    thismask_stack = np.ones(waveimg_stack.shape, dtype=bool)
+    thismask_stack[:,:,:10] = False
+    inmask_stack = rng.uniform(size=waveimg_stack.shape) > 0.05
+    sci_list = [rng.normal(size=waveimg_stack.shape) for i in range(5)]
+    var_list = [rng.uniform(size=waveimg_stack.shape)]
+    # Include the bin edges
+    spec_bins = np.linspace(4020., 4250., 201)
+    spat_bins = np.arange(-60., 61., 1.)
+    waveimg_stack[0,100,50] = spec_bins[-1]
+    dspat_stack[0,100,50] = spat_bins[-1]
+
+    hist = rebin2d_histogram2d(spec_bins, spat_bins, waveimg_stack, dspat_stack, thismask_stack,
+                               inmask_stack, sci_list, var_list)
+    bincount = coadd.rebin2d(spec_bins, spat_bins, waveimg_stack, dspat_stack, thismask_stack,
+                             inmask_stack, sci_list, var_list)
+
+    for h, b in zip(hist[0] + hist[1], bincount[0] + bincount[1]):
+        assert np.array_equal(h, b), 'Different rebinned images'
+    assert np.array_equal(hist[2], bincount[2]), 'Different rebinned occupation number'
+    assert np.array_equal(hist[3], bincount[3]), 'Different rebinned sampling'
+
+
+def test_streaming_combine():
+    rng = np.random.default_rng(0)
+    nimgs = 5
+    sci = rng.normal(size=(nimgs,20,30))
+    var = np.ones_like(sci)
+    gpm = rng.uniform(size=sci.shape) > 0.1
+    weights = rng.uniform(size=nimgs) + 0.5
+
+    # Without rejection, the result is identical to weighted_combine
+    sci_out, var_out, gpm_out, nused = combine.weighted_combine(weights, [sci], [var], gpm)
+    combiner = combine.StreamingWeightedCombine(sci.shape[1:], 1, 1)
+    for i in range(nimgs):
+        combiner.add(np.full(sci.shape[1:], weights[i]), [sci[i]], [var[i]], gpm[i])
+    _sci_out, _var_out, _gpm_out, _nused = combiner.result()
+    assert np.allclose(sci_out[0], _sci_out[0]), 'Bad combined image'
+    assert np.allclose(var_out[0], _var_out[0]), 'Bad combined variance'
+    assert np.array_equal(gpm_out, _gpm_out), 'Bad mask'
+    assert np.array_equal(nused, _nused), 'Bad number of images used'
+
+    # Outliers are rejected
+    sci[2,10,10] = 100.
+    combiner = combine.StreamingWeightedCombine(sci.shape[1:], 1, 1, sigrej=3.)
+    for i in range(nimgs):
+        combiner.add_clip_sample(sci[i], np.ones(sci.shape[1:], dtype=bool))
+    for i in range(nimgs):
+        combiner.add(np.ones(sci.shape[1:]), [sci[i]], [var[i]],
+                     np.ones(sci.shape[1:], dtype=bool), clip_img=sci[i], clip_var=var[i])
+    _sci_out, _var_out, _gpm_out, _nused = combiner.result()
+    assert _nused[10,10] == nimgs-1, 'Outlier should be rejected'
+    assert np.absolute(_sci_out[0][10,10]) < 3, 'Outlier should be rejected'
+
+    # Iterating the rejection removes outliers masked by brighter ones
+    sci = np.array([-1., -0.5, 0., 0.5, 1., 10., 30.]).reshape(-1,1,1)
+    gpm = np.ones(sci.shape[1:], dtype=bool)
+    for maxiters, nused in zip([1, 10], [6, 5]):
+        combiner = combine.StreamingWeightedCombine(sci.shape[1:], 1, 1, sigrej=3.,
+                                                    maxiters=maxiters)
+        niter = 0
+        iterate = True
+        while iterate:
+            for i in range(sci.shape[0]):
+                combiner.add_clip_sample(sci[i], gpm, clip_var=np.ones(sci.shape[1:]))
+            iterate = combiner.next_clip_iteration()
+            niter += 1
+        assert niter == min(maxiters, 4), 'Bad number of iterations'
+        for i in range(sci.shape[0]):
+            combiner.add(np.ones(sci.shape[1:]), [sci[i]], [np.ones(sci.shape[1:])], gpm,
+                         clip_img=sci[i], clip_var=np.ones(sci.shape[1:]))
+        assert combiner.result()[3][0,0] == nused, 'Bad rejection'
+
+
+def test_streaming_coadd2d():
+    rng = np.random.default_rng(1)
+    spectrograph = load_spectrograph('shane_kast_blue')
+    for nexp in [2, 4]:
+        files = []
+        for i in range(nexp):
+            allspec2D = spec2dobj.AllSpec2DObj()
+            allspec2D['meta']['ir_redux'] = False
+            allspec2D[1] = fake_spec2dobj(rng, cosmic_ray=i == 1)
+            files += [data_path('tst_spec2d_{0}.fits'.format(i))]
+            allspec2D.write_to_fits(files[-1], overwrite=True)
+
+        coadd_list = {}
+        for streaming in [False, True]:
+            for sigrej in [3., 1e6]:
+                par = spectrograph.default_pypeit_par()
+                par['coadd2d']['streaming'] = streaming
+                par['coadd2d']['sigrej'] = sigrej
+                coadd = coadd2d.CoAdd2D.get_instance(files, spectrograph, par, det=1,
+                                                     offsets=np.zeros(nexp), weights='uniform')
+                coadd_list[streaming, sigrej] = coadd.coadd()
+
+        for f in files:
+            os.remove(f)
+
+        for sigrej in [3., 1e6]:
+            for eager, stream in zip(coadd_list[False, sigrej], coadd_list[True, sigrej]):
+                assert np.array_equal(eager['wave_bins'], stream['wave_bins']), \
+                        'Bad wavelength bins'
+                assert np.array_equal(eager['dspat_bins'], stream['dspat_bins']), \
+                        'Bad spatial bins'
+                if nexp < 3 or sigrej > 100:
+                    # No rejection, so the results should be identical
+                    for key in ['sciimg', 'sciivar', 'imgminsky', 'tilts', 'waveimg', 'dspat',
+                                'outmask', 'nused']:
+                        assert np.allclose(eager[key], stream[key]), \
+                                'Streaming changed {0}'.format(key)
+                else:
+                    # The cosmic ray should be rejected by both
+                    assert eager['sciimg'].max() < 100, 'Cosmic ray not rejected'
+                    assert stream['sciimg'].max() < 100, 'Cosmic ray not rejected'
+                    assert np.allclose(eager['waveimg'], stream['waveimg']), \
+                            'Bad wavelength image'
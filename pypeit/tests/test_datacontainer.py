@@ -5,6 +5,9 @@ import sys
 import io
 import os
 import shutil
+import copy
+import pickle
+import time
 import inspect
 
 from IPython import embed
@@ -19,7 +22,7 @@ from astropy.table import Table
 
 from pypeit.datamodel import DataContainer
 from pypeit.images import pypeitimage
-from pypeit.io import fits_open
+from pypeit.io import fits_open, background_writer
 
 #-----------------------------------------------------------------------
 # Example derived classes
@@ -531,3 +534,116 @@ def test_init():
     _data = ComplexInitContainer.from_hdu(data.to_hdu(add_primary=True))
     assert data.func == _data.func, 'Bad read'
 
+
+
+def test_lazy_image():
+    ofile = 'test_lazy.fits'
+    if os.path.isfile(ofile):
+        os.remove(ofile)
+
+    img = ImageContainer(np.arange(100).astype(float).reshape(10,10), np.arange(25).reshape(5,5),
+                         img1_key='test')
+    img.to_file(ofile)
+
+    _img = ImageContainer.from_file(ofile, lazy=True)
+    # Nothing has been read yet
+    assert 'img1' in _img._lazy and 'img2' in _img._lazy, 'Images should not be read'
+    assert _img.img1_key == 'test', 'Bad key'
+    # Access reads the data
+    assert np.array_equal(_img.img1, img.img1), 'Bad lazy read'
+    assert 'img1' not in _img._lazy and 'img2' in _img._lazy, 'Only img1 should be read'
+    assert _img['img2'].dtype.byteorder in ['=', '|'], 'Should be native byte order'
+    assert np.array_equal(_img.img2, img.img2), 'Bad lazy read'
+    # Replacing an unread image
+    _img = ImageContainer.from_file(ofile, lazy=True)
+    openfile = _img._lazy['img1'].openfile.hdul.fileinfo(0)['file']
+    _img.img2 = np.zeros((5,5), dtype=int)
+    assert not np.any(_img.img2), 'Bad replacement'
+    assert not openfile.closed, 'File should be open until img1 is read'
+    assert np.array_equal(_img.img1, img.img1), 'Bad lazy read'
+    assert openfile.closed, 'File should be closed once all the images are read'
+    del _img
+
+    # Copying and pickling read the pending images
+    _img = ImageContainer.from_file(ofile, lazy=True)
+    openfile = _img._lazy['img1'].openfile.hdul.fileinfo(0)['file']
+    img_copy = copy.deepcopy(_img)
+    assert openfile.closed, 'File should be closed by the copy'
+    assert len(_img._lazy) == 0 and len(img_copy._lazy) == 0, 'Images should be read'
+    assert np.array_equal(img_copy.img1, img.img1) and np.array_equal(img_copy.img2, img.img2), \
+            'Bad copy'
+    _img = pickle.loads(pickle.dumps(ImageContainer.from_file(ofile, lazy=True)))
+    assert np.array_equal(_img.img1, img.img1) and np.array_equal(_img.img2, img.img2), \
+            'Bad pickle'
+    assert _img.img1_key == 'test', 'Bad key'
+
+    os.remove(ofile)
+
+
+def test_queued_file():
+    tmpfile = 'test_queued_tmp.fits'
+    ofile = 'test_queued.fits'
+    img = ImageContainer(np.arange(100).astype(float).reshape(10,10), np.arange(25).reshape(5,5),
+                         img1_key='test')
+    img.to_file(tmpfile, overwrite=True)
+
+    def slow_write():
+        time.sleep(0.5)
+        os.replace(tmpfile, ofile)
+
+    background_writer.set_limit(2)
+    try:
+        # A file that is still queued to be written is not missing
+        background_writer.submit(ofile, slow_write)
+        _img = ImageContainer.from_file(ofile)
+        assert np.array_equal(_img.img1, img.img1), 'Bad read of queued file'
+    finally:
+        background_writer.set_limit(0)
+    os.remove(ofile)
+
+
+def test_compressed_image():
+    rng = np.random.default_rng(3)
+    img = ImageContainer(rng.normal(size=(2048,2048)), rng.integers(0, 4, size=(2048,2048),
+                                                                    dtype=np.int32),
+                         img1_key='test')
+
+    ofiles = {'none': 'test_compress.fits', 'tile': 'test_compress_tile.fits',
+              'lossless': 'test_compress_lossless.fits', 'gzip': 'test_compress_1.fits.gz',
+              'gzip4': 'test_compress_4.fits.gz'}
+    kwargs = {'none': {}, 'tile': dict(compression='tile'),
+              'lossless': dict(compression='tile', quantize_level=0),
+              'gzip': dict(nthreads=1), 'gzip4': dict(nthreads=4)}
+    sizes = {}
+    for key in ofiles.keys():
+        img.to_file(ofiles[key], overwrite=True, **kwargs[key])
+        sizes[key] = os.path.getsize(ofiles[key])
+
+    for key in ofiles.keys():
+        _img = ImageContainer.from_file(ofiles[key])
+        assert _img.img1_key == 'test', 'Bad key'
+        assert np.array_equal(_img.img2, img.img2), 'Integer images should be lossless'
+        if key == 'tile':
+            # Quantized with a step of ~sigma/16
+            assert np.allclose(_img.img1, img.img1, atol=0.1), 'Bad quantized image'
+        else:
+            assert np.array_equal(_img.img1, img.img1), 'Bad compressed image'
+        if key != 'none':
+            assert sizes[key] < sizes['none'], 'Compression should reduce the file size'
+        os.remove(ofiles[key])
+
+    # Quantization is required for substantial compression of noisy
+    # float images
+    assert sizes['tile'] < 0.5*sizes['none'], 'Quantized images should be much smaller'
+    # Files gzipped in parallel are the same size
+    assert np.absolute(sizes['gzip4'] - sizes['gzip']) < 0.01*sizes['gzip'], \
+            'Parallel gzip should give a similar file size'
+
+    # The default compression is held by the writer
+    background_writer.set_compression(compression='tile')
+    try:
+        img.to_file(ofiles['tile'], overwrite=True)
+        assert os.path.getsize(ofiles['tile']) == sizes['tile'], 'Should use the default'
+    finally:
+        background_writer.set_compression()
+    os.remove(ofiles['tile'])
@@ -12,6 +12,7 @@ from pypeit.tests.tstutils import cooked_required
 from pypeit.spectrographs import util
 
 from pypeit import edgetrace
+from pypeit.core import trace
 
 @cooked_required
 def test_addrm_slit():
@@ -41,6 +42,40 @@ def test_addrm_slit():
     assert edges.ntrace//2 == nslits, 'Did not remove trace.'
 
 
+
+def test_follow_centroid():
+    """ Check the compiled centroid follower against the reference implementation. """
+    rng = np.random.default_rng(3)
+    nspec, nspat = 512, 300
+    spec = np.arange(nspec)[:,None]
+    spat = np.arange(nspat)[None,:]
+    # Synthetic image with curved slits
+    img = np.zeros((nspec,nspat), dtype=float)
+    for l in np.arange(20, 260, 60):
+        left = l + 5*np.sin(spec/100.)
+        img += 1000/(1+np.exp(-(spat-left)/1.5))/(1+np.exp((spat-left-40)/1.5))
+    img += rng.normal(scale=10, size=img.shape)
+    bpm = np.zeros(img.shape, dtype=bool)
+    bpm[100:110,20:60] = True
+    bpm[:,150] = True
+    sobel = trace.detect_slit_edges(img, bpm=bpm)[0]
+    ivar = np.ones_like(img)
+    ivar[300:305,:] = 0.
+    bitmask = edgetrace.EdgeTraceBitMask()
+    for side, offset in zip(['left', 'right'], [0, 40]):
+        flux = trace.prepare_sobel_for_trace(sobel, bpm=bpm, boxcar=5, side=side)
+        start = np.arange(20, 260, 60) + offset + rng.uniform(-1, 1, 4)
+        for kwargs in [dict(bitmask=bitmask), dict(),
+                       dict(width=np.linspace(3,9,4), maxerror=None, continuous=False)]:
+            ref = trace.follow_centroid(flux, nspec//2, start, ivar=ivar, bpm=bpm,
+                                        compiled=False, **kwargs)
+            cen, err, msk = trace.follow_centroid(flux, nspec//2, start, ivar=ivar, bpm=bpm,
+                                                  **kwargs)
+            assert np.array_equal(cen, ref[0]), 'Centroids changed'
+            assert np.array_equal(err, ref[1]), 'Errors changed'
+            assert msk.dtype == ref[2].dtype and np.array_equal(msk, ref[2]), 'Flags changed'
+            assert np.any(msk[:,0]), 'Flags should be set near the masked pixels'
+
 # TODO: Can we (and is it useful to) get these tests back?
 
 '''
@@ -61,3 +61,58 @@ def test_legendre():
 def test_robust_fit():
     # NEED A TEST!!
     pass
+
+
+def test_clenshaw():
+    rng = np.random.default_rng(99)
+    x = rng.uniform(0., 10., 1000)
+    x2 = rng.uniform(-5., 5., 1000)
+    val = {'polynomial': np.polynomial.polynomial.polyval,
+           'legendre': np.polynomial.legendre.legval,
+           'chebyshev': np.polynomial.chebyshev.chebval}
+    val2d = {'polynomial': np.polynomial.polynomial.polyval2d,
+             'legendre': np.polynomial.legendre.legval2d,
+             'chebyshev': np.polynomial.chebyshev.chebval2d}
+    for func in ['polynomial', 'legendre', 'chebyshev']:
+        xv = x if func == 'polynomial' else fitting.scale_minmax(x, minx=0., maxx=10.)[0]
+        x2v = x2 if func == 'polynomial' else fitting.scale_minmax(x2, minx=-5., maxx=5.)[0]
+        for ncoeff in [1, 2, 6]:
+            c = rng.normal(size=ncoeff)
+            pypeitFit = fitting.PypeItFit(fitc=c, func=func, minx=0., maxx=10.)
+            assert np.allclose(pypeitFit.eval(x), val[func](xv, c), rtol=1e-12, atol=0.)
+            assert np.allclose(pypeitFit.eval(x, dtype=np.float32), val[func](xv, c), rtol=1e-4)
+            assert pypeitFit.eval(x, dtype=np.float32).dtype == np.float32
+
+            c2 = rng.normal(size=(ncoeff, 4))
+            pypeitFit = fitting.PypeItFit(fitc=c2, func=func+'2d', minx=0., maxx=10.,
+                                          minx2=-5., maxx2=5.)
+            assert np.allclose(pypeitFit.eval(x, x2=x2), val2d[func](xv, x2v, c2),
+                               rtol=1e-10, atol=1e-8)
+            # A single value for the second coordinate
+            assert np.allclose(pypeitFit.eval(x, x2=x2[0]),
+                               val2d[func](xv, np.full_like(x2v, x2v[0]), c2),
+                               rtol=1e-10, atol=1e-8)
+
+
+def test_eval_grid():
+    rng = np.random.default_rng(99)
+    x = np.linspace(0., 1., 300)
+    x2 = np.linspace(0., 1., 200)
+    xx, xx2 = np.meshgrid(x, x2, indexing='ij')
+    c = rng.normal(size=(3, 6, 5))
+    for func in ['polynomial2d', 'legendre2d', 'chebyshev2d']:
+        grid = fitting.evaluate_fit_grid(c, func, x, x2=x2, minx=0., maxx=1., minx2=0., maxx2=1.)
+        assert grid.shape == (3, x.size, x2.size)
+        for i in range(c.shape[0]):
+            pypeitFit = fitting.PypeItFit(fitc=c[i], func=func, minx=0., maxx=1., minx2=0.,
+                                          maxx2=1.)
+            indiv = pypeitFit.eval(xx, x2=xx2)
+            assert np.allclose(grid[i], indiv, rtol=1e-12, atol=1e-12)
+            assert np.allclose(pypeitFit.eval_grid(x, x2=x2), indiv, rtol=1e-12, atol=1e-12)
+    # 1D fits
+    grid = fitting.evaluate_fit_grid(c[:,:,0], 'legendre', x, minx=0., maxx=1.)
+    assert np.allclose(grid, np.polynomial.legendre.legval(2*x-1, c[:,:,0].T))
+    # The basis matrices are cached
+    b = fitting.basis_matrix(x, 5, 'legendre', minx=0., maxx=1.)
+    assert fitting.basis_matrix(x.copy(), 5, 'legendre', minx=0., maxx=1.) is b
+    assert not b.flags.writeable
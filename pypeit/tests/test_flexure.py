@@ -2,12 +2,14 @@
 Module to run tests on simple fitting routines for arrays
 """
 import os
+from types import SimpleNamespace
 
 import pytest
 
 import numpy as np
 
 from linetools.spectra.io import readspec
+from linetools.spectra.xspectrum1d import XSpectrum1D
 
 import pypeit
 from pypeit.core import flexure, arc
@@ -66,3 +68,40 @@ def test_flex_shift():
 #    pyplot.plot(new_wave, obj_spec.flux)
 #    pyplot.show()
     assert np.abs(flex_dict['shift'] - 43.7) < 0.1
+
+
+def test_flex_shift_batch():
+    obj_spec = readspec(data_path('obj_lrisb_600_sky.fits'))
+    arx_file = pypeit.__path__[0]+'/data/sky_spec/sky_LRISb_600.fits'
+    arx_spec = readspec(arx_file)
+    arx_lines = arc.detect_lines(arx_spec.flux.value)
+
+    # Offset the wavelengths of the object spectrum by a known number of
+    # pixels, and degrade the resolution of some of them
+    offsets = np.array([0., 1.5, -3.2, 10., 0., 5.])
+    fluxes = [obj_spec.flux.value]*4 + [obj_spec.gauss_smooth(4.).flux.value]*2
+    waves = [flexure.flexure_interp(-o, obj_spec.wavelength.value) for o in offsets]
+
+    flex_dicts = flexure.spec_flex_shift_batch(waves, fluxes, arx_spec, arx_lines, mxshft=60)
+    shifts = np.array([d['shift'] for d in flex_dicts])
+    assert np.all(np.absolute(shifts - offsets - 43.7) < 0.1), 'Bad batched shifts'
+    # Should match the single-spectrum calculation
+    flex_dict = flexure.spec_flex_shift(obj_spec, arx_spec, arx_lines, mxshft=60)
+    assert np.absolute(shifts[0] - flex_dict['shift']) < 0.05, 'Batched shift is different'
+    assert flex_dicts[0]['smooth'] == 0. and flex_dicts[-1]['smooth'] > 0., 'Bad smoothing'
+
+    # Run for a set of slits
+    slit_specs = [XSpectrum1D.from_tuple((w, f)) for w, f in zip(waves, fluxes)]
+    slits = SimpleNamespace(nslits=len(slit_specs))
+    slit_bpm = np.zeros(len(slit_specs), dtype=bool)
+    slit_bpm[2] = True
+    flex_list = flexure.spec_flexure_slit(slits, np.arange(len(slit_specs)), slit_bpm, arx_file,
+                                          method='slitcen', slit_specs=slit_specs, mxshft=60)
+    assert len(flex_list[2]['shift']) == 0, 'Masked slit should be skipped'
+    assert np.allclose([flex_list[i]['shift'][0] for i in [0, 1, 3, 4, 5]],
+                       shifts[[0, 1, 3, 4, 5]]), 'Slit shifts should match the batch'
+    hits = flexure.sky_archive.cache_info().hits
+    flexure.spec_flexure_slit(slits, np.arange(len(slit_specs)), slit_bpm, arx_file,
+                              method='slitcen', slit_specs=slit_specs, mxshft=60)
+    assert flexure.sky_archive.cache_info().hits == hits + 1, \
+            'Archive sky spectrum should be cached'
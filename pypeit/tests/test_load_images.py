@@ -8,8 +8,11 @@ import pytest
 import glob
 import numpy as np
 
+from astropy.io import fits
+
+from pypeit import io
 from pypeit.images.rawimage import RawImage
-from pypeit.tests.tstutils import dev_suite_required
+from pypeit.tests.tstutils import dev_suite_required, data_path
 from pypeit.par import pypeitpar
 from pypeit.spectrographs.util import load_spectrograph
 
@@ -87,6 +90,121 @@ def test_load_kast():
         pytest.fail('Shane Kast test data section failed.')
 
 
+def test_raw_file_cache():
+    ifile = data_path('b1.fits.gz')
+    spec = load_spectrograph('shane_kast_blue')
+    cache = io.raw_file_cache
+    cache.clear()
+    cache.set_limit(1024.)
+
+    raw1 = RawImage(ifile, spec, 1)
+    assert cache.misses == 1 and cache.hits == 0, 'First read should not use the cache'
+    raw2 = RawImage(ifile, spec, 1)
+    assert cache.misses == 1 and cache.hits > 0, 'Second read should use the cache'
+    assert np.array_equal(raw1.rawimage, raw2.rawimage), 'Cached image changed'
+    assert cache.get(ifile) is raw2.hdu, 'Cache should return the same HDUList'
+
+    # Turning off the cache empties it
+    cache.set_limit(0)
+    assert cache.nbytes == 0 and cache.get(ifile) is None, 'Cache should be empty'
+    raw3 = RawImage(ifile, spec, 1)
+    assert np.array_equal(raw1.rawimage, raw3.rawimage), 'Uncached image changed'
+
+    # Reset
+    cache.clear()
+    cache.set_limit(1024.)
+
+
+def _fake_lris_file(ofile, ny=64):
+    """Write a small 4-amplifier LRIS file with binning 2,2."""
+    xbin, precol, postpix = 2, 12, 80
+    nx = 1024 // xbin
+    rng = np.random.default_rng(45)
+    hdr = fits.Header()
+    hdr['PRECOL'] = precol
+    hdr['POSTPIX'] = postpix
+    hdr['PRELINE'] = 0
+    hdr['POSTLINE'] = 0
+    hdr['BINNING'] = '{0},{0}'.format(xbin)
+    hdr['NUMAMPS'] = 4
+    hdr['ELAPTIME'] = 10.
+    hdus = [fits.PrimaryHDU(header=hdr)]
+    for i in range(4):
+        ext = fits.ImageHDU(data=rng.integers(0, 1000, size=(ny, nx + (precol + postpix)//xbin),
+                                              dtype=np.int16))
+        x1, x2 = (4-i)*1024, (3-i)*1024+1
+        ext.header['DETSEC'] = '[{0}:{1},1:{2}]'.format(x1, x2, ny*xbin)
+        ext.header['DATASEC'] = '[{0}:{1},1:{2}]'.format(precol//xbin+1, precol//xbin+nx, ny)
+        hdus += [ext]
+    fits.HDUList(hdus).writeto(ofile, overwrite=True)
+
+
+def test_get_rawimages():
+    ifile = data_path('fake_lris_multi.fits')
+    _fake_lris_file(ifile)
+    spec = load_spectrograph('keck_lris_blue')
+    cache = io.raw_file_cache
+    cache.clear()
+    cache.set_limit(1024.)
+
+    # Reading all detectors at once gives the same images
+    rawimages = spec.get_rawimages(ifile, [1,2])
+    for det, rawimage in zip([1,2], rawimages):
+        ref = spec.get_rawimage(ifile, det)
+        assert ref[0]['det'] == rawimage[0]['det'], 'Wrong detector'
+        for i in [1,3,4,5]:
+            assert np.array_equal(ref[i], rawimage[i]), 'Images should match'
+
+    # Only the requested detector is read if the detectors being
+    # reduced are not set
+    raw1 = RawImage(ifile, spec, 1)
+    nbytes = sum([h.data.nbytes for h in raw1.hdu if h.data is not None])
+    assert cache.nbytes == nbytes, 'Only the file should be cached'
+
+    # Read the second detector ahead of its use
+    cache.detectors = [1,2]
+    raw1 = RawImage(ifile, spec, 1)
+    hits = cache.hits
+    raw2 = RawImage(ifile, spec, 2)
+    assert cache.hits == hits + 1, 'Second detector should be in the cache'
+    assert np.array_equal(raw2.rawimage, rawimages[1][1]), 'Cached image changed'
+    assert np.array_equal(raw1.rawimage, rawimages[0][1]), 'Cached image changed'
+    # Detectors are removed when used
+    raw2 = RawImage(ifile, spec, 2)
+    assert cache.hits == hits + 2, 'File should still be in the cache'
+    assert np.array_equal(raw2.rawimage, rawimages[1][1]), 'Cached image changed'
+
+    # Detectors are not read ahead if their images do not fit
+    image_nbytes, section_nbytes = io.RawFileCache._rawimage_nbytes(rawimages[1])
+    cache.reset_detectors()
+    cache.detectors = [1,2]
+    file_nbytes = cache.nbytes
+    cache.set_limit((file_nbytes + image_nbytes + section_nbytes - 1) / 2**20)
+    RawImage(ifile, spec, 1)
+    assert cache.nbytes == file_nbytes, 'Second detector should not be read ahead'
+
+    # The section images are kept once for all files
+    ifile2 = data_path('fake_lris_multi2.fits')
+    _fake_lris_file(ifile2)
+    cache.set_limit(1024.)
+    RawImage(ifile, spec, 1)
+    RawImage(ifile2, spec, 1)
+    assert len(cache._detectors) == 2, 'Second detector of both files should be read ahead'
+    sections = [r[0][-1] for r in cache._detectors.values()]
+    assert sections[0] is sections[1], 'Section images should be shared'
+    assert cache.nbytes == 2*file_nbytes + 2*image_nbytes + section_nbytes, 'Bad cache size'
+
+    # Stop reading ahead
+    cache.reset_detectors()
+    assert cache.detectors is None and cache.nbytes == 2*file_nbytes, 'Detectors not removed'
+
+    # Reset
+    os.remove(ifile)
+    os.remove(ifile2)
+    cache.clear()
+    cache.set_limit(1024.)
+
+
 @dev_suite_required
 def test_load_vlt_xshooter_uvb():
     ifile = os.path.join(os.environ['PYPEIT_DEV'], 'RAW_DATA/vlt_xshooter',
@@ -35,3 +35,50 @@ def test_masterframe_methods():
 
     _master_key2, _master_dir2 = masterframe.grab_key_mdir(filename, from_filename=True)
     assert _master_key2 == master_key
+
+
+def test_master_cache():
+    from pypeit.images import pypeitimage
+    from pypeit.tests import test_detector
+
+    pypeitImage = pypeitimage.PypeItImage(np.ones((100, 100)))
+    pypeitImage.fullmask = np.zeros((100, 100), dtype=np.int64)
+    pypeitImage.detector = test_detector.detector_container.DetectorContainer(
+                                **test_detector.def_det)
+    pypeitImage.PYP_SPEC = 'shane_kast_blue'
+    arcImage = buildimage.ArcImage.from_pypeitimage(pypeitImage)
+    master_filename = masterframe.construct_file_name(arcImage, 'A_1_99', master_dir=data_root())
+    arcImage.to_master_file(master_filename)
+
+    cache = masterframe.MasterFrameCache(max_size=1.)
+    # First load reads the file, second uses the cache
+    arc1 = cache.load(master_filename, buildimage.ArcImage)
+    arc2 = cache.load(master_filename, buildimage.ArcImage)
+    assert cache.misses == 1 and cache.hits == 1 and len(cache) == 1, 'Cache not used'
+    assert np.array_equal(arc1.image, arc2.image), 'Bad cached image'
+    assert cache.nbytes >= arc1.image.nbytes, 'Bad size'
+    # Cached objects are copies
+    arc2.image[0,0] = 2.
+    assert cache.load(master_filename, buildimage.ArcImage).image[0,0] == 1., \
+            'Cached object was modified'
+
+    # Rewriting the master invalidates the global cache
+    masterframe.master_cache.clear()
+    masterframe.master_cache.load(master_filename, buildimage.ArcImage)
+    assert len(masterframe.master_cache) == 1, 'Master not cached'
+    arc2.to_master_file(master_filename)
+    assert len(masterframe.master_cache) == 0, 'Master not invalidated'
+    # A master that changed on disk is re-read
+    assert cache.load(master_filename, buildimage.ArcImage).image[0,0] == 2., \
+            'Changed master not re-read'
+    assert cache.misses == 2, 'Changed master not re-read'
+
+    # Objects larger than the cache are not cached
+    cache.set_limit(arc1.image.nbytes / 2**21)
+    assert len(cache) == 0, 'Cache not trimmed'
+    cache.load(master_filename, buildimage.ArcImage)
+    assert len(cache) == 0, 'Large object should not be cached'
+
+    # Clean up
+    masterframe.master_cache.clear()
+    os.remove(master_filename)
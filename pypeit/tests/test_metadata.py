@@ -1,5 +1,6 @@
 import os
 import glob
+import string
 import shutil
 import yaml
 
@@ -12,7 +13,7 @@ import numpy as np
 from pypeit.par.util import parse_pypeit_file
 from pypeit.pypeitsetup import PypeItSetup
 from pypeit.tests.tstutils import dev_suite_required, data_path
-from pypeit.metadata import PypeItMetaData
+from pypeit.metadata import PypeItMetaData, row_match_config
 from pypeit.spectrographs.util import load_spectrograph
 from pypeit.scripts import setup
 
@@ -163,3 +164,46 @@ def test_lris_blue_pypeit_overwrite():
     assert fitstbl['target'][0] != fitstbl_usr['target'][0], \
             'Fits header value and input pypeit file value expected to be different.'
 
+
+def _loop_configurations(fitstbl):
+    """The frame-by-frame configuration assignment."""
+    cfg_keys = fitstbl.spectrograph.configuration_keys()
+    configs = {'A': fitstbl.get_configuration(0, cfg_keys=cfg_keys)}
+    for i in range(1, len(fitstbl)):
+        if not any([row_match_config(fitstbl.table[i], c, fitstbl.spectrograph)
+                    for c in configs.values()]):
+            configs[string.ascii_uppercase[len(configs)]] \
+                    = fitstbl.get_configuration(i, cfg_keys=cfg_keys)
+    setup = np.full(len(fitstbl), 'None', dtype=object)
+    for i in range(len(fitstbl)):
+        for d, cfg in configs.items():
+            if row_match_config(fitstbl.table[i], cfg, fitstbl.spectrograph):
+                setup[i] = d
+    return configs, setup
+
+
+def test_group_configurations():
+    spec = load_spectrograph('keck_deimos')
+    rng = np.random.default_rng(1)
+    n = 500
+    # Include values that match within the tolerance of row_match_config,
+    # mixed types, and 0 values that never match.
+    data = dict(filename=['f{0}.fits'.format(i) for i in range(n)],
+                dispname=rng.choice(['600ZD', '1200G'], n),
+                decker=rng.choice(['LongMirr', 'mask1', None], n).astype(object),
+                binning=np.full(n, '1,1'),
+                dispangle=rng.choice([7500., 7500.*(1+5e-6), 7500*(1+2e-5), 8000.], n),
+                amp=np.full(n, 'SINGLE:B'))
+    data['dispangle'][[3,n//2]] = 0.
+    fitstbl = PypeItMetaData(spec, spec.default_pypeit_par(), data=data)
+    bm = fitstbl.type_bitmask
+    fitstbl.set_frame_types(bm.turn_on(np.zeros(n, dtype=bm.minimum_dtype()), 'science'))
+
+    ref_configs, ref_setup = _loop_configurations(fitstbl)
+    configs = fitstbl.unique_configurations(force=True)
+    fitstbl.set_configurations(configs, force=True)
+
+    assert list(configs.keys()) == list(ref_configs.keys()), 'Different configurations'
+    assert all([configs[k] == ref_configs[k] for k in configs.keys()]), \
+            'Different configuration values'
+    assert np.array_equal(fitstbl['setup'], ref_setup), 'Different setup assignments'
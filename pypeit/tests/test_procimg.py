@@ -29,3 +29,54 @@ def test_replace_columns():
                           np.repeat(np.arange(4),10).reshape(4,10).T), \
                 'Interpolation failed.'
 
+
+
+def test_amp_sections():
+    # Two amplifiers side-by-side with overscan regions on either side
+    shape = (10, 24)
+    datasec = ['[1:10,3:12]', '[1:10,13:22]']
+    oscansec = ['[1:10,1:2]', '[1:10,23:24]']
+    sections = procimg.amp_sections(shape, datasec, oscansec)
+    assert procimg.amp_sections(shape, datasec, oscansec) is sections, 'Sections not cached'
+    assert sections.datasec_img.dtype == np.int8, 'Amplifier image should be int8'
+    assert not sections.datasec_img.flags.writeable, 'Amplifier image should be read-only'
+    assert np.array_equal(np.unique(sections.datasec_img), [0,1,2]), 'Bad amplifier image'
+    assert np.sum(sections.oscansec_img == 2) == 20, 'Bad overscan image'
+
+    # Same geometry from the images
+    _sections = procimg.AmpSections.from_images(sections.datasec_img.astype(int),
+                                                sections.oscansec_img.astype(int))
+    for amp in [1,2]:
+        assert _sections.amp_slices(amp) == sections.amp_slices(amp), 'Data sections differ'
+        assert _sections.amp_slices(amp, overscan=True) \
+                    == sections.amp_slices(amp, overscan=True), 'Overscan sections differ'
+    assert procimg.AmpSections.from_images(sections.datasec_img, sections.oscansec_img) \
+                is sections, 'Should find the cached sections'
+
+    # Trimming
+    rng = np.random.default_rng(99)
+    img = rng.normal(size=shape)
+    assert np.array_equal(sections.trim(img), procimg.trim_frame(img, sections.datasec_img < 1)), \
+            'Trimming changed'
+
+    # Overscan subtraction
+    assert np.array_equal(procimg.subtract_overscan(img, sections.datasec_img,
+                                                    sections.oscansec_img, method='median'),
+                          procimg.subtract_overscan(img, sections.datasec_img,
+                                                    sections.oscansec_img, method='median',
+                                                    sections=sections)), \
+            'Overscan subtraction changed'
+
+    # Gain and read-noise images
+    gain_img = procimg.gain_frame(sections.datasec_img, [1.2, 1.5])
+    assert np.all(gain_img[sections.datasec_img == 0] == 0), 'Bad gain outside data sections'
+    assert np.all(gain_img[sections.datasec_img == 2] == 1.5), 'Bad gain'
+    rn2_img = procimg.rn_frame(sections.datasec_img, [1.2, 1.5], [3., 4.])
+    assert np.all(rn2_img[sections.datasec_img == 1] == 9. + 0.36), 'Bad read noise'
+    assert np.all(rn2_img[sections.datasec_img == 0] == 0.), 'Bad read noise'
+    # Some spectrographs provide floating-point amplifier images
+    assert np.array_equal(procimg.gain_frame(sections.datasec_img.astype(float), [1.2, 1.5]),
+                          gain_img), 'Bad gain for float amplifier image'
+    assert np.array_equal(procimg.rn_frame(sections.datasec_img.astype(float), [1.2, 1.5],
+                                           [3., 4.]), rn2_img), \
+            'Bad read noise for float amplifier image'
@@ -0,0 +1,110 @@
+"""
+Module to run tests on the stage profiler
+"""
+import json
+from concurrent import futures
+
+import numpy as np
+
+from pypeit import io
+from pypeit import profiling
+from pypeit.par import pypeitpar
+
+
+@profiling.stage('inner')
+def _inner(n):
+    return np.ones((n,n)).sum()
+
+
+def _busy(n):
+    return sum(range(n))
+
+
+def test_profiler(tmp_path):
+    profiler = profiling.profiler
+
+    # Nothing is recorded by default
+    profiler.reset(enabled=False)
+    assert _inner(10) == 100
+    with profiler.stage('outer', frame='b1.fits'):
+        _inner(10)
+    assert len(profiler.records) == 0
+    profiler.write(str(tmp_path / 'perf.json'))
+    assert not (tmp_path / 'perf.json').exists()
+
+    profiler.reset(enabled=True)
+    try:
+        with profiler.stage('outer', frame='b1.fits', det=None):
+            for det in [1,2]:
+                with profiler.stage('detector', det=det):
+                    assert _inner(1000) == 1e6
+                    # Same name within the same stage is only counted once
+                    with profiler.stage('detector'):
+                        pass
+
+        assert len(profiler.records) == 7
+        # Records are in the order in which the stages finished
+        assert [r['stage'] for r in profiler.records] \
+                    == ['inner', 'detector', 'detector']*2 + ['outer']
+        assert profiler.records[0]['path'] == 'outer/detector/inner'
+        # Labels are inherited, and None is ignored
+        assert profiler.records[0]['labels']['frame'] == 'b1.fits'
+        assert profiler.records[0]['labels']['det'] == 1
+        assert profiler.records[3]['labels']['det'] == 2
+        assert 'det' not in profiler.records[-1]['labels']
+        # The outer stage encloses the inner ones
+        assert profiler.records[-1]['wall'] >= profiler.records[1]['wall'] \
+                    + profiler.records[4]['wall']
+        if profiler.records[0]['peak_rss'] is not None:
+            # The 8 MB array must be included in the peak
+            assert profiler.records[-1]['peak_rss'] >= profiler.records[0]['peak_rss'] > 8
+
+        summary = profiler.summary()
+        assert summary['detector']['ncalls'] == 2
+        assert summary['inner']['ncalls'] == 2
+        assert np.isclose(summary['inner']['wall'], profiler.records[0]['wall']
+                          + profiler.records[3]['wall'])
+
+        ofile = str(tmp_path / 'QA' / 'perf.json')
+        profiler.write(ofile)
+        with open(ofile) as f:
+            report = json.load(f)
+        assert len(report['stages']) == 7
+        assert report['summary']['outer']['ncalls'] == 1
+
+        # The CPU time of the worker processes is recorded separately
+        profiler.reset()
+        with profiler.stage('outer'):
+            with futures.ProcessPoolExecutor(max_workers=1) as executor:
+                executor.submit(_busy, 10**7).result()
+        if profiling.resource is not None:
+            assert profiler.records[0]['cpu_children'] > 0.1, 'Worker time not recorded'
+            assert profiler.records[0]['cpu'] < profiler.records[0]['cpu_children']
+        assert profiler.summary()['outer']['cpu_children'] \
+                    == (profiler.records[0]['cpu_children'] or 0.)
+
+        # Files written in the background keep the labels of the stage
+        # in which they were queued
+        profiler.reset()
+        writer = io.BackgroundWriter(max_queue=2)
+        with profiler.stage('outer', frame='b1.fits'):
+            with profiler.stage('detector', det=2):
+                writer.submit(str(tmp_path / 'test.fits'), _inner, 10)
+        writer.close()
+        record = [r for r in profiler.records if r['stage'] == 'inner'][0]
+        assert record['path'] == 'outer/detector/inner', 'Bad path'
+        assert record['labels'] == dict(frame='b1.fits', det=2), 'Bad labels'
+        assert record['peak_rss'] is None and record['cpu_children'] is None
+
+        # Labels can have the same name as the recorded quantities
+        profiler.reset()
+        with profiler.stage('outer', stage='reduce', wall=1):
+            pass
+        assert profiler.records[0]['stage'] == 'outer'
+        assert profiler.records[0]['labels'] == dict(stage='reduce', wall=1)
+        assert profiler.records[0]['wall'] != 1
+    finally:
+        profiler.reset(enabled=False)
+
+    assert pypeitpar.ReduxPar()['perf_report'] is False
+
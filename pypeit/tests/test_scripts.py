@@ -3,6 +3,8 @@ Module to run tests on scripts
 """
 import os
 import shutil
+import sys
+import subprocess
 
 import numpy as np
 import pytest
@@ -301,3 +303,20 @@ def test_identify():
 
 
 # TODO: Include tests for coadd2d, sensfunc, flux_calib
+
+
+def test_script_import():
+    # Printing the help for run_pypeit should not import any of the heavy
+    # dependencies or spectrograph modules
+    code = 'import sys\n' \
+           'from pypeit.scripts import run_pypeit\n' \
+           'try:\n' \
+           '    run_pypeit.parse_args([\'-h\'])\n' \
+           'except SystemExit:\n' \
+           '    pass\n' \
+           'print(\'IMPORTED:\' + \',\'.join([m for m in [\'IPython\', \'matplotlib\', \'numba\', \'linetools\',\n' \
+           '    \'scipy\', \'pypeit.spectrographs.spectrograph\'] if m in sys.modules]))\n'
+    proc = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True)
+    assert proc.returncode == 0, proc.stderr
+    assert proc.stdout.strip().split('\n')[-1] == 'IMPORTED:', \
+            'Unexpected imports when parsing arguments'
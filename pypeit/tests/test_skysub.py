@@ -1,11 +1,14 @@
 """
 Module to run tests on skysub routines
 """
+from concurrent import futures
+
 import pytest
 import numpy as np
 
 from pypeit.core import skysub
 from pypeit.slittrace import SlitTraceSet
+from pypeit import specobj, specobjs
 
 
 def test_userregions():
@@ -49,4 +52,88 @@ def test_generatemask():
     skymask = skysub.generate_mask("IFU", regs, slits, slits.left_init, slits.right_init)
     assert(np.array_equal(skymask, tstmsk))
 
-test_userregions()
\ No newline at end of file
+test_userregions()
+
+def _fake_echelle(norders=3, nspec=200, nspat=300, width=60.):
+    """ Build a fake echelle frame with two objects in each order
+    """
+    rng = np.random.default_rng(49)
+    spec = np.arange(nspec, dtype=float)
+    spat = np.arange(nspat, dtype=float)
+    left = np.array([20. + 100.*i + 0.03*spec for i in range(norders)]).T
+    right = left + width
+    slitmask = np.full((nspec, nspat), -1, dtype=int)
+    tilts = np.outer(spec/(nspec-1), np.ones(nspat))
+    waveimg = np.zeros((nspec, nspat))
+    sky = np.zeros((nspec, nspat))
+    obj = np.zeros((nspec, nspat))
+    sobjs = specobjs.SpecObjs()
+    order_vec = 30 - np.arange(norders)
+    # Both objects are bright in the first two orders and faint in the last one,
+    # such that the last order uses the FWHM measured in the others
+    amps = np.array([[400., 30.], [150., 20.], [3., 1.]])
+    for iord in range(norders):
+        inorder = (spat[None,:] > left[:,iord,None]) & (spat[None,:] < right[:,iord,None])
+        slitmask[inorder] = iord
+        waveimg[inorder] = np.outer(5000. + 300.*iord + 0.2*spec, np.ones(nspat))[inorder]
+        skyspec = 50. + np.sum([3000.*np.exp(-0.5*((spec-c)/1.5)**2)
+                                for c in rng.uniform(10, nspec-10, 5)], axis=0)
+        sky[inorder] = np.outer(skyspec, np.ones(nspat))[inorder]
+        for iobj, frac in enumerate([0.35, 0.7]):
+            trace = left[:,iord] + frac*width
+            obj += amps[iord,iobj]*np.exp(-0.5*((spat[None,:]-trace[:,None])/2.)**2)*inorder
+            thisobj = specobj.SpecObj('Echelle', 1, ECH_ORDER=order_vec[iord], ECH_ORDERINDX=iord)
+            thisobj.TRACE_SPAT = trace
+            thisobj.trace_spec = spec
+            thisobj.SPAT_PIXPOS = trace[nspec//2]
+            thisobj.FWHM = 2.355*2.
+            thisobj.maskwidth = 4.*thisobj.FWHM
+            thisobj.ECH_OBJID = iobj + 1
+            thisobj.ECH_FRACPOS = frac
+            thisobj.OBJID = iobj + 1
+            thisobj.ech_snr = amps[iord,iobj]/2
+            sobjs.add_sobj(thisobj)
+    var = sky + obj + 9.
+    sciimg = sky + obj + rng.normal(size=sky.shape)*np.sqrt(var)
+    sciivar = (slitmask >= 0)/var
+    return sciimg, sciivar, np.zeros(sciimg.shape, dtype=np.int32), tilts, waveimg, sky, \
+                np.full(sciimg.shape, 9.), left, right, slitmask, sobjs, order_vec
+
+
+class _CountingExecutor(futures.ProcessPoolExecutor):
+    """Process pool that counts the submitted jobs."""
+    nsubmit = 0
+
+    def submit(self, *args, **kwargs):
+        _CountingExecutor.nsubmit += 1
+        return super().submit(*args, **kwargs)
+
+
+def test_ech_local_skysub_extract(monkeypatch):
+    args = _fake_echelle()
+    sciimg, slitmask, sobjs = args[0], args[9], args[10]
+    # The serial extraction uses the full detector images
+    ncutout = []
+    order_cutout = skysub._order_cutout
+    monkeypatch.setattr(skysub, '_order_cutout',
+                        lambda *a: ncutout.append(1) or order_cutout(*a))
+    skymodel, objmodel, ivarmodel, outmask, _sobjs \
+            = skysub.ech_local_skysub_extract(*args, box_rad_order=np.full(3, 5.))
+    assert len(ncutout) == 0, 'Serial extraction should not use cutouts'
+    # The model should describe the data
+    chi = ((sciimg - skymodel - objmodel)*np.sqrt(ivarmodel))[(slitmask >= 0) & (outmask == 0)]
+    assert np.absolute(np.std(chi) - 1) < 0.1, 'Bad sky and object model'
+    # The traces should be in detector coordinates
+    assert np.all(np.absolute(_sobjs.TRACE_SPAT - sobjs.TRACE_SPAT) < 1.), 'Bad traces'
+    # The first two orders are extracted in parallel on cutouts
+    monkeypatch.setattr(futures, 'ProcessPoolExecutor', _CountingExecutor)
+    _skymodel, _objmodel, _ivarmodel, _outmask, __sobjs \
+            = skysub.ech_local_skysub_extract(*args, box_rad_order=np.full(3, 5.), nproc=2)
+    assert _CountingExecutor.nsubmit == 2, 'The first two orders should be extracted in parallel'
+    assert len(ncutout) == 2, 'Parallel extraction should use cutouts'
+    chi = ((sciimg - _skymodel - _objmodel)*np.sqrt(_ivarmodel))[(slitmask >= 0) & (_outmask == 0)]
+    assert np.absolute(np.std(chi) - 1) < 0.1, 'Bad sky and object model'
+    assert np.all(np.absolute(__sobjs.TRACE_SPAT - sobjs.TRACE_SPAT) < 1.), 'Bad traces'
+    assert np.allclose(np.sum(_sobjs.OPT_COUNTS, axis=1), np.sum(__sobjs.OPT_COUNTS, axis=1),
+                       rtol=0.05), \
+            'Extractions should not depend much on the number of processes'
@@ -19,6 +19,7 @@ from pypeit.tests import test_wavetilts
 from pypeit import wavetilts
 from pypeit import slittrace
 from pypeit import pypmsgs
+from pypeit import io
 
 def data_path(filename):
     data_dir = os.path.join(os.path.dirname(__file__), 'files')
@@ -179,3 +180,73 @@ def test_all2dobj_update_image(init_dict):
     assert np.array_equal(allspec2D_2[1].sciimg, spec2DObj1.sciimg)
 
     os.remove(ofile)
+
+
+def test_all2dobj_select_det(init_dict):
+    # Build two
+    spec2DObj1 = spec2dobj.Spec2DObj(**init_dict)
+    spec2DObj2 = spec2dobj.Spec2DObj(**init_dict)
+    spec2DObj2.det = 2
+    spec2DObj2.sciimg = spec2DObj2.sciimg.copy()*2.
+    #
+    allspec2D = spec2dobj.AllSpec2DObj()
+    allspec2D['meta']['ir_redux'] = False
+    allspec2D[1] = spec2DObj1
+    allspec2D[2] = spec2DObj2
+
+    # Write
+    ofile = data_path('tst_allspec2d.fits')
+    if os.path.isfile(ofile):
+        os.remove(ofile)
+    allspec2D.write_to_fits(ofile)
+
+    # Read only one detector, deferring the image reads
+    _allspec2D = spec2dobj.AllSpec2DObj.from_fits(ofile, dets=[2], lazy=True)
+    assert _allspec2D.detectors == [2], 'Should only read detector 2'
+    assert 'sciimg' in _allspec2D[2]._lazy, 'Image should not yet be read'
+    assert np.array_equal(_allspec2D[2].sciimg, spec2DObj2.sciimg), 'Bad lazy read'
+    assert _allspec2D[2].slits.nslits == spec2DObj2.slits.nslits, 'Bad slits'
+
+    # Detector not in the file
+    with pytest.raises(pypmsgs.PypeItError):
+        spec2dobj.AllSpec2DObj.from_fits(ofile, dets=[3])
+
+    del _allspec2D
+    os.remove(ofile)
+
+
+def test_all2dobj_background_write(init_dict):
+    spec2DObj = spec2dobj.Spec2DObj(**init_dict)
+    allspec2D = spec2dobj.AllSpec2DObj()
+    allspec2D['meta']['ir_redux'] = False
+    allspec2D[1] = spec2DObj
+
+    io.background_writer.set_limit(2)
+    try:
+        # Queue a few writes
+        ofiles = [data_path('tst_allspec2d_{0}.fits'.format(i)) for i in range(3)]
+        for ofile in ofiles:
+            allspec2D.write_to_fits(ofile)
+        # Altering the image does not affect the queued writes
+        sciimg = spec2DObj.sciimg.copy()
+        spec2DObj.sciimg *= 2.
+        # Reading waits for the file to be written
+        _allspec2D = spec2dobj.AllSpec2DObj.from_fits(ofiles[-1])
+        assert np.array_equal(_allspec2D[1].sciimg, sciimg), \
+                'Image should be written as it was when the write was queued'
+        io.background_writer.flush()
+        assert not io.background_writer.pending(ofiles[0]), 'All files should be written'
+        for ofile in ofiles:
+            assert os.path.isfile(ofile), 'File not written'
+            os.remove(ofile)
+
+        # Errors are raised in the main thread
+        def fail():
+            raise OSError('Disk full')
+        io.background_writer.submit(data_path('tst_fail.fits'), fail)
+        with pytest.raises(OSError):
+            io.background_writer.flush()
+        # ... only once
+        io.background_writer.flush()
+    finally:
+        io.background_writer.set_limit(0)
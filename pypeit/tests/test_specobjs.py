@@ -132,3 +132,38 @@ def test_io(sobj1, sobj2, sobj3, sobj4):
     assert _sobjs1.nobj == 3
     assert _sobjs1[2].BOX_WAVE.size == 2000
     os.remove(ofile)
+
+
+def test_select(sobj1, sobj2, sobj3, sobj4):
+    sobjs = specobjs.SpecObjs([sobj1,sobj2,sobj3,sobj4])
+    for sobj in sobjs:
+        sobj['BOX_WAVE'] = np.arange(100).astype(float)
+        sobj.SPAT_PIXPOS = 10.*sobj.SLITID
+        sobj.set_name()
+    # Write
+    header = fits.PrimaryHDU().header
+    ofile = data_path('tst_specobjs.fits')
+    if os.path.isfile(ofile):
+        os.remove(ofile)
+    sobjs.write_to_fits(header, ofile, overwrite=True)
+
+    # Index
+    index = specobjs.SpecObjs.index(ofile)
+    assert np.array_equal(index['HDU'], np.arange(4)+1), 'Bad extension numbers'
+    assert np.array_equal(index['NAME'], sobjs.NAME), 'Bad names'
+    assert np.array_equal(index['DET'], sobjs.DET), 'Bad detectors'
+
+    # Select by detector
+    _sobjs = specobjs.SpecObjs.from_fitsfile(ofile, det=1)
+    assert _sobjs.nobj == 2, 'Should read 2 objects'
+    assert np.all(_sobjs.DET == 1), 'Bad detector selection'
+
+    # Select by name
+    _sobjs = specobjs.SpecObjs.from_fitsfile(ofile, names=sobjs[2].NAME)
+    assert _sobjs.nobj == 1, 'Should read 1 object'
+    assert _sobjs[0].NAME == sobjs[2].NAME, 'Bad name selection'
+    assert np.array_equal(_sobjs[0].BOX_WAVE, sobjs[2].BOX_WAVE), 'Bad read'
+    _sobjs = specobjs.SpecObjs.from_fitsfile(ofile, names=[sobjs[2].NAME, 'junk'], det=2)
+    assert _sobjs.nobj == 0, 'Should not read any objects'
+
+    os.remove(ofile)
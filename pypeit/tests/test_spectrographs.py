@@ -2,6 +2,9 @@
 Module to test spectrograph read functions
 """
 import os
+import sys
+import importlib
+import subprocess
 
 import pytest
 import glob
@@ -9,6 +12,7 @@ import glob
 from pkg_resources import resource_filename
 
 from pypeit import spectrographs
+from pypeit.spectrographs.util import load_spectrograph
 from pypeit.core import procimg
 
 from pypeit.tests.tstutils import dev_suite_required
@@ -248,3 +252,27 @@ def test_vltxshooternir():
     assert bpm.shape == (2045, 1097)
 
 
+
+
+def test_registry():
+    # Importing the package should not import any of the spectrograph modules
+    proc = subprocess.run([sys.executable, '-c',
+                           'import sys; from pypeit import spectrographs; '
+                           'print(any([m.startswith("pypeit.spectrographs.") '
+                           'for m in sys.modules]))'], capture_output=True, text=True)
+    assert proc.stdout.strip() == 'False', 'Spectrograph modules imported with the package'
+
+    # The registry must match the spectrograph classes defined in all the modules
+    for module in spectrographs.spectrograph_modules:
+        importlib.import_module('pypeit.spectrographs.{0}'.format(module))
+    classes = dict([(c.name, c) for c in
+                    spectrographs.all_subclasses(spectrographs.spectrograph.Spectrograph)
+                    if c.name is not None])
+    assert sorted(classes.keys()) == sorted(spectrographs.available_spectrographs), \
+            'Spectrograph registry is out of date'
+    for name, (module, cls) in spectrographs.spectrograph_registry.items():
+        assert classes[name].__module__ == 'pypeit.spectrographs.{0}'.format(module)
+        assert classes[name].__name__ == cls
+        assert spectrographs.spectrograph_class(name) is classes[name]
+    assert spectrographs.spectrograph_class('not_a_spectrograph') is None
+    assert load_spectrograph('shane_kast_blue').name == 'shane_kast_blue'
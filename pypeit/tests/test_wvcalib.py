@@ -10,11 +10,19 @@ import inspect
 import pytest
 
 import numpy as np
+import scipy.signal
+
+from astropy.table import Table
 
 from pypeit.core.wavecal import wv_fitting
+from pypeit.core.wavecal import wvutils
+from pypeit.core.wavecal import waveio
+from pypeit.core.wavecal import patterns
+from pypeit.core.wavecal import autoid
 from pypeit.core import fitting
 from pypeit import wavecalib
 from pypeit import slittrace
+from pypeit.par import pypeitpar
 
 def data_path(filename):
     data_dir = os.path.join(os.path.dirname(__file__), 'files')
@@ -117,3 +125,96 @@ def test_wavecalib():
 
     # Finish
     os.remove(out_file)
+
+
+def test_xcorr_template():
+    "Cross-correlate against a cached archival spectrum"
+    wv_calib_arxiv, _ = waveio.load_reid_arxiv('keck_nires.fits')
+    arxiv = wv_calib_arxiv['0']['spec']
+    nspec = arxiv.size
+    spec = np.interp(np.arange(nspec) - 2.3, np.arange(nspec), arxiv)
+    template = wvutils.XcorrTemplate(arxiv)
+
+    # Same result as processing the archival spectrum
+    for i in range(2):
+        shift, cc = wvutils.xcorr_shift(spec, arxiv, template=template)
+        _shift, _cc = wvutils.xcorr_shift(spec, arxiv)
+        assert shift == _shift and cc == _cc, 'Cached template changed the result'
+    assert len(template._smooth) == 1, 'Processed template should be cached'
+
+    # FFT correlation of long spectra
+    rng = np.random.default_rng(46)
+    y1, y2 = rng.normal(size=(2,4096))
+    assert np.array_equal(wvutils._correlate(y1, y2, template=wvutils.XcorrTemplate(y2)),
+                          scipy.signal.correlate(y1, y2, mode='full')), 'Bad correlation'
+
+    # Cached line detections
+    lines = template.arc_lines(sigdetect=5., fwhm=4.)
+    assert template.arc_lines(sigdetect=5., fwhm=4.) is lines, 'Lines should be cached'
+    assert np.array_equal(lines[0], wvutils.arc_lines_from_spec(arxiv, sigdetect=5., fwhm=4.)[0])
+
+
+def test_shift_stretch():
+    "Compare the grid search for the shift and stretch to the optimizer"
+    wv_calib_arxiv, _ = waveio.load_reid_arxiv('keck_nires.fits')
+    arxiv = wv_calib_arxiv['1']['spec']
+    rng = np.random.default_rng(47)
+    spec = wvutils.shift_and_stretch(arxiv, -7.6, 1.01) + rng.normal(size=arxiv.size)
+
+    success, shift, stretch, cc, _, _ = wvutils.xcorr_shift_stretch(spec, arxiv)
+    _success, _shift, _stretch, _cc, _, _ \
+            = wvutils.xcorr_shift_stretch(spec, arxiv, seed=np.random.RandomState(1), method='de')
+
+    assert success == 1 and _success == 1, 'Search failed'
+    assert np.isclose(shift, -7.6, atol=0.05), 'Bad shift'
+    assert np.isclose(shift, _shift, atol=1e-3), 'Shifts should match'
+    # The correlation only changes when int(nspec*stretch) changes
+    assert int(arxiv.size*stretch) == int(arxiv.size*_stretch), 'Stretches should match'
+    assert cc >= _cc - 1e-6, 'Grid search should find the same maximum'
+
+    # The coarse-to-fine search finds the maximum of the full grid
+    y1 = wvutils.smooth_ceil_cont(spec, 1.0)
+    y2 = wvutils.smooth_ceil_cont(arxiv, 1.0)
+    bounds = ((-0.05*arxiv.size, 0.05*arxiv.size), (0.95, 1.05))
+    result = wvutils.grid_shift_stretch(y1, y2, *bounds)
+    _result = wvutils.grid_shift_stretch(y1, y2, *bounds, step=1, nbatch=7)
+    assert result[:3] == _result[:3], 'Coarse-to-fine search should match the full grid'
+    assert result[3] < _result[3], 'Coarse-to-fine search should evaluate fewer correlations'
+
+
+def test_brute_patterns():
+    "Select the patterns of small search windows from those of the largest"
+    tcent = np.sort(np.random.default_rng(48).uniform(10., 2000., 30))
+    wvdata = np.sort(3000. + 2.*tcent + np.random.default_rng(1).normal(scale=0.2, size=30))
+    binw = np.linspace(wvdata.min(), wvdata.max(), 300)
+    bind = np.linspace(-1.5, 2.0, 3000)
+    for generate_patterns in [patterns.triangles, patterns.quadrangles]:
+        dindex, lindex, wvcen, disps = generate_patterns(tcent, wvdata, 2048, 5, 5, 1.0)
+        for detsrch, lstsrch in [(3, 5), (4, 4), (5, 3)]:
+            _dindex, _lindex, _wvcen, _disps = generate_patterns(tcent, wvdata, 2048, detsrch,
+                                                                 lstsrch, 1.0)
+            gd = (dindex[:,-1] - dindex[:,0] < detsrch) & (lindex[:,-1] - lindex[:,0] < lstsrch)
+            _gd = _disps > 0
+            gd &= disps > 0
+            assert np.array_equal(dindex[gd], _dindex[_gd]), 'Bad detected-line patterns'
+            assert np.array_equal(lindex[gd], _lindex[_gd]), 'Bad line-list patterns'
+            assert np.array_equal(wvcen[gd], _wvcen[_gd]), 'Bad central wavelengths'
+        # The histogram must match numpy
+        wvcen = np.append(wvcen.astype(float), [binw[0], binw[-1], 0.])
+        logdisp = np.log10(np.append(disps.astype(float), [2., 10**bind[-1], 1.]))
+        hist, _, _ = np.histogram2d(wvcen, logdisp, bins=[binw, bind])
+        assert np.array_equal(patterns.histogram_patterns(wvcen, logdisp, binw, bind), hist), \
+                'Bad histogram'
+
+
+def test_holygrail():
+    "Run the brute-force pattern matching on an archived arc"
+    arxiv = Table.read(os.path.join(waveio.reid_arxiv_path, 'shane_kast_blue_600.fits'))
+    flux = arxiv['flux'].data.astype(float)
+    par = pypeitpar.WavelengthSolutionPar()
+    par['lamps'] = ['CdI','HgI','HeI']
+    arcfitter = autoid.HolyGrail(flux[:,None], par=par, nonlinear_counts=1e10)
+    patt_dict, final_fit = arcfitter.get_results()
+    assert final_fit['0']['rms'] < par['rms_threshold'], 'Bad solution'
+    assert np.all(np.absolute(final_fit['0'].pypeitfit.eval(final_fit['0']['pixel_fit']
+                        / final_fit['0']['xnorm']) - final_fit['0']['wave_fit']) < 1.), 'Bad IDs'
@@ -7,7 +7,6 @@ traces using principle-component analysis.
 
 """
 import warnings
-from IPython import embed
 
 import numpy as np
 
@@ -250,7 +249,7 @@ class TracePCA(DataContainer):
         return d
 
     @classmethod
-    def _parse(cls, hdu, hdu_prefix=None):
+    def _parse(cls, hdu, hdu_prefix=None, lazy=False):
         """
         Parse the data from the provided HDU.
 
@@ -259,7 +258,7 @@ class TracePCA(DataContainer):
         """
         # Run the default parser to get most of the data
         d, version_passed, type_passed, parsed_hdus \
-                = super(TracePCA, cls)._parse(hdu, hdu_prefix=hdu_prefix)
+                = super(TracePCA, cls)._parse(hdu, hdu_prefix=hdu_prefix, lazy=lazy)
 
         # This should only ever read one hdu!
         if len(parsed_hdus) > 1:
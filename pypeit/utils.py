@@ -13,20 +13,14 @@ import itertools
 from collections import deque
 from bisect import insort, bisect_left
 
-from IPython import embed
-
 import numpy as np
 from numpy.lib.stride_tricks import as_strided
 
 from scipy import interpolate, ndimage
 
-import matplotlib
-from matplotlib import pyplot as plt
-
 from astropy import units
 from astropy import stats
 
-from pypeit.core import pydl
 from pypeit import msgs
 
 def embed_header():
@@ -418,6 +412,7 @@ def pyplot_rcparams():
     Returns:
 
     """
+    from matplotlib import pyplot as plt
     # set some plotting parameters
     plt.rcParams["xtick.top"] = True
     plt.rcParams["ytick.right"] = True
@@ -450,6 +445,7 @@ def pyplot_rcparams_default():
     Returns:
 
     """
+    import matplotlib
     matplotlib.rcParams.update(matplotlib.rcParamsDefault)
 
 
@@ -999,6 +995,9 @@ def robust_optimize(ydata, fitfunc, arg_dict, maxiter=10, inmask=None, invvar=No
               indicates bad values.
 
     """
+    # Avoid a circular import and only import pydl when it is needed
+    from pypeit.core import pydl
+
     # Setup the initial mask
     if inmask is None:
         inmask = np.ones(ydata.size, dtype=bool)
@@ -12,8 +12,6 @@ import numpy as np
 
 from matplotlib import pyplot as plt
 
-from linetools import utils as ltu
-
 from astropy.table import Table
 
 from pypeit import msgs
@@ -23,8 +21,6 @@ from pypeit.core.wavecal import autoid, waveio, wv_fitting
 from pypeit.core.gui.identify import Identify
 from pypeit import datamodel
 
-from IPython import embed
-
 class WaveCalib(datamodel.DataContainer):
     """
     DataContainer for the output from BuildWaveCalib
@@ -116,7 +112,7 @@ class WaveCalib(datamodel.DataContainer):
 
     @classmethod
     def _parse(cls, hdu, ext=None, transpose_table_arrays=False, debug=False,
-               hdu_prefix=None):
+               hdu_prefix=None, lazy=False):
         """
         See datamodel.DataContainer for docs
 
@@ -126,12 +122,13 @@ class WaveCalib(datamodel.DataContainer):
             transpose_table_arrays:
             debug:
             hdu_prefix:
+            lazy:
 
         Returns:
 
         """
         # Grab everything but the bspline's
-        _d, dm_version_passed, dm_type_passed, parsed_hdus = super(WaveCalib, cls)._parse(hdu)
+        _d, dm_version_passed, dm_type_passed, parsed_hdus = super(WaveCalib, cls)._parse(hdu, lazy=lazy)
         # Now the wave_fits
         list_of_wave_fits = []
         spat_ids = []
@@ -240,8 +237,10 @@ class WaveCalib(datamodel.DataContainer):
             if self.par['echelle']:
                 # # TODO: Put this in `SlitTraceSet`?
                 # evaluate solution --
-                image[thismask] = self.wv_fit2d.eval(
-                    tilts[thismask] + spec_flex[islit], x2=np.full_like(tilts[thismask], slits.ech_order[islit]))
+                # The order is the same for all pixels, so the fit is
+                # collapsed along the order dimension before evaluating it
+                image[thismask] = self.wv_fit2d.eval(tilts[thismask] + spec_flex[islit],
+                                                     x2=float(slits.ech_order[islit]))
                 image[thismask] /= slits.ech_order[islit]
             else:
                 iwv_fits = self.wv_fits[islit]
@@ -437,6 +436,7 @@ class BuildWaveCalib:
             final_fit = {}
             # Manually identify lines
             msgs.info("Initializing the wavelength calibration tool")
+            from IPython import embed
             embed(header='line 222 wavecalib.py')
             for slit_idx in ok_mask_idx:
                 arcfitter = Identify.initialise(arccen, self.slits, slit=slit_idx, par=self.par)
@@ -659,6 +659,7 @@ class BuildWaveCalib:
                     self.slits.mask[wv_masked], 'BADWVCALIB')
 
         # Pack up
+        from linetools import utils as ltu
         sv_par = self.par.data.copy()
         j_par = ltu.jsonify(sv_par)
         self.wv_calib['strpar'] = json.dumps(j_par)#, sort_keys=True, indent=4, separators=(',', ': '))
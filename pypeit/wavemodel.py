@@ -21,8 +21,6 @@ from pypeit import utils
 from pypeit.core.wave import airtovac
 from pypeit import io
 
-from IPython import embed
-
 def blackbody(wavelength, T_BB=250., debug=False):
     """ Given wavelength [in microns] and Temperature in Kelvin
     it returns the black body emission.
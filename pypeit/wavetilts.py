@@ -19,8 +19,6 @@ from pypeit.display import display
 from pypeit.core import arc
 from pypeit.core import tracewave
 
-from IPython import embed
-
 
 class WaveTilts(datamodel.DataContainer):
     """